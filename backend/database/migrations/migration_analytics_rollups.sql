@@ -0,0 +1,278 @@
+-- Migration: Pre-aggregated analytics rollups for the metrics dashboards
+-- Purpose: Let /metrics/dashboard, /metrics/daily and /metrics/top-questions read
+-- O(days) rollup rows instead of scanning every conversation and message of a twin.
+--
+-- Counters are attributed to the UTC day the conversation was created, which is
+-- how the dashboard windows were computed from the base tables.
+--
+-- twin_question_rollups is a Space-Saving heavy-hitters sketch: each twin keeps at
+-- most p_question_capacity questions. A new question arriving at a full sketch
+-- replaces the least frequent entry and inherits its count (stored in
+-- overestimate), so counts are exact while a twin has fewer distinct questions
+-- than the capacity and an upper bound afterwards.
+--
+-- Increments and backfills for one twin are serialized with a transaction
+-- advisory lock. A message logged while its twin is being backfilled can be
+-- counted twice; rerunning the backfill corrects it.
+
+CREATE TABLE IF NOT EXISTS twin_daily_rollups (
+  twin_id UUID NOT NULL REFERENCES twins(id) ON DELETE CASCADE,
+  day DATE NOT NULL,
+  conversations INTEGER NOT NULL DEFAULT 0,
+  messages INTEGER NOT NULL DEFAULT 0,
+  user_messages INTEGER NOT NULL DEFAULT 0,
+  assistant_messages INTEGER NOT NULL DEFAULT 0,
+  confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  confidence_count INTEGER NOT NULL DEFAULT 0,
+  escalations INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (twin_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS twin_question_rollups (
+  twin_id UUID NOT NULL REFERENCES twins(id) ON DELETE CASCADE,
+  question_key TEXT NOT NULL,
+  display TEXT NOT NULL,
+  count INTEGER NOT NULL DEFAULT 0,
+  overestimate INTEGER NOT NULL DEFAULT 0,
+  confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  confidence_count INTEGER NOT NULL DEFAULT 0,
+  last_seen_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (twin_id, question_key)
+);
+
+-- One row per twin once its rollups have been rebuilt from the base tables.
+CREATE TABLE IF NOT EXISTS twin_rollup_state (
+  twin_id UUID PRIMARY KEY REFERENCES twins(id) ON DELETE CASCADE,
+  backfilled_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_twin_question_rollups_twin_count
+  ON twin_question_rollups(twin_id, count DESC);
+
+ALTER TABLE twin_daily_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE twin_question_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE twin_rollup_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Tenant Isolation: View Twin Daily Rollups" ON twin_daily_rollups;
+DROP POLICY IF EXISTS "Tenant Isolation: View Twin Question Rollups" ON twin_question_rollups;
+
+CREATE POLICY "Tenant Isolation: View Twin Daily Rollups" ON twin_daily_rollups
+FOR SELECT
+USING (
+  EXISTS (
+    SELECT 1 FROM twins
+    WHERE twins.id = twin_daily_rollups.twin_id
+      AND twins.tenant_id = (auth.jwt() ->> 'tenant_id')::uuid
+  )
+);
+
+CREATE POLICY "Tenant Isolation: View Twin Question Rollups" ON twin_question_rollups
+FOR SELECT
+USING (
+  EXISTS (
+    SELECT 1 FROM twins
+    WHERE twins.id = twin_question_rollups.twin_id
+      AND twins.tenant_id = (auth.jwt() ->> 'tenant_id')::uuid
+  )
+);
+
+
+CREATE OR REPLACE FUNCTION increment_twin_rollups_system(
+  t_id UUID,
+  p_day DATE,
+  p_conversations INTEGER DEFAULT 0,
+  p_messages INTEGER DEFAULT 0,
+  p_user_messages INTEGER DEFAULT 0,
+  p_assistant_messages INTEGER DEFAULT 0,
+  p_confidence_sum DOUBLE PRECISION DEFAULT 0,
+  p_confidence_count INTEGER DEFAULT 0,
+  p_escalations INTEGER DEFAULT 0,
+  p_question_key TEXT DEFAULT NULL,
+  p_question_display TEXT DEFAULT NULL,
+  p_question_confidence DOUBLE PRECISION DEFAULT NULL,
+  p_question_capacity INTEGER DEFAULT 500
+)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+DECLARE
+  v_size INTEGER;
+  v_conf_sum DOUBLE PRECISION := CASE WHEN COALESCE(p_question_confidence, 0) <> 0 THEN p_question_confidence ELSE 0 END;
+  v_conf_count INTEGER := CASE WHEN COALESCE(p_question_confidence, 0) <> 0 THEN 1 ELSE 0 END;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('twin_rollups:' || t_id::text));
+
+  INSERT INTO public.twin_daily_rollups AS r (
+    twin_id, day, conversations, messages, user_messages, assistant_messages,
+    confidence_sum, confidence_count, escalations
+  )
+  VALUES (
+    t_id, p_day, p_conversations, p_messages, p_user_messages, p_assistant_messages,
+    p_confidence_sum, p_confidence_count, p_escalations
+  )
+  ON CONFLICT (twin_id, day) DO UPDATE
+  SET conversations = r.conversations + EXCLUDED.conversations,
+      messages = r.messages + EXCLUDED.messages,
+      user_messages = r.user_messages + EXCLUDED.user_messages,
+      assistant_messages = r.assistant_messages + EXCLUDED.assistant_messages,
+      confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum,
+      confidence_count = r.confidence_count + EXCLUDED.confidence_count,
+      escalations = r.escalations + EXCLUDED.escalations,
+      updated_at = NOW();
+
+  IF COALESCE(p_question_key, '') = '' THEN
+    RETURN;
+  END IF;
+
+  UPDATE public.twin_question_rollups
+  SET count = count + 1,
+      confidence_sum = confidence_sum + v_conf_sum,
+      confidence_count = confidence_count + v_conf_count,
+      last_seen_at = NOW()
+  WHERE twin_id = t_id AND question_key = p_question_key;
+  IF FOUND THEN
+    RETURN;
+  END IF;
+
+  SELECT COUNT(*) INTO v_size FROM public.twin_question_rollups WHERE twin_id = t_id;
+  IF v_size < GREATEST(p_question_capacity, 1) THEN
+    INSERT INTO public.twin_question_rollups (
+      twin_id, question_key, display, count, confidence_sum, confidence_count
+    )
+    VALUES (t_id, p_question_key, p_question_display, 1, v_conf_sum, v_conf_count);
+    RETURN;
+  END IF;
+
+  -- Sketch is full: the newcomer takes over the least frequent entry.
+  UPDATE public.twin_question_rollups q
+  SET question_key = p_question_key,
+      display = p_question_display,
+      overestimate = q.count,
+      count = q.count + 1,
+      confidence_sum = v_conf_sum,
+      confidence_count = v_conf_count,
+      last_seen_at = NOW()
+  WHERE q.twin_id = t_id
+    AND q.question_key = (
+      SELECT question_key FROM public.twin_question_rollups
+      WHERE twin_id = t_id
+      ORDER BY count ASC, last_seen_at ASC
+      LIMIT 1
+    );
+END;
+$$;
+
+
+CREATE OR REPLACE FUNCTION backfill_twin_rollups_system(
+  t_id UUID,
+  p_question_capacity INTEGER DEFAULT 500
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+DECLARE
+  v_days INTEGER;
+  v_questions INTEGER;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('twin_rollups:' || t_id::text));
+
+  DELETE FROM public.twin_daily_rollups WHERE twin_id = t_id;
+  DELETE FROM public.twin_question_rollups WHERE twin_id = t_id;
+
+  WITH convs AS (
+    SELECT c.id, (c.created_at AT TIME ZONE 'UTC')::date AS day
+    FROM public.conversations c
+    WHERE c.twin_id = t_id
+  ),
+  conv_days AS (
+    SELECT day, COUNT(*) AS conversations FROM convs GROUP BY day
+  ),
+  msg_days AS (
+    SELECT
+      cv.day,
+      COUNT(m.id) AS messages,
+      COUNT(m.id) FILTER (WHERE m.role = 'user') AS user_messages,
+      COUNT(m.id) FILTER (WHERE m.role = 'assistant') AS assistant_messages,
+      COALESCE(SUM(m.confidence_score) FILTER (
+        WHERE m.role = 'assistant' AND COALESCE(m.confidence_score, 0) <> 0
+      ), 0) AS confidence_sum,
+      COUNT(m.id) FILTER (
+        WHERE m.role = 'assistant' AND COALESCE(m.confidence_score, 0) <> 0
+      ) AS confidence_count
+    FROM convs cv
+    JOIN public.messages m ON m.conversation_id = cv.id
+    GROUP BY cv.day
+  ),
+  esc_days AS (
+    SELECT cv.day, COUNT(e.id) AS escalations
+    FROM convs cv
+    JOIN public.messages m ON m.conversation_id = cv.id
+    JOIN public.escalations e ON e.message_id = m.id
+    GROUP BY cv.day
+  )
+  INSERT INTO public.twin_daily_rollups (
+    twin_id, day, conversations, messages, user_messages, assistant_messages,
+    confidence_sum, confidence_count, escalations
+  )
+  SELECT
+    t_id, cd.day, cd.conversations,
+    COALESCE(md.messages, 0), COALESCE(md.user_messages, 0), COALESCE(md.assistant_messages, 0),
+    COALESCE(md.confidence_sum, 0), COALESCE(md.confidence_count, 0), COALESCE(ed.escalations, 0)
+  FROM conv_days cd
+  LEFT JOIN msg_days md ON md.day = cd.day
+  LEFT JOIN esc_days ed ON ed.day = cd.day;
+  GET DIAGNOSTICS v_days = ROW_COUNT;
+
+  WITH questions AS (
+    SELECT
+      left(lower(btrim(m.content)), 100) AS question_key,
+      btrim(m.content) AS content,
+      m.confidence_score,
+      m.created_at
+    FROM public.conversations c
+    JOIN public.messages m ON m.conversation_id = c.id
+    WHERE c.twin_id = t_id
+      AND m.role = 'user'
+      AND btrim(COALESCE(m.content, '')) <> ''
+  ),
+  grouped AS (
+    SELECT
+      question_key,
+      (array_agg(content ORDER BY created_at))[1] AS content,
+      COUNT(*) AS count,
+      COALESCE(SUM(confidence_score) FILTER (WHERE COALESCE(confidence_score, 0) <> 0), 0) AS confidence_sum,
+      COUNT(*) FILTER (WHERE COALESCE(confidence_score, 0) <> 0) AS confidence_count,
+      MAX(created_at) AS last_seen_at
+    FROM questions
+    GROUP BY question_key
+    ORDER BY COUNT(*) DESC, MAX(created_at) DESC
+    LIMIT GREATEST(p_question_capacity, 1)
+  )
+  INSERT INTO public.twin_question_rollups (
+    twin_id, question_key, display, count, confidence_sum, confidence_count, last_seen_at
+  )
+  SELECT
+    t_id,
+    question_key,
+    CASE WHEN length(content) > 100 THEN left(content, 100) || '...' ELSE content END,
+    count, confidence_sum, confidence_count, last_seen_at
+  FROM grouped;
+  GET DIAGNOSTICS v_questions = ROW_COUNT;
+
+  INSERT INTO public.twin_rollup_state (twin_id, backfilled_at)
+  VALUES (t_id, NOW())
+  ON CONFLICT (twin_id) DO UPDATE SET backfilled_at = NOW();
+
+  RETURN jsonb_build_object('days', v_days, 'questions', v_questions);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION increment_twin_rollups_system(UUID, DATE, INTEGER, INTEGER, INTEGER, INTEGER, DOUBLE PRECISION, INTEGER, INTEGER, TEXT, TEXT, DOUBLE PRECISION, INTEGER) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION increment_twin_rollups_system(UUID, DATE, INTEGER, INTEGER, INTEGER, INTEGER, DOUBLE PRECISION, INTEGER, INTEGER, TEXT, TEXT, DOUBLE PRECISION, INTEGER) TO service_role;
+REVOKE EXECUTE ON FUNCTION backfill_twin_rollups_system(UUID, INTEGER) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION backfill_twin_rollups_system(UUID, INTEGER) TO service_role;
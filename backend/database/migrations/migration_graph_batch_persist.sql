@@ -0,0 +1,79 @@
+-- Migration: Bulk graph persistence for the Scribe engine
+-- Purpose: Write every node and edge from one extraction batch in a single RPC
+-- instead of one create_node_system/create_edge_system round trip per item.
+--
+-- Nodes are deduplicated by case-insensitive name and upserted with the same
+-- ON CONFLICT semantics as create_node_system. Edges are resolved against the
+-- batch's node names inside the database, deduplicated by (from, to, type), and
+-- skipped when the same relationship already exists for the twin.
+
+CREATE OR REPLACE FUNCTION persist_graph_batch_system(
+  t_id UUID,
+  p_nodes JSONB,
+  p_edges JSONB
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+DECLARE
+  v_nodes JSONB;
+  v_edges JSONB;
+BEGIN
+  WITH input_nodes AS (
+    SELECT DISTINCT ON (lower(btrim(n->>'name')))
+      btrim(n->>'name') AS name,
+      n->>'type' AS type,
+      n->>'description' AS description,
+      COALESCE(n->'properties', '{}'::jsonb) AS properties
+    FROM jsonb_array_elements(COALESCE(p_nodes, '[]'::jsonb)) WITH ORDINALITY AS x(n, ord)
+    WHERE COALESCE(btrim(n->>'name'), '') <> ''
+    ORDER BY lower(btrim(n->>'name')), ord
+  ),
+  upserted AS (
+    INSERT INTO public.nodes (twin_id, name, type, description, properties)
+    SELECT t_id, name, type, description, properties FROM input_nodes
+    ON CONFLICT (twin_id, name, type) DO UPDATE
+    SET description = EXCLUDED.description,
+        properties = public.nodes.properties || EXCLUDED.properties
+    RETURNING *
+  )
+  SELECT COALESCE(jsonb_agg(to_jsonb(u)), '[]'::jsonb) INTO v_nodes FROM upserted u;
+
+  WITH node_ids AS (
+    SELECT lower(btrim(n->>'name')) AS name_key, (n->>'id')::uuid AS id
+    FROM jsonb_array_elements(v_nodes) AS n
+  ),
+  input_edges AS (
+    SELECT DISTINCT ON (f.id, t.id, e->>'type')
+      f.id AS from_id,
+      t.id AS to_id,
+      e->>'type' AS type,
+      e->>'description' AS description
+    FROM jsonb_array_elements(COALESCE(p_edges, '[]'::jsonb)) WITH ORDINALITY AS x(e, ord)
+    JOIN node_ids f ON f.name_key = lower(btrim(e->>'from_node'))
+    JOIN node_ids t ON t.name_key = lower(btrim(e->>'to_node'))
+    ORDER BY f.id, t.id, e->>'type', ord
+  ),
+  inserted AS (
+    INSERT INTO public.edges (twin_id, from_node_id, to_node_id, type, description, properties)
+    SELECT t_id, ie.from_id, ie.to_id, ie.type, ie.description, '{}'::jsonb
+    FROM input_edges ie
+    WHERE NOT EXISTS (
+      SELECT 1 FROM public.edges ex
+      WHERE ex.twin_id = t_id
+        AND ex.from_node_id = ie.from_id
+        AND ex.to_node_id = ie.to_id
+        AND ex.type = ie.type
+    )
+    RETURNING *
+  )
+  SELECT COALESCE(jsonb_agg(to_jsonb(i)), '[]'::jsonb) INTO v_edges FROM inserted i;
+
+  RETURN jsonb_build_object('nodes', v_nodes, 'edges', v_edges);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION persist_graph_batch_system(UUID, JSONB, JSONB) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION persist_graph_batch_system(UUID, JSONB, JSONB) TO service_role, authenticated;
@@ -0,0 +1,145 @@
+-- Migration: Semantic question clusters for top-questions analytics
+-- Purpose: Group paraphrased user questions ("how do you price?" / "what's your
+-- pricing?") into one entry per twin so /metrics/top-questions is a single
+-- ordered read and frequent unanswered clusters can be suggested as verified QnA.
+--
+-- Each user question is embedded once when it is logged and assigned online to
+-- the nearest cluster centroid (modules/question_clusters.py). centroid is the
+-- running mean of the member embeddings, stored as a JSON array like
+-- verified_qna.question_embedding. bump_question_cluster_system folds the new
+-- member's unit vector into the stored centroid and count under a row lock, so
+-- concurrent web instances never overwrite each other's updates. It returns
+-- NULL when the cluster no longer exists (e.g. after a rebuild replaced it).
+--
+-- confidence_sum / confidence_count accumulate the confidence of the assistant
+-- answers given to the cluster's questions.
+
+CREATE TABLE IF NOT EXISTS twin_question_clusters (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  twin_id UUID NOT NULL REFERENCES twins(id) ON DELETE CASCADE,
+  representative TEXT NOT NULL,
+  centroid TEXT NOT NULL,
+  count INTEGER NOT NULL DEFAULT 1,
+  confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  confidence_count INTEGER NOT NULL DEFAULT 0,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  last_seen_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- One row per twin once its clusters have been rebuilt from historical messages.
+CREATE TABLE IF NOT EXISTS twin_question_cluster_state (
+  twin_id UUID PRIMARY KEY REFERENCES twins(id) ON DELETE CASCADE,
+  questions INTEGER NOT NULL DEFAULT 0,
+  backfilled_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_twin_question_clusters_twin_count
+  ON twin_question_clusters(twin_id, count DESC);
+
+ALTER TABLE twin_question_clusters ENABLE ROW LEVEL SECURITY;
+ALTER TABLE twin_question_cluster_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Tenant Isolation: View Twin Question Clusters" ON twin_question_clusters;
+
+CREATE POLICY "Tenant Isolation: View Twin Question Clusters" ON twin_question_clusters
+FOR SELECT
+USING (
+  EXISTS (
+    SELECT 1 FROM twins
+    WHERE twins.id = twin_question_clusters.twin_id
+      AND twins.tenant_id = (auth.jwt() ->> 'tenant_id')::uuid
+  )
+);
+
+
+DROP FUNCTION IF EXISTS bump_question_cluster_system(UUID, TEXT, INTEGER, DOUBLE PRECISION);
+
+CREATE OR REPLACE FUNCTION bump_question_cluster_system(
+  p_cluster_id UUID,
+  p_vector TEXT DEFAULT NULL,
+  p_count_delta INTEGER DEFAULT 1,
+  p_confidence DOUBLE PRECISION DEFAULT NULL
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+DECLARE
+  v_count INTEGER;
+  v_centroid TEXT;
+BEGIN
+  SELECT count, centroid INTO v_count, v_centroid
+  FROM public.twin_question_clusters
+  WHERE id = p_cluster_id
+  FOR UPDATE;
+
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  -- Running mean: (centroid * count + vector) / (count + 1), element by element.
+  IF p_vector IS NOT NULL AND p_count_delta > 0 THEN
+    SELECT json_agg((c.value::DOUBLE PRECISION * v_count + v.value::DOUBLE PRECISION) / (v_count + 1) ORDER BY ord)::TEXT
+    INTO v_centroid
+    FROM jsonb_array_elements_text(v_centroid::jsonb) WITH ORDINALITY AS c(value, ord)
+    JOIN jsonb_array_elements_text(p_vector::jsonb) WITH ORDINALITY AS v(value, ord) USING (ord);
+  END IF;
+
+  UPDATE public.twin_question_clusters
+  SET count = count + p_count_delta,
+      centroid = v_centroid,
+      confidence_sum = confidence_sum + COALESCE(p_confidence, 0),
+      confidence_count = confidence_count + CASE WHEN COALESCE(p_confidence, 0) <> 0 THEN 1 ELSE 0 END,
+      last_seen_at = CASE WHEN p_count_delta > 0 THEN NOW() ELSE last_seen_at END
+  WHERE id = p_cluster_id
+  RETURNING count INTO v_count;
+  RETURN v_count;
+END;
+$$;
+
+
+-- Atomically swap a twin's clusters for a rebuilt set.
+-- p_clusters: [{"representative", "centroid", "count", "confidence_sum", "confidence_count"}]
+CREATE OR REPLACE FUNCTION replace_twin_question_clusters_system(
+  t_id UUID,
+  p_clusters JSONB,
+  p_questions INTEGER DEFAULT 0
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+DECLARE
+  v_clusters INTEGER;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('twin_question_clusters:' || t_id::text));
+
+  DELETE FROM public.twin_question_clusters WHERE twin_id = t_id;
+
+  INSERT INTO public.twin_question_clusters (
+    twin_id, representative, centroid, count, confidence_sum, confidence_count
+  )
+  SELECT
+    t_id,
+    c->>'representative',
+    c->>'centroid',
+    COALESCE((c->>'count')::INTEGER, 1),
+    COALESCE((c->>'confidence_sum')::DOUBLE PRECISION, 0),
+    COALESCE((c->>'confidence_count')::INTEGER, 0)
+  FROM jsonb_array_elements(COALESCE(p_clusters, '[]'::jsonb)) AS c;
+  GET DIAGNOSTICS v_clusters = ROW_COUNT;
+
+  INSERT INTO public.twin_question_cluster_state (twin_id, questions, backfilled_at)
+  VALUES (t_id, COALESCE(p_questions, 0), NOW())
+  ON CONFLICT (twin_id) DO UPDATE SET questions = EXCLUDED.questions, backfilled_at = NOW();
+
+  RETURN v_clusters;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION bump_question_cluster_system(UUID, TEXT, INTEGER, DOUBLE PRECISION) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION bump_question_cluster_system(UUID, TEXT, INTEGER, DOUBLE PRECISION) TO service_role;
+REVOKE EXECUTE ON FUNCTION replace_twin_question_clusters_system(UUID, JSONB, INTEGER) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION replace_twin_question_clusters_system(UUID, JSONB, INTEGER) TO service_role;
@@ -9,7 +9,8 @@ Refactored to support Strict Mode (extra="forbid") and explicit Property models.
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+import asyncio
 import logging
 import json
 import hashlib
@@ -19,9 +20,17 @@ from modules.clients import get_async_openai_client
 from modules.observability import supabase
 from modules.jobs import create_job, JobType, JobStatus, start_job, complete_job, fail_job, append_log, LogLevel
 from modules.job_queue import enqueue_job
+from modules.graph_index import bump_graph_version
 
 logger = logging.getLogger(__name__)
 
+# Bulk graph writes (persist_graph_batch_system RPC) and chunk extraction fan-out
+GRAPH_BATCH_PERSIST_ENABLED = os.getenv("GRAPH_BATCH_PERSIST_ENABLED", "true").lower() == "true"
+CONTENT_EXTRACTION_CONCURRENCY = max(1, int(os.getenv("CONTENT_EXTRACTION_CONCURRENCY", "4")))
+
+# None until the first bulk call; False once the RPC is known to be missing.
+_graph_batch_rpc_available: Optional[bool] = None
+
 # --- Structured Output Schema (Strict Mode) ---
 
 class Property(BaseModel):
@@ -161,25 +170,8 @@ async def process_interaction(
                 source_id=conversation_id
             )
         
-        # 2. Persist to Supabase
-        created_nodes = await _persist_nodes(twin_id, updates.nodes)
-        
-        # Create map for Edges
-        node_map = {n['name']: n['id'] for n in created_nodes}
-        
-        # Persist Edges
-        valid_edges = []
-        for edge in updates.edges:
-            from_id = node_map.get(edge.from_node)
-            to_id = node_map.get(edge.to_node)
-            
-            if from_id and to_id:
-                valid_edges.append(edge)
-            else:
-                # In strict mode, log partial edges
-                pass
-        
-        created_edges = await _persist_edges(twin_id, valid_edges, node_map)
+        # 2. Persist nodes and edges to Supabase in one batch
+        created_nodes, created_edges = await _persist_graph_updates(twin_id, updates.nodes, updates.edges)
         
         # 3. Update MemoryEvent with resolved IDs
         if memory_event:
@@ -352,22 +344,8 @@ Only extract information that is relevant to the current slot/question."""
                 source_id=conversation_id
             )
         
-        # Persist to Supabase
-        created_nodes = await _persist_nodes(twin_id, updates.nodes)
-        
-        # Create map for Edges
-        node_map = {n['name']: n['id'] for n in created_nodes}
-        
-        # Persist Edges
-        valid_edges = []
-        for edge in updates.edges:
-            from_id = node_map.get(edge.from_node)
-            to_id = node_map.get(edge.to_node)
-            
-            if from_id and to_id:
-                valid_edges.append(edge)
-        
-        created_edges = await _persist_edges(twin_id, valid_edges, node_map)
+        # Persist nodes and edges to Supabase in one batch
+        created_nodes, created_edges = await _persist_graph_updates(twin_id, updates.nodes, updates.edges)
         
         # Update MemoryEvent with resolved IDs
         if memory_event:
@@ -455,6 +433,130 @@ async def _persist_edges(twin_id: str, edges: List[EdgeUpdate], node_map: Dict[s
     return results
 
 
+def _graph_name_key(name: str) -> str:
+    """Name-based dedup key; matches lower(btrim(name)) in persist_graph_batch_system."""
+    return (name or "").strip().lower()
+
+
+def merge_graph_updates(batches: List[GraphUpdates]) -> Tuple[List[NodeUpdate], List[EdgeUpdate]]:
+    """
+    Merge extraction batches into one deduplicated set of nodes and edges.
+
+    Nodes are keyed by case-insensitive name: the first occurrence keeps its
+    name and type, the longest description wins, and properties are unioned
+    (first value per key wins). Edge endpoints are rewritten to the canonical
+    node names, edges with an unknown endpoint are dropped, and duplicate
+    (from, to, type) edges collapse to one.
+    """
+    nodes: Dict[str, NodeUpdate] = {}
+    for batch in batches:
+        for node in batch.nodes:
+            key = _graph_name_key(node.name)
+            if not key:
+                continue
+            existing = nodes.get(key)
+            if existing is None:
+                nodes[key] = node.model_copy(deep=True)
+                continue
+            if len(node.description or "") > len(existing.description or ""):
+                existing.description = node.description
+            known_props = {p.key for p in existing.properties}
+            for prop in node.properties:
+                if prop.key not in known_props:
+                    existing.properties.append(prop.model_copy())
+                    known_props.add(prop.key)
+
+    edges: Dict[Tuple[str, str, str], EdgeUpdate] = {}
+    for batch in batches:
+        for edge in batch.edges:
+            from_key = _graph_name_key(edge.from_node)
+            to_key = _graph_name_key(edge.to_node)
+            if from_key not in nodes or to_key not in nodes:
+                continue
+            edge_key = (from_key, to_key, (edge.type or "").strip().upper())
+            if edge_key in edges:
+                continue
+            edges[edge_key] = EdgeUpdate(
+                from_node=nodes[from_key].name,
+                to_node=nodes[to_key].name,
+                type=edge.type,
+                description=edge.description,
+            )
+
+    return list(nodes.values()), list(edges.values())
+
+
+def _is_missing_rpc_error(error: Exception) -> bool:
+    err = str(error).lower()
+    return "persist_graph_batch_system" in err and (
+        "does not exist" in err
+        or "could not find the function" in err
+        or "pgrst202" in err
+    )
+
+
+async def _persist_graph_updates(
+    twin_id: str,
+    nodes: List[NodeUpdate],
+    edges: List[EdgeUpdate],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Persist a batch of nodes and edges with a single persist_graph_batch_system RPC.
+
+    Falls back to per-item create_node_system/create_edge_system calls when bulk
+    writes are disabled or the RPC has not been migrated yet.
+    """
+    global _graph_batch_rpc_available
+
+    nodes, edges = merge_graph_updates([GraphUpdates(nodes=nodes, edges=edges, confidence=0.0)])
+    if not nodes:
+        return [], []
+
+    if GRAPH_BATCH_PERSIST_ENABLED and _graph_batch_rpc_available is not False:
+        try:
+            res = supabase.rpc("persist_graph_batch_system", {
+                "t_id": twin_id,
+                "p_nodes": [
+                    {
+                        "name": node.name,
+                        "type": node.type,
+                        "description": node.description,
+                        "properties": {p.key: p.value for p in node.properties},
+                    }
+                    for node in nodes
+                ],
+                "p_edges": [
+                    {
+                        "from_node": edge.from_node,
+                        "to_node": edge.to_node,
+                        "type": edge.type,
+                        "description": edge.description,
+                    }
+                    for edge in edges
+                ],
+            }).execute()
+            _graph_batch_rpc_available = True
+            bump_graph_version(twin_id)
+            data = res.data or {}
+            if isinstance(data, list):
+                data = data[0] if data else {}
+            return list(data.get("nodes") or []), list(data.get("edges") or [])
+        except Exception as e:
+            if not _is_missing_rpc_error(e):
+                logger.error(f"Bulk graph persist failed for twin {twin_id}: {e}")
+                return [], []
+            logger.warning("persist_graph_batch_system RPC missing; using per-item graph writes")
+            _graph_batch_rpc_available = False
+
+    created_nodes = await _persist_nodes(twin_id, nodes)
+    node_map = {n["name"]: n["id"] for n in created_nodes if n.get("name") and n.get("id")}
+    valid_edges = [edge for edge in edges if node_map.get(edge.from_node) and node_map.get(edge.to_node)]
+    created_edges = await _persist_edges(twin_id, valid_edges, node_map)
+    if created_nodes or created_edges:
+        bump_graph_version(twin_id)
+    return created_nodes, created_edges
+
+
 # --- Job Queue Integration (P0-D) ---
 
 def _generate_idempotency_key(conversation_id: str, user_message: str, assistant_message: str) -> str:
@@ -810,65 +912,55 @@ async def extract_from_content(
         
         logger.info(f"Extracting from content: {len(content_text)} chars -> {len(chunks)} chunks")
         
-        all_nodes = []
-        all_edges = []
-        node_map = {}
-        total_confidence = 0.0
+        # Extract chunks concurrently (bounded), then persist the merged graph once
+        semaphore = asyncio.Semaphore(CONTENT_EXTRACTION_CONCURRENCY)
         
-        for idx, chunk in enumerate(chunks):
-            try:
-                # Build content-focused extraction prompt
-                messages = [
-                    {"role": "system", "content": (
-                        "You are an expert Knowledge Graph Scribe extracting information from content. "
-                        "Your goal is to extract structured entities (Nodes) and relationships (Edges) "
-                        "from this text content. "
-                        "\n\nFocus on:"
-                        "\n- Named entities (people, companies, products, places)"
-                        "\n- Key concepts, ideas, and topics"
-                        "\n- Metrics, statistics, and numbers"
-                        "\n- Opinions, beliefs, and viewpoints"
-                        "\n- Relationships between entities"
-                        "\n\nDo NOT create generic nodes like 'Content' or 'Author'. "
-                        "Use Title Case for node names. Be selective - extract only meaningful entities."
-                    )},
-                    {"role": "user", "content": f"Extract entities and relationships from this content:\n\n{chunk}"}
-                ]
-                
-                # Call OpenAI with structured output
-                response = await client.beta.chat.completions.parse(
-                    model="gpt-4o-2024-08-06",
-                    messages=messages,
-                    response_format=GraphUpdates,
-                    temperature=0.0
-                )
-                
-                updates = response.choices[0].message.parsed
-                
-                if updates and updates.nodes:
-                    # Persist nodes and track for edge resolution
-                    created_nodes = await _persist_nodes(twin_id, updates.nodes)
+        async def _extract_chunk(idx: int, chunk: str) -> Optional[GraphUpdates]:
+            async with semaphore:
+                try:
+                    # Build content-focused extraction prompt
+                    messages = [
+                        {"role": "system", "content": (
+                            "You are an expert Knowledge Graph Scribe extracting information from content. "
+                            "Your goal is to extract structured entities (Nodes) and relationships (Edges) "
+                            "from this text content. "
+                            "\n\nFocus on:"
+                            "\n- Named entities (people, companies, products, places)"
+                            "\n- Key concepts, ideas, and topics"
+                            "\n- Metrics, statistics, and numbers"
+                            "\n- Opinions, beliefs, and viewpoints"
+                            "\n- Relationships between entities"
+                            "\n\nDo NOT create generic nodes like 'Content' or 'Author'. "
+                            "Use Title Case for node names. Be selective - extract only meaningful entities."
+                        )},
+                        {"role": "user", "content": f"Extract entities and relationships from this content:\n\n{chunk}"}
+                    ]
                     
-                    for node in created_nodes:
-                        if node.get('name') and node.get('id'):
-                            node_map[node['name']] = node['id']
-                            all_nodes.append(node)
+                    # Call OpenAI with structured output
+                    response = await client.beta.chat.completions.parse(
+                        model="gpt-4o-2024-08-06",
+                        messages=messages,
+                        response_format=GraphUpdates,
+                        temperature=0.0
+                    )
                     
-                    # Persist edges
-                    if updates.edges:
-                        valid_edges = [
-                            edge for edge in updates.edges
-                            if node_map.get(edge.from_node) and node_map.get(edge.to_node)
-                        ]
-                        created_edges = await _persist_edges(twin_id, valid_edges, node_map)
-                        all_edges.extend(created_edges)
-                    
-                    total_confidence += updates.confidence
-                    logger.info(f"Chunk {idx+1}/{len(chunks)}: {len(updates.nodes)} nodes, {len(updates.edges)} edges")
-                    
-            except Exception as chunk_error:
-                logger.warning(f"Error extracting chunk {idx+1}: {chunk_error}")
-                continue
+                    updates = response.choices[0].message.parsed
+                    if updates and updates.nodes:
+                        logger.info(f"Chunk {idx+1}/{len(chunks)}: {len(updates.nodes)} nodes, {len(updates.edges)} edges")
+                        return updates
+                except Exception as chunk_error:
+                    logger.warning(f"Error extracting chunk {idx+1}: {chunk_error}")
+                return None
+        
+        results = await asyncio.gather(*(_extract_chunk(idx, chunk) for idx, chunk in enumerate(chunks)))
+        extracted = [updates for updates in results if updates is not None]
+        total_confidence = sum(updates.confidence for updates in extracted)
+        
+        all_nodes = []
+        all_edges = []
+        if extracted:
+            merged_nodes, merged_edges = merge_graph_updates(extracted)
+            all_nodes, all_edges = await _persist_graph_updates(twin_id, merged_nodes, merged_edges)
         
         # Create memory event for audit
         if tenant_id and all_nodes:
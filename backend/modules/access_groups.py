@@ -5,6 +5,8 @@ Manages access groups, memberships, content permissions, limits, and overrides.
 
 from typing import Optional, List, Dict, Any
 from modules.observability import supabase
+from modules.async_db import db_execute
+from modules.verified_qna_index import invalidate_verified_qna_group_masks
 
 
 async def get_user_group(user_id: str, twin_id: str) -> Optional[Dict[str, Any]]:
@@ -13,9 +15,13 @@ async def get_user_group(user_id: str, twin_id: str) -> Optional[Dict[str, Any]]
     Returns the group object with membership info, or None if not found.
     """
     try:
-        membership_response = supabase.table("group_memberships").select(
-            "*, access_groups(*)"
-        ).eq("user_id", user_id).eq("twin_id", twin_id).eq("is_active", True).single().execute()
+        membership_response = await db_execute(
+            lambda db: db.table("group_memberships").select(
+                "*, access_groups(*)"
+            ).eq("user_id", user_id).eq("twin_id", twin_id).eq("is_active", True).single(),
+            name="access_groups.user_group",
+            client=supabase,
+        )
         
         if membership_response.data:
             membership = membership_response.data
@@ -33,9 +39,13 @@ async def get_default_group(twin_id: str) -> Dict[str, Any]:
     Get default group for a twin.
     Raises ValueError if no default group exists.
     """
-    response = supabase.table("access_groups").select("*").eq(
-        "twin_id", twin_id
-    ).eq("is_default", True).single().execute()
+    response = await db_execute(
+        lambda db: db.table("access_groups").select("*").eq(
+            "twin_id", twin_id
+        ).eq("is_default", True).single(),
+        name="access_groups.default_group",
+        client=supabase,
+    )
     
     if not response.data:
         raise ValueError(f"No default group found for twin {twin_id}")
@@ -121,6 +131,8 @@ async def add_content_permission(group_id: str, content_type: str, content_id: s
     
     try:
         response = supabase.table("content_permissions").insert(permission_data).execute()
+        if content_type == "verified_qna":
+            invalidate_verified_qna_group_masks(twin_id)
         return bool(response.data)
     except Exception as e:
         # If unique constraint violation, permission already exists
@@ -137,6 +149,8 @@ async def remove_content_permission(group_id: str, content_type: str, content_id
     response = supabase.table("content_permissions").delete().eq(
         "group_id", group_id
     ).eq("content_type", content_type).eq("content_id", content_id).execute()
+    if content_type == "verified_qna":
+        invalidate_verified_qna_group_masks()
     
     return True
 
@@ -183,9 +197,13 @@ async def get_group_settings(group_id: str) -> Dict[str, Any]:
     Returns merged settings dict with overrides applied.
     """
     # Get group
-    group_response = supabase.table("access_groups").select("settings").eq(
-        "id", group_id
-    ).single().execute()
+    group_response = await db_execute(
+        lambda db: db.table("access_groups").select("settings").eq(
+            "id", group_id
+        ).single(),
+        name="access_groups.group_settings",
+        client=supabase,
+    )
     
     if not group_response.data:
         raise ValueError(f"Group {group_id} not found")
@@ -193,9 +211,13 @@ async def get_group_settings(group_id: str) -> Dict[str, Any]:
     settings = group_response.data.get("settings", {})
     
     # Get overrides
-    overrides_response = supabase.table("group_overrides").select("*").eq(
-        "group_id", group_id
-    ).execute()
+    overrides_response = await db_execute(
+        lambda db: db.table("group_overrides").select("*").eq(
+            "group_id", group_id
+        ),
+        name="access_groups.group_overrides",
+        client=supabase,
+    )
     
     overrides = {}
     if overrides_response.data:
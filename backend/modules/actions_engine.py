@@ -14,6 +14,7 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 from modules.observability import supabase
 from modules.governance import AuditLogger
+from modules.verified_qna_index import invalidate_verified_qna_index
 import json
 try:
     from google.oauth2.credentials import Credentials
@@ -481,6 +482,7 @@ class ActionDraftManager:
                             "created_by": responded_by,
                             "is_active": True
                         }).execute()
+                        invalidate_verified_qna_index(draft["twin_id"])
                         result["verified_qna_id"] = qna_id
                         result["message"] = "Response saved and added to verified knowledge"
                     except Exception as e:
@@ -701,7 +703,7 @@ class ActionExecutor:
     async def _execute_escalate(twin_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """Create an escalation."""
         from modules.escalation import create_escalation
-        from modules.observability import supabase, create_conversation
+        from modules.observability import supabase, create_conversation, log_interaction
         import uuid
         
         question = inputs.get("question", "Automated escalation")
@@ -721,14 +723,14 @@ class ActionExecutor:
         
         # Create a message to attach the escalation to
         message_content = f"Automated escalation: {question}\n\nContext: {context}"
-        msg_response = supabase.table("messages").insert({
-            "conversation_id": conversation_id,
-            "role": "assistant",
-            "content": message_content,
-            "confidence_score": 0.0  # Low confidence triggers escalation
-        }).execute()
-        
-        message_id = msg_response.data[0]["id"] if msg_response.data else None
+        message = log_interaction(
+            conversation_id,
+            "assistant",
+            message_content,
+            confidence_score=0.0,  # Low confidence triggers escalation
+        )
+        
+        message_id = message["id"] if message else None
         
         if message_id:
             # Now create the escalation
@@ -10,6 +10,7 @@ from langgraph.graph.message import add_messages
 from modules.langfuse_sdk import langfuse_context, observe
 
 from modules.observability import supabase
+from modules.twin_cache import get_twin_settings, get_twin_settings_async, invalidate_twin_cache
 from modules.persona_compiler import (
     compile_prompt_plan,
     get_prompt_render_options,
@@ -40,9 +41,10 @@ from modules.fastpath_intent_router import (
     is_persona_draft_profile_allowed,
 )
 from modules.fastpath_response_builder import build_fastpath_response
-from modules.inference_router import invoke_json, invoke_text
+from modules.inference_router import invoke_json, invoke_text, stream_text
 from modules.routing_decision import build_routing_decision
 from modules.response_policy import UNCERTAINTY_RESPONSE
+from modules.response_streaming import get_token_sink
 from modules.grounding_policy import get_grounding_policy
 from modules.answerability import (
     build_targeted_clarification_questions,
@@ -128,10 +130,10 @@ async def get_owner_style_profile(twin_id: str, force_refresh: bool = False) ->
     try:
         # 1. Check if we already have a profile in the database
         if not force_refresh:
-            # RLS Fix: Use RPC
-            twin_res = supabase.rpc("get_twin_system", {"t_id": twin_id}).single().execute()
-            if twin_res.data and twin_res.data.get("settings"):
-                profile = twin_res.data["settings"].get("persona_profile")
+            # RLS Fix: Use RPC (cached per twin)
+            settings = get_twin_settings(twin_id)
+            if settings:
+                profile = settings.get("persona_profile")
                 if profile:
                     # Return a consolidated string or the dict depending on how it's used
                     # For backward compatibility, if it's a dict, we might need to handle it
@@ -217,6 +219,7 @@ async def get_owner_style_profile(twin_id: str, force_refresh: bool = False) ->
             # I'll leave update as is for now, assuming RLS allows update? (Unlikely).
             # I should use update_twin_settings system RPC but I didn't create one.
             supabase.table("twins").update({"settings": curr_settings}).eq("id", twin_id).execute()
+            invalidate_twin_cache(twin_id)
         except Exception as se:
             print(f"Error persisting persona profile: {se}")
 
@@ -2736,12 +2739,22 @@ async def realizer_node(state: TwinState):
     """
     
     try:
-        realized_text, route_meta = await invoke_text(
-            [{"role": "system", "content": realizer_prompt}],
-            task="realizer",
-            temperature=0.7,
-            max_tokens=500,
-        )
+        token_sink = get_token_sink()
+        if token_sink is not None:
+            realized_text, route_meta = await stream_text(
+                [{"role": "system", "content": realizer_prompt}],
+                on_token=token_sink,
+                task="realizer",
+                temperature=0.7,
+                max_tokens=500,
+            )
+        else:
+            realized_text, route_meta = await invoke_text(
+                [{"role": "system", "content": realizer_prompt}],
+                task="realizer",
+                temperature=0.7,
+                max_tokens=500,
+            )
         res = AIMessage(content=realized_text)
         
         # Post-process for citations and teaching metadata (Phase 4)
@@ -2771,6 +2784,8 @@ async def realizer_node(state: TwinState):
             res.additional_kwargs["inference_provider"] = route_meta.get("provider")
             res.additional_kwargs["inference_model"] = route_meta.get("model")
             res.additional_kwargs["inference_latency_ms"] = route_meta.get("latency_ms")
+            if route_meta.get("streamed"):
+                res.additional_kwargs["inference_ttft_ms"] = route_meta.get("ttft_ms")
         
         return {
             "messages": [res],
@@ -2832,75 +2847,76 @@ async def realizer_node(state: TwinState):
             ],
         }
 
-def create_twin_agent(
-    twin_id: str,
-    group_id: Optional[str] = None,
-    resolve_default_group: bool = True,
-    system_prompt_override: str = None,
-    full_settings: dict = None,
-    graph_context: str = "",
-    owner_memory_context: str = "",
-    conversation_history: Optional[List[BaseMessage]] = None
-):
-    # Retrieve-only tool setup needs to stay inside or be passed
+@observe(name="retrieve_hybrid_node")
+async def retrieve_hybrid_node(state: TwinState):
+    """Phase 2: Executing planned retrieval (Audit 1: Parallel & Robust)"""
+    # Retrieval scope is per request and comes from state, so the compiled
+    # graph can be shared across twins and turns.
     from modules.tools import get_retrieval_tool
     retrieval_tool = get_retrieval_tool(
-        twin_id,
-        group_id=group_id,
-        conversation_history=conversation_history,
-        resolve_default_group=resolve_default_group,
+        state.get("twin_id"),
+        group_id=state.get("retrieval_group_id"),
+        conversation_history=state.get("messages") or [],
+        resolve_default_group=state.get("resolve_default_group_filtering") is not False,
     )
 
-    @observe(name="retrieve_hybrid_node")
-    async def retrieve_hybrid_node(state: TwinState):
-        """Phase 2: Executing planned retrieval (Audit 1: Parallel & Robust)"""
-        sub_queries = state.get("sub_queries", [])
-        all_results = []
-        citations = []
-        
-        async def safe_retrieve(query):
+    sub_queries = state.get("sub_queries", [])
+    all_results = []
+    citations = []
+    
+    async def safe_retrieve(query):
+        try:
+            res_str = await retrieval_tool.ainvoke({"query": query})
+            return json.loads(res_str)
+        except Exception as e:
+            print(f"Retrieval error: {e}")
+            # Tag error in Langfuse
             try:
-                res_str = await retrieval_tool.ainvoke({"query": query})
-                return json.loads(res_str)
-            except Exception as e:
-                print(f"Retrieval error: {e}")
-                # Tag error in Langfuse
-                try:
-                    langfuse_context.update_current_observation(
-                        level="WARNING",
-                        metadata={
-                            "retrieval_error": True,
-                            "error_type": type(e).__name__,
-                            "query": query[:200] if query else None,
-                        }
-                    )
-                except Exception:
-                    pass
-                return []
-
-        tasks = [safe_retrieve(q) for q in sub_queries]
-        results_list = await asyncio.gather(*tasks)
-        for res_data in results_list:
-            if isinstance(res_data, list):
-                for item in res_data:
-                    all_results.append(item)
-                    if "source_id" in item:
-                        citations.append(item["source_id"])
-
-        if all_results:
-            citations = []
-            for item in all_results:
-                source_id = item.get("source_id")
-                if isinstance(source_id, str) and source_id and source_id not in citations:
-                    citations.append(source_id)
+                langfuse_context.update_current_observation(
+                    level="WARNING",
+                    metadata={
+                        "retrieval_error": True,
+                        "error_type": type(e).__name__,
+                        "query": query[:200] if query else None,
+                    }
+                )
+            except Exception:
+                pass
+            return []
+
+    tasks = [safe_retrieve(q) for q in sub_queries]
+    results_list = await asyncio.gather(*tasks)
+    for res_data in results_list:
+        if isinstance(res_data, list):
+            for item in res_data:
+                all_results.append(item)
+                if "source_id" in item:
+                    citations.append(item["source_id"])
+
+    if all_results:
+        citations = []
+        for item in all_results:
+            source_id = item.get("source_id")
+            if isinstance(source_id, str) and source_id and source_id not in citations:
+                citations.append(source_id)
+
+    return {
+        "retrieved_context": {"results": all_results},
+        "citations": citations,
+        "reasoning_history": (state.get("reasoning_history") or []) + [f"Retrieval: Executed {len(sub_queries)} queries."]
+    }
+
+
+def route_after_router(state: TwinState):
+    if state.get("execution_lane"):
+        return "deepagents"
+    if state.get("requires_evidence"):
+        return "retrieve"
+    return "planner"
 
-        return {
-            "retrieved_context": {"results": all_results},
-            "citations": citations,
-            "reasoning_history": (state.get("reasoning_history") or []) + [f"Retrieval: Executed {len(sub_queries)} queries."]
-        }
 
-    # Define the graph
+def build_twin_agent_graph(checkpointer=None):
+    """Build and compile the twin reasoning graph (router -> retrieve/deepagents -> planner -> realizer)."""
     workflow = StateGraph(TwinState)
     
     workflow.add_node("router", router_node)
@@ -2911,13 +2927,6 @@ def create_twin_agent(
     workflow.add_node("realizer", realizer_node)
     
     workflow.set_entry_point("router")
-    
-    def route_after_router(state: TwinState):
-        if state.get("execution_lane"):
-            return "deepagents"
-        if state.get("requires_evidence"):
-            return "retrieve"
-        return "planner"
 
     workflow.add_conditional_edges(
         "router",
@@ -2930,9 +2939,77 @@ def create_twin_agent(
     workflow.add_edge("planner", "realizer")
     workflow.add_edge("realizer", END)
     
-    checkpointer = get_checkpointer()
     return workflow.compile(checkpointer=checkpointer) if checkpointer else workflow.compile()
 
+
+# Compiled graph cache: the graph topology is identical for every twin and turn,
+# so it is compiled once per process (and again only if the checkpointer changes).
+AGENT_GRAPH_CACHE_ENABLED = os.getenv("AGENT_GRAPH_CACHE_ENABLED", "true").lower() == "true"
+_compiled_agent_graph = None
+_compiled_agent_checkpointer = None
+_agent_graph_stats = {"builds": 0, "hits": 0, "last_compile_ms": 0.0, "total_compile_ms": 0.0}
+
+
+def _compile_agent_graph(checkpointer):
+    started = time.perf_counter()
+    graph = build_twin_agent_graph(checkpointer)
+    compile_ms = (time.perf_counter() - started) * 1000
+    _agent_graph_stats["builds"] += 1
+    _agent_graph_stats["last_compile_ms"] = round(compile_ms, 3)
+    _agent_graph_stats["total_compile_ms"] = round(_agent_graph_stats["total_compile_ms"] + compile_ms, 3)
+    print(f"[LangGraph] Compiled twin agent graph in {compile_ms:.1f}ms")
+    return graph
+
+
+def get_compiled_twin_agent():
+    """Return the process-wide compiled twin graph, compiling it on first use."""
+    global _compiled_agent_graph, _compiled_agent_checkpointer
+    checkpointer = get_checkpointer()
+    if not AGENT_GRAPH_CACHE_ENABLED:
+        return _compile_agent_graph(checkpointer)
+    if _compiled_agent_graph is not None and _compiled_agent_checkpointer is checkpointer:
+        _agent_graph_stats["hits"] += 1
+        return _compiled_agent_graph
+    graph = _compile_agent_graph(checkpointer)
+    _compiled_agent_graph, _compiled_agent_checkpointer = graph, checkpointer
+    return graph
+
+
+def reset_compiled_twin_agent() -> None:
+    """Drop the cached graph (e.g. after patching node functions in tests)."""
+    global _compiled_agent_graph, _compiled_agent_checkpointer
+    _compiled_agent_graph = None
+    _compiled_agent_checkpointer = None
+
+
+def get_agent_graph_cache_stats() -> Dict[str, Any]:
+    return {
+        "enabled": AGENT_GRAPH_CACHE_ENABLED,
+        "compiled": _compiled_agent_graph is not None,
+        **_agent_graph_stats,
+    }
+
+
+def create_twin_agent(
+    twin_id: str,
+    group_id: Optional[str] = None,
+    resolve_default_group: bool = True,
+    system_prompt_override: str = None,
+    full_settings: dict = None,
+    graph_context: str = "",
+    owner_memory_context: str = "",
+    conversation_history: Optional[List[BaseMessage]] = None
+):
+    """
+    Return the compiled twin graph.
+
+    Kept for backward compatibility: the graph no longer closes over request
+    arguments. Twin, group and history scoping are read from TwinState
+    (twin_id, retrieval_group_id, resolve_default_group_filtering, messages),
+    which run_agent_stream populates on every turn.
+    """
+    return get_compiled_twin_agent()
+
 @observe(name="agent_response")
 async def run_agent_stream(
     twin_id: str,
@@ -2976,9 +3053,8 @@ async def run_agent_stream(
         return
 
     # 1. Fetch full twin settings for persona encoding
-    # RLS Fix: Use RPC
-    twin_res = supabase.rpc("get_twin_system", {"t_id": twin_id}).single().execute()
-    settings = twin_res.data["settings"] if twin_res.data else {}
+    # RLS Fix: Use RPC (cached per twin)
+    settings = await get_twin_settings_async(twin_id)
     
     # 2. Load group settings if group_id provided
     if group_id:
@@ -2993,10 +3069,8 @@ async def run_agent_stream(
     # 3. Ensure style analysis has been run at least once
     if "persona_profile" not in settings:
         await get_owner_style_profile(twin_id)
-        # Re-fetch after analysis
-        # RLS Fix: Use RPC
-        twin_res = supabase.rpc("get_twin_system", {"t_id": twin_id}).single().execute()
-        settings = twin_res.data["settings"] if twin_res.data else {}
+        # Re-fetch after analysis (the analysis invalidates the cached row)
+        settings = await get_twin_settings_async(twin_id)
         # Re-merge group settings if needed
         if group_id:
             try:
@@ -3039,16 +3113,8 @@ async def run_agent_stream(
     except Exception as e:
         print(f"[Mem0] Non-fatal load error: {e}")
 
-    agent = create_twin_agent(
-        twin_id,
-        group_id=effective_group_id,
-        resolve_default_group=enforce_group_filtering,
-        system_prompt_override=system_prompt,
-        full_settings=settings,
-        graph_context=graph_context,
-        owner_memory_context=owner_memory_context,
-        conversation_history=history
-    )
+    # Compiled once per process; request scoping travels in the state below.
+    agent = get_compiled_twin_agent()
     
     initial_messages = history or []
     initial_messages.append(HumanMessage(content=query))
@@ -0,0 +1,232 @@
+"""
+Analytics Rollups: incremental per-twin counters behind the metrics dashboards.
+
+Every conversation, message and escalation bumps one twin_daily_rollups row
+(keyed by twin and the UTC day the conversation was created) through the
+increment_twin_rollups_system RPC; user messages also feed the twin's
+question-frequency sketch (twin_question_rollups). The dashboard endpoints
+then read O(days) rollup rows instead of scanning every message of a twin.
+
+A twin's rollups are trusted only after backfill_twin_rollups_system has
+rebuilt them from the base tables (twin_rollup_state). The first dashboard
+read of a twin without that row runs the backfill; scripts/backfill_analytics_rollups.py
+rebuilds them in bulk. Any rollup failure returns None so callers fall back
+to the base-table scan, and write failures never block message logging.
+
+Environment Variables:
+- ANALYTICS_ROLLUPS_ENABLED: maintain and read rollups (default true)
+- ANALYTICS_QUESTION_SKETCH_CAPACITY: questions kept per twin in the top-questions sketch (default 500)
+- ANALYTICS_ROLLUP_CONVERSATION_CACHE_SIZE: conversation -> (twin, day) entries cached for message logging (default 10000)
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from modules.observability import supabase
+
+ANALYTICS_ROLLUPS_ENABLED = os.getenv("ANALYTICS_ROLLUPS_ENABLED", "true").lower() == "true"
+ANALYTICS_QUESTION_SKETCH_CAPACITY = max(1, int(os.getenv("ANALYTICS_QUESTION_SKETCH_CAPACITY", "500")))
+ANALYTICS_ROLLUP_CONVERSATION_CACHE_SIZE = max(
+    1, int(os.getenv("ANALYTICS_ROLLUP_CONVERSATION_CACHE_SIZE", "10000"))
+)
+
+_lock = threading.Lock()
+_conversations: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+_backfilled: Set[str] = set()
+_stats = {
+    "increments": 0,
+    "increment_failures": 0,
+    "conversation_lookups": 0,
+    "backfills": 0,
+    "backfill_failures": 0,
+    "rollup_reads": 0,
+}
+
+
+def question_key(content: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(key, display) used to group identical questions, or None for empty content."""
+    text = (content or "").strip()
+    if not text:
+        return None
+    return text.lower()[:100], text[:100] + ("..." if len(text) > 100 else "")
+
+
+def _remember_conversation(conversation_id: str, twin_id: str, day: str) -> None:
+    with _lock:
+        _conversations[conversation_id] = (twin_id, day)
+        _conversations.move_to_end(conversation_id)
+        while len(_conversations) > ANALYTICS_ROLLUP_CONVERSATION_CACHE_SIZE:
+            _conversations.popitem(last=False)
+
+
+def get_conversation_scope(conversation_id: str) -> Optional[Tuple[str, str]]:
+    """(twin_id, conversation day) for a conversation, cached; None if it does not exist."""
+    with _lock:
+        cached = _conversations.get(conversation_id)
+        if cached:
+            _conversations.move_to_end(conversation_id)
+            return cached
+        _stats["conversation_lookups"] += 1
+    res = supabase.table("conversations").select("twin_id, created_at").eq("id", conversation_id).limit(1).execute()
+    row = (res.data or [None])[0]
+    if not row or not row.get("twin_id"):
+        return None
+    day = str(row.get("created_at") or date.today().isoformat())[:10]
+    _remember_conversation(conversation_id, row["twin_id"], day)
+    return row["twin_id"], day
+
+
+def _increment(twin_id: str, day: str, **deltas: Any) -> None:
+    params = {"t_id": twin_id, "p_day": day, **{f"p_{k}": v for k, v in deltas.items()}}
+    if "p_question_key" in params:
+        params["p_question_capacity"] = ANALYTICS_QUESTION_SKETCH_CAPACITY
+    try:
+        supabase.rpc("increment_twin_rollups_system", params).execute()
+        with _lock:
+            _stats["increments"] += 1
+    except Exception as e:
+        with _lock:
+            _stats["increment_failures"] += 1
+        print(f"[AnalyticsRollups] increment failed for twin {twin_id}: {e}")
+
+
+def record_conversation(twin_id: str, conversation: Optional[Dict[str, Any]]) -> None:
+    """Count a newly created conversation row."""
+    if not ANALYTICS_ROLLUPS_ENABLED or not conversation or not conversation.get("id"):
+        return
+    day = str(conversation.get("created_at") or date.today().isoformat())[:10]
+    _remember_conversation(conversation["id"], twin_id, day)
+    _increment(twin_id, day, conversations=1)
+
+
+def record_message(
+    conversation_id: str,
+    role: str,
+    content: Optional[str],
+    confidence_score: Optional[float] = None,
+) -> None:
+    """Count a logged message; user messages also update the question sketch."""
+    if not ANALYTICS_ROLLUPS_ENABLED or not conversation_id:
+        return
+    try:
+        scope = get_conversation_scope(conversation_id)
+    except Exception as e:
+        print(f"[AnalyticsRollups] conversation lookup failed for {conversation_id}: {e}")
+        return
+    if not scope:
+        return
+    twin_id, day = scope
+    deltas: Dict[str, Any] = {"messages": 1}
+    if role == "user":
+        deltas["user_messages"] = 1
+        question = question_key(content)
+        if question:
+            deltas["question_key"], deltas["question_display"] = question
+            deltas["question_confidence"] = confidence_score
+    elif role == "assistant":
+        deltas["assistant_messages"] = 1
+        if confidence_score:
+            deltas["confidence_sum"] = float(confidence_score)
+            deltas["confidence_count"] = 1
+    _increment(twin_id, day, **deltas)
+
+
+def record_escalation(twin_id: str, conversation_created_at: Optional[str]) -> None:
+    """Count an escalation against the day its conversation was created."""
+    if not ANALYTICS_ROLLUPS_ENABLED or not twin_id:
+        return
+    _increment(twin_id, str(conversation_created_at or date.today().isoformat())[:10], escalations=1)
+
+
+def backfill_twin_rollups(twin_id: str) -> Optional[Dict[str, Any]]:
+    """Rebuild a twin's rollups from conversations/messages/escalations; None on failure."""
+    try:
+        res = supabase.rpc(
+            "backfill_twin_rollups_system",
+            {"t_id": twin_id, "p_question_capacity": ANALYTICS_QUESTION_SKETCH_CAPACITY},
+        ).execute()
+    except Exception as e:
+        with _lock:
+            _stats["backfill_failures"] += 1
+        print(f"[AnalyticsRollups] backfill failed for twin {twin_id}: {e}")
+        return None
+    with _lock:
+        _backfilled.add(twin_id)
+        _stats["backfills"] += 1
+    return res.data if isinstance(res.data, dict) else {}
+
+
+def _ensure_backfilled(twin_id: str) -> bool:
+    with _lock:
+        if twin_id in _backfilled:
+            return True
+    try:
+        res = supabase.table("twin_rollup_state").select("twin_id").eq("twin_id", twin_id).limit(1).execute()
+    except Exception as e:
+        print(f"[AnalyticsRollups] rollup state lookup failed for twin {twin_id}: {e}")
+        return False
+    if res.data:
+        with _lock:
+            _backfilled.add(twin_id)
+        return True
+    return backfill_twin_rollups(twin_id) is not None
+
+
+def get_daily_rollups(twin_id: str, start_day: date) -> Optional[Dict[str, Dict[str, Any]]]:
+    """day (YYYY-MM-DD) -> rollup row for days >= start_day, or None to use the base tables."""
+    if not ANALYTICS_ROLLUPS_ENABLED or not _ensure_backfilled(twin_id):
+        return None
+    try:
+        res = (
+            supabase.table("twin_daily_rollups")
+            .select("*")
+            .eq("twin_id", twin_id)
+            .gte("day", start_day.isoformat())
+            .execute()
+        )
+    except Exception as e:
+        print(f"[AnalyticsRollups] daily rollup read failed for twin {twin_id}: {e}")
+        return None
+    with _lock:
+        _stats["rollup_reads"] += 1
+    return {str(row["day"])[:10]: row for row in (res.data or [])}
+
+
+def get_question_rollups(twin_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+    """Most frequent questions from the twin's sketch, or None to use the base tables."""
+    if not ANALYTICS_ROLLUPS_ENABLED or not _ensure_backfilled(twin_id):
+        return None
+    try:
+        res = (
+            supabase.table("twin_question_rollups")
+            .select("question_key, display, count, overestimate, confidence_sum, confidence_count")
+            .eq("twin_id", twin_id)
+            .order("count", desc=True)
+            .limit(limit)
+            .execute()
+        )
+    except Exception as e:
+        print(f"[AnalyticsRollups] question rollup read failed for twin {twin_id}: {e}")
+        return None
+    with _lock:
+        _stats["rollup_reads"] += 1
+    return list(res.data or [])
+
+
+def invalidate_analytics_rollups() -> None:
+    """Forget cached conversation scopes and backfill state."""
+    with _lock:
+        _conversations.clear()
+        _backfilled.clear()
+
+
+def get_analytics_rollup_stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "enabled": ANALYTICS_ROLLUPS_ENABLED,
+            "conversations_cached": len(_conversations),
+            "twins_backfilled": len(_backfilled),
+            **_stats,
+        }
@@ -0,0 +1,187 @@
+"""
+Async DB: non-blocking Supabase access for hot request paths.
+
+The shared client in modules.observability is synchronous, so a bare
+.execute() inside an async handler blocks the event loop (and every other
+chat stream) for the whole round trip. This module offers two ways out:
+
+- db_execute(build, name=..., client=supabase): run a PostgREST builder chain
+  (``lambda db: db.table("x").select("*").eq(...)``) on a pooled
+  AsyncPostgrestClient backed by httpx.AsyncClient. Chains are identical for
+  the sync and async clients, so callers pass their module's sync client and
+  anything that is not a real supabase Client (e.g. a test double) runs the
+  same chain in the DB thread pool instead.
+- run_db(fn, *args, name=...): run an existing synchronous helper
+  (get_messages, create_conversation, ...) in the DB thread pool.
+
+Both paths share a per-event-loop concurrency cap and record latency per query
+name (see get_async_db_stats()).
+
+Environment Variables:
+- ASYNC_DB_BACKEND: "native" (default, pooled async HTTP) or "thread"
+- ASYNC_DB_MAX_CONCURRENCY: in-flight queries per event loop (default DB_POOL_SIZE + DB_MAX_OVERFLOW)
+- ASYNC_DB_TIMEOUT_SECONDS: HTTP timeout for native queries (default DB_POOL_TIMEOUT)
+"""
+import asyncio
+import functools
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from modules.observability import DB_MAX_OVERFLOW, DB_POOL_SIZE, DB_POOL_TIMEOUT, get_supabase_client
+from modules.latency_histogram import LatencyHistogram
+
+ASYNC_DB_BACKEND = os.getenv("ASYNC_DB_BACKEND", "native").lower()
+ASYNC_DB_MAX_CONCURRENCY = max(1, int(os.getenv("ASYNC_DB_MAX_CONCURRENCY", str(DB_POOL_SIZE + DB_MAX_OVERFLOW))))
+ASYNC_DB_TIMEOUT_SECONDS = float(os.getenv("ASYNC_DB_TIMEOUT_SECONDS", str(DB_POOL_TIMEOUT)))
+
+_executor = ThreadPoolExecutor(max_workers=ASYNC_DB_MAX_CONCURRENCY, thread_name_prefix="async-db")
+
+
+class _LoopState:
+    """Per-event-loop resources: httpx pools and asyncio primitives are loop-bound."""
+
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(ASYNC_DB_MAX_CONCURRENCY)
+        self.postgrest = None
+
+
+_loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+_loop_states_lock = threading.Lock()
+
+_latency: Dict[str, LatencyHistogram] = {}
+_counters = {"native": 0, "thread": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+_stats_lock = threading.Lock()
+
+
+def _loop_state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    with _loop_states_lock:
+        state = _loop_states.get(loop)
+        if state is None:
+            state = _LoopState()
+            _loop_states[loop] = state
+    return state
+
+
+def _credentials():
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_KEY")
+    if not key or "your_supabase_service_role_key" in key:
+        key = os.getenv("SUPABASE_KEY")
+    return url, key
+
+
+def _create_postgrest():
+    """AsyncPostgrestClient over a pooled httpx.AsyncClient (one per event loop)."""
+    import httpx
+    from postgrest import AsyncPostgrestClient
+
+    url, key = _credentials()
+    if not url or not key:
+        raise ValueError("SUPABASE_URL and SUPABASE_KEY/SUPABASE_SERVICE_KEY must be set for async DB access")
+    http_client = httpx.AsyncClient(
+        timeout=ASYNC_DB_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=ASYNC_DB_MAX_CONCURRENCY,
+            max_keepalive_connections=ASYNC_DB_MAX_CONCURRENCY,
+        ),
+        follow_redirects=True,
+    )
+    return AsyncPostgrestClient(
+        f"{url.rstrip('/')}/rest/v1",
+        headers={"apikey": key, "Authorization": f"Bearer {key}"},
+        http_client=http_client,
+    )
+
+
+def _is_shared_sync_client(client: Any) -> bool:
+    try:
+        from supabase import Client
+    except ImportError:
+        return False
+    return isinstance(client, Client)
+
+
+def _record(name: str, elapsed_ms: float, backend: str, failed: bool) -> None:
+    with _stats_lock:
+        histogram = _latency.get(name)
+        if histogram is None:
+            histogram = _latency[name] = LatencyHistogram()
+        _counters[backend] += 1
+        if failed:
+            _counters["errors"] += 1
+    histogram.observe(elapsed_ms)
+
+
+class _InFlight:
+    def __enter__(self):
+        with _stats_lock:
+            _counters["in_flight"] += 1
+            _counters["max_in_flight"] = max(_counters["max_in_flight"], _counters["in_flight"])
+
+    def __exit__(self, *_exc):
+        with _stats_lock:
+            _counters["in_flight"] -= 1
+
+
+async def run_db(fn: Callable[..., Any], *args: Any, name: Optional[str] = None, **kwargs: Any) -> Any:
+    """Run a synchronous DB helper in the DB thread pool under the concurrency cap."""
+    state = _loop_state()
+    label = name or getattr(fn, "__name__", "query")
+    loop = asyncio.get_running_loop()
+    async with state.semaphore:
+        started = time.perf_counter()
+        failed = False
+        with _InFlight():
+            try:
+                return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+            except Exception:
+                failed = True
+                raise
+            finally:
+                _record(label, (time.perf_counter() - started) * 1000.0, "thread", failed)
+
+
+async def db_execute(build: Callable[[Any], Any], *, name: str, client: Any = None) -> Any:
+    """
+    Execute a PostgREST builder chain without blocking the event loop.
+
+    build(db) must return an un-executed builder. ``client`` is the caller's
+    sync client (defaults to the shared one); the native async pool is used
+    only when it is the real supabase Client and ASYNC_DB_BACKEND is "native".
+    """
+    sync_client = client if client is not None else get_supabase_client()
+    state = _loop_state()
+
+    if ASYNC_DB_BACKEND == "native" and _is_shared_sync_client(sync_client):
+        if state.postgrest is None:
+            state.postgrest = _create_postgrest()
+        async with state.semaphore:
+            started = time.perf_counter()
+            failed = False
+            with _InFlight():
+                try:
+                    return await build(state.postgrest).execute()
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    _record(name, (time.perf_counter() - started) * 1000.0, "native", failed)
+
+    return await run_db(lambda: build(sync_client).execute(), name=name)
+
+
+def get_async_db_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        counters = dict(_counters)
+        names = list(_latency.items())
+    return {
+        "backend": ASYNC_DB_BACKEND,
+        "max_concurrency": ASYNC_DB_MAX_CONCURRENCY,
+        **counters,
+        "queries": {name: histogram.snapshot() for name, histogram in names},
+    }
@@ -12,6 +12,7 @@ import logging
 
 from modules.clients import get_elevenlabs_client
 from modules.observability import supabase
+from modules.twin_cache import invalidate_twin_cache
 
 logger = logging.getLogger(__name__)
 
@@ -207,6 +208,7 @@ async def clone_voice(twin_id: str, audio_files: list, voice_name: str = None) -
             settings["voice"]["cloned"] = True
             
             supabase.table("twins").update({"settings": settings}).eq("id", twin_id).execute()
+            invalidate_twin_cache(twin_id)
         except Exception as e:
             logger.error(f"Error saving voice settings: {e}")
         
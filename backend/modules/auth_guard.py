@@ -37,6 +37,8 @@ import json
 from fastapi import Header, HTTPException, status, Depends, Request
 from dotenv import load_dotenv
 
+from modules.twin_cache import conversation_cache, tenant_cache, twin_access_cache
+
 # Ensure env files are loaded before reading auth settings.
 _ROOT_ENV = Path(__file__).resolve().parents[2] / ".env"
 _BACKEND_ENV = Path(__file__).resolve().parents[1] / ".env"
@@ -272,7 +274,20 @@ def resolve_tenant_id(user_id: str, email: str = None, create_if_missing: bool =
     - Returns existing users.tenant_id when present.
     - Attempts non-destructive recovery via tenants.owner_id and then by email.
     - Creates a tenant only when create_if_missing=True.
+
+    Resolved mappings are cached briefly (see modules.twin_cache).
     """
+    cached_tenant_id = tenant_cache.get(user_id)
+    if cached_tenant_id:
+        return cached_tenant_id
+
+    tenant_id = _resolve_tenant_id_uncached(user_id, email=email, create_if_missing=create_if_missing)
+    if tenant_id:
+        tenant_cache.set(user_id, tenant_id)
+    return tenant_id
+
+
+def _resolve_tenant_id_uncached(user_id: str, email: str = None, create_if_missing: bool = True) -> str:
     from modules.observability import supabase as supabase_client
 
     # 1) Primary lookup from users table. Lookup failures are non-mutating.
@@ -587,6 +602,24 @@ def require_twin_access(twin_id: str, user: Dict[str, Any]) -> Dict[str, Any]:
         )
 
 
+def _twin_belongs_to_tenant(twin_id: str, tenant_id: str) -> bool:
+    """Check twins.tenant_id, caching positive results only."""
+    from modules.observability import supabase
+
+    def _load():
+        result = (
+            supabase.table("twins")
+            .select("id, tenant_id")
+            .eq("id", twin_id)
+            .eq("tenant_id", tenant_id)
+            .single()
+            .execute()
+        )
+        return True if result.data else None
+
+    return bool(twin_access_cache.get_or_load(("owner", twin_id, tenant_id), _load))
+
+
 def verify_twin_ownership(twin_id: str, user: Dict[str, Any]) -> bool:
     """
     Verify that a user owns a specific twin.
@@ -601,8 +634,6 @@ def verify_twin_ownership(twin_id: str, user: Dict[str, Any]) -> bool:
     Raises:
         HTTPException: If user doesn't own the twin
     """
-    from modules.observability import supabase
-
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -644,16 +675,7 @@ def verify_twin_ownership(twin_id: str, user: Dict[str, Any]) -> bool:
                 detail="Twin not found or access denied"
             )
 
-        result = (
-            supabase.table("twins")
-            .select("id, tenant_id")
-            .eq("id", twin_id)
-            .eq("tenant_id", tenant_id)
-            .single()
-            .execute()
-        )
-        
-        if not result.data:
+        if not _twin_belongs_to_tenant(twin_id, tenant_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Twin not found or access denied"
@@ -724,16 +746,7 @@ def verify_source_ownership(source_id: str, user: Dict[str, Any]) -> bool:
                 detail="Source not found or access denied"
             )
 
-        twin_result = (
-            supabase.table("twins")
-            .select("id, tenant_id")
-            .eq("id", twin_id)
-            .eq("tenant_id", tenant_id)
-            .single()
-            .execute()
-        )
-        
-        if not twin_result.data:
+        if not _twin_belongs_to_tenant(twin_id, tenant_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Source not found or access denied"
@@ -777,23 +790,30 @@ def verify_conversation_ownership(conversation_id: str, user: Dict[str, Any]) ->
     
     try:
         # Get conversation
-        result = supabase.table("conversations").select("user_id, twin_id").eq("id", conversation_id).single().execute()
+        def _load_conversation():
+            result = supabase.table("conversations").select("user_id, twin_id").eq("id", conversation_id).single().execute()
+            return result.data or None
+
+        conversation = conversation_cache.get_or_load(("conversation", conversation_id), _load_conversation)
         
-        if not result.data:
+        if not conversation:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Conversation {conversation_id} not found"
             )
         
         # Check if user owns the conversation directly
-        if result.data.get("user_id") == user_id:
+        if conversation.get("user_id") == user_id:
             return True
         
         # Or if user owns the twin this conversation belongs to
-        twin_id = result.data.get("twin_id")
+        twin_id = conversation.get("twin_id")
         if twin_id:
-            twin_result = supabase.table("twins").select("user_id").eq("id", twin_id).single().execute()
-            if twin_result.data and twin_result.data.get("user_id") == user_id:
+            def _load_twin_owner():
+                twin_result = supabase.table("twins").select("user_id").eq("id", twin_id).single().execute()
+                return (twin_result.data or {}).get("user_id") or None
+
+            if conversation_cache.get_or_load(("twin_owner", twin_id), _load_twin_owner) == user_id:
                 return True
         
         raise HTTPException(
@@ -826,6 +846,9 @@ def ensure_twin_active(twin_id: str) -> bool:
     """
     from modules.observability import supabase
     
+    if twin_access_cache.get(("active", twin_id)):
+        return True
+
     try:
         # Prefer status-aware check when the column exists.
         try:
@@ -873,6 +896,7 @@ def ensure_twin_active(twin_id: str) -> bool:
                 detail=f"Twin {twin_id} is not active (status: {twin_status})"
             )
         
+        twin_access_cache.set(("active", twin_id), True)
         return True
         
     except HTTPException:
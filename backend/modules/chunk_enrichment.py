@@ -0,0 +1,217 @@
+"""
+Chunk Enrichment: packed LLM analysis of ingestion chunks with a local pre-filter.
+
+Every new chunk used to cost one chat completion returning synthetic questions,
+a FACT/OPINION category, a tone and an opinion map. This module cuts that in
+two ways:
+
+- is_clearly_factual() recognizes chunks that are plainly factual (tables,
+  figures, key/value and list dumps without any first-person or stance
+  language) so they get the FACT defaults without an LLM call. The check is
+  conservative: anything it is unsure about still goes to the model, since
+  only OPINION chunks produce an opinion map.
+- analyze_chunk_batch() sends several chunks in one structured-output request
+  through the async OpenAI client. Each chunk carries an id that the model must
+  echo back, so results are matched by id rather than by position; chunks the
+  model skips or garbles come back as None for the caller to retry singly.
+  A failed request raises instead; the caller retries the whole pack once
+  after INGESTION_ENRICH_RETRY_SECONDS rather than fanning out per chunk
+  while the provider is pushing back.
+
+Environment Variables:
+- INGESTION_ENRICH_MODEL: chat model used for chunk enrichment (default gpt-4o-mini)
+- INGESTION_ENRICH_PACK_SIZE: chunks per enrichment request (default 8; 1 disables packing)
+- INGESTION_ENRICH_PACK_MAX_CHARS: character budget of one packed request (default 24000)
+- INGESTION_ENRICH_PREFILTER_ENABLED: skip the LLM for clearly factual chunks (default true)
+- INGESTION_ENRICH_RETRY_SECONDS: wait before retrying a failed packed request once (default 2)
+"""
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from modules.clients import get_async_openai_client
+
+INGESTION_ENRICH_MODEL = os.getenv("INGESTION_ENRICH_MODEL", "gpt-4o-mini")
+INGESTION_ENRICH_PACK_SIZE = max(1, int(os.getenv("INGESTION_ENRICH_PACK_SIZE", "8")))
+INGESTION_ENRICH_PACK_MAX_CHARS = max(1000, int(os.getenv("INGESTION_ENRICH_PACK_MAX_CHARS", "24000")))
+INGESTION_ENRICH_PREFILTER_ENABLED = os.getenv("INGESTION_ENRICH_PREFILTER_ENABLED", "true").lower() == "true"
+INGESTION_ENRICH_RETRY_SECONDS = max(0.0, float(os.getenv("INGESTION_ENRICH_RETRY_SECONDS", "2")))
+
+# Words that signal a personal perspective; any of them sends the chunk to the LLM.
+_OPINION_MARKERS = {
+    "i", "i'm", "i've", "i'd", "i'll", "me", "my", "mine", "myself",
+    "we", "we're", "we've", "we'd", "our", "ours", "us",
+    "believe", "think", "thought", "feel", "felt", "opinion", "view", "views",
+    "should", "shouldn't", "must", "ought", "prefer", "love", "hate", "like",
+    "favorite", "favourite", "honestly", "frankly", "personally", "convinced",
+    "bet", "recommend", "wish", "hope", "worst", "best", "overrated", "underrated",
+    "agree", "disagree", "mistake", "wrong", "right", "important", "lesson", "learned",
+}
+_WORD = re.compile(r"[a-z0-9']+")
+_STRUCTURED_LINE = re.compile(r"^\s*(?:[-*•]|\d+[.)]|[^:|]{1,40}:\s|.*\|.*\|)")
+_MIN_NUMERIC_TOKEN_SHARE = 0.12
+_MIN_NUMERIC_TOKENS = 8
+_MIN_STRUCTURED_LINE_SHARE = 0.5
+
+SYSTEM_PROMPT = """Analyze each text chunk provided. The input is a JSON array of {"id", "text"} objects.
+Analyze every chunk independently and return {"chunks": [...]} with exactly one entry per input id:
+- 'id': the chunk's id, copied verbatim.
+- 'questions': 3 brief questions this text chunk answers.
+- 'category': 'OPINION' if it contains beliefs, values, or personal perspectives. 'FACT' if it is objective information.
+- 'tone': A single word describing the style (e.g., 'Assertive', 'Casual', 'Technical', 'Thoughtful').
+- 'opinion_map': If category is 'OPINION', an object with:
+    - 'topic': The main subject of the opinion.
+    - 'stance': A short description of the owner's position.
+    - 'intensity': A score from 1-10 on how strongly this opinion is held.
+  If category is 'FACT', set 'opinion_map' to null."""
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "chunk_enrichment",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "additionalProperties": False,
+            "required": ["chunks"],
+            "properties": {
+                "chunks": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "additionalProperties": False,
+                        "required": ["id", "questions", "category", "tone", "opinion_map"],
+                        "properties": {
+                            "id": {"type": "string"},
+                            "questions": {"type": "array", "items": {"type": "string"}},
+                            "category": {"type": "string", "enum": ["FACT", "OPINION"]},
+                            "tone": {"type": "string"},
+                            "opinion_map": {
+                                "type": ["object", "null"],
+                                "additionalProperties": False,
+                                "required": ["topic", "stance", "intensity"],
+                                "properties": {
+                                    "topic": {"type": "string"},
+                                    "stance": {"type": "string"},
+                                    "intensity": {"type": "integer"},
+                                },
+                            },
+                        },
+                    },
+                }
+            },
+        },
+    },
+}
+
+
+def default_chunk_analysis() -> Dict[str, Any]:
+    """Analysis used for chunks that are not (or cannot be) sent to the LLM."""
+    return {"questions": [], "category": "FACT", "tone": "Neutral", "opinion_map": None}
+
+
+def is_clearly_factual(text: str) -> bool:
+    """True when a chunk has no stance language and is dominated by figures or structured lines."""
+    if not INGESTION_ENRICH_PREFILTER_ENABLED:
+        return False
+    body = (text or "").strip()
+    if not body or "?" in body or "!" in body:
+        return False
+    tokens = _WORD.findall(body.lower())
+    if not tokens or any(token in _OPINION_MARKERS for token in tokens):
+        return False
+    numeric_share = sum(1 for token in tokens if any(ch.isdigit() for ch in token)) / len(tokens)
+    if len(tokens) >= _MIN_NUMERIC_TOKENS and numeric_share >= _MIN_NUMERIC_TOKEN_SHARE:
+        return True
+    lines = [line for line in body.splitlines() if line.strip()]
+    structured = sum(1 for line in lines if _STRUCTURED_LINE.match(line))
+    return len(lines) >= 3 and structured / len(lines) >= _MIN_STRUCTURED_LINE_SHARE
+
+
+def plan_enrichment_packs(
+    texts: Sequence[str],
+    pack_size: int = INGESTION_ENRICH_PACK_SIZE,
+    max_chars: int = INGESTION_ENRICH_PACK_MAX_CHARS,
+) -> List[List[int]]:
+    """Group chunk indices, in order, into packs bounded by chunk count and total characters."""
+    packs: List[List[int]] = []
+    current: List[int] = []
+    current_chars = 0
+    for index, text in enumerate(texts):
+        size = len(text or "")
+        if current and (len(current) >= max(1, pack_size) or current_chars + size > max_chars):
+            packs.append(current)
+            current, current_chars = [], 0
+        current.append(index)
+        current_chars += size
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _normalize_analysis(raw: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(raw, dict):
+        return None
+    questions = raw.get("questions")
+    if not isinstance(questions, list):
+        return None
+    category = "OPINION" if str(raw.get("category") or "").upper() == "OPINION" else "FACT"
+    opinion_map = raw.get("opinion_map") if category == "OPINION" else None
+    return {
+        "questions": [str(q) for q in questions if isinstance(q, str) and q.strip()][:3],
+        "category": category,
+        "tone": str(raw.get("tone") or "Neutral"),
+        "opinion_map": opinion_map if isinstance(opinion_map, dict) else None,
+    }
+
+
+async def analyze_chunk_batch(texts: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Analyze several chunks in one structured-output request.
+
+    Returns one entry per input text. Chunks flagged as prompt injection get the
+    default analysis; chunks missing from (or malformed in) the response are None.
+    A failed request raises, so the caller can back off before retrying.
+
+    SECURITY: Each chunk is sanitized before it is sent to the LLM.
+    """
+    from modules.llm_safety import sanitize_for_llm, PromptInjectionError
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+    payload: List[Dict[str, str]] = []
+    for index, text in enumerate(texts):
+        try:
+            sanitized = sanitize_for_llm(text, strict_mode=False)
+        except PromptInjectionError as e:
+            print(f"[LLM Safety] Prompt injection detected in chunk: {e}")
+            results[index] = default_chunk_analysis()
+            continue
+        if sanitized.warnings:
+            print(f"[LLM Safety] Warnings for chunk analysis: {sanitized.warnings}")
+        payload.append({"id": f"c{index}", "text": sanitized.sanitized_text})
+    if not payload:
+        return results
+
+    try:
+        response = await get_async_openai_client().chat.completions.create(
+            model=INGESTION_ENRICH_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+            ],
+            response_format=RESPONSE_FORMAT,
+        )
+        items = json.loads(response.choices[0].message.content or "{}").get("chunks") or []
+    except Exception as e:
+        print(f"[ChunkEnrichment] packed analysis of {len(payload)} chunks failed: {e}")
+        raise
+
+    expected = {item["id"] for item in payload}
+    for item in items:
+        chunk_id = item.get("id") if isinstance(item, dict) else None
+        if chunk_id not in expected:
+            continue
+        expected.discard(chunk_id)
+        results[int(chunk_id[1:])] = _normalize_analysis(item)
+    return results
@@ -0,0 +1,277 @@
+"""
+Embedding Cache: two-tier cache for embedding vectors.
+
+Identical strings are embedded repeatedly across the system (retrieval queries,
+HyDE answers, owner-memory topics, verified QnA questions, graph seeds). This
+module caches vectors keyed by provider, model, dimension and a hash of the
+normalized text so repeats never reach the provider.
+
+Tiers:
+- L1: in-process LRU (always on when the cache is enabled)
+- L2: optional shared/persistent tier, Redis or on-disk SQLite
+
+Environment Variables:
+- EMBEDDING_CACHE_ENABLED: "true" (default) or "false"
+- EMBEDDING_CACHE_MAXSIZE: L1 entry limit (default 4096)
+- EMBEDDING_CACHE_BACKEND: "memory" (default), "redis" or "sqlite"
+- EMBEDDING_CACHE_REDIS_URL: Redis URL for the redis tier (falls back to REDIS_URL)
+- EMBEDDING_CACHE_TTL_SECONDS: Redis entry TTL (default 7 days, 0 disables expiry)
+- EMBEDDING_CACHE_SQLITE_PATH: SQLite file for the sqlite tier
+
+L1 stores vectors as tuples and every lookup returns a fresh list, so a caller
+mutating its result cannot corrupt the cache. L2 stores vectors as packed
+float32, which is the precision providers return.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_VERSION = "v1"
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_MAXSIZE = int(os.getenv("EMBEDDING_CACHE_MAXSIZE", "4096"))
+EMBEDDING_CACHE_BACKEND = os.getenv("EMBEDDING_CACHE_BACKEND", "memory").strip().lower()
+EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+EMBEDDING_CACHE_SQLITE_PATH = os.getenv("EMBEDDING_CACHE_SQLITE_PATH", "embedding_cache.sqlite3")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different strings share a cache entry."""
+    return _WHITESPACE_RE.sub(" ", str(text or "")).strip()
+
+
+def make_cache_key(text: str, *, provider: str, model: str, dimension: Optional[int]) -> str:
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"emb:{CACHE_KEY_VERSION}:{provider}:{model}:{dimension or 0}:{digest}"
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class _RedisTier:
+    name = "redis"
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis
+
+        # Binary payloads: do not decode responses.
+        self._client = redis.from_url(url, decode_responses=False)
+        self._client.ping()
+        self._ttl = ttl_seconds
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        blobs = self._client.mget(keys)
+        return {key: _unpack(blob) for key, blob in zip(keys, blobs) if blob}
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        for key, vector in items.items():
+            if self._ttl > 0:
+                pipe.set(key, _pack(vector), ex=self._ttl)
+            else:
+                pipe.set(key, _pack(vector))
+        pipe.execute()
+
+
+class _SQLiteTier:
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        # Stay under SQLite's bound-parameter limit.
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" for _ in batch)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+            for key, blob in rows:
+                found[key] = _unpack(blob)
+        return found
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                [(key, _pack(vector), now) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU of embedding vectors with an optional L2 tier.
+
+    L2 errors are logged and treated as misses so the cache can never make an
+    embedding call fail.
+    """
+
+    def __init__(self, maxsize: int = EMBEDDING_CACHE_MAXSIZE, l2=None):
+        self.maxsize = max(1, int(maxsize))
+        self._l1: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._l2 = l2
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.l2_errors = 0
+
+    @property
+    def backend(self) -> str:
+        return self._l2.name if self._l2 is not None else "memory"
+
+    def _l1_put(self, key: str, vector: Sequence[float]) -> None:
+        self._l1[key] = tuple(vector)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.maxsize:
+            self._l1.popitem(last=False)
+
+    def get(self, key: str) -> Optional[List[float]]:
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, vector: List[float]) -> None:
+        self.set_many({key: vector})
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the given keys; missing keys are omitted."""
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        pending: List[str] = []
+
+        with self._lock:
+            for key in unique_keys:
+                vector = self._l1.get(key)
+                if vector is not None:
+                    self._l1.move_to_end(key)
+                    found[key] = list(vector)
+                    self.l1_hits += 1
+                else:
+                    pending.append(key)
+
+        if pending and self._l2 is not None:
+            try:
+                l2_found = self._l2.get_many(pending)
+            except Exception as e:
+                l2_found = {}
+                self.l2_errors += 1
+                logger.warning("[EmbeddingCache] %s lookup failed: %s", self.backend, e)
+            if l2_found:
+                with self._lock:
+                    for key, vector in l2_found.items():
+                        self._l1_put(key, vector)
+                    self.l2_hits += len(l2_found)
+                found.update(l2_found)
+                pending = [key for key in pending if key not in l2_found]
+
+        with self._lock:
+            self.misses += len(pending)
+        return found
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        with self._lock:
+            for key, vector in items.items():
+                self._l1_put(key, vector)
+        if self._l2 is not None:
+            try:
+                self._l2.set_many(items)
+            except Exception as e:
+                self.l2_errors += 1
+                logger.warning("[EmbeddingCache] %s write failed: %s", self.backend, e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._l1.clear()
+            self.l1_hits = self.l2_hits = self.misses = self.l2_errors = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.l1_hits + self.l2_hits
+            lookups = hits + self.misses
+            return {
+                "backend": self.backend,
+                "size": len(self._l1),
+                "maxsize": self.maxsize,
+                "hits": hits,
+                "l1_hits": self.l1_hits,
+                "l2_hits": self.l2_hits,
+                "misses": self.misses,
+                "l2_errors": self.l2_errors,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _build_l2_tier():
+    if EMBEDDING_CACHE_BACKEND == "redis":
+        url = os.getenv("EMBEDDING_CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+        if not url:
+            logger.warning("[EmbeddingCache] Redis backend requested but no REDIS_URL set; using memory only")
+            return None
+        try:
+            return _RedisTier(url, EMBEDDING_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning("[EmbeddingCache] Redis unavailable (%s); using memory only", e)
+            return None
+    if EMBEDDING_CACHE_BACKEND == "sqlite":
+        try:
+            return _SQLiteTier(EMBEDDING_CACHE_SQLITE_PATH)
+        except Exception as e:
+            logger.warning("[EmbeddingCache] SQLite unavailable (%s); using memory only", e)
+            return None
+    return None
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+    global _embedding_cache
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(l2=_build_l2_tier())
+    return _embedding_cache
+
+
+def get_embedding_cache_stats() -> dict:
+    cache = get_embedding_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
@@ -12,6 +12,7 @@ Environment Variables:
 - EMBEDDING_PROVIDER: "openai" (default) or "huggingface"
 - HF_EMBEDDING_MODEL: Model name (default: all-MiniLM-L6-v2)
 - HF_EMBEDDING_DEVICE: "cpu" or "cuda" (auto-detected if not set)
+- EMBEDDING_CACHE_*: see modules/embedding_cache.py
 
 SECURITY FIXES:
 - Added timeout handling for all external API calls (HIGH Bug H2)
@@ -19,13 +20,14 @@ SECURITY FIXES:
 - Circuit breaker pattern for resilience
 - Automatic fallback between providers
 """
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
 import asyncio
 import time
 import logging
 from functools import wraps, lru_cache
 from modules.clients import get_openai_client, get_pinecone_client
+from modules.embedding_cache import get_embedding_cache, get_embedding_cache_stats, make_cache_key
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -168,6 +170,10 @@ def with_retry_and_timeout(max_attempts: int = None, timeout_seconds: int = None
 # PROVIDER-SPECIFIC IMPLEMENTATIONS
 # =============================================================================
 
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-large"
+OPENAI_EMBEDDING_DIMENSIONS = 3072
+
+
 def _get_embedding_openai(text: str) -> List[float]:
     """Generate embedding using OpenAI API."""
     client = get_openai_client()
@@ -175,8 +181,8 @@ def _get_embedding_openai(text: str) -> List[float]:
     def _fetch():
         response = client.embeddings.create(
             input=text,
-            model="text-embedding-3-large",
-            dimensions=3072
+            model=OPENAI_EMBEDDING_MODEL,
+            dimensions=OPENAI_EMBEDDING_DIMENSIONS
         )
         return response.data[0].embedding
     
@@ -254,6 +260,20 @@ def _ensure_hf_dimension_compatibility() -> None:
     raise RuntimeError(msg)
 
 
+def _embedding_cache_key(text: str, provider: str) -> str:
+    """Cache key for text embedded by the given provider's configured model."""
+    if provider == "huggingface":
+        model = os.getenv("HF_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        dimension = os.getenv("HF_EMBEDDING_DIMENSION", "384")
+        return make_cache_key(text, provider=provider, model=model, dimension=int(dimension or 0))
+    return make_cache_key(
+        text,
+        provider="openai",
+        model=OPENAI_EMBEDDING_MODEL,
+        dimension=OPENAI_EMBEDDING_DIMENSIONS,
+    )
+
+
 # =============================================================================
 # UNIFIED EMBEDDING FUNCTIONS WITH PROVIDER SWITCHING
 # =============================================================================
@@ -280,20 +300,32 @@ def get_embedding(text: str) -> List[float]:
         TimeoutError: If request exceeds timeout
         Exception: On API errors (if fallback disabled or both fail)
     """
+    cache = get_embedding_cache()
+    if cache is not None:
+        cached = cache.get(_embedding_cache_key(text, EMBEDDING_PROVIDER))
+        if cached is not None:
+            return cached
+
     # Try primary provider
+    provider_used = EMBEDDING_PROVIDER
     if EMBEDDING_PROVIDER == "huggingface":
         try:
             _ensure_hf_dimension_compatibility()
-            return _get_embedding_huggingface(text)
+            embedding = _get_embedding_huggingface(text)
         except Exception as e:
-            if EMBEDDING_FALLBACK_ENABLED:
-                logger.warning(f"[Embeddings] HuggingFace failed: {e}")
-                logger.info("[Embeddings] Falling back to OpenAI")
-                return _get_embedding_openai(text)
-            raise
-    
-    # Default: OpenAI
-    return _get_embedding_openai(text)
+            if not EMBEDDING_FALLBACK_ENABLED:
+                raise
+            logger.warning(f"[Embeddings] HuggingFace failed: {e}")
+            logger.info("[Embeddings] Falling back to OpenAI")
+            provider_used = "openai"
+            embedding = _get_embedding_openai(text)
+    else:
+        # Default: OpenAI
+        embedding = _get_embedding_openai(text)
+
+    if cache is not None and embedding:
+        cache.set(_embedding_cache_key(text, provider_used), embedding)
+    return embedding
 
 
 async def _get_embeddings_async_openai(texts: List[str]) -> List[List[float]]:
@@ -304,8 +336,8 @@ async def _get_embeddings_async_openai(texts: List[str]) -> List[List[float]]:
     def _fetch():
         response = client.embeddings.create(
             input=texts,
-            model="text-embedding-3-large",
-            dimensions=3072,
+            model=OPENAI_EMBEDDING_MODEL,
+            dimensions=OPENAI_EMBEDDING_DIMENSIONS,
             timeout=EMBEDDING_TIMEOUT
         )
         return [d.embedding for d in response.data]
@@ -326,44 +358,87 @@ async def _get_embeddings_async_huggingface(texts: List[str]) -> List[List[float
     return await loop.run_in_executor(None, _fetch)
 
 
-async def get_embeddings_async(texts: List[str]) -> List[List[float]]:
-    """
-    Generate embeddings for multiple texts asynchronously (batch processing).
-    
-    Provider is determined by EMBEDDING_PROVIDER environment variable.
-    Supports automatic fallback if enabled.
-    
-    Args:
-        texts: List of texts to embed
-        
-    Returns:
-        List of embedding vectors (one per input text)
-        
-    Raises:
-        TimeoutError: If request exceeds timeout
-        Exception: On API errors (if fallback disabled or both fail)
-    """
+async def _get_embeddings_async_uncached(texts: List[str]) -> Tuple[List[List[float]], str]:
+    """Embed texts with the configured provider; returns (vectors, provider_used)."""
+    vectors, provider_used = await _get_embeddings_async_provider(texts)
+    if len(vectors) != len(texts):
+        raise ValueError(
+            f"Embedding provider {provider_used} returned {len(vectors)} vectors for {len(texts)} texts"
+        )
+    return vectors, provider_used
+
+
+async def _get_embeddings_async_provider(texts: List[str]) -> Tuple[List[List[float]], str]:
     # Try primary provider
     if EMBEDDING_PROVIDER == "huggingface":
         try:
             _ensure_hf_dimension_compatibility()
-            return await _get_embeddings_async_huggingface(texts)
+            return await _get_embeddings_async_huggingface(texts), "huggingface"
         except Exception as e:
             if EMBEDDING_FALLBACK_ENABLED:
                 logger.warning(f"[Embeddings] HuggingFace async failed: {e}")
                 logger.info("[Embeddings] Falling back to OpenAI")
-                return await _get_embeddings_async_openai(texts)
+                return await _get_embeddings_async_openai(texts), "openai"
             raise
     
     # Default: OpenAI
     try:
-        return await _get_embeddings_async_openai(texts)
+        return await _get_embeddings_async_openai(texts), "openai"
     except Exception as e:
         if "timeout" in str(e).lower():
             raise TimeoutError(f"Embedding batch request timed out after {EMBEDDING_TIMEOUT}s")
         raise
 
 
+async def get_embeddings_async(texts: List[str]) -> List[List[float]]:
+    """
+    Generate embeddings for multiple texts asynchronously (batch processing).
+    
+    Provider is determined by EMBEDDING_PROVIDER environment variable.
+    Supports automatic fallback if enabled. Cached vectors are served from the
+    embedding cache in one bulk lookup; only misses (deduplicated) are sent to
+    the provider.
+    
+    Args:
+        texts: List of texts to embed
+        
+    Returns:
+        List of embedding vectors (one per input text)
+        
+    Raises:
+        TimeoutError: If request exceeds timeout
+        Exception: On API errors (if fallback disabled or both fail)
+    """
+    cache = get_embedding_cache()
+    if cache is None or not texts:
+        vectors, _provider_used = await _get_embeddings_async_uncached(texts)
+        return vectors
+
+    keys = [_embedding_cache_key(text, EMBEDDING_PROVIDER) for text in texts]
+    found = cache.get_many(keys)
+
+    miss_texts: Dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in miss_texts:
+            miss_texts[key] = text
+
+    if miss_texts:
+        miss_keys = list(miss_texts.keys())
+        vectors, provider_used = await _get_embeddings_async_uncached(list(miss_texts.values()))
+        fresh = dict(zip(miss_keys, vectors))
+        found.update(fresh)
+        cache.set_many(
+            {
+                _embedding_cache_key(miss_texts[key], provider_used): vector
+                for key, vector in fresh.items()
+                if vector
+            }
+        )
+
+    # Copy per position so duplicate texts never share one mutable list.
+    return [list(found[key]) for key in keys]
+
+
 def get_embedding_with_timeout(text: str, timeout_seconds: int = None) -> Optional[List[float]]:
     """
     Generate embedding with explicit timeout, returns None on failure.
@@ -429,6 +504,7 @@ def get_embedding_health_status() -> dict:
         "last_failure": _embedding_circuit_breaker.last_failure_time,
         "target_dimension": target_dim,
         "timeout_config": EMBEDDING_TIMEOUT,
+        "cache": get_embedding_cache_stats(),
         "retry_config": {
             "attempts": EMBEDDING_RETRY_ATTEMPTS,
             "delay": EMBEDDING_RETRY_DELAY,
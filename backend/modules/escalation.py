@@ -10,7 +10,7 @@ async def create_escalation(message_id: str):
     # Path: messages -> conversations -> twins -> tenant_id
     try:
         msg_res = supabase.table("messages").select(
-            "id, conversation_id, conversations(twin_id, twins(tenant_id))"
+            "id, conversation_id, conversations(twin_id, created_at, twins(tenant_id))"
         ).eq("id", message_id).single().execute()
         
         if not msg_res.data:
@@ -46,6 +46,9 @@ async def create_escalation(message_id: str):
             escalation_data["twin_id"] = twin_id
             
         response = supabase.table("escalations").insert(escalation_data).execute()
+        if twin_id:
+            from modules.analytics_rollups import record_escalation
+            record_escalation(twin_id, conv_data.get("created_at"))
         return response.data
         
     except Exception as e:
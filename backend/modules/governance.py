@@ -6,6 +6,7 @@ import uuid
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from modules.observability import supabase
+from modules.twin_cache import invalidate_twin_cache
 
 class AuditLogger:
     """Centralized logger for immutable system events."""
@@ -91,6 +92,7 @@ def request_verification(twin_id: str, tenant_id: str, method: str = "MANUAL_REV
     supabase.table("twins").update({
         "verification_status": "pending"
     }).eq("id", twin_id).execute()
+    invalidate_twin_cache(twin_id)
     
     # Log the action
     AuditLogger.log(
@@ -118,6 +120,7 @@ def approve_verification(twin_id: str, tenant_id: str, verifier_id: str):
         "is_verified": True,
         "verification_status": "verified"
     }).eq("id", twin_id).execute()
+    invalidate_twin_cache(twin_id)
     
     AuditLogger.log(
         tenant_id=tenant_id,
@@ -3,13 +3,17 @@
 Graph Context Module
 
 Provides bounded, query-relevant graph snapshot retrieval for chat context.
-Uses Supabase for storage with 1-hop and optional 2-hop expansion.
+Uses Supabase for storage with 1-hop and optional 2-hop expansion. When
+GRAPH_INDEX_ENABLED, seeds and hops are served from the per-twin in-memory
+index in modules.graph_index instead of per-turn Supabase reads.
 """
 
 from typing import Dict, Any, List, Optional
 import logging
 
 from modules.observability import supabase
+from modules import graph_index
+from modules.async_db import db_execute
 
 logger = logging.getLogger(__name__)
 
@@ -114,6 +118,16 @@ async def get_graph_snapshot(
         Dict with context_text, nodes, edges, metadata
     """
     try:
+        index = await graph_index.get_graph_index(twin_id) if graph_index.GRAPH_INDEX_ENABLED else None
+        if index is not None:
+            seed_nodes = await _select_seeds_indexed(index, query)
+            if not seed_nodes:
+                return _format_snapshot(index.node_list(limit=max_nodes), [], query)
+            seed_ids = [n['id'] for n in seed_nodes]
+            nodes, edges = index.expand(seed_ids, max_hops=max_hops, max_nodes=max_nodes)
+            ranked_nodes = _rank_nodes(nodes, seed_ids)
+            return _format_snapshot(ranked_nodes[:max_nodes], edges[:max_edges], query)
+
         # 1. Seed Selection (keywords + semantic fallback)
         seed_nodes = await _select_seeds(twin_id, query)
         seed_ids = [n['id'] for n in seed_nodes]
@@ -177,11 +191,36 @@ async def get_graph_snapshot(
         }
 
 
+async def _select_seeds_indexed(index: "graph_index.GraphIndex", query: str) -> List[Dict[str, Any]]:
+    """Keyword seeds from the inverted index, topped up by node-embedding similarity."""
+    if not query:
+        return []
+    
+    seeds = index.keyword_seeds(query, max_seeds=MAX_SEED_NODES)
+    if len(seeds) < 3:
+        try:
+            semantic_seeds = await index.semantic_seeds(query, top_k=5)
+        except Exception as e:
+            logger.warning(f"Semantic seed selection failed: {e}, falling back to empty")
+            semantic_seeds = []
+        seen_ids = {s['id'] for s in seeds}
+        for s in semantic_seeds:
+            if s['id'] not in seen_ids and len(seeds) < MAX_SEED_NODES:
+                seeds.append(s)
+                seen_ids.add(s['id'])
+    return seeds
+
+
 async def _select_seeds(twin_id: str, query: str) -> List[Dict[str, Any]]:
     """Select seed nodes via ILIKE match on query, with semantic fallback."""
     if not query:
         return []
     
+    if graph_index.GRAPH_INDEX_ENABLED:
+        index = await graph_index.get_graph_index(twin_id)
+        if index is not None:
+            return await _select_seeds_indexed(index, query)
+    
     try:
         # Extract keywords from query (simple split, could use NLP)
         keywords = [w.strip() for w in query.split() if len(w.strip()) > 2]
@@ -194,10 +233,11 @@ async def _select_seeds(twin_id: str, query: str) -> List[Dict[str, Any]]:
         search_terms = keywords[:3]
         
         # Fetch all nodes and filter (Supabase doesn't support complex OR ILIKE easily)
-        nodes_res = supabase.rpc("get_nodes_system", {
-            "t_id": twin_id,
-            "limit_val": 100
-        }).execute()
+        nodes_res = await db_execute(
+            lambda db: db.rpc("get_nodes_system", {"t_id": twin_id, "limit_val": 100}),
+            name="graph.nodes",
+            client=supabase,
+        )
         
         nodes = nodes_res.data if nodes_res.data else []
         
@@ -313,10 +353,11 @@ async def _select_seeds_semantic(
         
         # 4. Find nodes that reference these sources (via properties or description)
         if cached_nodes is None:
-            nodes_res = supabase.rpc("get_nodes_system", {
-                "t_id": twin_id,
-                "limit_val": 100
-            }).execute()
+            nodes_res = await db_execute(
+                lambda db: db.rpc("get_nodes_system", {"t_id": twin_id, "limit_val": 100}),
+                name="graph.nodes",
+                client=supabase,
+            )
             cached_nodes = nodes_res.data if nodes_res.data else []
         
         # 5. Score nodes by source_id proximity and text similarity
@@ -349,11 +390,17 @@ async def _select_seeds_semantic(
 
 async def _get_all_nodes(twin_id: str, limit: int = 20) -> List[Dict[str, Any]]:
     """Get all nodes for a twin (fallback when no query)."""
+    if graph_index.GRAPH_INDEX_ENABLED:
+        index = await graph_index.get_graph_index(twin_id)
+        if index is not None:
+            return index.node_list(limit=limit)
+    
     try:
-        nodes_res = supabase.rpc("get_nodes_system", {
-            "t_id": twin_id,
-            "limit_val": limit
-        }).execute()
+        nodes_res = await db_execute(
+            lambda db: db.rpc("get_nodes_system", {"t_id": twin_id, "limit_val": limit}),
+            name="graph.nodes",
+            client=supabase,
+        )
         return nodes_res.data if nodes_res.data else []
     except Exception as e:
         logger.error(f"Error getting all nodes: {e}")
@@ -365,12 +412,19 @@ async def _expand_one_hop(twin_id: str, node_ids: List[str]) -> tuple:
     if not node_ids:
         return [], []
     
+    if graph_index.GRAPH_INDEX_ENABLED:
+        index = await graph_index.get_graph_index(twin_id)
+        if index is not None:
+            return index.neighbors(node_ids)
+    
     try:
         # Get edges where any seed is from or to
         # Note: This is a simplification - ideally we'd use a custom RPC
-        edges_res = supabase.table("edges").select("*").eq(
-            "twin_id", twin_id
-        ).execute()
+        edges_res = await db_execute(
+            lambda db: db.table("edges").select("*").eq("twin_id", twin_id),
+            name="graph.edges",
+            client=supabase,
+        )
         
         edges = edges_res.data if edges_res.data else []
         
@@ -394,9 +448,13 @@ async def _expand_one_hop(twin_id: str, node_ids: List[str]) -> tuple:
         # Fetch neighbor nodes
         neighbor_nodes = []
         if neighbor_ids:
-            nodes_res = supabase.table("nodes").select("*").eq(
-                "twin_id", twin_id
-            ).in_("id", list(neighbor_ids)).execute()
+            nodes_res = await db_execute(
+                lambda db: db.table("nodes").select("*").eq(
+                    "twin_id", twin_id
+                ).in_("id", list(neighbor_ids)),
+                name="graph.neighbor_nodes",
+                client=supabase,
+            )
             neighbor_nodes = nodes_res.data if nodes_res.data else []
         
         return neighbor_nodes, connected_edges
@@ -0,0 +1,520 @@
+# backend/modules/graph_index.py
+"""
+Graph Index: per-twin in-memory view of the cognitive graph.
+
+get_graph_snapshot used to re-read up to 100 nodes, substring-score them, and
+make a Supabase round trip (plus a full edges scan) per expansion hop on every
+chat turn. The index loads a twin's nodes and edges once and keeps:
+
+- node records by id, in load order
+- adjacency lists (node id -> incident edges)
+- name/description inverted indexes over lowercase word tokens
+- node embeddings (name + description) for semantic seeds, built by a
+  background task the first time seeds are requested, in provider-sized
+  batches; failed builds back off instead of retrying on every turn
+- memoized multi-hop expansions
+
+Freshness: graph writes call bump_graph_version(twin_id). The stamp lives in
+Redis (INCR) when REDIS_URL is configured so every process sees it, and in an
+in-process counter otherwise. get_graph_index() rebuilds when the stamp moved
+or the index is older than GRAPH_INDEX_TTL_SECONDS; concurrent callers share
+one rebuild per twin and version. The Redis stamp is read off the event loop
+and cached for GRAPH_VERSION_CACHE_SECONDS. Rows are paged in id order.
+
+Environment Variables:
+- GRAPH_INDEX_ENABLED: "true" (default) or "false" to query Supabase per hop
+- GRAPH_INDEX_TTL_SECONDS: max age of an index before reload (default 300)
+- GRAPH_INDEX_MAX_NODES: nodes loaded per twin (default 5000)
+- GRAPH_INDEX_MAX_EDGES: edges loaded per twin (default 20000)
+- GRAPH_INDEX_MAX_TWINS: twins kept in memory, LRU (default 256)
+- GRAPH_INDEX_SEMANTIC_MIN_SCORE: cosine floor for semantic seeds (default 0.35)
+- GRAPH_INDEX_EMBED_BATCH_SIZE: node texts per embedding request (default 512, max 2048)
+- GRAPH_INDEX_EMBED_RETRY_SECONDS: first backoff after a failed node embedding build (default 30)
+- GRAPH_VERSION_CACHE_SECONDS: how long a Redis version stamp is reused (default 5)
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from modules.async_db import run_db
+from modules.observability import supabase
+
+logger = logging.getLogger(__name__)
+
+GRAPH_INDEX_ENABLED = os.getenv("GRAPH_INDEX_ENABLED", "true").lower() == "true"
+GRAPH_INDEX_TTL_SECONDS = float(os.getenv("GRAPH_INDEX_TTL_SECONDS", "300"))
+GRAPH_INDEX_MAX_NODES = int(os.getenv("GRAPH_INDEX_MAX_NODES", "5000"))
+GRAPH_INDEX_MAX_EDGES = int(os.getenv("GRAPH_INDEX_MAX_EDGES", "20000"))
+GRAPH_INDEX_MAX_TWINS = int(os.getenv("GRAPH_INDEX_MAX_TWINS", "256"))
+GRAPH_INDEX_SEMANTIC_MIN_SCORE = float(os.getenv("GRAPH_INDEX_SEMANTIC_MIN_SCORE", "0.35"))
+# OpenAI accepts at most 2048 inputs per embeddings request.
+GRAPH_INDEX_EMBED_BATCH_SIZE = min(2048, max(1, int(os.getenv("GRAPH_INDEX_EMBED_BATCH_SIZE", "512"))))
+GRAPH_INDEX_EMBED_RETRY_SECONDS = max(1.0, float(os.getenv("GRAPH_INDEX_EMBED_RETRY_SECONDS", "30")))
+GRAPH_VERSION_CACHE_SECONDS = max(0.0, float(os.getenv("GRAPH_VERSION_CACHE_SECONDS", "5")))
+
+GRAPH_VERSION_KEY_PREFIX = "graph_version:"
+_PAGE_SIZE = 1000
+_EXPANSION_CACHE_SIZE = 256
+_EMBED_RETRY_MAX_SECONDS = 1800.0
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def _node_text(node: Dict[str, Any]) -> str:
+    return f"{node.get('name') or ''}: {node.get('description') or ''}".strip()
+
+
+class _TokenIndex:
+    """Inverted index with prefix lookup ("invest" matches "investment")."""
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = {}
+        self._vocab: List[str] = []
+
+    def add(self, node_id: str, text: str) -> None:
+        for token in _tokenize(text):
+            self._postings.setdefault(token, set()).add(node_id)
+
+    def freeze(self) -> None:
+        self._vocab = sorted(self._postings)
+
+    def lookup_prefix(self, prefix: str) -> Set[str]:
+        matches: Set[str] = set()
+        start = bisect.bisect_left(self._vocab, prefix)
+        for token in self._vocab[start:]:
+            if not token.startswith(prefix):
+                break
+            matches |= self._postings[token]
+        return matches
+
+    def lookup_term(self, term: str) -> Set[str]:
+        """Nodes whose field contains every token of term (each as a prefix)."""
+        result: Optional[Set[str]] = None
+        for token in _tokenize(term):
+            ids = self.lookup_prefix(token)
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return result or set()
+
+
+class GraphIndex:
+    """Immutable snapshot of one twin's graph at a given version stamp."""
+
+    def __init__(self, twin_id: str, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], version: str = ""):
+        self.twin_id = twin_id
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.order: List[str] = []
+        for node in nodes:
+            node_id = node.get("id")
+            if node_id and node_id not in self.nodes:
+                self.nodes[node_id] = node
+                self.order.append(node_id)
+
+        self.edges: List[Dict[str, Any]] = []
+        self.adjacency: Dict[str, List[Dict[str, Any]]] = {}
+        for edge in edges:
+            from_id = edge.get("from_node_id")
+            to_id = edge.get("to_node_id")
+            if from_id not in self.nodes or to_id not in self.nodes:
+                continue
+            self.edges.append(edge)
+            self.adjacency.setdefault(from_id, []).append(edge)
+            if to_id != from_id:
+                self.adjacency.setdefault(to_id, []).append(edge)
+
+        self.name_index = _TokenIndex()
+        self.description_index = _TokenIndex()
+        for node_id in self.order:
+            node = self.nodes[node_id]
+            self.name_index.add(node_id, node.get("name") or "")
+            self.description_index.add(node_id, node.get("description") or "")
+        self.name_index.freeze()
+        self.description_index.freeze()
+
+        self._position = {node_id: i for i, node_id in enumerate(self.order)}
+        self._embedding_ids: List[str] = []
+        self._vectors: Dict[Tuple[str, str], np.ndarray] = {}
+        self._embedding_matrix: Optional[np.ndarray] = None
+        self._embedding_lock = threading.Lock()
+        self._embedding_task: Optional["asyncio.Task[Optional[np.ndarray]]"] = None
+        self._embed_failures = 0
+        self._embed_retry_at = 0.0
+        self._expansions: "OrderedDict[Tuple[Any, ...], Tuple[List[str], List[Dict[str, Any]]]]" = OrderedDict()
+        self._expansions_lock = threading.Lock()
+
+    def node_list(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        ids = self.order if limit is None else self.order[:limit]
+        return [self.nodes[node_id] for node_id in ids]
+
+    def keyword_seeds(self, query: str, max_seeds: int, max_terms: int = 3) -> List[Dict[str, Any]]:
+        """Score nodes by query terms: +3 per name match, +1 per description match."""
+        keywords = [w.strip() for w in (query or "").split() if len(w.strip()) > 2]
+        scores: Dict[str, int] = {}
+        for term in keywords[:max_terms]:
+            for node_id in self.name_index.lookup_term(term):
+                scores[node_id] = scores.get(node_id, 0) + 3
+            for node_id in self.description_index.lookup_term(term):
+                scores[node_id] = scores.get(node_id, 0) + 1
+        ranked = sorted(scores, key=lambda node_id: (-scores[node_id], self._position[node_id]))
+        return [self.nodes[node_id] for node_id in ranked[:max_seeds]]
+
+    def neighbors(self, node_ids: Iterable[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """1-hop neighbors and the edges connecting them (same contract as _expand_one_hop)."""
+        frontier = set(node_ids)
+        neighbor_ids: List[str] = []
+        seen_neighbors: Set[str] = set()
+        edges: List[Dict[str, Any]] = []
+        seen_edges: Set[Any] = set()
+        for node_id in sorted(frontier, key=lambda nid: self._position.get(nid, len(self._position))):
+            for edge in self.adjacency.get(node_id, []):
+                edge_key = edge.get("id") or id(edge)
+                if edge_key not in seen_edges:
+                    seen_edges.add(edge_key)
+                    edges.append(edge)
+                other = edge["to_node_id"] if edge.get("from_node_id") == node_id else edge.get("from_node_id")
+                if other not in frontier and other not in seen_neighbors:
+                    seen_neighbors.add(other)
+                    neighbor_ids.append(other)
+        return [self.nodes[node_id] for node_id in neighbor_ids], edges
+
+    def expand(
+        self, seed_ids: List[str], max_hops: int, max_nodes: int
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Breadth-first expansion from seeds, capped at max_nodes.
+
+        Returns (nodes in discovery order, edges among those nodes). Results are
+        memoized per (seeds, hops, cap) for the lifetime of this index version.
+        """
+        cache_key = (tuple(seed_ids), max_hops, max_nodes)
+        with self._expansions_lock:
+            cached = self._expansions.get(cache_key)
+            if cached is not None:
+                self._expansions.move_to_end(cache_key)
+        if cached is None:
+            cached = self._expand_uncached(seed_ids, max_hops, max_nodes)
+            with self._expansions_lock:
+                self._expansions[cache_key] = cached
+                while len(self._expansions) > _EXPANSION_CACHE_SIZE:
+                    self._expansions.popitem(last=False)
+        node_ids, edges = cached
+        return [self.nodes[node_id] for node_id in node_ids], list(edges)
+
+    def _expand_uncached(self, seed_ids: List[str], max_hops: int, max_nodes: int):
+        selected = [node_id for node_id in dict.fromkeys(seed_ids) if node_id in self.nodes]
+        visited = set(selected)
+        frontier = list(selected)
+        for _hop in range(max_hops):
+            if len(selected) >= max_nodes or not frontier:
+                break
+            neighbor_nodes, _edges = self.neighbors(frontier)
+            next_frontier = []
+            for node in neighbor_nodes:
+                if node["id"] not in visited and len(selected) < max_nodes:
+                    visited.add(node["id"])
+                    selected.append(node["id"])
+                    next_frontier.append(node["id"])
+            frontier = next_frontier
+
+        edges = []
+        seen_edges: Set[Any] = set()
+        for node_id in selected:
+            for edge in self.adjacency.get(node_id, []):
+                edge_key = edge.get("id") or id(edge)
+                if edge_key in seen_edges:
+                    continue
+                if edge.get("from_node_id") in visited and edge.get("to_node_id") in visited:
+                    seen_edges.add(edge_key)
+                    edges.append(edge)
+        return selected, edges
+
+    async def semantic_seeds(
+        self,
+        query: str,
+        top_k: int = 5,
+        min_score: float = GRAPH_INDEX_SEMANTIC_MIN_SCORE,
+    ) -> List[Dict[str, Any]]:
+        """
+        Nodes whose name/description embedding is closest to the query.
+
+        Returns [] until the node embeddings are built; the first call starts
+        that build in the background so the request never waits on it.
+        """
+        if not query or not self.nodes:
+            return []
+        matrix = self._embedding_matrix
+        if matrix is None:
+            self.schedule_embeddings()
+            return []
+        if not len(matrix):
+            return []
+        from modules.embeddings import get_embeddings_async
+
+        query_vector = np.asarray((await get_embeddings_async([query]))[0], dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if not norm:
+            return []
+        scores = matrix @ (query_vector / norm)
+        best = np.argsort(-scores)[:top_k]
+        return [self.nodes[self._embedding_ids[i]] for i in best if scores[i] >= min_score]
+
+    def schedule_embeddings(self) -> None:
+        """Start building node embeddings in the background unless running or backing off."""
+        if self._embedding_matrix is not None:
+            return
+        if self._embedding_task is not None and not self._embedding_task.done():
+            return
+        if time.monotonic() < self._embed_retry_at:
+            return
+        task = asyncio.get_running_loop().create_task(self.build_embeddings())
+        self._embedding_task = task
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def build_embeddings(self) -> Optional[np.ndarray]:
+        """
+        Embed node texts in batches of GRAPH_INDEX_EMBED_BATCH_SIZE and build the
+        normalized matrix. Completed batches are kept when a later one fails;
+        the failure pushes the next attempt back exponentially.
+        """
+        if self._embedding_matrix is not None:
+            return self._embedding_matrix
+        from modules.embeddings import get_embeddings_async
+
+        keys = [(node_id, _node_text(self.nodes[node_id])) for node_id in self.order]
+        keys = [key for key in keys if key[1].strip(": ")]
+        missing = [key for key in keys if key not in self._vectors]
+        try:
+            for start in range(0, len(missing), GRAPH_INDEX_EMBED_BATCH_SIZE):
+                batch = missing[start : start + GRAPH_INDEX_EMBED_BATCH_SIZE]
+                vectors = await get_embeddings_async([text for _node_id, text in batch])
+                if len(vectors) != len(batch):
+                    raise ValueError(f"expected {len(batch)} embeddings, got {len(vectors)}")
+                for key, vector in zip(batch, vectors):
+                    self._vectors[key] = np.asarray(vector, dtype=np.float32)
+        except Exception as e:
+            self._embed_failures += 1
+            delay = min(_EMBED_RETRY_MAX_SECONDS, GRAPH_INDEX_EMBED_RETRY_SECONDS * 2 ** (self._embed_failures - 1))
+            self._embed_retry_at = time.monotonic() + delay
+            with _indexes_lock:
+                _stats["embedding_failures"] += 1
+            logger.warning(f"Graph node embeddings failed for {self.twin_id}; retrying in {delay:.0f}s: {e}")
+            return None
+
+        with self._embedding_lock:
+            if not keys:
+                self._embedding_matrix = np.zeros((0, 0), dtype=np.float32)
+                return self._embedding_matrix
+            matrix = np.vstack([self._vectors[key] for key in keys])
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._embedding_ids = [node_id for node_id, _text in keys]
+            self._embedding_matrix = matrix / norms
+        self._embed_failures = 0
+        return self._embedding_matrix
+
+    def inherit_embeddings(self, previous: "GraphIndex") -> None:
+        """Reuse the previous version's vectors for nodes whose text is unchanged."""
+        current = {(node_id, _node_text(self.nodes[node_id])) for node_id in self.order}
+        self._vectors.update({key: vector for key, vector in previous._vectors.items() if key in current})
+        # A rebuild must not bypass the backoff of a failing embedding provider.
+        self._embed_failures = previous._embed_failures
+        self._embed_retry_at = previous._embed_retry_at
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "twin_id": self.twin_id,
+            "version": self.version,
+            "nodes": len(self.nodes),
+            "edges": len(self.edges),
+            "age_seconds": round(time.monotonic() - self.loaded_at, 3),
+            "embedded_nodes": len(self._embedding_ids) if self._embedding_matrix is not None else 0,
+            "cached_expansions": len(self._expansions),
+        }
+
+
+# --- Version stamps -------------------------------------------------------
+
+_local_versions: Dict[str, int] = {}
+# twin_id -> (Redis stamp, monotonic time it was read)
+_remote_versions: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_versions_lock = threading.Lock()
+
+
+def _get_redis():
+    try:
+        from modules.job_queue import get_redis_client
+
+        return get_redis_client()
+    except Exception:
+        return None
+
+
+def bump_graph_version(twin_id: str) -> None:
+    """Mark a twin's graph as changed so cached indexes rebuild on next use."""
+    if not twin_id:
+        return
+    with _versions_lock:
+        _local_versions[twin_id] = _local_versions.get(twin_id, 0) + 1
+        _remote_versions.pop(twin_id, None)
+    client = _get_redis()
+    if client is not None:
+        try:
+            client.incr(f"{GRAPH_VERSION_KEY_PREFIX}{twin_id}")
+        except Exception as e:
+            logger.warning(f"Graph version bump failed in Redis for {twin_id}: {e}")
+
+
+def _cached_graph_version(twin_id: str) -> Optional[str]:
+    with _versions_lock:
+        cached = _remote_versions.get(twin_id)
+        if cached is None or time.monotonic() - cached[1] >= GRAPH_VERSION_CACHE_SECONDS:
+            return None
+        return f"{_local_versions.get(twin_id, 0)}:{cached[0]}"
+
+
+def get_graph_version(twin_id: str) -> str:
+    """Read the twin's version stamp from Redis (blocking) and refresh the short-lived cache."""
+    remote = ""
+    client = _get_redis()
+    if client is not None:
+        try:
+            remote = client.get(f"{GRAPH_VERSION_KEY_PREFIX}{twin_id}") or "0"
+        except Exception:
+            remote = ""
+    with _versions_lock:
+        _remote_versions[twin_id] = (remote, time.monotonic())
+        _remote_versions.move_to_end(twin_id)
+        while len(_remote_versions) > GRAPH_INDEX_MAX_TWINS:
+            _remote_versions.popitem(last=False)
+        local = _local_versions.get(twin_id, 0)
+    return f"{local}:{remote}"
+
+
+# --- Index cache ----------------------------------------------------------
+
+_indexes: "OrderedDict[str, GraphIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_stats = {"hits": 0, "builds": 0, "stale_rebuilds": 0, "shared_rebuilds": 0, "errors": 0, "embedding_failures": 0}
+_background_tasks: Set["asyncio.Task[Any]"] = set()
+# In-flight rebuilds keyed by (twin_id, version) so concurrent stale readers share one load.
+_loads: Dict[Tuple[str, str], "asyncio.Task[Optional[GraphIndex]]"] = {}
+
+
+def _fetch_paged(table: str, twin_id: str, cap: int) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    while len(rows) < cap:
+        start = len(rows)
+        end = min(start + _PAGE_SIZE, cap) - 1
+        res = supabase.table(table).select("*").eq("twin_id", twin_id).order("id").range(start, end).execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < end - start + 1:
+            break
+    return rows
+
+
+def load_graph_index(twin_id: str, version: str = "") -> GraphIndex:
+    """Read a twin's nodes and edges from Supabase and build an index (blocking)."""
+    nodes = _fetch_paged("nodes", twin_id, GRAPH_INDEX_MAX_NODES)
+    edges = _fetch_paged("edges", twin_id, GRAPH_INDEX_MAX_EDGES)
+    return GraphIndex(twin_id, nodes, edges, version=version)
+
+
+async def get_graph_index(twin_id: str) -> Optional[GraphIndex]:
+    """Return a fresh index for twin_id, rebuilding it if its version stamp moved."""
+    if not twin_id:
+        return None
+    version = _cached_graph_version(twin_id)
+    if version is None:
+        version = await asyncio.to_thread(get_graph_version, twin_id)
+    with _indexes_lock:
+        current = _indexes.get(twin_id)
+        if (
+            current is not None
+            and current.version == version
+            and time.monotonic() - current.loaded_at < GRAPH_INDEX_TTL_SECONDS
+        ):
+            _indexes.move_to_end(twin_id)
+            _stats["hits"] += 1
+            return current
+        loop = asyncio.get_running_loop()
+        task = _loads.get((twin_id, version))
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(_rebuild_graph_index(twin_id, version, current))
+            _loads[(twin_id, version)] = task
+            task.add_done_callback(lambda done, key=(twin_id, version): _forget_load(key, done))
+        else:
+            _stats["shared_rebuilds"] += 1
+    # Shielded so one cancelled caller does not abort the rebuild the others wait on.
+    return await asyncio.shield(task)
+
+
+def _forget_load(key: Tuple[str, str], task: "asyncio.Task[Optional[GraphIndex]]") -> None:
+    with _indexes_lock:
+        if _loads.get(key) is task:
+            del _loads[key]
+
+
+async def _rebuild_graph_index(twin_id: str, version: str, current: Optional[GraphIndex]) -> Optional[GraphIndex]:
+    try:
+        index = await run_db(load_graph_index, twin_id, version, name="graph_index.load")
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.error(f"Error loading graph index for {twin_id}: {e}")
+        return None
+
+    if current is not None:
+        index.inherit_embeddings(current)
+        if current._embedding_matrix is not None:
+            # This twin uses semantic seeds; re-embed changed nodes now rather than on a query.
+            index.schedule_embeddings()
+    with _indexes_lock:
+        _stats["builds"] += 1
+        if current is not None:
+            _stats["stale_rebuilds"] += 1
+        _indexes[twin_id] = index
+        _indexes.move_to_end(twin_id)
+        while len(_indexes) > GRAPH_INDEX_MAX_TWINS:
+            _indexes.popitem(last=False)
+    return index
+
+
+def invalidate_graph_index(twin_id: Optional[str] = None) -> None:
+    """Drop cached indexes (one twin, or all when twin_id is None) in this process."""
+    with _indexes_lock:
+        if twin_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(twin_id, None)
+    with _versions_lock:
+        if twin_id is None:
+            _remote_versions.clear()
+        else:
+            _remote_versions.pop(twin_id, None)
+
+
+def get_graph_index_stats() -> Dict[str, Any]:
+    with _indexes_lock:
+        return {
+            "enabled": GRAPH_INDEX_ENABLED,
+            "twins": len(_indexes),
+            "max_twins": GRAPH_INDEX_MAX_TWINS,
+            "ttl_seconds": GRAPH_INDEX_TTL_SECONDS,
+            **_stats,
+        }
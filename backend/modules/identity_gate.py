@@ -16,7 +16,7 @@ from modules.owner_memory_store import (
     format_owner_memory_context
 )
 from modules.clarification_manager import build_clarification
-from modules.observability import supabase
+from modules.twin_cache import get_twin_settings
 
 
 STANCE_PATTERNS = [
@@ -64,8 +64,7 @@ def _contains_any(text: str, keywords: set) -> bool:
 
 def _load_intent_profile(twin_id: str) -> Dict[str, str]:
     try:
-        twin_res = supabase.rpc("get_twin_system", {"t_id": twin_id}).single().execute()
-        settings = twin_res.data.get("settings", {}) if twin_res.data else {}
+        settings = get_twin_settings(twin_id)
         profile = settings.get("intent_profile") or {}
         if not isinstance(profile, dict):
             return {}
@@ -5,6 +5,7 @@ Routes generation requests across OpenAI, Cerebras, and Anthropic with:
 - task-aware provider preference
 - automatic fallback
 - per-request telemetry (provider/model/latency/attempts)
+- token streaming for text generation (stream_text)
 """
 from __future__ import annotations
 
@@ -13,7 +14,7 @@ import logging
 import os
 import re
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import httpx
 
@@ -296,6 +297,132 @@ async def invoke_text(
     raise RuntimeError(f"All providers failed for task '{task}': {attempts}")
 
 
+async def _stream_openai(
+    messages: List[Dict[str, str]],
+    *,
+    temperature: float,
+    max_tokens: int,
+    on_token: Callable[[str], None],
+) -> Tuple[str, str]:
+    client = get_async_openai_client()
+    stream = await client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=list(messages),
+        temperature=temperature,
+        max_tokens=max_tokens,
+        timeout=PROVIDER_TIMEOUT_SECONDS,
+        stream=True,
+    )
+    parts: List[str] = []
+    async for chunk in stream:
+        choices = getattr(chunk, "choices", None) or []
+        delta = getattr(choices[0].delta, "content", None) if choices else None
+        if delta:
+            parts.append(delta)
+            on_token(delta)
+    return "".join(parts).strip(), OPENAI_MODEL
+
+
+@observe(as_type="generation")
+async def _stream_provider(
+    provider: str,
+    messages: List[Dict[str, str]],
+    *,
+    temperature: float,
+    max_tokens: int,
+    on_token: Callable[[str], None],
+) -> Tuple[str, str]:
+    langfuse_context.update_current_observation(
+        name=f"llm_{provider}_stream",
+        input=messages,
+    )
+    if provider == "openai":
+        return await _stream_openai(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            on_token=on_token,
+        )
+    # Providers without a streaming client deliver the whole completion as one token.
+    content, model = await _call_provider(
+        provider,
+        messages,
+        json_mode=False,
+        temperature=temperature,
+        max_tokens=max_tokens,
+    )
+    if content:
+        on_token(content)
+    return content, model
+
+
+async def stream_text(
+    messages: List[Dict[str, str]],
+    *,
+    on_token: Callable[[str], None],
+    task: str = "general",
+    temperature: float = 0.0,
+    max_tokens: int = 1024,
+    preferred_provider: Optional[str] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Like invoke_text, but passes each generated token to on_token as it arrives.
+
+    Falls back to the next provider only while nothing has been emitted; a
+    failure after the first token is raised so the caller can retract it.
+    Route metadata adds ttft_ms (time to first token) next to latency_ms.
+    """
+    attempts: List[Dict[str, Any]] = []
+    candidates = _candidate_providers(task, preferred_provider=preferred_provider)
+    if not candidates:
+        raise RuntimeError("No configured inference providers available")
+
+    for provider in candidates:
+        start = time.perf_counter()
+        first_token_at: List[float] = []
+
+        def _forward(delta: str) -> None:
+            if not first_token_at:
+                first_token_at.append(time.perf_counter())
+            on_token(delta)
+
+        try:
+            content, model = await _stream_provider(
+                provider,
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                on_token=_forward,
+            )
+            latency_ms = round((time.perf_counter() - start) * 1000, 2)
+            meta = {
+                "provider": provider,
+                "model": model,
+                "task": task,
+                "latency_ms": latency_ms,
+                "ttft_ms": round((first_token_at[0] - start) * 1000, 2) if first_token_at else None,
+                "streamed": True,
+                "fallback_used": len(attempts) > 0,
+                "attempts": attempts + [{"provider": provider, "status": "ok", "latency_ms": latency_ms}],
+            }
+            return content, meta
+        except Exception as e:
+            latency_ms = round((time.perf_counter() - start) * 1000, 2)
+            attempts.append(
+                {
+                    "provider": provider,
+                    "status": "error",
+                    "latency_ms": latency_ms,
+                    "error": str(e),
+                }
+            )
+            logger.warning("[InferenceRouter] provider=%s stream failed task=%s: %s", provider, task, e)
+            if first_token_at:
+                raise RuntimeError(f"Stream for task '{task}' failed after first token: {attempts}") from e
+
+    raise RuntimeError(f"All providers failed for task '{task}': {attempts}")
+
+
 async def invoke_json(
     messages: List[Dict[str, str]],
     *,
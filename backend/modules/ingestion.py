@@ -9,24 +9,37 @@ import time
 import httpx
 import html
 import html as html_lib
+import itertools
 import asyncio
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Optional, Any, Tuple, Callable, Iterable, Iterator
 from bs4 import BeautifulSoup
 from modules.transcription import transcribe_audio_multi
-from modules.embeddings import get_embedding
+from modules.embeddings import get_embeddings_async, EMBEDDING_PROVIDER
 from PyPDF2 import PdfReader
 import docx
 import openpyxl
 from youtube_transcript_api import YouTubeTranscriptApi
-from modules.clients import get_openai_client, get_pinecone_index
+from modules.clients import get_openai_client, get_async_openai_client, get_pinecone_index
+from modules.chunk_enrichment import (
+    INGESTION_ENRICH_MODEL,
+    INGESTION_ENRICH_PACK_MAX_CHARS,
+    INGESTION_ENRICH_PACK_SIZE,
+    INGESTION_ENRICH_RETRY_SECONDS,
+    analyze_chunk_batch,
+    default_chunk_analysis,
+    is_clearly_factual,
+    plan_enrichment_packs,
+)
 from modules.observability import supabase, log_ingestion_event
 from modules.ingestion_diagnostics import start_step, finish_step, build_error
 from modules.health_checks import run_all_health_checks, calculate_content_hash
 from modules.access_groups import get_default_group, add_content_permission
 from modules.governance import AuditLogger
 from modules.delphi_namespace import get_primary_namespace_for_twin, resolve_creator_id_for_twin
+from modules.namespace_ledger import record_namespace_write
 from modules.doc_sectioning import extract_section_blocks
 from modules.pinecone_adapter import PineconeIndexAdapter
+from modules.async_db import run_db
 from modules.persona_extraction_service import run_persona_extraction_for_source
 
 
@@ -157,31 +170,35 @@ class PIIScrubber:
 
 
 def extract_text_from_pdf(file_path: str) -> str:
-    text, _chunk_entries = extract_pdf_text_and_chunk_entries(
-        file_path,
-        doc_name=os.path.basename(file_path) or "document",
-    )
-    return text
+    return "\n".join(page["text"] for page in iter_pdf_pages(file_path))
 
 
-def _extract_pdf_pages(file_path: str) -> List[Dict[str, Any]]:
+# DOCX/XLSX text is streamed to the chunker in sections of about this many
+# characters. Documents shorter than one section are chunked as a single block.
+INGESTION_STREAM_SECTION_CHARS = max(1000, int(os.getenv("INGESTION_STREAM_SECTION_CHARS", "200000")))
+
+
+def iter_pdf_pages(file_path: str) -> Iterator[Dict[str, Any]]:
     """
-    Extract per-page text from a PDF while preserving page numbers.
+    Yield per-page text from a PDF one page at a time, preserving page numbers.
     """
     reader = PdfReader(file_path)
-    pages: List[Dict[str, Any]] = []
     for page_number, page in enumerate(reader.pages, 1):
         # Some PDFs return None for image-only pages; keep extraction best-effort
         # instead of crashing the whole ingest on a single page.
         page_text = (page.extract_text() or "").strip()
         if page_text:
-            pages.append(
-                {
-                    "page_number": page_number,
-                    "text": page_text,
-                }
-            )
-    return pages
+            yield {
+                "page_number": page_number,
+                "text": page_text,
+            }
+
+
+def _extract_pdf_pages(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Extract per-page text from a PDF while preserving page numbers.
+    """
+    return list(iter_pdf_pages(file_path))
 
 
 def _safe_doc_name(value: str) -> str:
@@ -191,14 +208,13 @@ def _safe_doc_name(value: str) -> str:
     return name.replace("\\", "/")
 
 
-def _build_pdf_chunk_entries(
-    pages: List[Dict[str, Any]],
+def _iter_pdf_chunk_entries(
+    pages: Iterable[Dict[str, Any]],
     *,
     doc_name: str,
     chunk_size: int = 1000,
     overlap: int = 200,
-) -> List[Dict[str, Any]]:
-    entries: List[Dict[str, Any]] = []
+) -> Iterator[Dict[str, Any]]:
     safe_doc_name = _safe_doc_name(doc_name)
 
     for page in pages:
@@ -251,19 +267,27 @@ def _build_pdf_chunk_entries(
             for chunk in chunk_text(block_text, chunk_size=chunk_size, overlap=overlap):
                 if not chunk or not chunk.strip():
                     continue
-                entries.append(
-                    {
-                        "text": chunk,
-                        "section_title": section_title,
-                        "section_path": section_path,
-                        "chunk_type": str(block.get("chunk_type") or "section"),
-                        "block_type": str(block.get("block_type") or "answer_text"),
-                        "is_answer_text": _to_bool(block.get("is_answer_text"), default=True),
-                        "page_number": page_number,
-                    }
-                )
+                yield {
+                    "text": chunk,
+                    "section_title": section_title,
+                    "section_path": section_path,
+                    "chunk_type": str(block.get("chunk_type") or "section"),
+                    "block_type": str(block.get("block_type") or "answer_text"),
+                    "is_answer_text": _to_bool(block.get("is_answer_text"), default=True),
+                    "page_number": page_number,
+                }
 
-    return entries
+
+def _build_pdf_chunk_entries(
+    pages: Iterable[Dict[str, Any]],
+    *,
+    doc_name: str,
+    chunk_size: int = 1000,
+    overlap: int = 200,
+) -> List[Dict[str, Any]]:
+    return list(
+        _iter_pdf_chunk_entries(pages, doc_name=doc_name, chunk_size=chunk_size, overlap=overlap)
+    )
 
 
 def extract_pdf_text_and_chunk_entries(
@@ -284,28 +308,120 @@ def extract_pdf_text_and_chunk_entries(
     return text, chunk_entries
 
 
-def extract_text_from_docx(file_path: str) -> str:
-    """Extract text from a Word document."""
+def iter_docx_lines(file_path: str) -> Iterator[str]:
+    """Yield the paragraphs of a Word document in order."""
     doc = docx.Document(file_path)
-    text = []
     for para in doc.paragraphs:
-        text.append(para.text)
-    return "\n".join(text)
+        yield para.text
+
+
+def extract_text_from_docx(file_path: str) -> str:
+    """Extract text from a Word document."""
+    return "\n".join(iter_docx_lines(file_path))
+
+
+def iter_excel_lines(file_path: str) -> Iterator[str]:
+    """
+    Yield sheet headers and pipe-joined rows of an Excel file.
+
+    The workbook is opened read-only so rows are parsed as they are iterated
+    instead of loading every sheet into memory.
+    """
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet_name in wb.sheetnames:
+            sheet = wb[sheet_name]
+            yield f"--- Sheet: {sheet_name} ---"
+            for row in sheet.iter_rows(values_only=True):
+                # Filter out None values and convert to string
+                row_text = [str(cell) for cell in row if cell is not None]
+                if row_text:
+                    yield " | ".join(row_text)
+    finally:
+        wb.close()
 
 
 def extract_text_from_excel(file_path: str) -> str:
     """Extract text from all sheets in an Excel file."""
-    wb = openpyxl.load_workbook(file_path, data_only=True)
-    text = []
-    for sheet_name in wb.sheetnames:
-        sheet = wb[sheet_name]
-        text.append(f"--- Sheet: {sheet_name} ---")
-        for row in sheet.iter_rows(values_only=True):
-            # Filter out None values and convert to string
-            row_text = [str(cell) for cell in row if cell is not None]
-            if row_text:
-                text.append(" | ".join(row_text))
-    return "\n".join(text)
+    return "\n".join(iter_excel_lines(file_path))
+
+
+def iter_text_sections(lines: Iterable[str], max_chars: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Group lines into sections of roughly max_chars characters (split on line
+    boundaries). Joining the section texts with newlines reproduces the
+    newline-joined input exactly.
+    """
+    max_chars = max_chars or INGESTION_STREAM_SECTION_CHARS
+    buffer: List[str] = []
+    size = 0
+    section_number = 0
+    for line in lines:
+        if buffer and size + len(line) > max_chars:
+            section_number += 1
+            yield {"section_number": section_number, "text": "\n".join(buffer)}
+            buffer, size = [], 0
+        buffer.append(line)
+        size += len(line) + 1
+    if buffer:
+        section_number += 1
+        yield {"section_number": section_number, "text": "\n".join(buffer)}
+
+
+class StreamedDocument:
+    """
+    Single-pass stream of chunk entries for a large upload.
+
+    Iterating pulls one page/section at a time from the extractor, turns it
+    into chunk entries and drops it, so only the extracted text is retained
+    (it is stored on the source row and fed to health checks). Pass an instance
+    as chunk_entries_override to process_and_index_text.
+    """
+
+    def __init__(
+        self,
+        units: Iterable[Dict[str, Any]],
+        build_entries: Callable[[Dict[str, Any]], Iterable[Dict[str, Any]]],
+    ):
+        self._units = units
+        self._build_entries = build_entries
+        self._parts: List[str] = []
+        self.units_read = 0
+        self.consumed = False
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self.consumed:
+            raise RuntimeError("StreamedDocument can only be iterated once")
+        self.consumed = True
+        for unit in self._units:
+            self.units_read += 1
+            self._parts.append(str(unit.get("text") or ""))
+            yield from self._build_entries(unit)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self._parts)
+
+
+def stream_document(file_path: str, *, doc_name: str, chunk_size: int = 1000, overlap: int = 200) -> Optional[StreamedDocument]:
+    """StreamedDocument for PDF/DOCX/XLSX files, or None for other types."""
+    if file_path.endswith(".pdf"):
+        return StreamedDocument(
+            iter_pdf_pages(file_path),
+            lambda page: _iter_pdf_chunk_entries(
+                [page], doc_name=doc_name, chunk_size=chunk_size, overlap=overlap
+            ),
+        )
+    if file_path.endswith(".docx"):
+        lines = iter_docx_lines(file_path)
+    elif file_path.endswith(".xlsx"):
+        lines = iter_excel_lines(file_path)
+    else:
+        return None
+    return StreamedDocument(
+        iter_text_sections(lines),
+        lambda section: chunk_text_with_metadata(section["text"], chunk_size=chunk_size, overlap=overlap),
+    )
 
 
 def extract_video_id(url: str) -> str:
@@ -1837,6 +1953,111 @@ def _build_embedding_text(entry: Dict[str, Any], chunk_text_value: str) -> str:
     return chunk_text_value
 
 
+# Bump when the hashed fields or their normalization change so that every
+# existing chunk is treated as new on the next ingest.
+CHUNK_HASH_VERSION = "v1"
+INGESTION_INCREMENTAL_ENABLED = os.getenv("INGESTION_INCREMENTAL_ENABLED", "true").lower() == "true"
+_CHUNK_HASH_FIELDS = (
+    "text",
+    "section_title",
+    "section_path",
+    "chunk_type",
+    "block_type",
+    "is_answer_text",
+    "page_number",
+)
+
+
+def _chunk_content_hash(entry: Dict[str, Any], metadata_override: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Content address for a chunk entry.
+
+    Covers everything that feeds the embedding, the enrichment prompt and the
+    stored metadata, so an unchanged hash means the existing vector, chunk row
+    and enrichment can be reused as-is.
+    """
+    payload = {field: entry.get(field) for field in _CHUNK_HASH_FIELDS}
+    payload["embedding_text"] = _build_embedding_text(entry, str(entry.get("text") or ""))
+    payload["metadata_override"] = metadata_override or {}
+    payload["embedding_provider"] = EMBEDDING_PROVIDER
+    payload["version"] = CHUNK_HASH_VERSION
+    return calculate_content_hash(json.dumps(payload, sort_keys=True, default=str))
+
+
+_CHUNK_PAGE_SIZE = 1000
+
+
+def _fetch_source_chunk_rows(source_id: str, columns: str) -> List[Dict[str, Any]]:
+    """
+    Read every chunk row of a source, paging past PostgREST's row cap (blocking).
+    """
+    from modules.observability import supabase
+    rows: List[Dict[str, Any]] = []
+    while True:
+        start = len(rows)
+        res = (
+            supabase.table("chunks")
+            .select(columns)
+            .eq("source_id", source_id)
+            .order("id")
+            .range(start, start + _CHUNK_PAGE_SIZE - 1)
+            .execute()
+        )
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < _CHUNK_PAGE_SIZE:
+            return rows
+
+
+def _delete_source_chunk_rows(source_id: str) -> None:
+    from modules.observability import supabase
+    supabase.table("chunks").delete().eq("source_id", source_id).execute()
+
+
+async def _purge_source_chunks(source_id: str, namespace: Optional[str], index: Any = None) -> int:
+    """
+    Delete every vector and chunk row of a source.
+
+    Vectors are deleted by ID (from the chunk rows) through the bulk writer,
+    then swept with a metadata filter delete for vectors that have no chunk
+    row (older or partial ingests). Returns the number of vectors deleted by ID.
+    """
+    index = index if index is not None else get_pinecone_index()
+    rows = await run_db(_fetch_source_chunk_rows, source_id, "id, vector_id", name="ingestion.source_vector_ids")
+    vector_ids = [row["vector_id"] for row in rows if row.get("vector_id")]
+    deleted = 0
+    if vector_ids:
+        stats = await PineconeIndexAdapter(index).delete_bulk_async(vector_ids, namespace)
+        deleted = stats["items"]
+        print(f"[Pinecone] Deleted {deleted} vectors for source {source_id} ({stats['vectors_per_sec']} vectors/sec)")
+    # Note: Delete by filter requires metadata indexing enabled or serverless index
+    await asyncio.to_thread(
+        index.delete,
+        filter={
+            "source_id": {"$eq": source_id}
+        },
+        namespace=namespace
+    )
+    await run_db(_delete_source_chunk_rows, source_id, name="ingestion.delete_source_chunks")
+    return deleted
+
+
+def _load_existing_chunks_by_hash(source_id: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Group a source's stored chunk rows by content hash.
+
+    Rows written before content hashing was introduced have no hash and are
+    never reused, so they are replaced on the next ingest.
+    """
+    by_hash: Dict[str, List[Dict[str, Any]]] = {}
+    for row in _fetch_source_chunk_rows(source_id, "id, vector_id, metadata"):
+        metadata = row.get("metadata") if isinstance(row.get("metadata"), dict) else {}
+        content_hash = metadata.get("content_hash")
+        key = content_hash if isinstance(content_hash, str) and content_hash else f"__unhashed__:{row.get('id')}"
+        by_hash.setdefault(key, []).append(row)
+    return by_hash
+
+
 def chunk_text_with_metadata(
     text: str,
     chunk_size: int = 1000,
@@ -1881,13 +2102,13 @@ def chunk_text_with_metadata(
 async def analyze_chunk_content(text: str) -> dict:
     """
     Analyzes a chunk to generate synthetic questions, category (Fact/Opinion), and tone.
+    Bulk ingestion goes through _enrich_chunk_texts, which packs chunks into
+    analyze_chunk_batch calls and only falls back to this per-chunk request.
     
     SECURITY: Sanitizes input before sending to LLM to prevent prompt injection.
     """
     from modules.llm_safety import sanitize_for_llm, PromptInjectionError
     
-    client = get_openai_client()
-    
     try:
         # SECURITY FIX H3: Sanitize user content before LLM call
         sanitized_result = sanitize_for_llm(text, strict_mode=False)  # Non-strict: warn but don't block
@@ -1897,9 +2118,9 @@ async def analyze_chunk_content(text: str) -> dict:
         
         safe_text = sanitized_result.sanitized_text
         
-        # Using gpt-4o-mini for better reasoning with JSON output
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        # Single-chunk path: packs of one and chunks a packed call did not return.
+        response = await get_async_openai_client().chat.completions.create(
+            model=INGESTION_ENRICH_MODEL,
             messages=[
                 {"role": "system", "content": """Analyze the text chunk provided. Return a JSON object with:
                 - 'questions': 3 brief questions this text chunk answers.
@@ -1919,10 +2140,252 @@ async def analyze_chunk_content(text: str) -> dict:
     except PromptInjectionError as e:
         print(f"[LLM Safety] Prompt injection detected in chunk: {e}")
         # Return safe defaults, don't process potentially malicious content
-        return {"questions": [], "category": "FACT", "tone": "Neutral", "opinion_map": None}
+        return default_chunk_analysis()
     except Exception as e:
         print(f"Error analyzing chunk: {e}")
-        return {"questions": [], "category": "FACT", "tone": "Neutral", "opinion_map": None}
+        return default_chunk_analysis()
+
+
+# Batch/concurrency knobs for the enrich + embed stage of process_and_index_text.
+INGESTION_EMBED_BATCH_SIZE = max(1, int(os.getenv("INGESTION_EMBED_BATCH_SIZE", "64")))
+INGESTION_ENRICH_CONCURRENCY = max(1, int(os.getenv("INGESTION_ENRICH_CONCURRENCY", "8")))
+# Chunk entries are enriched, embedded and indexed this many at a time.
+INGESTION_STREAM_BATCH_CHUNKS = max(1, int(os.getenv("INGESTION_STREAM_BATCH_CHUNKS", "256")))
+
+
+def _stage_throughput(count: int, seconds: float) -> float:
+    if seconds <= 0:
+        return float(count)
+    return round(count / seconds, 2)
+
+
+async def _enrich_chunk_texts(
+    texts: List[str],
+    *,
+    concurrency: int,
+    pack_size: int,
+    max_pack_chars: int = INGESTION_ENRICH_PACK_MAX_CHARS,
+) -> Tuple[List[dict], Dict[str, int]]:
+    """
+    Enrich chunk texts with as few LLM calls as possible.
+
+    Clearly factual chunks get the FACT defaults locally; the rest are packed
+    into analyze_chunk_batch calls (bounded by the semaphore). Packs of one and
+    chunks a packed call did not return go through analyze_chunk_content. A
+    pack whose request fails is retried once after INGESTION_ENRICH_RETRY_SECONDS
+    and then keeps the default analysis, so a throttled provider never sees one
+    call per chunk.
+    Returns analyses aligned with texts and skipped-vs-enriched counters.
+    """
+    analyses: List[Optional[dict]] = [None] * len(texts)
+    counts = {
+        "enrich_skipped": 0,
+        "enrich_llm_chunks": 0,
+        "enrich_llm_calls": 0,
+        "enrich_fallback_chunks": 0,
+        "enrich_failed_chunks": 0,
+    }
+    pending: List[int] = []
+    for index, text in enumerate(texts):
+        if is_clearly_factual(text):
+            analyses[index] = default_chunk_analysis()
+            counts["enrich_skipped"] += 1
+        else:
+            pending.append(index)
+    counts["enrich_llm_chunks"] = len(pending)
+    semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def _analyze_one(index: int) -> None:
+        async with semaphore:
+            counts["enrich_llm_calls"] += 1
+            analyses[index] = await analyze_chunk_content(texts[index])
+
+    async def _analyze_pack(pack: List[int]) -> None:
+        if len(pack) == 1:
+            await _analyze_one(pack[0])
+            return
+        results = None
+        for attempt in range(2):
+            if attempt:
+                await asyncio.sleep(INGESTION_ENRICH_RETRY_SECONDS)
+            async with semaphore:
+                counts["enrich_llm_calls"] += 1
+                try:
+                    results = await analyze_chunk_batch([texts[index] for index in pack])
+                    break
+                except Exception:
+                    continue
+        if results is None:
+            for index in pack:
+                analyses[index] = default_chunk_analysis()
+            counts["enrich_failed_chunks"] += len(pack)
+            return
+        missing = [index for index, result in zip(pack, results) if result is None]
+        for index, result in zip(pack, results):
+            if result is not None:
+                analyses[index] = result
+        counts["enrich_fallback_chunks"] += len(missing)
+        await asyncio.gather(*(_analyze_one(index) for index in missing))
+
+    packs = plan_enrichment_packs([texts[index] for index in pending], pack_size, max_pack_chars)
+    await asyncio.gather(*(_analyze_pack([pending[row] for row in pack]) for pack in packs))
+    return [a if isinstance(a, dict) else {} for a in analyses], counts
+
+
+async def _enrich_and_embed_chunks(
+    chunk_entries: List[Dict[str, Any]],
+    *,
+    embed: bool = True,
+    batch_size: int = INGESTION_EMBED_BATCH_SIZE,
+    enrich_concurrency: int = INGESTION_ENRICH_CONCURRENCY,
+    enrich_pack_size: Optional[int] = None,
+) -> Tuple[List[dict], List[Optional[List[float]]], Dict[str, Any]]:
+    """
+    Run LLM enrichment and embedding for chunk entries as two overlapping stages.
+
+    Enrichment packs several chunks per call (see _enrich_chunk_texts) under a
+    bounded semaphore; embeddings are requested in batches through
+    get_embeddings_async. Both lists are aligned with chunk_entries.
+    Returns (analyses, embeddings, stats) where stats carries per-stage timings,
+    throughput and skipped-vs-enriched counts for the ingestion step events.
+    """
+    texts = [str(entry.get("text") or "") for entry in chunk_entries]
+    batch_size = max(1, int(batch_size))
+    pack_size = max(1, int(enrich_pack_size or INGESTION_ENRICH_PACK_SIZE))
+
+    async def _enrich_all() -> Tuple[List[dict], Dict[str, int], float]:
+        started = time.perf_counter()
+        results, enrich_counts = await _enrich_chunk_texts(
+            texts, concurrency=enrich_concurrency, pack_size=pack_size
+        )
+        return results, enrich_counts, time.perf_counter() - started
+
+    async def _embed_all() -> Tuple[List[Optional[List[float]]], int, float]:
+        started = time.perf_counter()
+        if not embed:
+            return [None] * len(texts), 0, 0.0
+        embedding_inputs = [
+            _build_embedding_text(entry, chunk) for entry, chunk in zip(chunk_entries, texts)
+        ]
+        embeddings: List[Optional[List[float]]] = []
+        batches = 0
+        for start in range(0, len(embedding_inputs), batch_size):
+            batch = embedding_inputs[start:start + batch_size]
+            batch_vectors = await get_embeddings_async(batch)
+            if len(batch_vectors) != len(batch):
+                raise ValueError(
+                    f"Embedding batch size mismatch: requested={len(batch)} received={len(batch_vectors)}"
+                )
+            embeddings.extend(batch_vectors)
+            batches += 1
+        return embeddings, batches, time.perf_counter() - started
+
+    wall_started = time.perf_counter()
+    (analyses, enrich_counts, enrich_seconds), (embeddings, embed_batches, embed_seconds) = await asyncio.gather(
+        _enrich_all(),
+        _embed_all(),
+    )
+    wall_seconds = time.perf_counter() - wall_started
+
+    stats = {
+        "enrich_seconds": round(enrich_seconds, 3),
+        "enrich_chunks_per_sec": _stage_throughput(len(texts), enrich_seconds),
+        "enrich_concurrency": max(1, int(enrich_concurrency)),
+        "enrich_pack_size": pack_size,
+        **enrich_counts,
+        "embed_seconds": round(embed_seconds, 3),
+        "embed_chunks_per_sec": _stage_throughput(len(texts), embed_seconds) if embed else 0.0,
+        "embed_batches": embed_batches,
+        "embed_batch_size": batch_size,
+        "wall_seconds": round(wall_seconds, 3),
+    }
+    return analyses, embeddings, stats
+
+
+def _iter_batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, max(1, size)))
+        if not batch:
+            return
+        yield batch
+
+
+def _merge_stage_stats(total: Dict[str, Any], stats: Dict[str, Any]) -> None:
+    for key in ("enrich_seconds", "embed_seconds", "embed_batches", "wall_seconds"):
+        total[key] = round(total.get(key, 0) + stats.get(key, 0), 3)
+    for key in ("enrich_skipped", "enrich_llm_chunks", "enrich_llm_calls", "enrich_fallback_chunks", "enrich_failed_chunks"):
+        total[key] = total.get(key, 0) + stats.get(key, 0)
+    for key in ("enrich_concurrency", "enrich_pack_size", "embed_batch_size"):
+        total[key] = stats.get(key, total.get(key))
+
+
+def _build_chunk_records(
+    entry: Dict[str, Any],
+    *,
+    source_id: str,
+    twin_id: str,
+    content_hash: str,
+    analysis: dict,
+    embedding: Optional[List[float]],
+    metadata_override: Optional[Dict[str, Any]],
+    use_integrated_mode: bool,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Build the Pinecone vector payload and Supabase chunk row for one new chunk."""
+    chunk = str(entry.get("text") or "")
+    vector_id = str(uuid.uuid4())
+    chunk_id = str(uuid.uuid4())  # Supabase primary key
+
+    synth_questions = analysis.get("questions", [])
+
+    metadata = {
+        "source_id": source_id,
+        "twin_id": twin_id,
+        "chunk_id": chunk_id,  # Link back to DB chunk row
+        "text": chunk,  # Keep original text for grounding
+        "synthetic_questions": synth_questions,
+        "category": analysis.get("category", "FACT"),
+        "tone": analysis.get("tone", "Neutral"),
+        "is_verified": False,  # Explicitly mark regular sources as not verified
+        "content_hash": content_hash,
+    }
+
+    # Add opinion mapping if present
+    opinion_map = analysis.get("opinion_map")
+    if opinion_map and isinstance(opinion_map, dict):
+        metadata["opinion_topic"] = opinion_map.get("topic")
+        metadata["opinion_stance"] = opinion_map.get("stance")
+        metadata["opinion_intensity"] = opinion_map.get("intensity")
+
+    for section_key in ("section_title", "section_path", "chunk_type", "block_type"):
+        section_value = entry.get(section_key)
+        if isinstance(section_value, str) and section_value.strip():
+            metadata[section_key] = section_value.strip()
+    metadata["is_answer_text"] = _to_bool(entry.get("is_answer_text"), default=True)
+    page_number = entry.get("page_number")
+    if isinstance(page_number, int):
+        metadata["page_number"] = page_number
+    elif isinstance(page_number, str) and page_number.strip().isdigit():
+        metadata["page_number"] = int(page_number.strip())
+
+    if metadata_override:
+        metadata.update(metadata_override)
+
+    vector_payload = {
+        "id": vector_id,
+        "metadata": metadata,
+    }
+    if not use_integrated_mode:
+        vector_payload["values"] = embedding
+
+    db_chunk = {
+        "id": chunk_id,
+        "source_id": source_id,
+        "content": chunk,
+        "vector_id": vector_id,
+        "metadata": metadata,
+    }
+    return vector_payload, db_chunk
 
 
 async def process_and_index_text(
@@ -1932,204 +2395,268 @@ async def process_and_index_text(
     metadata_override: dict = None,
     provider: str = "unknown",
     correlation_id: Optional[str] = None,
-    chunk_entries_override: Optional[List[Dict[str, Any]]] = None,
+    chunk_entries_override: Optional[Iterable[Dict[str, Any]]] = None,
+    incremental: Optional[bool] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
 ):
-    # Step: chunked
-    chunk_event_id = start_step(
-        source_id=source_id,
-        twin_id=twin_id,
-        provider=provider,
-        step="chunked",
-        correlation_id=correlation_id,
-        message="Chunking text",
-    )
-    try:
-        chunk_entries = (
-            [entry for entry in (chunk_entries_override or []) if isinstance(entry, dict)]
-            if chunk_entries_override is not None
-            else chunk_text_with_metadata(text)
+    """
+    Chunk, enrich, embed and index text for a source.
+
+    Re-ingestion is incremental by default: each chunk entry is content-hashed
+    and chunks whose hash already exists for the source keep their vector ID,
+    chunk row and enrichment. Only new chunks are enriched, embedded and
+    upserted, and only chunks that disappeared are deleted. Pass
+    incremental=False (or set INGESTION_INCREMENTAL_ENABLED=false) to rebuild
+    every chunk. Returns the number of chunks indexed for the source.
+
+    Chunk entries are consumed lazily in batches of INGESTION_STREAM_BATCH_CHUNKS;
+    each batch is enriched, embedded, persisted and upserted before the next one
+    is read. chunk_entries_override may therefore be a generator (e.g. a
+    StreamedDocument), which keeps peak memory bounded by the batch rather than
+    the document. on_progress(progress) is called after every batch.
+    """
+    if incremental is None:
+        incremental = INGESTION_INCREMENTAL_ENABLED
+
+    open_steps: Dict[str, str] = {}
+
+    def _start(step: str, message: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        open_steps[step] = start_step(
+            source_id=source_id,
+            twin_id=twin_id,
+            provider=provider,
+            step=step,
+            correlation_id=correlation_id,
+            message=message,
+            metadata=metadata,
         )
-        chunks = [entry.get("text", "") for entry in chunk_entries if isinstance(entry, dict)]
+
+    def _finish(step: str, metadata: Dict[str, Any]) -> None:
         finish_step(
-            event_id=chunk_event_id,
+            event_id=open_steps.pop(step),
             source_id=source_id,
             twin_id=twin_id,
             provider=provider,
-            step="chunked",
+            step=step,
             status="completed",
             correlation_id=correlation_id,
-            metadata={"chunks": len(chunks)},
+            metadata=metadata,
         )
-    except Exception as e:
+
+    def _fail(step: str, code: str, e: Exception, raw: Dict[str, Any]) -> None:
+        # Later pipeline steps may already be open; close every open step with the error.
         err = build_error(
-            code="CHUNKING_FAILED",
+            code=code,
             message=str(e),
             provider=provider,
-            step="chunked",
+            step=step,
             correlation_id=correlation_id,
-            raw={"text_len": len(text) if text else 0},
+            raw=raw,
             exc=e,
         )
-        finish_step(
-            event_id=chunk_event_id,
-            source_id=source_id,
-            twin_id=twin_id,
-            provider=provider,
-            step="chunked",
-            status="error",
-            correlation_id=correlation_id,
-            error=err,
-        )
-        raise
-
-    # 0. Cleanup existing chunks for this source (idempotency)
-    from modules.observability import supabase
-    try:
-        supabase.table("chunks").delete().eq("source_id", source_id).execute()
-    except Exception as e:
-        print(f"[Ingestion] Warning: Failed to clean old chunks for source {source_id}: {e}")
+        for open_step in [step] + [s for s in list(open_steps) if s != step]:
+            if open_step not in open_steps:
+                continue
+            finish_step(
+                event_id=open_steps.pop(open_step),
+                source_id=source_id,
+                twin_id=twin_id,
+                provider=provider,
+                step=open_step,
+                status="error",
+                correlation_id=correlation_id,
+                error=err,
+            )
 
-    # Step: embedded
-    embed_event_id = start_step(
-        source_id=source_id,
-        twin_id=twin_id,
-        provider=provider,
-        step="embedded",
-        correlation_id=correlation_id,
-        message="Generating embeddings",
-        metadata={"chunks": len(chunks)},
-    )
+    # Step: chunked (completes once the entry stream is exhausted)
+    _start("chunked", "Chunking text")
+    if chunk_entries_override is not None:
+        entry_stream: Iterable[Dict[str, Any]] = chunk_entries_override
+    else:
+        try:
+            entry_stream = chunk_text_with_metadata(text)
+        except Exception as e:
+            _fail("chunked", "CHUNKING_FAILED", e, {"text_len": len(text) if text else 0})
+            raise
 
-    # Generate embeddings and prepare vectors
+    # 0. Load existing chunks for this source so unchanged content can be reused.
+    # Stale rows/vectors are removed only after the new ones are indexed.
+    from modules.observability import supabase
     index = get_pinecone_index()
     pinecone_adapter = PineconeIndexAdapter(index)
     use_integrated_mode = pinecone_adapter.mode == "integrated"
-    vectors = []
-    db_chunks = []
-    
-    try:
-        for entry in chunk_entries:
-            chunk = str(entry.get("text") or "")
-            if not chunk:
-                continue
-            vector_id = str(uuid.uuid4())
-            chunk_id = str(uuid.uuid4())  # Supabase primary key
+    target = {"resolved": False, "creator_id": None, "namespace": None}
 
-            # Analyze chunk for enrichment
-            analysis = await analyze_chunk_content(chunk)
-            synth_questions = analysis.get("questions", [])
+    def _resolve_target() -> None:
+        if not target["resolved"]:
+            target["creator_id"] = resolve_creator_id_for_twin(twin_id)
+            target["namespace"] = get_primary_namespace_for_twin(twin_id=twin_id, creator_id=target["creator_id"])
+            target["resolved"] = True
 
-            metadata = {
-                "source_id": source_id,
-                "twin_id": twin_id,
-                "chunk_id": chunk_id,  # Link back to DB chunk row
-                "text": chunk,  # Keep original text for grounding
-                "synthetic_questions": synth_questions,
-                "category": analysis.get("category", "FACT"),
-                "tone": analysis.get("tone", "Neutral"),
-                "is_verified": False  # Explicitly mark regular sources as not verified
-            }
+    existing_by_hash: Dict[str, List[Dict[str, Any]]] = {}
+    try:
+        existing_by_hash = _load_existing_chunks_by_hash(source_id)
+    except Exception as e:
+        # Without the existing rows nothing can be reused or cleaned up later,
+        # so fall back to a full rebuild: clear the source first.
+        print(f"[Ingestion] Warning: Failed to load existing chunks for source {source_id}, rebuilding: {e}")
+        try:
+            _resolve_target()
+            await _purge_source_chunks(source_id, target["namespace"], index)
+        except Exception as purge_error:
+            _fail("chunked", "INDEXING_FAILED", purge_error, {"source_id": source_id})
+            raise
+
+    counts = {"chunks": 0, "vectors": 0, "persisted": 0, "reused": 0, "batches": 0}
+    stage_stats: Dict[str, Any] = {}
+    upsert_seconds = 0.0
+    last_page_number = None
+    batches = _iter_batches(
+        (entry for entry in entry_stream if isinstance(entry, dict)),
+        INGESTION_STREAM_BATCH_CHUNKS,
+    )
 
-            # Add opinion mapping if present
-            opinion_map = analysis.get("opinion_map")
-            if opinion_map and isinstance(opinion_map, dict):
-                metadata["opinion_topic"] = opinion_map.get("topic")
-                metadata["opinion_stance"] = opinion_map.get("stance")
-                metadata["opinion_intensity"] = opinion_map.get("intensity")
-
-            for section_key in ("section_title", "section_path", "chunk_type", "block_type"):
-                section_value = entry.get(section_key)
-                if isinstance(section_value, str) and section_value.strip():
-                    metadata[section_key] = section_value.strip()
-            metadata["is_answer_text"] = _to_bool(entry.get("is_answer_text"), default=True)
-            page_number = entry.get("page_number")
-            if isinstance(page_number, int):
-                metadata["page_number"] = page_number
-            elif isinstance(page_number, str) and page_number.strip().isdigit():
-                metadata["page_number"] = int(page_number.strip())
-
-            if metadata_override:
-                metadata.update(metadata_override)
-
-            vector_payload = {
-                "id": vector_id,
-                "metadata": metadata,
-            }
-            if not use_integrated_mode:
-                embedding_text = _build_embedding_text(entry, chunk)
-                vector_payload["values"] = get_embedding(embedding_text)
+    while True:
+        try:
+            batch = next(batches, None)
+        except Exception as e:
+            _fail("chunked", "CHUNKING_FAILED", e, {"text_len": len(text) if text else 0, "chunks": counts["chunks"]})
+            raise
+        if batch is None:
+            break
+        counts["chunks"] += len(batch)
+        counts["batches"] += 1
+
+        # Step: embedded
+        if "embedded" not in open_steps:
+            _start("embedded", "Generating embeddings", {"chunks": len(batch)})
+        try:
+            new_entries: List[Dict[str, Any]] = []
+            new_hashes: List[str] = []
+            for entry in batch:
+                if entry.get("page_number") is not None:
+                    last_page_number = entry.get("page_number")
+                if not str(entry.get("text") or ""):
+                    continue
+                content_hash = _chunk_content_hash(entry, metadata_override)
+                candidates = existing_by_hash.get(content_hash) if incremental else None
+                if candidates:
+                    candidates.pop()
+                    counts["reused"] += 1
+                    continue
+                new_entries.append(entry)
+                new_hashes.append(content_hash)
 
-            vectors.append(vector_payload)
-            
-            db_chunks.append({
-                "id": chunk_id,
-                "source_id": source_id,
-                "content": chunk,
-                "vector_id": vector_id,
-                "metadata": metadata
-            })
+            # Enrichment (LLM) and embedding (batched) run concurrently for new chunks only.
+            analyses, embeddings, batch_stats = await _enrich_and_embed_chunks(
+                new_entries,
+                embed=not use_integrated_mode,
+            )
+            _merge_stage_stats(stage_stats, batch_stats)
+
+            vectors = []
+            db_chunks = []
+            for entry, content_hash, analysis, embedding in zip(new_entries, new_hashes, analyses, embeddings):
+                vector_payload, db_chunk = _build_chunk_records(
+                    entry,
+                    source_id=source_id,
+                    twin_id=twin_id,
+                    content_hash=content_hash,
+                    analysis=analysis,
+                    embedding=embedding,
+                    metadata_override=metadata_override,
+                    use_integrated_mode=use_integrated_mode,
+                )
+                vectors.append(vector_payload)
+                db_chunks.append(db_chunk)
+        except Exception as e:
+            _fail("embedded", "EMBEDDINGS_FAILED", e, {"chunks": counts["chunks"]})
+            raise
 
-        finish_step(
-            event_id=embed_event_id,
-            source_id=source_id,
-            twin_id=twin_id,
-            provider=provider,
-            step="embedded",
-            status="completed",
-            correlation_id=correlation_id,
-            metadata={"chunks": len(chunks), "vectors": len(vectors)},
-        )
-    except Exception as e:
-        err = build_error(
-            code="EMBEDDINGS_FAILED",
-            message=str(e),
-            provider=provider,
-            step="embedded",
-            correlation_id=correlation_id,
-            raw={"chunks": len(chunks)},
-            exc=e,
-        )
-        finish_step(
-            event_id=embed_event_id,
-            source_id=source_id,
-            twin_id=twin_id,
-            provider=provider,
-            step="embedded",
-            status="error",
-            correlation_id=correlation_id,
-            error=err,
-        )
-        raise
+        # Step: indexed (Supabase chunks + Pinecone upsert + permissions)
+        if "indexed" not in open_steps:
+            _start("indexed", "Persisting chunks and upserting vectors", {"vectors": len(vectors)})
+        try:
+            # Persist chunks to Supabase for citation grounding
+            if db_chunks:
+                supabase.table("chunks").insert(db_chunks).execute()
+                counts["persisted"] += len(db_chunks)
+                print(f"[Supabase] Persisted {len(db_chunks)} chunks for source_id={source_id}")
+
+            # Upsert vectors to Pinecone (Delphi creator namespace with legacy fallback)
+            if vectors:
+                _resolve_target()
+                for vector in vectors:
+                    md = vector.get("metadata") or {}
+                    if target["creator_id"]:
+                        md["creator_id"] = target["creator_id"]
+                    md["twin_id"] = twin_id
+                    vector["metadata"] = md
+
+                write_stats = await pinecone_adapter.upsert_bulk_async(vectors, target["namespace"])
+                record_namespace_write(twin_id, target["namespace"], len(vectors))
+                counts["vectors"] += len(vectors)
+                upsert_seconds += write_stats.get("seconds", 0.0)
+                print(
+                    f"[Pinecone] Upserted {len(vectors)} vectors to namespace={target['namespace']} "
+                    f"({write_stats.get('batches')} requests, {write_stats.get('vectors_per_sec')} vectors/sec)"
+                )
+        except Exception as e:
+            _fail("indexed", "INDEXING_FAILED", e, {"vectors": counts["vectors"] + len(vectors), "chunks": counts["persisted"]})
+            raise
 
-    # Step: indexed (Supabase chunks + Pinecone upsert + permissions)
-    index_event_id = start_step(
-        source_id=source_id,
-        twin_id=twin_id,
-        provider=provider,
-        step="indexed",
-        correlation_id=correlation_id,
-        message="Persisting chunks and upserting vectors",
-        metadata={"vectors": len(vectors)},
+        if on_progress:
+            try:
+                on_progress({**counts, "page_number": last_page_number})
+            except Exception as e:
+                print(f"[Ingestion] Progress callback failed (non-fatal): {e}")
+
+    _finish("chunked", {"chunks": counts["chunks"]})
+    if "embedded" not in open_steps:
+        _start("embedded", "Generating embeddings", {"chunks": 0})
+    stage_stats["enrich_chunks_per_sec"] = _stage_throughput(counts["vectors"], stage_stats.get("enrich_seconds", 0.0))
+    stage_stats["embed_chunks_per_sec"] = (
+        _stage_throughput(counts["vectors"], stage_stats.get("embed_seconds", 0.0)) if not use_integrated_mode else 0.0
+    )
+    if counts["vectors"]:
+        print(
+            f"[Ingestion] Enrichment for source {source_id}: {counts['vectors']} chunks, "
+            f"{stage_stats.get('enrich_skipped', 0)} skipped as factual, "
+            f"{stage_stats.get('enrich_llm_chunks', 0)} enriched in {stage_stats.get('enrich_llm_calls', 0)} LLM calls "
+            f"({stage_stats.get('enrich_fallback_chunks', 0)} retried singly, "
+            f"{stage_stats.get('enrich_failed_chunks', 0)} left unenriched), {stage_stats.get('enrich_seconds', 0.0)}s"
+        )
+    _finish(
+        "embedded",
+        {
+            "chunks": counts["chunks"],
+            "vectors": counts["vectors"],
+            "reused": counts["reused"],
+            "stream_batches": counts["batches"],
+            **stage_stats,
+        },
     )
+
+    if "indexed" not in open_steps:
+        _start("indexed", "Persisting chunks and upserting vectors", {"vectors": 0})
+    stale_chunks = [row for rows in existing_by_hash.values() for row in rows]
     try:
-        # Persist chunks to Supabase for citation grounding
-        if db_chunks:
-            supabase.table("chunks").insert(db_chunks).execute()
-            print(f"[Supabase] Persisted {len(db_chunks)} chunks for source_id={source_id}")
-
-        # Upsert vectors to Pinecone (Delphi creator namespace with legacy fallback)
-        if vectors:
-            creator_id = resolve_creator_id_for_twin(twin_id)
-            namespace = get_primary_namespace_for_twin(twin_id=twin_id, creator_id=creator_id)
-            for vector in vectors:
-                md = vector.get("metadata") or {}
-                if creator_id:
-                    md["creator_id"] = creator_id
-                md["twin_id"] = twin_id
-                vector["metadata"] = md
-
-            pinecone_adapter.upsert(vectors=vectors, namespace=namespace)
-            print(f"[Pinecone] Upserted {len(vectors)} vectors to namespace={namespace}")
+        # Remove chunks whose content no longer exists in the source.
+        if stale_chunks:
+            _resolve_target()
+            stale_row_ids = [row["id"] for row in stale_chunks if row.get("id")]
+            stale_vector_ids = [row["vector_id"] for row in stale_chunks if row.get("vector_id")]
+            if stale_row_ids:
+                supabase.table("chunks").delete().in_("id", stale_row_ids).execute()
+            if stale_vector_ids:
+                try:
+                    await pinecone_adapter.delete_bulk_async(stale_vector_ids, target["namespace"])
+                except Exception as e:
+                    print(f"[Pinecone] Warning: Failed to delete {len(stale_vector_ids)} stale vectors: {e}")
+            print(
+                f"[Ingestion] Removed {len(stale_chunks)} stale chunks for source_id={source_id} "
+                f"(reused={counts['reused']}, new={counts['vectors']})"
+            )
 
         # Ensure default group has access to this source (required for retrieval filtering)
         try:
@@ -2141,38 +2668,24 @@ async def process_and_index_text(
             log_ingestion_event(source_id, twin_id, "warning", f"Failed to grant default group permission: {e}")
             print(f"[Ingestion] Warning: Failed to grant default group permission for source {source_id}: {e}")
 
-        finish_step(
-            event_id=index_event_id,
-            source_id=source_id,
-            twin_id=twin_id,
-            provider=provider,
-            step="indexed",
-            status="completed",
-            correlation_id=correlation_id,
-            metadata={"vectors": len(vectors), "chunks": len(db_chunks)},
+        _finish(
+            "indexed",
+            {
+                "vectors": counts["vectors"],
+                "chunks": counts["persisted"],
+                "reused": counts["reused"],
+                "deleted": len(stale_chunks),
+                "upsert_vectors_per_sec": _stage_throughput(counts["vectors"], upsert_seconds),
+            },
         )
     except Exception as e:
-        err = build_error(
-            code="INDEXING_FAILED",
-            message=str(e),
-            provider=provider,
-            step="indexed",
-            correlation_id=correlation_id,
-            raw={"vectors": len(vectors), "chunks": len(db_chunks)},
-            exc=e,
-        )
-        finish_step(
-            event_id=index_event_id,
-            source_id=source_id,
-            twin_id=twin_id,
-            provider=provider,
-            step="indexed",
-            status="error",
-            correlation_id=correlation_id,
-            error=err,
-        )
+        _fail("indexed", "INDEXING_FAILED", e, {"vectors": counts["vectors"], "chunks": counts["persisted"]})
         raise
 
+    # Streamed documents only know their full text once every page was read.
+    if not text and isinstance(chunk_entries_override, StreamedDocument):
+        text = chunk_entries_override.text
+
     # Optional persona extraction path (safe, non-fatal, flag-gated).
     try:
         extraction_summary = run_persona_extraction_for_source(
@@ -2189,7 +2702,7 @@ async def process_and_index_text(
     except Exception as e:
         print(f"[Ingestion] Persona extraction hook failed (non-fatal): {e}")
 
-    return len(vectors)
+    return counts["vectors"] + counts["reused"]
 
 
 def _infer_source_type(filename: str) -> str:
@@ -2211,6 +2724,24 @@ def _infer_source_type(filename: str) -> str:
     return "ingested_content"
 
 
+async def _fail_source_ingest(source_id: str, twin_id: str, error: Exception) -> None:
+    """
+    Remove what a failed indexing run already wrote, then mark the source failed.
+
+    Batches are indexed as they are produced (while a document is still being
+    read), so a run that fails midway would otherwise leave a partial,
+    searchable copy of the source behind.
+    """
+    try:
+        namespace = get_primary_namespace_for_twin(twin_id=twin_id, creator_id=resolve_creator_id_for_twin(twin_id))
+        await _purge_source_chunks(source_id, namespace)
+        log_ingestion_event(source_id, twin_id, "error", f"Indexing failed, partial chunks removed: {error}")
+    except Exception as cleanup_error:
+        print(f"[Ingestion] Warning: Failed to remove partial chunks for source {source_id}: {cleanup_error}")
+        log_ingestion_event(source_id, twin_id, "error", f"Indexing failed, partial chunks may remain: {error}")
+    supabase.table("sources").update({"status": "error", "health_status": "failed"}).eq("id", source_id).execute()
+
+
 async def ingest_source(source_id: str, twin_id: str, file_path: str, filename: str = None):
     """Ingest a file - extracts text and indexes to Pinecone.
     
@@ -2249,17 +2780,49 @@ async def ingest_source(source_id: str, twin_id: str, file_path: str, filename:
     if has_duplicate:
         log_ingestion_event(source_id, twin_id, "info", "Duplicate filename detected, removed old sources")
 
-    # 1. Extract text (PDF, Docx, Excel, or Audio)
-    pdf_chunk_entries: Optional[List[Dict[str, Any]]] = None
-    if file_path.endswith('.pdf'):
-        text, pdf_chunk_entries = extract_pdf_text_and_chunk_entries(
-            file_path,
-            doc_name=filename or os.path.basename(file_path) or "document",
-        )
-    elif file_path.endswith('.docx'):
-        text = extract_text_from_docx(file_path)
-    elif file_path.endswith('.xlsx'):
-        text = extract_text_from_excel(file_path)
+    index_metadata = {
+        "filename": filename or "unknown",
+        "type": "file"
+    }
+
+    # 1. Extract text (PDF, Docx, Excel, or Audio).
+    # Documents are streamed page by page (or section by section) straight into
+    # chunking, embedding and upsert, so the first chunks are indexed while later
+    # pages are still being read and memory does not grow with the file.
+    num_chunks: Optional[int] = None
+    document = stream_document(file_path, doc_name=filename or os.path.basename(file_path) or "document")
+    if document is not None:
+        if not filename:
+            # Chunk rows reference the source, so it must exist before streaming starts.
+            supabase.table("sources").upsert({
+                "id": source_id,
+                "twin_id": twin_id,
+                "status": "processing"
+            }).execute()
+
+        def _report_progress(progress: Dict[str, Any]) -> None:
+            where = f"page {progress['page_number']}" if progress.get("page_number") else f"section {document.units_read}"
+            log_ingestion_event(
+                source_id,
+                twin_id,
+                "info",
+                f"Streaming ingest: {progress['chunks']} chunks indexed through {where}",
+                metadata={**progress, "units_read": document.units_read},
+            )
+
+        try:
+            num_chunks = await process_and_index_text(
+                source_id,
+                twin_id,
+                "",
+                metadata_override=index_metadata,
+                chunk_entries_override=document,
+                on_progress=_report_progress,
+            )
+        except Exception as e:
+            await _fail_source_ingest(source_id, twin_id, e)
+            raise
+        text = document.text
     elif file_path.endswith(('.mp3', '.wav', '.m4a', '.webm')):
         text = await transcribe_audio(file_path)
     else:
@@ -2325,11 +2888,13 @@ async def ingest_source(source_id: str, twin_id: str, file_path: str, filename:
 
     log_ingestion_event(source_id, twin_id, "info", f"Health checks completed: {health_result['overall_status']}")
 
-    log_ingestion_event(source_id, twin_id, "info", "Auto-indexing enabled")
-    num_chunks = await process_and_index_text(source_id, twin_id, text, metadata_override={
-        "filename": filename or "unknown",
-        "type": "file"
-    }, chunk_entries_override=pdf_chunk_entries)
+    if num_chunks is None:
+        log_ingestion_event(source_id, twin_id, "info", "Auto-indexing enabled")
+        try:
+            num_chunks = await process_and_index_text(source_id, twin_id, text, metadata_override=index_metadata)
+        except Exception as e:
+            await _fail_source_ingest(source_id, twin_id, e)
+            raise
     
     # Set status to live after successful Pinecone upsert
     supabase.table("sources").update({
@@ -2382,13 +2947,7 @@ async def delete_source(source_id: str, twin_id: str):
     index = get_pinecone_index()
     try:
         namespace = get_primary_namespace_for_twin(twin_id)
-        # Note: Delete by filter requires metadata indexing enabled or serverless index
-        index.delete(
-            filter={
-                "source_id": {"$eq": source_id}
-            },
-            namespace=namespace
-        )
+        await _purge_source_chunks(source_id, namespace, index)
     except Exception as e:
         print(f"Error deleting from Pinecone: {e}")
         # Continue to delete from Supabase even if Pinecone fails (maybe it was already gone)
@@ -13,6 +13,7 @@ CRITICAL FIXES APPLIED:
 - Race condition fixed with atomic UPDATE...WHERE status='queued' RETURNING *
 - Connection pooling with retry logic
 - Distributed locking for multi-worker setups
+- Lock-free Redis dequeue via ZPOPMIN/BZPOPMIN (each job id is popped by exactly one worker)
 """
 import os
 import json
@@ -70,6 +71,10 @@ def get_redis_client():
     return _redis_client
 
 
+QUEUE_KEY = "training_jobs_queue"
+WORKER_STATS_KEY_PREFIX = "worker_stats:"
+
+
 def enqueue_job(job_id: str, job_type: str, priority: int = 0, metadata: Optional[Dict[str, Any]] = None):
     """
     Add job to queue (priority-based: higher priority numbers processed first).
@@ -83,13 +88,8 @@ def enqueue_job(job_id: str, job_type: str, priority: int = 0, metadata: Optiona
     client = get_redis_client()
     
     if client:
-        # Use Redis sorted set for priority queue
-        # Score = -priority (negative so higher priority comes first)
-        # Member = job_id
-        score = -priority  # Negative for descending order
-        client.zadd("training_jobs_queue", {job_id: score})
-        
-        # Store job metadata in hash
+        # Store job metadata in hash first: once the id is in the sorted set a
+        # worker may pop it immediately and will read this hash.
         if metadata:
             client.hset(f"job_metadata:{job_id}", mapping={
                 "job_type": job_type,
@@ -101,6 +101,12 @@ def enqueue_job(job_id: str, job_type: str, priority: int = 0, metadata: Optiona
                 "job_type": job_type,
                 "enqueued_at": datetime.utcnow().isoformat()
             })
+
+        # Use Redis sorted set for priority queue
+        # Score = -priority (negative so higher priority comes first)
+        # Member = job_id
+        score = -priority  # Negative for descending order
+        client.zadd(QUEUE_KEY, {job_id: score})
     else:
         # DB-backed fallback: job records are already persisted in Supabase (`training_jobs` or `jobs` tables).
         # Do NOT enqueue in-memory by default (web/worker are separate processes in production).
@@ -413,11 +419,52 @@ def _dequeue_from_db() -> Optional[Dict[str, Any]]:
         return None
 
 
-def dequeue_job() -> Optional[Dict[str, Any]]:
+def _pop_redis_job(client, block_timeout: float = 0) -> Optional[Dict[str, Any]]:
+    """
+    Atomically pop the highest-priority job id and claim its metadata hash.
+
+    ZPOPMIN/BZPOPMIN hand each member to exactly one caller, so no dequeue lock
+    is needed; the popping worker then owns job_metadata:{job_id}.
+    """
+    if block_timeout and block_timeout > 0:
+        popped = client.bzpopmin(QUEUE_KEY, timeout=block_timeout)
+        if not popped:
+            return None
+        _key, job_id, score = popped
+    else:
+        popped = client.zpopmin(QUEUE_KEY, 1)
+        if not popped:
+            return None
+        job_id, score = popped[0]
+
+    pipe = client.pipeline(transaction=True)
+    pipe.hgetall(f"job_metadata:{job_id}")
+    pipe.delete(f"job_metadata:{job_id}")
+    metadata, _deleted = pipe.execute()
+    metadata = metadata or {}
+
+    # Parse metadata JSON if present
+    metadata_json = metadata.get("metadata")
+    job_metadata = json.loads(metadata_json) if metadata_json else {}
+
+    return {
+        "job_id": job_id,
+        "job_type": metadata.get("job_type", "ingestion"),
+        "priority": -int(score),  # Convert back from negative
+        "metadata": job_metadata,
+    }
+
+
+def dequeue_job(block_timeout: float = 0) -> Optional[Dict[str, Any]]:
     """
     Get next job from queue (highest priority first).
     
     Uses atomic claiming to prevent race conditions.
+
+    Args:
+        block_timeout: With Redis, wait up to this many seconds for a job
+            (BZPOPMIN) instead of returning immediately. Ignored by the
+            DB-backed fallback, which cannot block.
     
     Returns:
         Dict with job_id, job_type, and metadata, or None if queue is empty
@@ -425,52 +472,7 @@ def dequeue_job() -> Optional[Dict[str, Any]]:
     client = get_redis_client()
     
     if client:
-        # Use distributed lock for Redis dequeue
-        lock = DistributedLock("redis_dequeue", timeout_seconds=10)
-        
-        # Synchronous lock acquisition for Redis
-        lock_value = f"{os.getpid()}:{time.time()}"
-        acquired = client.set("lock:redis_dequeue", lock_value, nx=True, ex=10)
-        
-        if not acquired:
-            # Another worker is dequeuing, skip this cycle
-            return None
-        
-        try:
-            # Get highest priority job (lowest score = highest priority)
-            result = client.zrange("training_jobs_queue", 0, 0, withscores=True)
-            if not result:
-                return None
-            
-            job_id = result[0][0]
-            score = result[0][1]
-            priority = -int(score)  # Convert back from negative
-            
-            # Remove from queue
-            client.zrem("training_jobs_queue", job_id)
-            
-            # Get metadata
-            metadata = client.hgetall(f"job_metadata:{job_id}")
-            job_type = metadata.get("job_type", "ingestion")
-            
-            # Parse metadata JSON if present
-            metadata_json = metadata.get("metadata")
-            job_metadata = json.loads(metadata_json) if metadata_json else {}
-            
-            # Clean up metadata hash
-            client.delete(f"job_metadata:{job_id}")
-            
-            return {
-                "job_id": job_id,
-                "job_type": job_type,
-                "priority": priority,
-                "metadata": job_metadata
-            }
-        finally:
-            # Release lock
-            current_value = client.get("lock:redis_dequeue")
-            if current_value == lock_value:
-                client.delete("lock:redis_dequeue")
+        return _pop_redis_job(client, block_timeout=block_timeout)
     else:
         if _in_memory_enabled() and _in_memory_queue:
             priority, job_id, job_type, metadata = heapq.heappop(_in_memory_queue)
@@ -488,7 +490,7 @@ def get_queue_length() -> int:
     client = get_redis_client()
     
     if client:
-        return client.zcard("training_jobs_queue")
+        return client.zcard(QUEUE_KEY)
     else:
         if _in_memory_enabled():
             return len(_in_memory_queue)
@@ -507,7 +509,7 @@ def remove_job(job_id: str):
     client = get_redis_client()
     
     if client:
-        client.zrem("training_jobs_queue", job_id)
+        client.zrem(QUEUE_KEY, job_id)
         client.delete(f"job_metadata:{job_id}")
     else:
         if _in_memory_enabled():
@@ -520,6 +522,38 @@ def remove_job(job_id: str):
             heapq.heapify(_in_memory_queue)
 
 
+def publish_worker_stats(worker_id: str, stats: Dict[str, Any], ttl_seconds: int = 120) -> bool:
+    """Publish a worker's runtime stats to Redis so the API can report them."""
+    client = get_redis_client()
+    if not client:
+        return False
+    try:
+        client.set(f"{WORKER_STATS_KEY_PREFIX}{worker_id}", json.dumps(stats), ex=max(1, int(ttl_seconds)))
+        return True
+    except Exception as e:
+        print(f"[JobQueue] Failed to publish worker stats: {e}")
+        return False
+
+
+def get_worker_stats() -> Dict[str, Dict[str, Any]]:
+    """Return the latest published stats for every live worker, keyed by worker id."""
+    client = get_redis_client()
+    if not client:
+        return {}
+    try:
+        keys = list(client.scan_iter(match=f"{WORKER_STATS_KEY_PREFIX}*"))
+        if not keys:
+            return {}
+        stats = {}
+        for key, raw in zip(keys, client.mget(keys)):
+            if raw:
+                stats[key[len(WORKER_STATS_KEY_PREFIX):]] = json.loads(raw)
+        return stats
+    except Exception as e:
+        print(f"[JobQueue] Failed to read worker stats: {e}")
+        return {}
+
+
 # =============================================================================
 # DATABASE RPC FOR ATOMIC CLAIMING
 # =============================================================================
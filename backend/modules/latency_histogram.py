@@ -0,0 +1,48 @@
+"""
+Latency Histogram: cumulative-bucket latency histograms shared by the
+rerank batcher and the async DB layer.
+"""
+import threading
+from typing import Any, Dict, Sequence
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram (Prometheus-style le buckets)."""
+
+    def __init__(self, buckets_ms: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        with self._lock:
+            index = len(self.buckets_ms)
+            for i, bound in enumerate(self.buckets_ms):
+                if value_ms <= bound:
+                    index = i
+                    break
+            self._counts[index] += 1
+            self.count += 1
+            self.sum_ms += value_ms
+            self.max_ms = max(self.max_ms, value_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets_ms, self._counts):
+                cumulative += count
+                buckets[f"le_{bound}"] = cumulative
+            buckets["le_inf"] = cumulative + self._counts[-1]
+            return {
+                "count": self.count,
+                "sum_ms": round(self.sum_ms, 3),
+                "avg_ms": round(self.sum_ms / self.count, 3) if self.count else 0.0,
+                "max_ms": round(self.max_ms, 3),
+                "buckets": buckets,
+            }
@@ -3,6 +3,7 @@ from modules.clients import get_pinecone_index
 from modules.embeddings import get_embedding
 from modules.observability import supabase
 from modules.delphi_namespace import get_primary_namespace_for_twin, resolve_creator_id_for_twin
+from modules.namespace_ledger import record_namespace_write
 
 async def inject_verified_memory(escalation_id: str, owner_answer: str):
     """
@@ -41,6 +42,7 @@ async def inject_verified_memory(escalation_id: str, owner_answer: str):
         }],
         namespace=namespace
     )
+    record_namespace_write(twin_id, namespace, 1)
     
     return vector_id
 
@@ -0,0 +1,219 @@
+"""
+Namespace Ledger: per-twin record of which Pinecone namespaces hold vectors.
+
+With DELPHI_DUAL_READ every retrieval queries both the creator namespace and
+the legacy twin namespace. All writes (ingestion, reindex, verified memory)
+go to the primary namespace, so a legacy namespace can only shrink: once
+describe_index_stats reports it empty, the twin is fully migrated and the
+legacy query is pure overhead.
+
+The ledger keeps:
+- one cached describe_index_stats snapshot (namespace -> vector_count) for the
+  whole index, refreshed in a background thread when older than
+  NAMESPACE_STATS_TTL_SECONDS (stale-while-revalidate; a stale "empty" is still
+  correct because legacy namespaces only shrink)
+- per twin, the namespaces written by this process since the snapshot
+  (record_namespace_write), which are always read even if the snapshot predates them
+- counters for avoided fan-out (namespaces skipped, Pinecone queries avoided)
+
+select_read_namespaces() always keeps the primary namespace and any namespace
+with unknown counts, so a missing or failed snapshot degrades to full dual-read.
+
+Environment Variables:
+- NAMESPACE_LEDGER_ENABLED: skip namespaces the ledger knows are empty (default true)
+- NAMESPACE_STATS_TTL_SECONDS: describe_index_stats refresh interval (default 300)
+- NAMESPACE_STATS_RETRY_SECONDS: wait after a failed refresh before trying again (default 30)
+- NAMESPACE_LEDGER_MAX_TWINS: twins kept in the write ledger LRU (default 4096)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+NAMESPACE_LEDGER_ENABLED = os.getenv("NAMESPACE_LEDGER_ENABLED", "true").lower() == "true"
+NAMESPACE_STATS_TTL_SECONDS = float(os.getenv("NAMESPACE_STATS_TTL_SECONDS", "300"))
+NAMESPACE_STATS_RETRY_SECONDS = float(os.getenv("NAMESPACE_STATS_RETRY_SECONDS", "30"))
+NAMESPACE_LEDGER_MAX_TWINS = int(os.getenv("NAMESPACE_LEDGER_MAX_TWINS", "4096"))
+
+
+def parse_namespace_counts(stats: Any) -> Optional[Dict[str, int]]:
+    """namespace -> vector_count from a describe_index_stats response (dict or SDK object)."""
+    namespaces = stats.get("namespaces") if isinstance(stats, dict) else getattr(stats, "namespaces", None)
+    if not isinstance(namespaces, dict):
+        return None
+    counts: Dict[str, int] = {}
+    for namespace, ns_stats in namespaces.items():
+        raw = ns_stats.get("vector_count") if isinstance(ns_stats, dict) else getattr(ns_stats, "vector_count", None)
+        try:
+            counts[str(namespace)] = int(raw or 0)
+        except (TypeError, ValueError):
+            return None
+    return counts
+
+
+_lock = threading.Lock()
+_snapshot: Dict[str, Any] = {"counts": None, "fetched_at": None, "failed_at": None}
+_refreshing = False
+# twin_id -> {namespace: monotonic time of the last write seen by this process}
+_writes: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+_stats = {
+    "lookups": 0,
+    "namespaces_skipped": 0,
+    "queries_avoided": 0,
+    "lookups_without_snapshot": 0,
+    "stats_refreshes": 0,
+    "stats_failures": 0,
+    "writes_recorded": 0,
+}
+
+
+def _refresh(describe: Callable[[], Any]) -> None:
+    global _refreshing
+    counts: Optional[Dict[str, int]] = None
+    try:
+        counts = parse_namespace_counts(describe())
+    except Exception as e:
+        print(f"[NamespaceLedger] describe_index_stats failed: {type(e).__name__}: {e}")
+    with _lock:
+        _refreshing = False
+        if counts is None:
+            _snapshot["failed_at"] = time.monotonic()
+            _stats["stats_failures"] += 1
+            return
+        _snapshot["counts"] = counts
+        _snapshot["fetched_at"] = time.monotonic()
+        _snapshot["failed_at"] = None
+        _stats["stats_refreshes"] += 1
+
+
+def _may_hold_vectors(namespace: str, counts: Dict[str, int], written: Dict[str, float], fetched_at: float) -> bool:
+    return counts.get(namespace, 0) > 0 or written.get(namespace, -1.0) >= fetched_at
+
+
+def _needs_refresh(now: float) -> bool:
+    if _refreshing:
+        return False
+    failed_at = _snapshot["failed_at"]
+    if failed_at is not None and now - failed_at < NAMESPACE_STATS_RETRY_SECONDS:
+        return False
+    fetched_at = _snapshot["fetched_at"]
+    return fetched_at is None or now - fetched_at >= NAMESPACE_STATS_TTL_SECONDS
+
+
+def refresh_namespace_counts(index: Any, *, wait: bool = False) -> None:
+    """Start a describe_index_stats refresh (single-flight); block until done when wait=True."""
+    global _refreshing
+    with _lock:
+        if _refreshing:
+            return
+        _refreshing = True
+    if wait:
+        _refresh(index.describe_index_stats)
+    else:
+        threading.Thread(
+            target=_refresh,
+            args=(index.describe_index_stats,),
+            name="namespace-ledger-refresh",
+            daemon=True,
+        ).start()
+
+
+def select_read_namespaces(
+    twin_id: str,
+    candidates: List[str],
+    index: Any = None,
+    *,
+    queries_per_namespace: int = 1,
+) -> List[str]:
+    """
+    Subset of candidates (primary first) that may hold vectors for the twin.
+
+    queries_per_namespace is how many Pinecone queries the caller would have
+    sent to each namespace; it only feeds the queries_avoided counter.
+
+    Never blocks on Pinecone: a stale snapshot is used while a background
+    refresh runs, and without any snapshot every candidate is returned.
+    """
+    if not NAMESPACE_LEDGER_ENABLED or len(candidates) <= 1:
+        return list(candidates)
+
+    now = time.monotonic()
+    with _lock:
+        start_refresh = index is not None and _needs_refresh(now)
+        counts = _snapshot["counts"]
+        fetched_at = _snapshot["fetched_at"] or 0.0
+        written = dict(_writes.get(twin_id) or {})
+        _stats["lookups"] += 1
+        if counts is None:
+            _stats["lookups_without_snapshot"] += 1
+    if start_refresh:
+        refresh_namespace_counts(index)
+    if counts is None:
+        return list(candidates)
+
+    selected = [candidates[0]]
+    selected.extend(ns for ns in candidates[1:] if _may_hold_vectors(ns, counts, written, fetched_at))
+    skipped = len(candidates) - len(selected)
+    if skipped:
+        with _lock:
+            _stats["namespaces_skipped"] += skipped
+            _stats["queries_avoided"] += skipped * max(1, queries_per_namespace)
+    return selected
+
+
+def record_namespace_write(twin_id: str, namespace: str, vectors: int = 0) -> None:
+    """Note that this process wrote to namespace, so reads include it before the next refresh."""
+    now = time.monotonic()
+    with _lock:
+        _writes.setdefault(twin_id, {})[namespace] = now
+        _writes.move_to_end(twin_id)
+        while len(_writes) > max(1, NAMESPACE_LEDGER_MAX_TWINS):
+            _writes.popitem(last=False)
+        counts = _snapshot["counts"]
+        if counts is not None and vectors > 0:
+            counts[namespace] = counts.get(namespace, 0) + vectors
+        _stats["writes_recorded"] += 1
+
+
+def get_namespace_ledger(twin_id: str, candidates: List[str]) -> List[Dict[str, Any]]:
+    """Per-namespace view for debugging: cached vector count and whether reads will include it."""
+    with _lock:
+        counts = _snapshot["counts"]
+        fetched_at = _snapshot["fetched_at"] or 0.0
+        written = dict(_writes.get(twin_id) or {})
+    return [
+        {
+            "namespace": namespace,
+            "vector_count": counts.get(namespace, 0) if counts is not None else None,
+            "written_by_this_process": namespace in written,
+            "read": (
+                not NAMESPACE_LEDGER_ENABLED
+                or position == 0
+                or counts is None
+                or _may_hold_vectors(namespace, counts, written, fetched_at)
+            ),
+        }
+        for position, namespace in enumerate(candidates)
+    ]
+
+
+def invalidate_namespace_ledger() -> None:
+    """Drop the stats snapshot and write ledger (the next lookup reads every candidate)."""
+    global _refreshing
+    with _lock:
+        _snapshot.update(counts=None, fetched_at=None, failed_at=None)
+        _refreshing = False
+        _writes.clear()
+
+
+def get_namespace_ledger_stats() -> Dict[str, Any]:
+    with _lock:
+        fetched_at = _snapshot["fetched_at"]
+        return {
+            "enabled": NAMESPACE_LEDGER_ENABLED,
+            "namespaces_tracked": len(_snapshot["counts"] or {}),
+            "snapshot_age_seconds": round(time.monotonic() - fetched_at, 1) if fetched_at is not None else None,
+            "twins_with_writes": len(_writes),
+            **_stats,
+        }
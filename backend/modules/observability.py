@@ -190,7 +190,10 @@ def create_conversation(
         if group_id:
             fallback["group_id"] = group_id
         response = supabase.table("conversations").insert(fallback).execute()
-    return response.data[0] if response.data else None
+    conversation = response.data[0] if response.data else None
+    from modules.analytics_rollups import record_conversation
+    record_conversation(twin_id, conversation)
+    return conversation
 
 def log_interaction(
     conversation_id: str,
@@ -226,7 +229,13 @@ def log_interaction(
         if confidence_score is not None:
             fallback["confidence_score"] = confidence_score
         response = supabase.table("messages").insert(fallback).execute()
-    return response.data[0] if response.data else None
+    message = response.data[0] if response.data else None
+    if message:
+        from modules.analytics_rollups import record_message
+        from modules.question_clusters import observe_message
+        record_message(conversation_id, role, content, confidence_score)
+        observe_message(conversation_id, role, content, confidence_score)
+    return message
 
 def get_conversations(twin_id: str):
     response = supabase.table("conversations").select("*").eq("twin_id", twin_id).order("created_at", desc=True).execute()
@@ -0,0 +1,364 @@
+"""
+Owner Memory Index: per-twin in-memory index for owner-memory candidate search.
+
+find_owner_memory_candidates runs on every identity-gated turn. Instead of
+re-selecting the twin's active memories, decoding each JSON embedding and
+scoring them one by one, the index keeps per twin:
+- a row-normalized NumPy matrix of memory embeddings (one matrix-vector product per query)
+- value/topic token -> row postings so Jaccard overlaps are computed for sharing rows only
+- memory_type and confidence columns for vectorized filtering and ordering
+
+Writes are applied write-through: create/approve upsert the row and
+supersede/retract drop it, producing a new snapshot instead of a reload.
+Every write also bumps a per-twin version stamp in Redis (INCR) when
+REDIS_URL is configured; an index built at an older stamp is rebuilt, so
+other web instances see the write within OWNER_MEMORY_VERSION_CACHE_SECONDS.
+A rebuild also happens after invalidate_owner_memory_index(twin_id) or when
+OWNER_MEMORY_INDEX_TTL_SECONDS elapses. A failed load raises and is not cached.
+
+Environment Variables:
+- OWNER_MEMORY_INDEX_ENABLED: serve candidate search from the index (default true)
+- OWNER_MEMORY_INDEX_TTL_SECONDS: rebuild interval per twin (default 300)
+- OWNER_MEMORY_INDEX_MAX_TWINS: twins kept in the LRU (default 256)
+- OWNER_MEMORY_INDEX_MAX_ROWS: newest memories indexed per twin (default 200)
+- OWNER_MEMORY_VERSION_CACHE_SECONDS: how long a Redis version stamp is reused (default 5)
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+OWNER_MEMORY_INDEX_ENABLED = os.getenv("OWNER_MEMORY_INDEX_ENABLED", "true").lower() == "true"
+OWNER_MEMORY_INDEX_TTL_SECONDS = float(os.getenv("OWNER_MEMORY_INDEX_TTL_SECONDS", "300"))
+OWNER_MEMORY_INDEX_MAX_TWINS = int(os.getenv("OWNER_MEMORY_INDEX_MAX_TWINS", "256"))
+OWNER_MEMORY_INDEX_MAX_ROWS = int(os.getenv("OWNER_MEMORY_INDEX_MAX_ROWS", "200"))
+OWNER_MEMORY_VERSION_CACHE_SECONDS = max(0.0, float(os.getenv("OWNER_MEMORY_VERSION_CACHE_SECONDS", "5")))
+OWNER_MEMORY_VERSION_KEY_PREFIX = "owner_memory_version:"
+
+# A "stance" lookup also accepts these memory types (same rule as the row scan).
+STANCE_COMPATIBLE_TYPES = ("belief", "lens", "preference")
+
+
+def _parse_embedding(raw: Any) -> Optional[List[float]]:
+    if raw is None or raw == "":
+        return None
+    try:
+        values = json.loads(raw) if isinstance(raw, str) else raw
+        if isinstance(values, (list, tuple)) and values:
+            return [float(v) for v in values]
+    except (json.JSONDecodeError, ValueError, TypeError):
+        return None
+    return None
+
+
+def _build_postings(token_sets: List[Set[str]]) -> Dict[str, np.ndarray]:
+    postings: Dict[str, List[int]] = {}
+    for row, tokens in enumerate(token_sets):
+        for token in tokens:
+            postings.setdefault(token, []).append(row)
+    return {token: np.asarray(rows, dtype=np.int64) for token, rows in postings.items()}
+
+
+class OwnerMemoryIndex:
+    """Immutable snapshot of one twin's retrievable owner memories, newest first."""
+
+    def __init__(
+        self,
+        twin_id: str,
+        memories: List[Dict[str, Any]],
+        tokenize: Callable[[str], List[str]],
+        built_at: Optional[float] = None,
+        version: Optional[int] = None,
+    ):
+        self.twin_id = twin_id
+        self.memories = list(memories)
+        self.built_at = time.monotonic() if built_at is None else built_at
+        # Redis version stamp the rows were read at (None without Redis).
+        self.version = version
+        self._tokenize = tokenize
+        self.id_to_row: Dict[str, int] = {str(m.get("id")): row for row, m in enumerate(self.memories)}
+
+        self.value_tokens = [set(tokenize(m.get("value") or "")) for m in self.memories]
+        self.topic_tokens = [set(tokenize(m.get("topic_normalized") or "")) for m in self.memories]
+        self.value_sizes = np.asarray([len(t) for t in self.value_tokens], dtype=np.float64)
+        self.topic_sizes = np.asarray([len(t) for t in self.topic_tokens], dtype=np.float64)
+        self.value_postings = _build_postings(self.value_tokens)
+        self.topic_postings = _build_postings(self.topic_tokens)
+
+        self.memory_types = np.asarray([str(m.get("memory_type") or "") for m in self.memories], dtype=object)
+        self.confidence = np.asarray([float(m.get("confidence") or 0.0) for m in self.memories], dtype=np.float64)
+
+        vectors = [_parse_embedding(m.get("embedding")) for m in self.memories]
+        dims = {len(v) for v in vectors if v}
+        self.dimension = max(dims, key=lambda d: sum(1 for v in vectors if v and len(v) == d)) if dims else 0
+        self.matrix = np.zeros((len(self.memories), self.dimension), dtype=np.float32)
+        self.has_embedding = np.zeros(len(self.memories), dtype=bool)
+        for row, vector in enumerate(vectors):
+            if vector and len(vector) == self.dimension:
+                self.matrix[row] = vector
+                self.has_embedding[row] = True
+        norms = np.linalg.norm(self.matrix, axis=1)
+        nonzero = norms > 0
+        self.matrix[nonzero] /= norms[nonzero, None]
+        self.has_embedding &= nonzero
+
+    def __len__(self) -> int:
+        return len(self.memories)
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return ttl_seconds <= 0 or (time.monotonic() - self.built_at) < ttl_seconds
+
+    @property
+    def needs_query_embedding(self) -> bool:
+        return bool(self.has_embedding.any())
+
+    def with_memory(self, memory: Dict[str, Any], max_rows: int) -> "OwnerMemoryIndex":
+        """Snapshot with memory inserted (or replaced in place), oldest rows trimmed to max_rows."""
+        memories = list(self.memories)
+        row = self.id_to_row.get(str(memory.get("id")))
+        if row is not None:
+            memories[row] = memory
+        else:
+            created_at = str(memory.get("created_at") or "")
+            position = 0
+            if created_at:
+                while position < len(memories) and str(memories[position].get("created_at") or "") > created_at:
+                    position += 1
+            memories.insert(position, memory)
+        return OwnerMemoryIndex(
+            self.twin_id, memories[: max(1, max_rows)], self._tokenize, built_at=self.built_at, version=self.version
+        )
+
+    def without_memory(self, memory_id: str) -> "OwnerMemoryIndex":
+        memories = [m for m in self.memories if str(m.get("id")) != str(memory_id)]
+        return OwnerMemoryIndex(self.twin_id, memories, self._tokenize, built_at=self.built_at, version=self.version)
+
+    def _jaccard(self, query_tokens: Set[str], postings: Dict[str, np.ndarray], sizes: np.ndarray) -> np.ndarray:
+        intersections = np.zeros(len(self.memories), dtype=np.float64)
+        for token in query_tokens:
+            rows = postings.get(token)
+            if rows is not None:
+                intersections[rows] += 1.0
+        overlap = np.zeros(len(self.memories), dtype=np.float64)
+        shared = intersections > 0
+        overlap[shared] = intersections[shared] / (len(query_tokens) + sizes[shared] - intersections[shared])
+        return overlap
+
+    def search(
+        self,
+        query: str,
+        query_embedding: Optional[List[float]] = None,
+        topic_normalized: Optional[str] = None,
+        memory_type: Optional[str] = None,
+        limit: int = 6,
+    ) -> List[Dict[str, Any]]:
+        """
+        Score = max(topic Jaccard, value Jaccard, embedding cosine), ordered by
+        (score, confidence) desc with ties kept newest first. Returned rows are
+        copies carrying "_score".
+        """
+        if not self.memories or limit <= 0:
+            return []
+
+        keep = np.ones(len(self.memories), dtype=bool)
+        if memory_type:
+            allowed = [memory_type, ""]
+            if memory_type == "stance":
+                allowed.extend(STANCE_COMPATIBLE_TYPES)
+            keep = np.isin(self.memory_types, allowed)
+        rows = np.flatnonzero(keep)
+        if rows.size == 0:
+            return []
+
+        scores = np.zeros(len(self.memories), dtype=np.float64)
+        query_tokens = set(self._tokenize(query))
+        if query_tokens:
+            scores = np.maximum(scores, self._jaccard(query_tokens, self.value_postings, self.value_sizes))
+        topic_tokens = set(self._tokenize(topic_normalized)) if topic_normalized else set()
+        if topic_tokens:
+            scores = np.maximum(scores, self._jaccard(topic_tokens, self.topic_postings, self.topic_sizes))
+
+        if query_embedding and self.dimension and len(query_embedding) == self.dimension:
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(query_vector))
+            if norm > 0.0:
+                cosine = (self.matrix @ (query_vector / norm)).astype(np.float64)
+                scores = np.where(self.has_embedding, np.maximum(scores, cosine), scores)
+
+        selected = scores[rows]
+        order = np.lexsort((rows, -self.confidence[rows], -selected))[:limit]
+        results = []
+        for position in order:
+            row = int(rows[position])
+            results.append({**self.memories[row], "_score": float(selected[position])})
+        return results
+
+
+_indexes: "OrderedDict[str, OwnerMemoryIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+# Bumped on every write so a build that loaded before the write is not cached over it.
+_generations: Dict[str, int] = {}
+_index_stats = {"hits": 0, "builds": 0, "invalidations": 0, "write_through": 0, "remote_invalidations": 0}
+# twin_id -> (Redis stamp, monotonic time it was read)
+_remote_versions: "OrderedDict[str, Tuple[Optional[int], float]]" = OrderedDict()
+
+
+def _get_redis():
+    try:
+        from modules.job_queue import get_redis_client
+
+        return get_redis_client()
+    except Exception:
+        return None
+
+
+def _bump_version(twin_id: str) -> Optional[int]:
+    """INCR the twin's stamp in Redis; returns the new stamp (None without Redis)."""
+    client = _get_redis()
+    if client is None:
+        return None
+    try:
+        return int(client.incr(f"{OWNER_MEMORY_VERSION_KEY_PREFIX}{twin_id}"))
+    except Exception as e:
+        print(f"[OwnerMemory] version bump failed in Redis for {twin_id}: {e}")
+        return None
+
+
+def _current_version(twin_id: str) -> Optional[int]:
+    """The twin's Redis stamp, re-read at most every OWNER_MEMORY_VERSION_CACHE_SECONDS."""
+    with _indexes_lock:
+        cached = _remote_versions.get(twin_id)
+        if cached is not None and time.monotonic() - cached[1] < OWNER_MEMORY_VERSION_CACHE_SECONDS:
+            return cached[0]
+    version = None
+    client = _get_redis()
+    if client is not None:
+        try:
+            version = int(client.get(f"{OWNER_MEMORY_VERSION_KEY_PREFIX}{twin_id}") or 0)
+        except Exception:
+            version = None
+    with _indexes_lock:
+        _remote_versions[twin_id] = (version, time.monotonic())
+        _remote_versions.move_to_end(twin_id)
+        while len(_remote_versions) > max(1, OWNER_MEMORY_INDEX_MAX_TWINS):
+            _remote_versions.popitem(last=False)
+    return version
+
+
+def _after_local_write(twin_id: str, snapshot: OwnerMemoryIndex, bumped: Optional[int]) -> OwnerMemoryIndex:
+    """
+    Advance a written-through snapshot to the bumped stamp when this write is
+    the only one since it was built; otherwise leave it stale so it rebuilds.
+    """
+    if bumped is not None and snapshot.version == bumped - 1:
+        snapshot.version = bumped
+    _remote_versions[twin_id] = (bumped, time.monotonic())
+    return snapshot
+
+
+def _store(index: OwnerMemoryIndex) -> None:
+    _indexes[index.twin_id] = index
+    _indexes.move_to_end(index.twin_id)
+    while len(_indexes) > max(1, OWNER_MEMORY_INDEX_MAX_TWINS):
+        evicted, _ = _indexes.popitem(last=False)
+        _generations.pop(evicted, None)
+
+
+def get_owner_memory_index(
+    twin_id: str,
+    loader: Callable[[str], List[Dict[str, Any]]],
+    tokenize: Callable[[str], List[str]],
+) -> OwnerMemoryIndex:
+    """
+    Return a fresh index for the twin, building it with loader(twin_id) if needed.
+
+    Loader errors propagate to the caller and leave the cache untouched.
+    """
+    version = _current_version(twin_id)
+    with _indexes_lock:
+        index = _indexes.get(twin_id)
+        if index is not None and index.is_fresh(OWNER_MEMORY_INDEX_TTL_SECONDS):
+            if index.version == version:
+                _indexes.move_to_end(twin_id)
+                _index_stats["hits"] += 1
+                return index
+            _index_stats["remote_invalidations"] += 1
+        generation = _generations.get(twin_id, 0)
+
+    index = OwnerMemoryIndex(twin_id, loader(twin_id) or [], tokenize, version=version)
+    with _indexes_lock:
+        if _generations.get(twin_id, 0) == generation:
+            _store(index)
+        _index_stats["builds"] += 1
+    return index
+
+
+def upsert_owner_memory_index(twin_id: str, memory: Dict[str, Any]) -> None:
+    """Write-through a created/updated retrievable memory into a cached index."""
+    bumped = _bump_version(twin_id)
+    with _indexes_lock:
+        _generations[twin_id] = _generations.get(twin_id, 0) + 1
+        index = _indexes.get(twin_id)
+        if index is None:
+            _remote_versions.pop(twin_id, None)
+            return
+        _store(_after_local_write(twin_id, index.with_memory(memory, OWNER_MEMORY_INDEX_MAX_ROWS), bumped))
+        _index_stats["write_through"] += 1
+
+
+def remove_from_owner_memory_index(memory_id: str, twin_id: Optional[str] = None) -> None:
+    """Drop a memory (superseded, retracted, ...) from whichever cached index holds it."""
+    key = str(memory_id)
+    with _indexes_lock:
+        targets = [twin_id] if twin_id else [t for t, index in _indexes.items() if key in index.id_to_row]
+    bumped = {target: _bump_version(target) for target in targets}
+    with _indexes_lock:
+        for target in targets:
+            _generations[target] = _generations.get(target, 0) + 1
+            index = _indexes.get(target)
+            if index is not None and key in index.id_to_row:
+                _store(_after_local_write(target, index.without_memory(key), bumped[target]))
+                _index_stats["write_through"] += 1
+            else:
+                _remote_versions.pop(target, None)
+
+
+def find_owner_memory_twin(memory_id: str) -> Optional[str]:
+    """Twin whose cached index holds memory_id, if any."""
+    key = str(memory_id)
+    with _indexes_lock:
+        return next((t for t, index in _indexes.items() if key in index.id_to_row), None)
+
+
+def invalidate_owner_memory_index(twin_id: Optional[str] = None) -> None:
+    """
+    Drop the cached index for a twin (or all twins when twin_id is None). A
+    single twin is also invalidated on other instances through its stamp.
+    """
+    if twin_id is not None:
+        _bump_version(twin_id)
+    with _indexes_lock:
+        if twin_id is None:
+            for cached in _indexes:
+                _generations[cached] = _generations.get(cached, 0) + 1
+            _indexes.clear()
+            _remote_versions.clear()
+        else:
+            _generations[twin_id] = _generations.get(twin_id, 0) + 1
+            _indexes.pop(twin_id, None)
+            _remote_versions.pop(twin_id, None)
+        _index_stats["invalidations"] += 1
+
+
+def get_owner_memory_index_stats() -> Dict[str, Any]:
+    with _indexes_lock:
+        return {
+            "enabled": OWNER_MEMORY_INDEX_ENABLED,
+            "twins": len(_indexes),
+            "memories": sum(len(index) for index in _indexes.values()),
+            **_index_stats,
+        }
@@ -13,6 +13,15 @@ import os
 
 from modules.observability import supabase
 from modules.embeddings import get_embedding, cosine_similarity
+from modules.owner_memory_index import (
+    OWNER_MEMORY_INDEX_ENABLED,
+    OWNER_MEMORY_INDEX_MAX_ROWS,
+    find_owner_memory_twin,
+    get_owner_memory_index,
+    invalidate_owner_memory_index,
+    remove_from_owner_memory_index,
+    upsert_owner_memory_index,
+)
 
 
 STOPWORDS = {
@@ -75,20 +84,24 @@ def extract_topic_from_query(query: str, history: Optional[List[Dict[str, Any]]]
     return _normalize_text(query)[:80]
 
 
+def _query_owner_memories(twin_id: str, status: Optional[str] = "active", limit: int = 200) -> List[Dict[str, Any]]:
+    query = supabase.table("owner_beliefs").select("*").eq("twin_id", twin_id)
+    if status and status != "all":
+        if status == "active":
+            # Treat verified memories as active for retrieval/UI compatibility
+            statuses = ["active", "verified"]
+            if AUTO_APPROVE_OWNER_MEMORY:
+                statuses.append("proposed")
+            query = query.in_("status", statuses)
+        else:
+            query = query.eq("status", status)
+    res = query.order("created_at", desc=True).limit(limit).execute()
+    return res.data or []
+
+
 def list_owner_memories(twin_id: str, status: Optional[str] = "active", limit: int = 200) -> List[Dict[str, Any]]:
     try:
-        query = supabase.table("owner_beliefs").select("*").eq("twin_id", twin_id)
-        if status and status != "all":
-            if status == "active":
-                # Treat verified memories as active for retrieval/UI compatibility
-                statuses = ["active", "verified"]
-                if AUTO_APPROVE_OWNER_MEMORY:
-                    statuses.append("proposed")
-                query = query.in_("status", statuses)
-            else:
-                query = query.eq("status", status)
-        res = query.order("created_at", desc=True).limit(limit).execute()
-        return res.data or []
+        return _query_owner_memories(twin_id, status=status, limit=limit)
     except Exception as e:
         # Table may not exist yet if migration not applied
         print(f"[OwnerMemory] list_owner_memories failed: {e}")
@@ -137,6 +150,42 @@ def _lexical_overlap(a: str, b: str) -> float:
     return len(a_tokens & b_tokens) / float(len(a_tokens | b_tokens))
 
 
+def _load_indexed_owner_memories(twin_id: str) -> List[Dict[str, Any]]:
+    # Unlike list_owner_memories, errors propagate: an empty result is cached, a failure must not be.
+    return _query_owner_memories(twin_id, status="active", limit=OWNER_MEMORY_INDEX_MAX_ROWS)
+
+
+def _embed_query(query: str) -> Optional[List[float]]:
+    try:
+        return get_embedding(query)
+    except Exception as e:
+        print(f"[OwnerMemory] embedding failed: {e}")
+        return None
+
+
+def _is_retrievable_status(status: Optional[str]) -> bool:
+    """Mirror of the status set list_owner_memories(status="active") returns."""
+    normalized = str(status or "").lower()
+    return normalized in {"active", "verified"} or (AUTO_APPROVE_OWNER_MEMORY and normalized == "proposed")
+
+
+def sync_owner_memory_index(memory: Optional[Dict[str, Any]]) -> None:
+    """
+    Write-through a changed owner_beliefs row into the candidate index:
+    retrievable rows are upserted, anything else is dropped.
+    """
+    if not memory or not memory.get("id"):
+        return
+    twin_id = memory.get("twin_id") or find_owner_memory_twin(memory["id"])
+    if not _is_retrievable_status(memory.get("status")):
+        remove_from_owner_memory_index(memory["id"], twin_id)
+    elif twin_id:
+        upsert_owner_memory_index(twin_id, memory)
+    else:
+        # Unknown twin: cannot place the row, so fall back to a rebuild everywhere.
+        invalidate_owner_memory_index()
+
+
 def find_owner_memory_candidates(
     query: str,
     twin_id: str,
@@ -144,19 +193,28 @@ def find_owner_memory_candidates(
     memory_type: Optional[str] = None,
     limit: int = 6
 ) -> List[Dict[str, Any]]:
+    if OWNER_MEMORY_INDEX_ENABLED:
+        try:
+            index = get_owner_memory_index(twin_id, _load_indexed_owner_memories, _tokenize)
+        except Exception as e:
+            print(f"[OwnerMemory] owner memory index load failed: {e}")
+            return []
+        query_embedding = _embed_query(query) if index.needs_query_embedding else None
+        return index.search(
+            query,
+            query_embedding=query_embedding,
+            topic_normalized=topic_normalized,
+            memory_type=memory_type,
+            limit=limit,
+        )
+
     memories = list_owner_memories(twin_id, status="active", limit=200)
     if not memories:
         return []
 
     # Precompute embedding for query if any memory has embedding
     has_embedding = any(m.get("embedding") for m in memories)
-    query_embedding = None
-    if has_embedding:
-        try:
-            query_embedding = get_embedding(query)
-        except Exception as e:
-            print(f"[OwnerMemory] embedding failed: {e}")
-            query_embedding = None
+    query_embedding = _embed_query(query) if has_embedding else None
 
     scored = []
     for mem in memories:
@@ -290,9 +348,10 @@ def create_owner_memory(
         if not res.data:
             return None
         new_mem = res.data[0]
+        sync_owner_memory_index(new_mem)
 
         if supersede_id:
-            supersede_owner_memory(supersede_id, new_mem["id"])
+            supersede_owner_memory(supersede_id, new_mem["id"], twin_id)
 
         return new_mem
     except Exception as e:
@@ -300,26 +359,28 @@ def create_owner_memory(
         return None
 
 
-def supersede_owner_memory(old_id: str, new_id: str) -> bool:
+def supersede_owner_memory(old_id: str, new_id: str, twin_id: str) -> bool:
     try:
         supabase.table("owner_beliefs").update({
             "status": "superseded",
             "superseded_by": new_id,
             "updated_at": datetime.utcnow().isoformat()
         }).eq("id", old_id).execute()
+        remove_from_owner_memory_index(old_id, twin_id)
         return True
     except Exception as e:
         print(f"[OwnerMemory] supersede failed: {e}")
         return False
 
 
-def retract_owner_memory(mem_id: str, reason: Optional[str] = None) -> bool:
+def retract_owner_memory(mem_id: str, twin_id: str, reason: Optional[str] = None) -> bool:
     try:
         supabase.table("owner_beliefs").update({
             "status": "retracted",
             "updated_at": datetime.utcnow().isoformat(),
             "provenance": {"retract_reason": reason or "owner_request"}
         }).eq("id", mem_id).execute()
+        remove_from_owner_memory_index(mem_id, twin_id)
         return True
     except Exception as e:
         print(f"[OwnerMemory] retract failed: {e}")
@@ -362,6 +423,7 @@ def approve_owner_memory(
         }).eq("id", mem_id).execute()
         if not res.data:
             return None
+        sync_owner_memory_index({**existing, **res.data[0]})
         return res.data[0]
     except Exception as e:
         print(f"[OwnerMemory] approve failed: {e}")
@@ -12,6 +12,7 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from modules.observability import supabase
+from modules.twin_cache import invalidate_twin_cache
 
 
 PERSONA_PROFILE_SETTINGS_KEY = "persona_identity_pack"
@@ -55,6 +56,7 @@ def _get_settings_for_twin(twin_id: str) -> Dict[str, Any]:
 def _update_twin_settings(twin_id: str, settings: Dict[str, Any]) -> bool:
     try:
         supabase.table("twins").update({"settings": settings}).eq("id", twin_id).execute()
+        invalidate_twin_cache(twin_id)
         return True
     except Exception as e:
         print(f"[PersonaProfileStore] Failed to update twins.settings for {twin_id}: {e}")
@@ -1,6 +1,11 @@
+import asyncio
+import json
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 
 logger = logging.getLogger(__name__)
@@ -38,6 +43,97 @@ DEFAULT_METADATA_FIELDS = [
 ]
 
 
+# Bulk writer limits. Pinecone rejects requests over 2MB or 1000 vectors
+# (96 records for integrated upsert_records); defaults leave headroom.
+PINECONE_WRITE_MAX_BATCH_VECTORS = max(1, int(os.getenv("PINECONE_WRITE_MAX_BATCH_VECTORS", "100")))
+PINECONE_WRITE_MAX_BATCH_BYTES = max(1024, int(os.getenv("PINECONE_WRITE_MAX_BATCH_BYTES", str(1_800_000))))
+PINECONE_DELETE_BATCH_SIZE = max(1, int(os.getenv("PINECONE_DELETE_BATCH_SIZE", "1000")))
+PINECONE_WRITE_MAX_IN_FLIGHT = max(1, int(os.getenv("PINECONE_WRITE_MAX_IN_FLIGHT", "4")))
+PINECONE_WRITE_RETRY_ATTEMPTS = max(1, int(os.getenv("PINECONE_WRITE_RETRY_ATTEMPTS", "4")))
+PINECONE_WRITE_RETRY_BASE_SECONDS = float(os.getenv("PINECONE_WRITE_RETRY_BASE_SECONDS", "0.5"))
+PINECONE_WRITE_RETRY_MAX_SECONDS = float(os.getenv("PINECONE_WRITE_RETRY_MAX_SECONDS", "8.0"))
+INTEGRATED_MAX_BATCH_RECORDS = 96
+
+
+class PineconeBulkWriteError(RuntimeError):
+    """A bulk write batch failed after retries; stats cover the batches that succeeded."""
+
+    def __init__(self, message: str, stats: Dict[str, Any], cause: BaseException):
+        super().__init__(message)
+        self.stats = stats
+        self.__cause__ = cause
+
+
+def _payload_bytes(item: Any) -> int:
+    return len(json.dumps(item, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def iter_write_batches(
+    items: Iterable[Any],
+    *,
+    max_items: int,
+    max_bytes: Optional[int] = None,
+    size_of: Callable[[Any], int] = _payload_bytes,
+) -> Iterator[List[Any]]:
+    """
+    Lazily group items into batches capped by count and (optionally) serialized
+    size. An item larger than max_bytes is sent alone rather than dropped.
+    """
+    batch: List[Any] = []
+    batch_bytes = 0
+    for item in items:
+        item_bytes = size_of(item) if max_bytes else 0
+        if batch and (len(batch) >= max_items or (max_bytes and batch_bytes + item_bytes > max_bytes)):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(item)
+        batch_bytes += item_bytes
+    if batch:
+        yield batch
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (ValueError, TypeError)):
+        return False
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500 and status != 429:
+        return False
+    return True
+
+
+def _retry_delay(attempt: int) -> float:
+    # Full jitter keeps concurrent writers from retrying in lockstep.
+    return random.uniform(0, min(PINECONE_WRITE_RETRY_MAX_SECONDS, PINECONE_WRITE_RETRY_BASE_SECONDS * (2 ** attempt)))
+
+
+def _new_write_stats(operation: str, namespace: str, max_in_flight: int) -> Dict[str, Any]:
+    return {
+        "operation": operation,
+        "namespace": namespace,
+        "items": 0,
+        "batches": 0,
+        "retries": 0,
+        "max_in_flight": max_in_flight,
+        "started": time.perf_counter(),
+    }
+
+
+def _finish_write_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    seconds = max(time.perf_counter() - stats.pop("started"), 1e-9)
+    stats["seconds"] = round(seconds, 3)
+    stats["vectors_per_sec"] = round(stats["items"] / seconds, 2)
+    logger.info(
+        "[PineconeAdapter] %s namespace=%s items=%s batches=%s retries=%s vectors_per_sec=%s",
+        stats["operation"],
+        stats["namespace"],
+        stats["items"],
+        stats["batches"],
+        stats["retries"],
+        stats["vectors_per_sec"],
+    )
+    return stats
+
+
 def get_pinecone_index_mode() -> str:
     raw_mode = (os.getenv("PINECONE_INDEX_MODE", DEFAULT_INDEX_MODE) or "").strip().lower()
     if raw_mode in ALLOWED_INDEX_MODES:
@@ -110,6 +206,225 @@ class PineconeIndexAdapter:
             return {"upserted_count": 0}
         return self.index.upsert_records(namespace=namespace, records=records)
 
+    def delete(self, ids: List[str], namespace: str) -> Any:
+        # Record deletion by ID is identical for vector and integrated indexes.
+        cleaned_ids = [str(vector_id) for vector_id in ids if vector_id]
+        if not cleaned_ids:
+            return {}
+        return self.index.delete(ids=cleaned_ids, namespace=namespace)
+
+    # ------------------------------------------------------------------
+    # Bulk writer: size-aware batching, bounded in-flight requests and
+    # per-batch retry with jitter. Inputs may be generators; batches are
+    # planned lazily, so at most max_in_flight batches are held at once.
+    # ------------------------------------------------------------------
+
+    def _upsert_batches(
+        self,
+        vectors: Iterable[Dict[str, Any]],
+        max_batch_vectors: Optional[int],
+        max_batch_bytes: Optional[int],
+    ) -> Iterator[List[Dict[str, Any]]]:
+        max_items = max_batch_vectors or PINECONE_WRITE_MAX_BATCH_VECTORS
+        if self.mode == "integrated":
+            max_items = min(max_items, INTEGRATED_MAX_BATCH_RECORDS)
+        return iter_write_batches(
+            vectors,
+            max_items=max_items,
+            max_bytes=max_batch_bytes or PINECONE_WRITE_MAX_BATCH_BYTES,
+        )
+
+    def _delete_batches(self, ids: Iterable[str], batch_size: Optional[int]) -> Iterator[List[str]]:
+        cleaned = (str(vector_id) for vector_id in ids if vector_id)
+        return iter_write_batches(cleaned, max_items=batch_size or PINECONE_DELETE_BATCH_SIZE)
+
+    @staticmethod
+    def _send_with_retry(send: Callable[[List[Any]], Any], batch: List[Any]) -> int:
+        """Send one batch, retrying transient failures. Returns the number of retries used."""
+        for attempt in range(PINECONE_WRITE_RETRY_ATTEMPTS):
+            try:
+                send(batch)
+                return attempt
+            except Exception as e:
+                if attempt + 1 >= PINECONE_WRITE_RETRY_ATTEMPTS or not _is_retryable(e):
+                    raise
+                delay = _retry_delay(attempt)
+                logger.warning("[PineconeAdapter] batch of %s failed (%s); retrying in %.2fs", len(batch), e, delay)
+                time.sleep(delay)
+        return 0
+
+    @staticmethod
+    async def _send_with_retry_async(send: Callable[[List[Any]], Any], batch: List[Any]) -> int:
+        for attempt in range(PINECONE_WRITE_RETRY_ATTEMPTS):
+            try:
+                await asyncio.to_thread(send, batch)
+                return attempt
+            except Exception as e:
+                if attempt + 1 >= PINECONE_WRITE_RETRY_ATTEMPTS or not _is_retryable(e):
+                    raise
+                delay = _retry_delay(attempt)
+                logger.warning("[PineconeAdapter] batch of %s failed (%s); retrying in %.2fs", len(batch), e, delay)
+                await asyncio.sleep(delay)
+        return 0
+
+    def _run_bulk(
+        self,
+        operation: str,
+        namespace: str,
+        batches: Iterator[List[Any]],
+        send: Callable[[List[Any]], Any],
+        max_in_flight: Optional[int],
+    ) -> Dict[str, Any]:
+        limit = max_in_flight or PINECONE_WRITE_MAX_IN_FLIGHT
+        stats = _new_write_stats(operation, namespace, limit)
+
+        def _record(batch: List[Any], retries: int) -> None:
+            stats["items"] += len(batch)
+            stats["batches"] += 1
+            stats["retries"] += retries
+
+        if limit <= 1:
+            for batch in batches:
+                try:
+                    _record(batch, self._send_with_retry(send, batch))
+                except Exception as e:
+                    raise PineconeBulkWriteError(f"{operation} batch failed: {e}", _finish_write_stats(stats), e)
+            return _finish_write_stats(stats)
+
+        failure: Optional[BaseException] = None
+        with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="pinecone-write") as pool:
+            pending: Dict[Any, List[Any]] = {}
+
+            def _drain(done) -> Optional[BaseException]:
+                error = None
+                for future in done:
+                    batch = pending.pop(future)
+                    try:
+                        _record(batch, future.result())
+                    except Exception as e:
+                        error = error or e
+                return error
+
+            for batch in batches:
+                if len(pending) >= limit:
+                    done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                    failure = _drain(done)
+                    if failure:
+                        break
+                pending[pool.submit(self._send_with_retry, send, batch)] = batch
+            failure = _drain(wait(list(pending))[0]) or failure
+
+        if failure:
+            raise PineconeBulkWriteError(f"{operation} batch failed: {failure}", _finish_write_stats(stats), failure)
+        return _finish_write_stats(stats)
+
+    async def _run_bulk_async(
+        self,
+        operation: str,
+        namespace: str,
+        batches: Iterator[List[Any]],
+        send: Callable[[List[Any]], Any],
+        max_in_flight: Optional[int],
+    ) -> Dict[str, Any]:
+        limit = max_in_flight or PINECONE_WRITE_MAX_IN_FLIGHT
+        stats = _new_write_stats(operation, namespace, limit)
+        pending: Dict[asyncio.Task, List[Any]] = {}
+        failure: Optional[BaseException] = None
+
+        def _drain(done) -> Optional[BaseException]:
+            error = None
+            for task in done:
+                batch = pending.pop(task)
+                if task.exception() is not None:
+                    error = error or task.exception()
+                    continue
+                stats["items"] += len(batch)
+                stats["batches"] += 1
+                stats["retries"] += task.result()
+            return error
+
+        for batch in batches:
+            if len(pending) >= limit:
+                done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+                failure = _drain(done)
+                if failure:
+                    break
+            pending[asyncio.create_task(self._send_with_retry_async(send, batch))] = batch
+        if pending:
+            done, _ = await asyncio.wait(list(pending))
+            failure = _drain(done) or failure
+
+        if failure:
+            raise PineconeBulkWriteError(f"{operation} batch failed: {failure}", _finish_write_stats(stats), failure)
+        return _finish_write_stats(stats)
+
+    def upsert_bulk(
+        self,
+        vectors: Iterable[Dict[str, Any]],
+        namespace: str,
+        *,
+        max_batch_vectors: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Upsert any number of vectors; returns stats including vectors_per_sec."""
+        return self._run_bulk(
+            "upsert",
+            namespace,
+            self._upsert_batches(vectors, max_batch_vectors, max_batch_bytes),
+            lambda batch: self.upsert(vectors=batch, namespace=namespace),
+            max_in_flight,
+        )
+
+    async def upsert_bulk_async(
+        self,
+        vectors: Iterable[Dict[str, Any]],
+        namespace: str,
+        *,
+        max_batch_vectors: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        return await self._run_bulk_async(
+            "upsert",
+            namespace,
+            self._upsert_batches(vectors, max_batch_vectors, max_batch_bytes),
+            lambda batch: self.upsert(vectors=batch, namespace=namespace),
+            max_in_flight,
+        )
+
+    def delete_bulk(
+        self,
+        ids: Iterable[str],
+        namespace: str,
+        *,
+        batch_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        return self._run_bulk(
+            "delete",
+            namespace,
+            self._delete_batches(ids, batch_size),
+            lambda batch: self.delete(ids=batch, namespace=namespace),
+            max_in_flight,
+        )
+
+    async def delete_bulk_async(
+        self,
+        ids: Iterable[str],
+        namespace: str,
+        *,
+        batch_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        return await self._run_bulk_async(
+            "delete",
+            namespace,
+            self._delete_batches(ids, batch_size),
+            lambda batch: self.delete(ids=batch, namespace=namespace),
+            max_in_flight,
+        )
+
     def query(
         self,
         *,
@@ -119,6 +434,7 @@ class PineconeIndexAdapter:
         namespace: str,
         include_metadata: bool = True,
         metadata_filter: Optional[Dict[str, Any]] = None,
+        include_values: bool = False,
     ) -> Dict[str, Any]:
         if self.mode == "vector":
             params: Dict[str, Any] = {
@@ -127,10 +443,14 @@ class PineconeIndexAdapter:
                 "include_metadata": include_metadata,
                 "namespace": namespace,
             }
+            if include_values:
+                params["include_values"] = True
             if metadata_filter:
                 params["filter"] = metadata_filter
             return self.index.query(**params)
 
+        # Integrated indexes do not return stored vectors; include_values is ignored.
+
         cleaned_query = (query_text or "").strip()
         if not cleaned_query:
             raise ValueError(
@@ -0,0 +1,523 @@
+"""
+Question Clusters: online semantic grouping of user questions per twin.
+
+Each logged user question is embedded once (modules/embeddings.get_embedding,
+so repeated questions hit the embedding cache) and assigned to the nearest
+centroid among its twin's clusters. A question whose cosine similarity reaches
+QUESTION_CLUSTER_SIMILARITY joins that cluster and moves its centroid (running
+mean of member embeddings); otherwise it starts a new cluster, until the twin
+holds QUESTION_CLUSTER_MAX_PER_TWIN clusters, after which it joins the nearest.
+The confidence of the assistant answer that follows a question is added to the
+question's cluster.
+
+Assignment runs on one background worker so log_interaction never waits on the
+embedding call, and in order, so an answer's confidence always lands on the
+cluster its question went to. Each twin's centroids are cached as a
+row-normalized NumPy matrix (one matrix-vector product per question) and
+reloaded after QUESTION_CLUSTER_TTL_SECONDS so web instances pick up each
+other's new clusters.
+
+/metrics/top-questions reads clusters only for twins whose history has been
+clustered by scripts/backfill_question_clusters.py (twin_question_cluster_state);
+other twins keep using the analytics rollups. Frequent clusters that no active
+verified answer covers are offered as verified QnA suggestions.
+
+Environment Variables:
+- QUESTION_CLUSTERS_ENABLED: cluster logged questions and serve them to analytics (default true)
+- QUESTION_CLUSTER_SIMILARITY: cosine similarity needed to join an existing cluster (default 0.85)
+- QUESTION_CLUSTER_MAX_PER_TWIN: clusters per twin before new questions join the nearest one (default 1000)
+- QUESTION_CLUSTER_TTL_SECONDS: how long a twin's cached centroids are trusted (default 300)
+- QUESTION_CLUSTER_CACHE_TWINS: twins whose centroids are kept in memory (default 256)
+- QUESTION_CLUSTER_QUEUE_LIMIT: pending background assignments before new ones are dropped (default 1000)
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from modules.analytics_rollups import get_conversation_scope
+from modules.embeddings import get_embedding, get_embeddings_async
+from modules.observability import supabase
+from modules.verified_qna import find_verified_qna_for_embedding
+from modules.verified_qna_index import parse_embedding
+
+QUESTION_CLUSTERS_ENABLED = os.getenv("QUESTION_CLUSTERS_ENABLED", "true").lower() == "true"
+QUESTION_CLUSTER_SIMILARITY = float(os.getenv("QUESTION_CLUSTER_SIMILARITY", "0.85"))
+QUESTION_CLUSTER_MAX_PER_TWIN = max(1, int(os.getenv("QUESTION_CLUSTER_MAX_PER_TWIN", "1000")))
+QUESTION_CLUSTER_TTL_SECONDS = float(os.getenv("QUESTION_CLUSTER_TTL_SECONDS", "300"))
+QUESTION_CLUSTER_CACHE_TWINS = max(1, int(os.getenv("QUESTION_CLUSTER_CACHE_TWINS", "256")))
+QUESTION_CLUSTER_QUEUE_LIMIT = max(1, int(os.getenv("QUESTION_CLUSTER_QUEUE_LIMIT", "1000")))
+
+# Conversations whose latest question is still waiting for its answer's confidence.
+_MAX_OPEN_QUESTIONS = 10000
+
+_lock = threading.Lock()
+_twins: "OrderedDict[str, TwinQuestionClusters]" = OrderedDict()
+_open_questions: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+_backfilled: Set[str] = set()
+_pending = 0
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="question-clusters")
+_stats = {
+    "questions": 0,
+    "clusters_created": 0,
+    "answers": 0,
+    "dropped": 0,
+    "failures": 0,
+    "stale_clusters": 0,
+    "loads": 0,
+    "rebuilds": 0,
+    "cluster_reads": 0,
+}
+
+
+def _unit(vector: Any) -> Optional[np.ndarray]:
+    values = np.asarray(vector, dtype=np.float32)
+    if values.ndim != 1 or not values.size:
+        return None
+    norm = float(np.linalg.norm(values))
+    return values / norm if norm > 0.0 else None
+
+
+def _representative(question: str) -> str:
+    text = question.strip()
+    return text[:200] + ("..." if len(text) > 200 else "")
+
+
+def _centroid_json(mean: np.ndarray) -> str:
+    return json.dumps([round(float(v), 6) for v in mean])
+
+
+class TwinQuestionClusters:
+    """One twin's clusters: mean member embeddings plus a row-normalized matrix for matching."""
+
+    def __init__(self, twin_id: str, rows: Iterable[Dict[str, Any]] = ()):
+        self.twin_id = twin_id
+        self.loaded_at = time.monotonic()
+        self.ids: List[Optional[str]] = []
+        self.representatives: List[str] = []
+        self.counts: List[int] = []
+        self.confidence_sums: List[float] = []
+        self.confidence_counts: List[int] = []
+        self._means: List[np.ndarray] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        for row in rows:
+            mean = parse_embedding(row.get("centroid"))
+            if mean is None or (self._means and len(mean) != self.matrix.shape[1]):
+                continue
+            self._append(
+                row.get("id"),
+                row.get("representative") or "",
+                np.asarray(mean, dtype=np.float32),
+                count=int(row.get("count") or 1),
+                confidence_sum=float(row.get("confidence_sum") or 0.0),
+                confidence_count=int(row.get("confidence_count") or 0),
+            )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return (time.monotonic() - self.loaded_at) < ttl_seconds
+
+    def mean(self, row: int) -> np.ndarray:
+        return self._means[row]
+
+    def _append(
+        self,
+        cluster_id: Optional[str],
+        representative: str,
+        mean: np.ndarray,
+        *,
+        count: int = 1,
+        confidence_sum: float = 0.0,
+        confidence_count: int = 0,
+    ) -> int:
+        unit = _unit(mean)
+        if unit is None:
+            return -1
+        self.ids.append(cluster_id)
+        self.representatives.append(representative)
+        self.counts.append(count)
+        self.confidence_sums.append(confidence_sum)
+        self.confidence_counts.append(confidence_count)
+        self._means.append(mean.astype(np.float32))
+        self.matrix = unit[None, :] if not self.matrix.size else np.vstack([self.matrix, unit[None, :]])
+        return len(self.ids) - 1
+
+    def nearest(self, vector: np.ndarray) -> Tuple[Optional[int], float]:
+        """(row, cosine similarity) of the closest centroid to a unit vector."""
+        if not self.matrix.size:
+            return None, 0.0
+        if vector.shape[0] != self.matrix.shape[1]:
+            raise ValueError(f"embedding dimension {vector.shape[0]} != cluster dimension {self.matrix.shape[1]}")
+        scores = self.matrix @ vector
+        row = int(np.argmax(scores))
+        return row, float(scores[row])
+
+    def assign(self, vector: np.ndarray, representative: str, threshold: float, max_clusters: int) -> Tuple[int, bool]:
+        """Add one unit question vector; returns (row, created_new_cluster)."""
+        row, similarity = self.nearest(vector)
+        if row is None or (similarity < threshold and len(self) < max_clusters):
+            return self._append(None, representative, vector), True
+        count = self.counts[row]
+        self._means[row] = (self._means[row] * count + vector) / (count + 1)
+        unit = _unit(self._means[row])
+        if unit is not None:
+            self.matrix[row] = unit
+        self.counts[row] = count + 1
+        return row, False
+
+    def add_confidence(self, row: int, confidence: Optional[float]) -> None:
+        if confidence:
+            self.confidence_sums[row] += float(confidence)
+            self.confidence_counts[row] += 1
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "representative": self.representatives[row],
+                "centroid": _centroid_json(self._means[row]),
+                "count": self.counts[row],
+                "confidence_sum": self.confidence_sums[row],
+                "confidence_count": self.confidence_counts[row],
+            }
+            for row in range(len(self))
+        ]
+
+
+def _load_twin_clusters(twin_id: str) -> "TwinQuestionClusters":
+    res = (
+        supabase.table("twin_question_clusters")
+        .select("id, representative, centroid, count, confidence_sum, confidence_count")
+        .eq("twin_id", twin_id)
+        .order("count", desc=True)
+        .limit(QUESTION_CLUSTER_MAX_PER_TWIN)
+        .execute()
+    )
+    with _lock:
+        _stats["loads"] += 1
+    return TwinQuestionClusters(twin_id, res.data or [])
+
+
+def _twin_clusters(twin_id: str) -> "TwinQuestionClusters":
+    with _lock:
+        clusters = _twins.get(twin_id)
+        if clusters is not None and clusters.is_fresh(QUESTION_CLUSTER_TTL_SECONDS):
+            _twins.move_to_end(twin_id)
+            return clusters
+    clusters = _load_twin_clusters(twin_id)
+    with _lock:
+        _twins[twin_id] = clusters
+        _twins.move_to_end(twin_id)
+        while len(_twins) > QUESTION_CLUSTER_CACHE_TWINS:
+            _twins.popitem(last=False)
+    return clusters
+
+
+def _forget_twin(twin_id: str) -> None:
+    with _lock:
+        _twins.pop(twin_id, None)
+
+
+def _persist_assignment(clusters: "TwinQuestionClusters", vector: np.ndarray, text: str) -> Tuple[Optional[str], bool]:
+    """
+    Assign a unit question vector in the cached clusters and write it through.
+
+    Returns (cluster_id, created); cluster_id is None when the cached cluster
+    no longer exists in the table.
+    """
+    row, created = clusters.assign(
+        vector, _representative(text), QUESTION_CLUSTER_SIMILARITY, QUESTION_CLUSTER_MAX_PER_TWIN
+    )
+    if created:
+        res = (
+            supabase.table("twin_question_clusters")
+            .insert(
+                {
+                    "twin_id": clusters.twin_id,
+                    "representative": clusters.representatives[row],
+                    "centroid": _centroid_json(clusters.mean(row)),
+                    "count": 1,
+                }
+            )
+            .execute()
+        )
+        clusters.ids[row] = res.data[0]["id"]
+        return clusters.ids[row], True
+    # The new mean is computed in SQL from the stored centroid, so concurrent
+    # instances add to each other's updates instead of overwriting them.
+    res = supabase.rpc(
+        "bump_question_cluster_system",
+        {"p_cluster_id": clusters.ids[row], "p_vector": _centroid_json(vector)},
+    ).execute()
+    if res.data is None:
+        return None, False
+    clusters.counts[row] = int(res.data)
+    return clusters.ids[row], False
+
+
+def _assign_question(twin_id: str, question: str, embedding: Optional[List[float]] = None) -> Optional[str]:
+    """Assign one question to a cluster of its twin and persist it; returns the cluster id."""
+    text = (question or "").strip()
+    if not text:
+        return None
+    vector = _unit(embedding if embedding is not None else get_embedding(text))
+    if vector is None:
+        return None
+    cluster_id: Optional[str] = None
+    created = False
+    for _attempt in range(2):
+        clusters = _twin_clusters(twin_id)
+        try:
+            cluster_id, created = _persist_assignment(clusters, vector, text)
+        except Exception:
+            # The cached copy may now disagree with the table; reload it next time.
+            _forget_twin(twin_id)
+            raise
+        if cluster_id is not None:
+            break
+        # A rebuild replaced the twin's clusters since they were cached: reload and reassign.
+        _forget_twin(twin_id)
+        with _lock:
+            _stats["stale_clusters"] += 1
+    if cluster_id is None:
+        return None
+    with _lock:
+        _stats["questions"] += 1
+        _stats["clusters_created"] += int(created)
+    return cluster_id
+
+
+def _observe_question(conversation_id: str, question: str) -> None:
+    scope = get_conversation_scope(conversation_id)
+    if not scope:
+        return
+    twin_id = scope[0]
+    cluster_id = _assign_question(twin_id, question)
+    if not cluster_id:
+        return
+    with _lock:
+        _open_questions[conversation_id] = (twin_id, cluster_id)
+        _open_questions.move_to_end(conversation_id)
+        while len(_open_questions) > _MAX_OPEN_QUESTIONS:
+            _open_questions.popitem(last=False)
+
+
+def _observe_answer(conversation_id: str, confidence_score: Optional[float]) -> None:
+    with _lock:
+        open_question = _open_questions.pop(conversation_id, None)
+    if not open_question or not confidence_score:
+        return
+    supabase.rpc(
+        "bump_question_cluster_system",
+        {"p_cluster_id": open_question[1], "p_count_delta": 0, "p_confidence": float(confidence_score)},
+    ).execute()
+    with _lock:
+        _stats["answers"] += 1
+
+
+def _run(fn: Callable[..., None], *args: Any) -> None:
+    global _pending
+    try:
+        fn(*args)
+    except Exception as e:
+        with _lock:
+            _stats["failures"] += 1
+        print(f"[QuestionClusters] {fn.__name__} failed: {e}")
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def _submit(fn: Callable[..., None], *args: Any) -> None:
+    global _pending
+    with _lock:
+        if _pending >= QUESTION_CLUSTER_QUEUE_LIMIT:
+            _stats["dropped"] += 1
+            return
+        _pending += 1
+    _executor.submit(_run, fn, *args)
+
+
+def observe_message(
+    conversation_id: str,
+    role: str,
+    content: Optional[str],
+    confidence_score: Optional[float] = None,
+) -> None:
+    """Queue clustering of a logged user question, or its answer's confidence."""
+    if not QUESTION_CLUSTERS_ENABLED or not conversation_id:
+        return
+    if role == "user" and (content or "").strip():
+        _submit(_observe_question, conversation_id, content)
+    elif role == "assistant":
+        _submit(_observe_answer, conversation_id, confidence_score)
+
+
+def _load_question_history(twin_id: str, batch_size: int = 50) -> List[Tuple[str, Optional[float]]]:
+    """(question, confidence of the answer that followed it) for every user message, oldest first."""
+    conversations = supabase.table("conversations").select("id").eq("twin_id", twin_id).execute()
+    conversation_ids = [row["id"] for row in (conversations.data or [])]
+    messages: List[Dict[str, Any]] = []
+    for i in range(0, len(conversation_ids), batch_size):
+        res = (
+            supabase.table("messages")
+            .select("conversation_id, role, content, confidence_score, created_at")
+            .in_("conversation_id", conversation_ids[i:i + batch_size])
+            .order("created_at")
+            .execute()
+        )
+        messages.extend(res.data or [])
+    messages.sort(key=lambda m: str(m.get("created_at") or ""))
+
+    questions: List[List[Any]] = []
+    open_rows: Dict[str, int] = {}
+    for message in messages:
+        conversation_id = message.get("conversation_id")
+        if message.get("role") == "user" and (message.get("content") or "").strip():
+            open_rows[conversation_id] = len(questions)
+            questions.append([message["content"].strip(), None])
+        elif message.get("role") == "assistant" and conversation_id in open_rows:
+            questions[open_rows.pop(conversation_id)][1] = message.get("confidence_score")
+    return [(text, confidence) for text, confidence in questions]
+
+
+async def rebuild_question_clusters(twin_id: str, batch_size: int = 100) -> Optional[Dict[str, Any]]:
+    """Re-cluster a twin's whole question history and swap it in; None on failure."""
+    try:
+        questions = _load_question_history(twin_id)
+        clusters = TwinQuestionClusters(twin_id)
+        for start in range(0, len(questions), batch_size):
+            batch = questions[start:start + batch_size]
+            embeddings = await get_embeddings_async([text for text, _ in batch])
+            for (text, confidence), embedding in zip(batch, embeddings):
+                vector = _unit(embedding)
+                if vector is None:
+                    continue
+                row, _ = clusters.assign(
+                    vector, _representative(text), QUESTION_CLUSTER_SIMILARITY, QUESTION_CLUSTER_MAX_PER_TWIN
+                )
+                clusters.add_confidence(row, confidence)
+        supabase.rpc(
+            "replace_twin_question_clusters_system",
+            {"t_id": twin_id, "p_clusters": clusters.to_rows(), "p_questions": len(questions)},
+        ).execute()
+    except Exception as e:
+        with _lock:
+            _stats["failures"] += 1
+        print(f"[QuestionClusters] rebuild failed for twin {twin_id}: {e}")
+        return None
+    with _lock:
+        _twins.pop(twin_id, None)
+        _backfilled.add(twin_id)
+        _stats["rebuilds"] += 1
+    return {"questions": len(questions), "clusters": len(clusters)}
+
+
+def _is_backfilled(twin_id: str) -> bool:
+    with _lock:
+        if twin_id in _backfilled:
+            return True
+    try:
+        res = supabase.table("twin_question_cluster_state").select("twin_id").eq("twin_id", twin_id).limit(1).execute()
+    except Exception as e:
+        print(f"[QuestionClusters] cluster state lookup failed for twin {twin_id}: {e}")
+        return False
+    if not res.data:
+        return False
+    with _lock:
+        _backfilled.add(twin_id)
+    return True
+
+
+def get_top_question_clusters(twin_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+    """Most asked question clusters of a twin, or None to use the other top-question sources."""
+    if not QUESTION_CLUSTERS_ENABLED or not _is_backfilled(twin_id):
+        return None
+    try:
+        res = (
+            supabase.table("twin_question_clusters")
+            .select("id, representative, count, confidence_sum, confidence_count")
+            .eq("twin_id", twin_id)
+            .order("count", desc=True)
+            .limit(limit)
+            .execute()
+        )
+    except Exception as e:
+        print(f"[QuestionClusters] cluster read failed for twin {twin_id}: {e}")
+        return None
+    with _lock:
+        _stats["cluster_reads"] += 1
+    return list(res.data or [])
+
+
+def suggest_verified_qna_candidates(
+    twin_id: str,
+    limit: int = 10,
+    min_count: int = 2,
+    semantic_threshold: float = 0.7,
+) -> List[Dict[str, Any]]:
+    """
+    Frequent question clusters that no active verified answer covers, most asked first.
+
+    Coverage is checked with each cluster's centroid against the twin's verified
+    QnA index, so no embedding calls are made.
+    """
+    res = (
+        supabase.table("twin_question_clusters")
+        .select("id, representative, centroid, count, confidence_sum, confidence_count")
+        .eq("twin_id", twin_id)
+        .gte("count", min_count)
+        .order("count", desc=True)
+        .limit(limit * 5)
+        .execute()
+    )
+    suggestions: List[Dict[str, Any]] = []
+    for row in res.data or []:
+        centroid = parse_embedding(row.get("centroid"))
+        if centroid and find_verified_qna_for_embedding(
+            twin_id, row["representative"], centroid, semantic_threshold
+        ):
+            continue
+        suggestions.append(
+            {
+                "cluster_id": row["id"],
+                "question": row["representative"],
+                "count": row["count"],
+                "avg_confidence": round(row["confidence_sum"] / row["confidence_count"], 1)
+                if row.get("confidence_count")
+                else None,
+            }
+        )
+        if len(suggestions) >= limit:
+            break
+    return suggestions
+
+
+def invalidate_question_clusters(twin_id: Optional[str] = None) -> None:
+    """Drop cached centroids and backfill state for a twin (or all twins when twin_id is None)."""
+    with _lock:
+        if twin_id is None:
+            _twins.clear()
+            _backfilled.clear()
+            _open_questions.clear()
+        else:
+            _twins.pop(twin_id, None)
+            _backfilled.discard(twin_id)
+
+
+def get_question_cluster_stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "enabled": QUESTION_CLUSTERS_ENABLED,
+            "twins_cached": len(_twins),
+            "clusters_cached": sum(len(clusters) for clusters in _twins.values()),
+            "twins_backfilled": len(_backfilled),
+            "pending": _pending,
+            **_stats,
+        }
@@ -2,11 +2,44 @@
 Rate Limiting Module
 
 Implements sliding window rate limiting for API keys and sessions.
+
+Counting happens in a pluggable backend so the request path never touches
+Postgres:
+- RedisRateLimitBackend: sliding-window counter shared by every instance
+  (INCR + EXPIRE on per-window keys, previous window weighted by overlap)
+- InMemoryRateLimitBackend: per-process token bucket, used when Redis is
+  not configured
+
+check_rate_limit() checks and consumes in one atomic backend call
+(try_acquire), so concurrent requests cannot all pass the check before any
+of them is counted.
+
+Supabase `rate_limit_tracking` only receives aggregated counts, flushed at
+most every RATE_LIMIT_FLUSH_INTERVAL_SECONDS, for reporting.
+
+Environment Variables:
+- RATE_LIMIT_BACKEND: "auto" (default: redis if available, else memory),
+  "redis" or "memory"
+- RATE_LIMIT_FLUSH_INTERVAL_SECONDS: Supabase reporting flush interval (default 60)
 """
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
 from typing import Tuple, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from modules.observability import supabase
 
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "auto").strip().lower()
+RATE_LIMIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("RATE_LIMIT_FLUSH_INTERVAL_SECONDS", "60"))
+
+WINDOW_SECONDS = {
+    "requests_per_minute": 60,
+    "requests_per_hour": 3600,
+    "requests_per_day": 86400,
+}
+
 
 def get_window_start(timestamp: datetime, limit_type: str) -> datetime:
     """
@@ -28,6 +61,283 @@ def get_window_start(timestamp: datetime, limit_type: str) -> datetime:
         raise ValueError(f"Unknown limit_type: {limit_type}")
 
 
+def _window_seconds(limit_type: str) -> int:
+    if limit_type not in WINDOW_SECONDS:
+        raise ValueError(f"Unknown limit_type: {limit_type}")
+    return WINDOW_SECONDS[limit_type]
+
+
+# ============================================================================
+# Backends
+# ============================================================================
+
+class RateLimitBackend(ABC):
+    """
+    Counts requests per (tracking_type, tracking_key, limit_type).
+
+    current_count() returns the number of requests in the trailing window;
+    increment() records one request and returns the updated count;
+    try_acquire() records one request only if the window is below the limit
+    and returns (allowed, count). All operations are atomic with respect to
+    concurrent callers.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def current_count(self, tracking_key: str, tracking_type: str, limit_type: str, limit_value: int, now: float) -> int:
+        ...
+
+    @abstractmethod
+    def increment(self, tracking_key: str, tracking_type: str, limit_type: str, now: float) -> int:
+        ...
+
+    @abstractmethod
+    def try_acquire(
+        self, tracking_key: str, tracking_type: str, limit_type: str, limit_value: int, now: float
+    ) -> Tuple[bool, int]:
+        ...
+
+    def reset_at(self, limit_type: str, now: float) -> float:
+        """Epoch seconds at which the current window rolls over."""
+        window = _window_seconds(limit_type)
+        return (math.floor(now / window) + 1) * window
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process token bucket.
+
+    Each bucket holds `level` = tokens spent; it drains continuously at
+    limit_value / window seconds, so remaining tokens = limit_value - level.
+    The drain rate comes from the limit passed to current_count(); a bucket
+    that has only been incremented keeps its level until it is first checked.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> [level, updated_at, limit_value or None]
+        self._buckets: Dict[Tuple[str, str, str], list] = {}
+
+    def _drain(self, bucket: list, limit_type: str, now: float) -> None:
+        level, updated_at, limit_value = bucket
+        if limit_value and now > updated_at:
+            rate = limit_value / _window_seconds(limit_type)
+            bucket[0] = max(0.0, level - (now - updated_at) * rate)
+        bucket[1] = now
+
+    def current_count(self, tracking_key, tracking_type, limit_type, limit_value, now):
+        key = (tracking_type, tracking_key, limit_type)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return 0
+            bucket[2] = limit_value
+            self._drain(bucket, limit_type, now)
+            if bucket[0] <= 0:
+                del self._buckets[key]
+                return 0
+            return int(math.ceil(bucket[0] - 1e-9))
+
+    def increment(self, tracking_key, tracking_type, limit_type, now):
+        key = (tracking_type, tracking_key, limit_type)
+        with self._lock:
+            bucket = self._buckets.setdefault(key, [0.0, now, None])
+            self._drain(bucket, limit_type, now)
+            bucket[0] += 1
+            return int(math.ceil(bucket[0] - 1e-9))
+
+    def try_acquire(self, tracking_key, tracking_type, limit_type, limit_value, now):
+        key = (tracking_type, tracking_key, limit_type)
+        with self._lock:
+            bucket = self._buckets.setdefault(key, [0.0, now, limit_value])
+            bucket[2] = limit_value
+            self._drain(bucket, limit_type, now)
+            count = int(math.ceil(bucket[0] - 1e-9))
+            if count >= limit_value:
+                return False, count
+            bucket[0] += 1
+            return True, int(math.ceil(bucket[0] - 1e-9))
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Sliding-window counter in Redis.
+
+    Requests are counted in fixed per-window keys (INCR + EXPIRE in one
+    MULTI). The trailing-window count is the current window plus the previous
+    window weighted by how much of it still overlaps the trailing window.
+    try_acquire() runs the read, compare and INCR server-side in one Lua script.
+    """
+
+    name = "redis"
+    KEY_PREFIX = "ratelimit"
+
+    # KEYS: current window, previous window. ARGV: overlap, limit, ttl.
+    ACQUIRE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local count = math.floor(current + previous * tonumber(ARGV[1]))
+if count >= tonumber(ARGV[2]) then
+    return {0, count}
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return {1, count + 1}
+"""
+
+    def __init__(self, client):
+        self._client = client
+        self._acquire = client.register_script(self.ACQUIRE_SCRIPT)
+
+    def _key(self, tracking_key: str, tracking_type: str, limit_type: str, window_index: int) -> str:
+        return f"{self.KEY_PREFIX}:{tracking_type}:{limit_type}:{tracking_key}:{window_index}"
+
+    def current_count(self, tracking_key, tracking_type, limit_type, limit_value, now):
+        window = _window_seconds(limit_type)
+        index = int(now // window)
+        current, previous = self._client.mget(
+            self._key(tracking_key, tracking_type, limit_type, index),
+            self._key(tracking_key, tracking_type, limit_type, index - 1),
+        )
+        overlap = 1.0 - (now - index * window) / window
+        return int(math.floor(int(current or 0) + int(previous or 0) * overlap))
+
+    def increment(self, tracking_key, tracking_type, limit_type, now):
+        window = _window_seconds(limit_type)
+        key = self._key(tracking_key, tracking_type, limit_type, int(now // window))
+        pipe = self._client.pipeline(transaction=True)
+        pipe.incr(key)
+        # Keep the key through the next window, where it is the weighted "previous" count.
+        pipe.expire(key, window * 2)
+        count, _ = pipe.execute()
+        return int(count)
+
+    def try_acquire(self, tracking_key, tracking_type, limit_type, limit_value, now):
+        window = _window_seconds(limit_type)
+        index = int(now // window)
+        overlap = 1.0 - (now - index * window) / window
+        allowed, count = self._acquire(
+            keys=[
+                self._key(tracking_key, tracking_type, limit_type, index),
+                self._key(tracking_key, tracking_type, limit_type, index - 1),
+            ],
+            args=[repr(overlap), int(limit_value), window * 2],
+        )
+        return bool(int(allowed)), int(count)
+
+
+_backend: Optional[RateLimitBackend] = None
+_backend_lock = threading.Lock()
+
+
+def _build_backend() -> RateLimitBackend:
+    if RATE_LIMIT_BACKEND in ("auto", "redis"):
+        from modules.job_queue import get_redis_client
+
+        client = get_redis_client()
+        if client is not None:
+            return RedisRateLimitBackend(client)
+        if RATE_LIMIT_BACKEND == "redis":
+            print("[RateLimit] Redis backend requested but Redis is unavailable; using in-memory token buckets")
+    return InMemoryRateLimitBackend()
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Return the process-wide rate limit backend."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _build_backend()
+    return _backend
+
+
+def set_rate_limit_backend(backend: Optional[RateLimitBackend]) -> None:
+    """Replace the process-wide backend (None re-selects from the environment on next use)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+# ============================================================================
+# Supabase reporting (aggregated, off the request path)
+# ============================================================================
+
+_pending_usage: Dict[Tuple[str, str, str, str], int] = {}
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+_flush_in_progress = False
+
+
+def _queue_usage(tracking_key: str, tracking_type: str, limit_type: str, window_start: str) -> None:
+    global _last_flush, _flush_in_progress
+    key = (tracking_key, tracking_type, limit_type, window_start)
+    start_flush = False
+    with _pending_lock:
+        _pending_usage[key] = _pending_usage.get(key, 0) + 1
+        if not _flush_in_progress and time.monotonic() - _last_flush >= RATE_LIMIT_FLUSH_INTERVAL_SECONDS:
+            _flush_in_progress = True
+            _last_flush = time.monotonic()
+            start_flush = True
+    if start_flush:
+        threading.Thread(target=_flush_in_background, name="rate-limit-flush", daemon=True).start()
+
+
+def _flush_in_background() -> None:
+    global _flush_in_progress
+    try:
+        flush_rate_limit_usage()
+    finally:
+        with _pending_lock:
+            _flush_in_progress = False
+
+
+def flush_rate_limit_usage() -> int:
+    """
+    Write aggregated request counts to rate_limit_tracking.
+    Returns number of (key, window) rows written. Failed rows are re-queued.
+    """
+    with _pending_lock:
+        pending = dict(_pending_usage)
+        _pending_usage.clear()
+
+    written = 0
+    for (tracking_key, tracking_type, limit_type, window_start), count in pending.items():
+        try:
+            response = supabase.table("rate_limit_tracking").select("id, request_count").eq(
+                "tracking_key", tracking_key
+            ).eq("tracking_type", tracking_type).eq("limit_type", limit_type).eq(
+                "window_start", window_start
+            ).execute()
+
+            if response.data and len(response.data) > 0:
+                supabase.table("rate_limit_tracking").update({
+                    "request_count": response.data[0].get("request_count", 0) + count
+                }).eq("id", response.data[0]["id"]).execute()
+            else:
+                supabase.table("rate_limit_tracking").insert({
+                    "tracking_key": tracking_key,
+                    "tracking_type": tracking_type,
+                    "limit_type": limit_type,
+                    "window_start": window_start,
+                    "request_count": count
+                }).execute()
+            written += 1
+        except Exception as e:
+            print(f"Error flushing rate limit usage: {e}")
+            key = (tracking_key, tracking_type, limit_type, window_start)
+            with _pending_lock:
+                _pending_usage[key] = _pending_usage.get(key, 0) + count
+    return written
+
+
+# ============================================================================
+# Public API
+# ============================================================================
+
 def check_rate_limit(
     tracking_key: str,
     tracking_type: str,
@@ -35,42 +345,26 @@ def check_rate_limit(
     limit_value: int
 ) -> Tuple[bool, Dict[str, Any]]:
     """
-    Check if a request should be allowed based on rate limits.
+    Check a request against the rate limit and, if allowed, count it.
+
+    The check and the increment are one atomic backend operation, so callers
+    must not call record_request() for the same request.
     Returns: (allowed: bool, status_dict)
-    status_dict contains: remaining, reset_at, limit_value
+    status_dict contains: remaining, reset_at, limit_value, current_count
     """
-    now = datetime.utcnow()
-    window_start = get_window_start(now, limit_type)
-    
     try:
-        # Get current count for this window
-        response = supabase.table("rate_limit_tracking").select("*").eq(
-            "tracking_key", tracking_key
-        ).eq("tracking_type", tracking_type).eq("limit_type", limit_type).eq(
-            "window_start", window_start.isoformat()
-        ).execute()
-        
-        current_count = 0
-        if response.data and len(response.data) > 0:
-            current_count = response.data[0].get("request_count", 0)
-        
-        # Check if limit exceeded
-        allowed = current_count < limit_value
+        backend = get_rate_limit_backend()
+        now = time.time()
+        allowed, current_count = backend.try_acquire(tracking_key, tracking_type, limit_type, limit_value, now)
+        if allowed:
+            _queue_usage(tracking_key, tracking_type, limit_type, _window_start_iso(limit_type, now))
+
         remaining = max(0, limit_value - current_count)
-        
-        # Calculate reset time (next window start)
-        if limit_type == "requests_per_minute":
-            reset_at = window_start + timedelta(minutes=1)
-        elif limit_type == "requests_per_hour":
-            reset_at = window_start + timedelta(hours=1)
-        elif limit_type == "requests_per_day":
-            reset_at = window_start + timedelta(days=1)
-        else:
-            reset_at = None
-        
+        reset_at = datetime.fromtimestamp(backend.reset_at(limit_type, now), timezone.utc)
+
         return allowed, {
             "remaining": remaining,
-            "reset_at": reset_at.isoformat() if reset_at else None,
+            "reset_at": reset_at.isoformat(),
             "limit_value": limit_value,
             "current_count": current_count
         }
@@ -91,40 +385,21 @@ def record_request(
     limit_type: str
 ) -> None:
     """
-    Record a request in the rate limit tracking table.
+    Record a request that bypassed check_rate_limit() and queue it for reporting.
     """
     try:
-        now = datetime.utcnow()
-        window_start = get_window_start(now, limit_type)
-        window_start_str = window_start.isoformat()
-        
-        # Try to get existing record
-        response = supabase.table("rate_limit_tracking").select("*").eq(
-            "tracking_key", tracking_key
-        ).eq("tracking_type", tracking_type).eq("limit_type", limit_type).eq(
-            "window_start", window_start_str
-        ).execute()
-        
-        if response.data and len(response.data) > 0:
-            # Update existing record
-            current_count = response.data[0].get("request_count", 0)
-            supabase.table("rate_limit_tracking").update({
-                "request_count": current_count + 1
-            }).eq("id", response.data[0]["id"]).execute()
-        else:
-            # Create new record
-            supabase.table("rate_limit_tracking").insert({
-                "tracking_key": tracking_key,
-                "tracking_type": tracking_type,
-                "limit_type": limit_type,
-                "window_start": window_start_str,
-                "request_count": 1
-            }).execute()
+        now = time.time()
+        get_rate_limit_backend().increment(tracking_key, tracking_type, limit_type, now)
+        _queue_usage(tracking_key, tracking_type, limit_type, _window_start_iso(limit_type, now))
     except Exception as e:
         print(f"Error recording request: {e}")
         # Don't fail on rate limit tracking errors
 
 
+def _window_start_iso(limit_type: str, now: float) -> str:
+    return get_window_start(datetime.fromtimestamp(now, timezone.utc), limit_type).isoformat()
+
+
 def get_rate_limit_status(
     tracking_key: str,
     tracking_type: str
@@ -140,7 +415,7 @@ def get_rate_limit_status(
         ).eq("tracking_type", tracking_type).execute()
         
         status = {}
-        now = datetime.utcnow()
+        now = datetime.now(timezone.utc)
         
         for record in (response.data or []):
             limit_type = record["limit_type"]
@@ -155,6 +430,16 @@ def get_rate_limit_status(
                     "window_start": window_start_str
                 }
         
+        # Counts not yet flushed to Supabase
+        with _pending_lock:
+            for (key, kind, limit_type, window_start_str), count in _pending_usage.items():
+                if key != tracking_key or kind != tracking_type:
+                    continue
+                if window_start_str != get_window_start(now, limit_type).isoformat():
+                    continue
+                entry = status.setdefault(limit_type, {"current_count": 0, "window_start": window_start_str})
+                entry["current_count"] += count
+
         return status
     except Exception as e:
         print(f"Error getting rate limit status: {e}")
@@ -167,7 +452,7 @@ def cleanup_old_windows() -> int:
     Returns number of records deleted.
     """
     try:
-        cutoff = datetime.utcnow() - timedelta(days=2)
+        cutoff = datetime.now(timezone.utc) - timedelta(days=2)
         cutoff_str = cutoff.isoformat()
         
         # Delete old windows
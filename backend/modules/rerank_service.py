@@ -0,0 +1,257 @@
+"""
+Rerank Service: cross-request micro-batching for the FlashRank cross-encoder.
+
+FlashRank's rerank() is synchronous and CPU-bound. Calling it inside an async
+handler stalls the event loop, and concurrent chats serialize behind it. The
+batcher runs the model on a dedicated worker thread (ONNX Runtime releases the
+GIL while it computes). Requests that arrive within a short window are
+coalesced so their query/passage pairs go through the model in one forward
+pass, then the scores are split back per request.
+
+Latency is tracked as two histograms: queue wait (submit -> batch start) and
+compute (forward pass per batch).
+
+Environment Variables:
+- RERANK_BATCHING_ENABLED: "true" (default) or "false" to call the ranker inline
+- RERANK_BATCH_WINDOW_MS: how long the first request waits for company (default 5)
+- RERANK_BATCH_MAX_PAIRS: pairs per forward pass (default 128)
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from modules.latency_histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+RERANK_BATCHING_ENABLED = os.getenv("RERANK_BATCHING_ENABLED", "true").lower() == "true"
+RERANK_BATCH_WINDOW_MS = float(os.getenv("RERANK_BATCH_WINDOW_MS", "5"))
+RERANK_BATCH_MAX_PAIRS = int(os.getenv("RERANK_BATCH_MAX_PAIRS", "128"))
+
+
+def score_pairs_with_flashrank(ranker: Any, pairs: List[Tuple[str, str]]) -> List[float]:
+    """
+    Score (query, passage) pairs in one forward pass.
+
+    Mirrors FlashRank's pairwise cross-encoder path (tokenize, ONNX session,
+    sigmoid/softmax), but accepts pairs from different queries. Rankers
+    without an ONNX session (listwise LLM models) are scored per query via
+    their own rerank().
+    """
+    if not pairs:
+        return []
+    session = getattr(ranker, "session", None)
+    tokenizer = getattr(ranker, "tokenizer", None)
+    if session is None or tokenizer is None or getattr(ranker, "llm_model", None) is not None:
+        return _score_pairs_per_query(ranker, pairs)
+
+    encoded = tokenizer.encode_batch([[query, text] for query, text in pairs])
+    input_ids = np.array([e.ids for e in encoded])
+    token_type_ids = np.array([e.type_ids for e in encoded])
+    attention_mask = np.array([e.attention_mask for e in encoded])
+
+    onnx_input = {"input_ids": input_ids.astype(np.int64), "attention_mask": attention_mask.astype(np.int64)}
+    if not np.all(token_type_ids == 0):
+        onnx_input["token_type_ids"] = token_type_ids.astype(np.int64)
+
+    logits = session.run(None, onnx_input)[0]
+    if logits.shape[1] == 1:
+        scores = 1 / (1 + np.exp(-logits.flatten()))
+    else:
+        exp_logits = np.exp(logits)
+        scores = exp_logits[:, 1] / np.sum(exp_logits, axis=1)
+    return [float(score) for score in scores]
+
+
+def _score_pairs_per_query(ranker: Any, pairs: List[Tuple[str, str]]) -> List[float]:
+    from flashrank import RerankRequest
+
+    scores = [0.0] * len(pairs)
+    by_query: Dict[str, List[int]] = {}
+    for i, (query, _text) in enumerate(pairs):
+        by_query.setdefault(query, []).append(i)
+    for query, indexes in by_query.items():
+        passages = [{"id": str(i), "text": pairs[i][1]} for i in indexes]
+        for res in ranker.rerank(RerankRequest(query=query, passages=passages)):
+            scores[int(res["id"])] = float(res.get("score", 0.0) or 0.0)
+    return scores
+
+
+class _PendingRequest:
+    __slots__ = ("query", "texts", "future", "enqueued_at")
+
+    def __init__(self, query: str, texts: List[str]):
+        self.query = query
+        self.texts = texts
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+def _resolve(future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Settle a request's future unless its caller already gave up on it."""
+    if future.done():
+        return
+    with contextlib.suppress(InvalidStateError):
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+class RerankBatcher:
+    """
+    Coalesces rerank requests onto one worker thread.
+
+    score() is awaitable from any event loop; score_sync() blocks. Each batch
+    starts when the first waiting request has waited window_ms or when
+    max_pairs are pending, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        ranker_provider: Callable[[], Any],
+        *,
+        window_ms: float = RERANK_BATCH_WINDOW_MS,
+        max_pairs: int = RERANK_BATCH_MAX_PAIRS,
+        scorer: Callable[[Any, List[Tuple[str, str]]], List[float]] = score_pairs_with_flashrank,
+    ):
+        self._ranker_provider = ranker_provider
+        self._scorer = scorer
+        self.window_seconds = max(0.0, window_ms) / 1000.0
+        self.max_pairs = max(1, int(max_pairs))
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self.queue_wait_ms = LatencyHistogram()
+        self.compute_ms = LatencyHistogram()
+        self.batches = 0
+        self.requests = 0
+        self.pairs = 0
+        self.errors = 0
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="rerank-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, query: str, texts: List[str]) -> Future:
+        request = _PendingRequest(query, list(texts))
+        if not request.texts:
+            request.future.set_result([])
+            return request.future
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future
+
+    async def score(self, query: str, texts: List[str]) -> List[float]:
+        return await asyncio.wrap_future(self.submit(query, texts))
+
+    def score_sync(self, query: str, texts: List[str]) -> List[float]:
+        return self.submit(query, texts).result()
+
+    def _collect_batch(self) -> List[_PendingRequest]:
+        first = self._queue.get()
+        batch = [first]
+        pair_count = len(first.texts)
+        deadline = first.enqueued_at + self.window_seconds
+        while pair_count < self.max_pairs:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            pair_count += len(request.texts)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            try:
+                self._score_batch(batch)
+            except Exception as e:
+                # Never let one bad batch end the thread; later requests would hang.
+                self.errors += 1
+                logger.exception(f"Rerank batch failed: {e}")
+                for request in batch:
+                    _resolve(request.future, error=e)
+
+    def _score_batch(self, batch: List[_PendingRequest]) -> None:
+        # Callers that timed out or were cancelled drop out; the rest can no longer be cancelled.
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        started = time.perf_counter()
+        for request in batch:
+            self.queue_wait_ms.observe((started - request.enqueued_at) * 1000.0)
+        pairs = [(request.query, text) for request in batch for text in request.texts]
+        try:
+            ranker = self._ranker_provider()
+            if ranker is None:
+                raise RuntimeError("FlashRank model unavailable")
+            scores = self._scorer(ranker, pairs)
+        except Exception as e:
+            self.errors += 1
+            for request in batch:
+                _resolve(request.future, error=e)
+            return
+        finally:
+            self.compute_ms.observe((time.perf_counter() - started) * 1000.0)
+
+        self.batches += 1
+        self.requests += len(batch)
+        self.pairs += len(pairs)
+        offset = 0
+        for request in batch:
+            size = len(request.texts)
+            _resolve(request.future, result=scores[offset:offset + size])
+            offset += size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": RERANK_BATCHING_ENABLED,
+            "window_ms": round(self.window_seconds * 1000.0, 3),
+            "max_pairs": self.max_pairs,
+            "pending": self._queue.qsize(),
+            "batches": self.batches,
+            "requests": self.requests,
+            "pairs": self.pairs,
+            "errors": self.errors,
+            "avg_requests_per_batch": round(self.requests / self.batches, 3) if self.batches else 0.0,
+            "avg_pairs_per_batch": round(self.pairs / self.batches, 3) if self.batches else 0.0,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "compute_ms": self.compute_ms.snapshot(),
+        }
+
+
+_flashrank_batcher: Optional[RerankBatcher] = None
+_flashrank_batcher_lock = threading.Lock()
+
+
+def get_flashrank_batcher() -> RerankBatcher:
+    """Process-wide batcher for the FlashRank model returned by retrieval.get_ranker()."""
+    global _flashrank_batcher
+    if _flashrank_batcher is None:
+        with _flashrank_batcher_lock:
+            if _flashrank_batcher is None:
+                from modules.retrieval import get_ranker
+
+                _flashrank_batcher = RerankBatcher(get_ranker)
+    return _flashrank_batcher
+
+
+def get_rerank_batching_stats() -> Dict[str, Any]:
+    if _flashrank_batcher is None:
+        return {"enabled": RERANK_BATCHING_ENABLED, "batches": 0}
+    return _flashrank_batcher.stats()
@@ -0,0 +1,62 @@
+"""
+Response Streaming: carries realizer LLM tokens from the agent graph to the chat SSE stream.
+
+The chat router binds a per-request token sink before it starts the agent run.
+realizer_node looks the sink up and, when one is bound, streams its generation
+through inference_router.stream_text instead of waiting for invoke_text. The
+sink lives in a ContextVar rather than in TwinState so it is never written to
+the LangGraph checkpointer and cannot leak across concurrent requests.
+
+SentenceSplitter cuts the token stream on the same boundaries the grounding
+verifier uses for claims, so checks can run as soon as each sentence is complete.
+
+Environment Variables:
+- CHAT_TOKEN_STREAMING_ENABLED: forward realizer tokens to the client as they are generated (default false)
+"""
+import os
+import re
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+CHAT_TOKEN_STREAMING_ENABLED = os.getenv("CHAT_TOKEN_STREAMING_ENABLED", "false").lower() == "true"
+
+TokenSink = Callable[[str], None]
+
+_token_sink: ContextVar[Optional[TokenSink]] = ContextVar("realizer_token_sink", default=None)
+
+# End of a sentence: terminal punctuation followed by whitespace, or a line break.
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def bind_token_sink(sink: Optional[TokenSink]) -> None:
+    """Route realizer tokens produced in the current context (and tasks it spawns) to sink."""
+    _token_sink.set(sink)
+
+
+def get_token_sink() -> Optional[TokenSink]:
+    return _token_sink.get()
+
+
+class SentenceSplitter:
+    """Accumulates streamed text and returns each sentence once its boundary has arrived."""
+
+    def __init__(self) -> None:
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        self._buffer += delta or ""
+        sentences: List[str] = []
+        while True:
+            match = _SENTENCE_BOUNDARY.search(self._buffer)
+            if not match:
+                break
+            sentence = self._buffer[: match.start()].strip()
+            self._buffer = self._buffer[match.end():]
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Return the trailing sentence that never got a boundary (end of generation)."""
+        tail, self._buffer = self._buffer.strip(), ""
+        return [tail] if tail else []
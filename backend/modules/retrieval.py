@@ -5,8 +5,14 @@ import logging
 import json
 import re
 import inspect
-from typing import List, Dict, Any, Optional, Set, Tuple
+import threading
+from typing import AbstractSet, Any, Dict, FrozenSet, List, Optional, Set, Tuple
+from collections import OrderedDict
 from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
+
 from modules.clients import get_openai_client, get_pinecone_index, get_cohere_client
 from modules.langfuse_sdk import is_enabled as is_langfuse_enabled, langfuse_context, observe
 from modules.verified_qna import match_verified_qna
@@ -20,7 +26,9 @@ from modules.delphi_namespace import (
     resolve_creator_id_for_twin,
 )
 from modules.grounding_policy import get_grounding_policy
+from modules.namespace_ledger import get_namespace_ledger_stats, select_read_namespaces
 from modules.pinecone_adapter import PineconeIndexAdapter, get_pinecone_index_mode
+from modules.retrieval_metrics import record_phase_timing
 
 # Embedding generation moved to modules.embeddings
 from modules.embeddings import get_embedding, get_embeddings_async
@@ -83,6 +91,11 @@ RETRIEVAL_SPARSE_FUSION_ENABLED = (
 RETRIEVAL_SPARSE_RRF_WEIGHT = max(_float_env("RETRIEVAL_SPARSE_RRF_WEIGHT", 0.75), 0.05)
 RETRIEVAL_MMR_ENABLED = os.getenv("RETRIEVAL_MMR_ENABLED", "true").lower() == "true"
 RETRIEVAL_MMR_LAMBDA = min(max(_float_env("RETRIEVAL_MMR_LAMBDA", 0.72), 0.0), 1.0)
+# Fetch stored vectors with general matches so MMR can diversify on cosine similarity.
+# Off by default: cosine redundancy between related chunks (~0.6-0.9) is on a much
+# larger scale than the Jaccard penalty RETRIEVAL_MMR_LAMBDA was tuned for (~0.1-0.3),
+# and it adds include_values to every general query.
+RETRIEVAL_MMR_DENSE_ENABLED = os.getenv("RETRIEVAL_MMR_DENSE_ENABLED", "false").lower() == "true"
 RETRIEVAL_DIVERSITY_PER_DOC_CAP = max(1, _int_env("RETRIEVAL_DIVERSITY_PER_DOC_CAP", 3))
 RETRIEVAL_DIVERSITY_PER_SECTION_CAP = max(1, _int_env("RETRIEVAL_DIVERSITY_PER_SECTION_CAP", 2))
 RETRIEVAL_CONFIDENCE_RETRY_ENABLED = (
@@ -101,6 +114,8 @@ _VIRTUAL_SOURCE_PREFIXES = (
     "graph-",
 )
 
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9_-]*")
+
 _QUERY_STOPWORDS: Set[str] = {
     "a", "an", "and", "are", "as", "ask", "at", "be", "by", "can", "do", "for",
     "from", "have", "hello", "help", "hi", "how", "i", "in", "is", "it", "know",
@@ -122,11 +137,62 @@ def _token_variants(token: str) -> Set[str]:
     return variants
 
 
+class _TextFeatures:
+    """Tokenization of one chunk text, computed once and reused by every stage."""
+
+    __slots__ = ("token_set", "_variants")
+
+    def __init__(self, text: str):
+        self.token_set: FrozenSet[str] = frozenset(_TOKEN_PATTERN.findall((text or "").lower()))
+        self._variants: Optional[FrozenSet[str]] = None
+
+    @property
+    def variants(self) -> FrozenSet[str]:
+        """Token set expanded with the plural/singular variants anchors are matched against."""
+        if self._variants is None:
+            variants: Set[str] = set()
+            for token in self.token_set:
+                variants.update(_token_variants(token))
+            self._variants = frozenset(variants)
+        return self._variants
+
+
+class _TextFeatureCache:
+    """
+    Per-request cache of chunk tokenizations and query anchors.
+
+    The sparse, MMR, lexical-fusion and anchor-filter stages all look at the
+    same candidate texts; sharing one cache across them means each text is
+    tokenized once per query instead of once per stage.
+    """
+
+    def __init__(self) -> None:
+        self._texts: Dict[str, _TextFeatures] = {}
+        self._anchors: Dict[str, FrozenSet[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def text(self, text: str) -> _TextFeatures:
+        key = text or ""
+        features = self._texts.get(key)
+        if features is None:
+            features = self._texts[key] = _TextFeatures(key)
+        return features
+
+    def anchors(self, query: str) -> FrozenSet[str]:
+        key = query or ""
+        anchors = self._anchors.get(key)
+        if anchors is None:
+            anchors = self._anchors[key] = frozenset(_extract_anchor_terms(key))
+        return anchors
+
+
 def _extract_anchor_terms(query: str) -> Set[str]:
     text = (query or "").strip().lower()
     if not text:
         return set()
-    tokens = re.findall(r"[a-z0-9][a-z0-9_-]*", text)
+    tokens = _TOKEN_PATTERN.findall(text)
     anchors: Set[str] = set()
     for token in tokens:
         if len(token) < RETRIEVAL_ANCHOR_MIN_TOKEN_LEN or token in _QUERY_STOPWORDS:
@@ -161,7 +227,7 @@ def _should_attempt_query_expansion(query: str) -> bool:
     if not q:
         return False
     # Keep single-token chatter out of expensive expansion calls.
-    token_count = len(re.findall(r"[a-z0-9][a-z0-9_-]*", q.lower()))
+    token_count = len(_TOKEN_PATTERN.findall(q.lower()))
     return token_count >= 2
 
 
@@ -193,7 +259,7 @@ def _should_attempt_hyde(query: str) -> bool:
     if any(marker in q for marker in reasoning_markers):
         return True
 
-    token_count = len(re.findall(r"[a-z0-9][a-z0-9_-]*", q))
+    token_count = len(_TOKEN_PATTERN.findall(q))
     return token_count >= 7
 
 
@@ -282,17 +348,23 @@ def _deterministic_query_expansions(query: str) -> List[str]:
     return deduped[:3]
 
 
-def _text_has_anchor_overlap(text: str, anchors: Set[str]) -> bool:
+def _text_has_anchor_overlap(
+    text: str,
+    anchors: AbstractSet[str],
+    features: Optional[_TextFeatureCache] = None,
+) -> bool:
     if not anchors:
         return False
-    text_tokens = re.findall(r"[a-z0-9][a-z0-9_-]*", (text or "").lower())
-    normalized_tokens: Set[str] = set()
-    for token in text_tokens:
-        normalized_tokens.update(_token_variants(token))
-    return bool(anchors.intersection(normalized_tokens))
+    if features is None:
+        features = _TextFeatureCache()
+    return not features.text(text).variants.isdisjoint(anchors)
 
 
-def _apply_anchor_relevance_filter(contexts: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+def _apply_anchor_relevance_filter(
+    contexts: List[Dict[str, Any]],
+    query: str,
+    features: Optional[_TextFeatureCache] = None,
+) -> List[Dict[str, Any]]:
     """
     Remove clearly off-topic retrieval hits.
 
@@ -304,7 +376,9 @@ def _apply_anchor_relevance_filter(contexts: List[Dict[str, Any]], query: str) -
     if not contexts:
         return contexts
 
-    anchors = _extract_anchor_terms(query)
+    if features is None:
+        features = _TextFeatureCache()
+    anchors = features.anchors(query)
     if not anchors:
         return contexts
 
@@ -316,7 +390,7 @@ def _apply_anchor_relevance_filter(contexts: List[Dict[str, Any]], query: str) -
 
         text = str(ctx.get("text", ""))
         vector_score = float(ctx.get("vector_score", ctx.get("score", 0.0)) or 0.0)
-        if _text_has_anchor_overlap(text, anchors) or vector_score >= RETRIEVAL_STRONG_VECTOR_FLOOR:
+        if _text_has_anchor_overlap(text, anchors, features) or vector_score >= RETRIEVAL_STRONG_VECTOR_FLOOR:
             filtered.append(ctx)
 
     if len(filtered) != len(contexts):
@@ -340,14 +414,13 @@ def _apply_anchor_relevance_filter(contexts: List[Dict[str, Any]], query: str) -
     return filtered
 
 
-def _lexical_overlap_score(query: str, text: str) -> float:
-    anchors = _extract_anchor_terms(query)
+def _lexical_overlap_score(query: str, text: str, features: Optional[_TextFeatureCache] = None) -> float:
+    if features is None:
+        features = _TextFeatureCache()
+    anchors = features.anchors(query)
     if not anchors:
         return 0.0
-    text_tokens = set(re.findall(r"[a-z0-9][a-z0-9_-]*", (text or "").lower()))
-    normalized_tokens: Set[str] = set()
-    for token in text_tokens:
-        normalized_tokens.update(_token_variants(token))
+    normalized_tokens = features.text(text).variants
     if not normalized_tokens:
         return 0.0
     overlap = len(anchors.intersection(normalized_tokens))
@@ -437,7 +510,11 @@ def _apply_prompt_question_policy(query: str, contexts: List[Dict[str, Any]]) ->
     return adjusted
 
 
-def _apply_lexical_fusion(query: str, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _apply_lexical_fusion(
+    query: str,
+    contexts: List[Dict[str, Any]],
+    features: Optional[_TextFeatureCache] = None,
+) -> List[Dict[str, Any]]:
     """
     Blend semantic/reranker scores with lexical overlap to reduce misses on
     direct phrase queries while keeping dense retrieval signal dominant.
@@ -445,10 +522,12 @@ def _apply_lexical_fusion(query: str, contexts: List[Dict[str, Any]]) -> List[Di
     if not RETRIEVAL_LEXICAL_FUSION_ENABLED or not contexts:
         return contexts
 
+    if features is None:
+        features = _TextFeatureCache()
     fused: List[Dict[str, Any]] = []
     for ctx in contexts:
         current_score = float(ctx.get("score", ctx.get("vector_score", 0.0)) or 0.0)
-        lexical_score = _lexical_overlap_score(query, str(ctx.get("text", "")))
+        lexical_score = _lexical_overlap_score(query, str(ctx.get("text", "")), features)
         blended = ((1.0 - RETRIEVAL_LEXICAL_FUSION_ALPHA) * current_score) + (
             RETRIEVAL_LEXICAL_FUSION_ALPHA * lexical_score
         )
@@ -463,11 +542,7 @@ def _apply_lexical_fusion(query: str, contexts: List[Dict[str, Any]]) -> List[Di
     return fused
 
 
-def _text_tokens(text: str) -> Set[str]:
-    return set(re.findall(r"[a-z0-9][a-z0-9_-]*", (text or "").lower()))
-
-
-def _jaccard_similarity(a: Set[str], b: Set[str]) -> float:
+def _jaccard_similarity(a: AbstractSet[str], b: AbstractSet[str]) -> float:
     if not a or not b:
         return 0.0
     inter = len(a.intersection(b))
@@ -477,37 +552,111 @@ def _jaccard_similarity(a: Set[str], b: Set[str]) -> float:
     return inter / float(union)
 
 
-def _apply_mmr(query: str, contexts: List[Dict[str, Any]], *, limit: int) -> List[Dict[str, Any]]:
+def _as_dense_vector(values: Any) -> Optional[np.ndarray]:
+    """Stored Pinecone values as a float32 vector, or None when absent/unusable."""
+    if isinstance(values, np.ndarray):
+        vector = values.astype(np.float32, copy=False)
+    elif isinstance(values, (list, tuple)) and values:
+        try:
+            vector = np.asarray(values, dtype=np.float32)
+        except (TypeError, ValueError):
+            return None
+    else:
+        return None
+    return vector if vector.ndim == 1 and vector.size else None
+
+
+class _MMRSimilarity:
     """
-    Lightweight MMR diversification over already-retrieved contexts.
+    Candidate-to-candidate similarity for MMR: cosine between stored vectors
+    (one Gram matrix product), token Jaccard for any pair where a candidate has
+    no vector of the dominant dimension. Jaccard rows are computed on demand.
+    """
+
+    def __init__(
+        self,
+        texts: List[str],
+        vectors: Optional[Dict[str, np.ndarray]],
+        features: _TextFeatureCache,
+    ):
+        self.texts = texts
+        self.features = features
+        candidate_vectors = [(vectors or {}).get(text) for text in texts]
+        dims = [v.shape[0] for v in candidate_vectors if v is not None]
+        dimension = max(set(dims), key=dims.count) if dims else 0
+        self.has_vector = np.asarray(
+            [v is not None and v.shape[0] == dimension for v in candidate_vectors],
+            dtype=bool,
+        )
+        self.all_dense = bool(self.has_vector.all())
+        self.gram: Optional[np.ndarray] = None
+        if self.has_vector.any():
+            zero = np.zeros(dimension, dtype=np.float32)
+            matrix = np.stack([v if ok else zero for v, ok in zip(candidate_vectors, self.has_vector)])
+            norms = np.linalg.norm(matrix, axis=1)
+            matrix /= np.where(norms > 0, norms, 1.0)[:, None]
+            self.gram = matrix @ matrix.T
+
+    def row(self, index: int, available: np.ndarray) -> np.ndarray:
+        """Similarity of candidate `index` to every candidate (only `available` entries are meaningful)."""
+        if self.all_dense:
+            return self.gram[index]
+        values = np.zeros(len(self.texts), dtype=np.float32)
+        if self.has_vector[index]:
+            values[self.has_vector] = self.gram[index, self.has_vector]
+            lexical = np.flatnonzero(available & ~self.has_vector)
+        else:
+            lexical = np.flatnonzero(available)
+        if lexical.size:
+            tokens = self.features.text(self.texts[index]).token_set
+            for other in lexical:
+                values[other] = _jaccard_similarity(tokens, self.features.text(self.texts[other]).token_set)
+        return values
+
+
+def _apply_mmr(
+    query: str,
+    contexts: List[Dict[str, Any]],
+    *,
+    limit: int,
+    features: Optional[_TextFeatureCache] = None,
+    vectors: Optional[Dict[str, np.ndarray]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    MMR diversification over already-retrieved contexts.
+
+    vectors maps context text to its stored embedding. Candidates with a
+    vector are compared by cosine similarity; the rest fall back to token
+    Jaccard. Each selection step is a masked argmax plus one running-max update.
     """
     if not RETRIEVAL_MMR_ENABLED or len(contexts) <= max(1, limit):
         return contexts[: max(1, limit)]
 
+    if features is None:
+        features = _TextFeatureCache()
     candidates = [dict(row) for row in contexts]
-    candidate_tokens = [_text_tokens(str(row.get("text") or "")) for row in candidates]
+    similarity = _MMRSimilarity([str(row.get("text") or "") for row in candidates], vectors, features)
+    relevances = np.asarray(
+        [float(row.get("score", row.get("vector_score", 0.0)) or 0.0) for row in candidates],
+        dtype=np.float64,
+    ) * RETRIEVAL_MMR_LAMBDA
+    # -inf once selected, so argmax only sees the remaining candidates.
+    taken = np.zeros(len(candidates), dtype=np.float64)
+    available = np.ones(len(candidates), dtype=bool)
+    # Max similarity to anything selected so far, updated against the newest pick only.
+    penalties: Optional[np.ndarray] = None
     selected: List[Dict[str, Any]] = []
-    selected_token_sets: List[Set[str]] = []
-
-    while candidates and len(selected) < max(1, limit):
-        best_idx = 0
-        best_score = float("-inf")
-
-        for idx, row in enumerate(candidates):
-            relevance = float(row.get("score", row.get("vector_score", 0.0)) or 0.0)
-            diversity_penalty = 0.0
-            if selected_token_sets:
-                diversity_penalty = max(
-                    _jaccard_similarity(candidate_tokens[idx], sel_tokens)
-                    for sel_tokens in selected_token_sets
-                )
-            mmr_score = (RETRIEVAL_MMR_LAMBDA * relevance) - ((1.0 - RETRIEVAL_MMR_LAMBDA) * diversity_penalty)
-            if mmr_score > best_score:
-                best_score = mmr_score
-                best_idx = idx
 
-        selected.append(candidates.pop(best_idx))
-        selected_token_sets.append(candidate_tokens.pop(best_idx))
+    for _ in range(min(max(1, limit), len(candidates))):
+        scores = relevances + taken
+        if penalties is not None:
+            scores -= (1.0 - RETRIEVAL_MMR_LAMBDA) * penalties
+        best_idx = int(np.argmax(scores))
+        selected.append(candidates[best_idx])
+        taken[best_idx] = -np.inf
+        available[best_idx] = False
+        row = similarity.row(best_idx, available)
+        penalties = row.astype(np.float64) if penalties is None else np.maximum(penalties, row)
 
     return selected
 
@@ -797,16 +946,17 @@ def _enforce_twin_source_scope(
 
 @contextmanager
 def measure_phase(phase_name: str, twin_id: str):
-    """Context manager to measure and log phase timing."""
-    start = time.time()
+    """Context manager to measure, record and log phase timing."""
+    start = time.perf_counter()
     try:
         yield
     finally:
-        elapsed = time.time() - start
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        record_phase_timing(phase_name, duration_ms)
         log_retrieval_event("phase_timing", {
             "phase": phase_name,
             "twin_id": twin_id,
-            "duration_ms": round(elapsed * 1000, 2)
+            "duration_ms": duration_ms
         })
 
 # =============================================================================
@@ -898,48 +1048,160 @@ _selective_reranking_enabled = os.getenv("SELECTIVE_RERANKING_ENABLED", "true").
 # Reranking cache
 _rerank_cache_enabled = os.getenv("RERANK_CACHE_ENABLED", "true").lower() == "true"
 _rerank_cache_maxsize = int(os.getenv("RERANK_CACHE_MAXSIZE", "1000"))
+_rerank_cache_ttl_seconds = float(os.getenv("RERANK_CACHE_TTL_SECONDS", "600"))
+# "memory" (default) or "redis" to share results across web instances
+_rerank_cache_backend = os.getenv("RERANK_CACHE_BACKEND", "memory").strip().lower()
+_flashrank_model_name = "ms-marco-MiniLM-L-12-v2"
+
+
+def _reranker_version() -> str:
+    """Identity of the reranker configuration; results from another configuration never match."""
+    return (
+        f"cohere={_cohere_rerank_model if _cohere_rerank_enabled else 'off'}|"
+        f"flashrank={_flashrank_model_name if _flashrank_enabled else 'off'}|"
+        f"hybrid={_hybrid_cohere_weight}:{_hybrid_flashrank_weight}"
+    )
 
 
-def _get_cache_key(query: str, contexts: List[Dict[str, Any]]) -> str:
-    """Generate cache key for reranking results."""
+def _get_cache_key(query: str, contexts: List[Dict[str, Any]], target_k: int = 0) -> str:
+    """
+    Generate cache key for reranking results.
+
+    Every candidate contributes its chunk_id plus a hash of its full text, in
+    order, so two different candidate sets can never share a key.
+    """
     import hashlib
-    context_hash = hashlib.md5(
-        "".join(c.get("text", "")[:100] for c in contexts).encode()
-    ).hexdigest()[:16]
-    query_hash = hashlib.md5(query.encode()).hexdigest()[:16]
-    return f"{query_hash}:{context_hash}"
+    digest = hashlib.sha256()
+    digest.update(_reranker_version().encode())
+    digest.update(f"|k={target_k}|q=".encode())
+    digest.update(query.encode())
+    for c in contexts:
+        text_hash = hashlib.sha1(str(c.get("text", "")).encode()).hexdigest()
+        digest.update(f"\x1f{c.get('chunk_id') or c.get('id') or ''}:{text_hash}".encode())
+    return f"rerank:v2:{digest.hexdigest()}"
 
 
 class RerankCache:
-    """Simple LRU cache for reranking results."""
-    
-    def __init__(self, maxsize: int = 1000):
-        self._cache: Dict[str, Tuple[List[Dict[str, Any]], float]] = {}
-        self._maxsize = maxsize
-        self._access_times: Dict[str, float] = {}
-        
+    """
+    LRU + TTL cache for reranking results with an optional Redis tier.
+
+    get/set are O(1) (OrderedDict move_to_end/popitem). Redis errors are
+    treated as misses so the cache never fails a rerank.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl_seconds: float = 600, redis_client=None):
+        self._cache: "OrderedDict[str, Tuple[List[Dict[str, Any]], float]]" = OrderedDict()
+        self._maxsize = max(1, int(maxsize))
+        self._ttl_seconds = ttl_seconds
+        self._redis = redis_client
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _put_local(self, key: str, value: List[Dict[str, Any]]) -> None:
+        expires_at = time.monotonic() + self._ttl_seconds if self._ttl_seconds > 0 else float("inf")
+        self._cache[key] = (value, expires_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
     def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
-        if key in self._cache:
-            self._access_times[key] = time.time()
-            return self._cache[key][0]
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return [dict(c) for c in entry[0]]
+                del self._cache[key]
+                self.expirations += 1
+
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(key)
+            except Exception as e:
+                raw = None
+                print(f"[Reranking] Redis cache lookup failed: {e}")
+            if raw:
+                value = json.loads(raw)
+                with self._lock:
+                    self._put_local(key, value)
+                    self.redis_hits += 1
+                return [dict(c) for c in value]
+
+        with self._lock:
+            self.misses += 1
         return None
-        
+
     def set(self, key: str, value: List[Dict[str, Any]]):
-        if len(self._cache) >= self._maxsize:
-            # Evict oldest
-            oldest = min(self._access_times, key=self._access_times.get)
-            del self._cache[oldest]
-            del self._access_times[oldest]
-        self._cache[key] = (value, time.time())
-        self._access_times[key] = time.time()
-        
+        stored = [dict(c) for c in value]
+        with self._lock:
+            self._put_local(key, stored)
+        if self._redis is not None:
+            try:
+                payload = json.dumps(stored, default=str)
+                if self._ttl_seconds > 0:
+                    self._redis.set(key, payload, ex=max(1, int(self._ttl_seconds)))
+                else:
+                    self._redis.set(key, payload)
+            except Exception as e:
+                print(f"[Reranking] Redis cache write failed: {e}")
+
     def clear(self):
-        self._cache.clear()
-        self._access_times.clear()
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.redis_hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.hits + self.redis_hits
+            lookups = hits + self.misses
+            return {
+                "backend": "redis" if self._redis is not None else "memory",
+                "size": len(self._cache),
+                "maxsize": self._maxsize,
+                "ttl_seconds": self._ttl_seconds,
+                "hits": hits,
+                "local_hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _build_rerank_cache_redis():
+    if _rerank_cache_backend != "redis":
+        return None
+    url = os.getenv("RERANK_CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+    if not url:
+        print("[Reranking] Redis rerank cache requested but no REDIS_URL set; using memory only")
+        return None
+    try:
+        import redis
+
+        client = redis.from_url(url, decode_responses=True)
+        client.ping()
+        return client
+    except Exception as e:
+        print(f"[Reranking] Redis rerank cache unavailable ({e}); using memory only")
+        return None
 
 
 # Global rerank cache instance
-_rerank_cache = RerankCache(maxsize=_rerank_cache_maxsize)
+_rerank_cache = RerankCache(
+    maxsize=_rerank_cache_maxsize,
+    ttl_seconds=_rerank_cache_ttl_seconds,
+    redis_client=_build_rerank_cache_redis() if _rerank_cache_enabled else None,
+)
 
 
 def get_ranker(preload: bool = False):
@@ -953,9 +1215,9 @@ def get_ranker(preload: bool = False):
     if _flashrank_enabled and _flashrank_available:
         if _ranker_instance is None or preload:
             try:
-                print("[FlashRank] Loading model ms-marco-MiniLM-L-12-v2...")
+                print(f"[FlashRank] Loading model {_flashrank_model_name}...")
                 _ranker_instance = Ranker(
-                    model_name="ms-marco-MiniLM-L-12-v2", 
+                    model_name=_flashrank_model_name, 
                     cache_dir="./.model_cache"
                 )
                 print("[FlashRank] Model loaded successfully")
@@ -1101,15 +1363,27 @@ async def _rerank_with_flashrank(
     IMPROVEMENTS:
     - Better error handling
     - Source tracking
+    - Model runs off the event loop; concurrent requests are micro-batched
+      (see modules.rerank_service)
     """
     ranker = get_ranker()
     if ranker is None or not contexts:
         return None
 
     try:
-        passages = [{"id": str(i), "text": c["text"], "meta": c} for i, c in enumerate(contexts)]
-        rerank_request = RerankRequest(query=query, passages=passages)
-        results = ranker.rerank(rerank_request)
+        from modules.rerank_service import RERANK_BATCHING_ENABLED, get_flashrank_batcher
+
+        if RERANK_BATCHING_ENABLED:
+            scores = await get_flashrank_batcher().score(query, [c["text"] for c in contexts])
+            results = sorted(
+                ({"id": str(i), "score": score} for i, score in enumerate(scores)),
+                key=lambda res: res["score"],
+                reverse=True,
+            )
+        else:
+            passages = [{"id": str(i), "text": c["text"], "meta": c} for i, c in enumerate(contexts)]
+            rerank_request = RerankRequest(query=query, passages=passages)
+            results = await asyncio.to_thread(ranker.rerank, rerank_request)
 
         max_rerank_score = max((float(res.get("score", 0) or 0) for res in results), default=0.0)
         if max_rerank_score < 0.001:
@@ -1248,7 +1522,7 @@ async def rerank_contexts(
     # IMPROVEMENT 6: Cache Lookup
     cache_key = None
     if _rerank_cache_enabled:
-        cache_key = _get_cache_key(query, contexts)
+        cache_key = _get_cache_key(query, contexts, rerank_target_k)
         cached = _rerank_cache.get(cache_key)
         if cached is not None:
             print(f"[Reranking] Cache hit")
@@ -1360,6 +1634,11 @@ async def generate_hyde_answer(query: str) -> str:
         return query
 
 
+def _rrf_doc_id(hit: Dict[str, Any]) -> Any:
+    # Only stringify id-less hits: str() of a hit carrying dense values is expensive.
+    return hit["id"] if "id" in hit else str(hit)
+
+
 def rrf_merge(
     results_list: List[List[Dict[str, Any]]],
     k: int = 60,
@@ -1386,14 +1665,14 @@ def rrf_merge(
             except Exception:
                 weight = 1.0
         for rank, hit in enumerate(results, start=1):
-            doc_id = hit.get("id", str(hit))
+            doc_id = _rrf_doc_id(hit)
             score_map[doc_id] = score_map.get(doc_id, 0.0) + (weight / (k + rank))
     
     # Build reverse index: {doc_id: hit}
     doc_map: Dict[str, Dict[str, Any]] = {}
     for results in results_list:
         for hit in results:
-            doc_id = hit.get("id", str(hit))
+            doc_id = _rrf_doc_id(hit)
             if doc_id not in doc_map:
                 doc_map[doc_id] = hit
     
@@ -1426,10 +1705,18 @@ def rrf_merge(
     return final_results
 
 
-def _build_sparse_hits_from_dense(query: str, dense_hits: List[Dict[str, Any]], *, limit: int) -> List[Dict[str, Any]]:
+def _build_sparse_hits_from_dense(
+    query: str,
+    dense_hits: List[Dict[str, Any]],
+    *,
+    limit: int,
+    features: Optional[_TextFeatureCache] = None,
+) -> List[Dict[str, Any]]:
     """
     Build lexical (sparse) ranking over dense candidates, then fuse via RRF.
     """
+    if features is None:
+        features = _TextFeatureCache()
     sparse_hits: List[Dict[str, Any]] = []
     for hit in dense_hits:
         if not isinstance(hit, dict):
@@ -1438,7 +1725,7 @@ def _build_sparse_hits_from_dense(query: str, dense_hits: List[Dict[str, Any]],
         text = str(metadata.get("text") or "").strip()
         if not text:
             continue
-        sparse_score = _lexical_overlap_score(query, text)
+        sparse_score = _lexical_overlap_score(query, text, features)
         if sparse_score <= 0.0:
             continue
         row = dict(hit)
@@ -1607,24 +1894,41 @@ async def _execute_pinecone_queries(
         print(f"[Retrieval] Pinecone index unavailable: {e}")
         return []
 
-    def _extract_matches(response: Any) -> List[Dict[str, Any]]:
+    # Skip namespaces (typically the legacy twin namespace) the ledger knows are empty.
+    namespace_candidates = select_read_namespaces(
+        target_twin_id,
+        namespace_candidates,
+        index,
+        queries_per_namespace=len(embeddings) + 1,
+    )
+
+    def _extract_matches(response: Any, include_values: bool = False) -> List[Dict[str, Any]]:
         if isinstance(response, dict):
-            return response.get("matches", []) or []
+            matches = response.get("matches", []) or []
+            return [_with_dense_values(m) for m in matches] if include_values else matches
         raw = getattr(response, "matches", []) or []
         normalized = []
         for match in raw:
             if isinstance(match, dict):
-                normalized.append(match)
+                normalized.append(_with_dense_values(match) if include_values else match)
             else:
-                normalized.append(
-                    {
-                        "id": getattr(match, "id", None),
-                        "score": getattr(match, "score", 0.0),
-                        "metadata": getattr(match, "metadata", {}) or {},
-                    }
-                )
+                row = {
+                    "id": getattr(match, "id", None),
+                    "score": getattr(match, "score", 0.0),
+                    "metadata": getattr(match, "metadata", {}) or {},
+                }
+                values = _as_dense_vector(getattr(match, "values", None)) if include_values else None
+                if values is not None:
+                    row["values"] = values
+                normalized.append(row)
         return normalized
 
+    def _with_dense_values(match: Dict[str, Any]) -> Dict[str, Any]:
+        values = _as_dense_vector(match.get("values"))
+        if values is None:
+            return {k: v for k, v in match.items() if k != "values"}
+        return {**match, "values": values}
+
     def _merge_matches(matches: List[Dict[str, Any]]) -> Dict[str, Any]:
         # Keep best score for duplicate ids across namespaces.
         dedup: Dict[str, Dict[str, Any]] = {}
@@ -1642,6 +1946,13 @@ async def _execute_pinecone_queries(
         is_verified: bool = False,
     ) -> Dict[str, Any]:
         """Execute one query across namespace candidates and merge."""
+        # Stored vectors are only consumed by dense MMR over general matches.
+        include_values = (
+            not is_verified
+            and RETRIEVAL_MMR_ENABLED
+            and RETRIEVAL_MMR_DENSE_ENABLED
+            and pinecone_adapter.mode == "vector"
+        )
         top_k = (
             RETRIEVAL_TOP_K_VERIFIED
             if is_verified
@@ -1663,14 +1974,26 @@ async def _execute_pinecone_queries(
                 else:
                     metadata_filter = None
 
-                return pinecone_adapter.query(
+                if not include_values:
+                    return pinecone_adapter.query(
+                        vector=embedding,
+                        query_text=query_text,
+                        top_k=top_k,
+                        namespace=namespace,
+                        include_metadata=True,
+                        metadata_filter=metadata_filter,
+                    )
+                response = pinecone_adapter.query(
                     vector=embedding,
                     query_text=query_text,
                     top_k=top_k,
                     namespace=namespace,
                     include_metadata=True,
                     metadata_filter=metadata_filter,
+                    include_values=True,
                 )
+                # Convert stored vectors to arrays here, off the event loop.
+                return {"matches": _extract_matches(response, include_values=True)}
 
             attempts: List[float] = [RETRIEVAL_PER_NAMESPACE_TIMEOUT]
             # Optional retry for primary namespace only (disabled by default to avoid long tail timeouts).
@@ -1950,6 +2273,19 @@ def _process_general_matches(merged_general_hits: List[Dict[str, Any]]) -> List[
     return raw_general_chunks
 
 
+def _dense_vectors_by_text(hits: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Stored vectors of general matches keyed by chunk text (the context key MMR sees)."""
+    vectors: Dict[str, np.ndarray] = {}
+    for hit in hits:
+        values = hit.get("values") if isinstance(hit, dict) else None
+        if not isinstance(values, np.ndarray):
+            continue
+        text = str((hit.get("metadata") or {}).get("text") or "").strip()
+        if text:
+            vectors.setdefault(text, values)
+    return vectors
+
+
 def _filter_by_group_permissions(
     contexts: List[Dict[str, Any]],
     group_id: Optional[str]
@@ -2184,31 +2520,33 @@ async def retrieve_context_with_verified_first(
     return vector_results
 
 
-@observe(name="rag_vector_retrieval")
-async def retrieve_context_vectors(
-    query: str,
-    twin_id: str,
-    creator_id: Optional[str] = None,
-    group_id: Optional[str] = None,
-    top_k: int = 5,
-    _retry_attempted: bool = False,
-) -> List[Dict[str, Any]]:
+@dataclass
+class _RetrievalSession:
     """
-    Optimized retrieval pipeline using HyDE, Query Expansion, and RRF (vector-only).
-    Used when no verified QnA match is found.
-    If group_id is provided, filters results by group permissions.
-    
-    Args:
-        query: Search query
-        twin_id: Twin ID
-        creator_id: Creator ID (for Delphi namespace format) - None for legacy
-        group_id: Access group for filtering (optional)
-        top_k: Number of results to return
+    Per-query retrieval state shared between the primary pass and the
+    confidence retry: the search plan, its query embeddings and the raw
+    Pinecone results with the per-query top_k they were fetched at.
     """
-    query = (query or "").strip()
-    if not query:
-        return []
 
+    query: str
+    twin_id: str
+    creator_id: Optional[str]
+    search_queries: List[str]
+    search_weights: List[float]
+    search_kinds: List[str]
+    embeddings: List[List[float]]
+    index_mode: str
+    raw_results: List[Dict[str, Any]] = field(default_factory=list)
+    fetched_top_k: int = 0
+    vector_fetches: int = 0
+
+
+async def _prepare_retrieval_session(
+    query: str,
+    twin_id: str,
+    creator_id: Optional[str],
+) -> Optional[_RetrievalSession]:
+    """Query prep (expansion + HyDE) and query embeddings, each under its timeout budget."""
     # 1. Query prep under a strict timeout budget.
     expanded_queries: List[str] = _deterministic_query_expansions(query)
     hyde_answer = ""
@@ -2223,31 +2561,32 @@ async def retrieve_context_vectors(
         prep_tasks.append(generate_hyde_answer(query))
         prep_labels.append("hyde")
 
-    if prep_tasks:
-        try:
-            prep_results = await asyncio.wait_for(
-                asyncio.gather(*prep_tasks, return_exceptions=True),
-                timeout=RETRIEVAL_QUERY_PREP_TIMEOUT,
-            )
-            for label, raw in zip(prep_labels, prep_results):
-                if isinstance(raw, Exception):
-                    continue
-                if label == "expand" and isinstance(raw, list):
-                    llm_expansions = [
-                        _normalize_query_text(q)
-                        for q in raw
-                        if isinstance(q, str) and _normalize_query_text(q)
-                    ]
-                    expanded_queries.extend(llm_expansions)
-                elif label == "hyde" and isinstance(raw, str) and raw.strip():
-                    hyde_answer = _normalize_query_text(raw)
-        except asyncio.TimeoutError:
-            print(
-                f"[Retrieval] Query preparation timed out after {RETRIEVAL_QUERY_PREP_TIMEOUT}s, "
-                "using reduced query plan."
-            )
-        except Exception as e:
-            print(f"[Retrieval] Query preparation failed: {e}, using reduced query plan")
+    with measure_phase("query_prep", twin_id):
+        if prep_tasks:
+            try:
+                prep_results = await asyncio.wait_for(
+                    asyncio.gather(*prep_tasks, return_exceptions=True),
+                    timeout=RETRIEVAL_QUERY_PREP_TIMEOUT,
+                )
+                for label, raw in zip(prep_labels, prep_results):
+                    if isinstance(raw, Exception):
+                        continue
+                    if label == "expand" and isinstance(raw, list):
+                        llm_expansions = [
+                            _normalize_query_text(q)
+                            for q in raw
+                            if isinstance(q, str) and _normalize_query_text(q)
+                        ]
+                        expanded_queries.extend(llm_expansions)
+                    elif label == "hyde" and isinstance(raw, str) and raw.strip():
+                        hyde_answer = _normalize_query_text(raw)
+            except asyncio.TimeoutError:
+                print(
+                    f"[Retrieval] Query preparation timed out after {RETRIEVAL_QUERY_PREP_TIMEOUT}s, "
+                    "using reduced query plan."
+                )
+            except Exception as e:
+                print(f"[Retrieval] Query preparation failed: {e}, using reduced query plan")
 
     search_plan = _build_search_query_plan(
         query=query,
@@ -2272,40 +2611,41 @@ async def retrieve_context_vectors(
         )
     )
     
-    # 2. Embeddings under timeout with single-query fallback.
-    all_embeddings: List[List[float]] = []
-    pinecone_index_mode = get_pinecone_index_mode()
-    if pinecone_index_mode == "integrated":
-        # Integrated mode searches by text directly and does not require external query embeddings.
-        all_embeddings = [[0.0] for _ in search_queries]
-    else:
-        try:
-            all_embeddings = await asyncio.wait_for(
-                get_embeddings_async(search_queries),
-                timeout=RETRIEVAL_EMBEDDING_TIMEOUT,
-            )
-        except asyncio.TimeoutError:
-            print(f"[Retrieval] Embedding batch timed out after {RETRIEVAL_EMBEDDING_TIMEOUT}s, falling back to single embedding")
-        except Exception as e:
-            print(f"[Retrieval] Embedding batch failed: {e}, falling back to single embedding")
-
-    if not all_embeddings:
+    with measure_phase("query_embedding", twin_id):
+        # 2. Embeddings under timeout with single-query fallback.
+        all_embeddings: List[List[float]] = []
+        pinecone_index_mode = get_pinecone_index_mode()
         if pinecone_index_mode == "integrated":
-            all_embeddings = [[0.0]]
-            search_queries = [query]
-            search_weights = [1.0]
-            search_kinds = ["original"]
+            # Integrated mode searches by text directly and does not require external query embeddings.
+            all_embeddings = [[0.0] for _ in search_queries]
         else:
             try:
-                one = await asyncio.wait_for(
-                    asyncio.to_thread(get_embedding, query),
-                    timeout=min(RETRIEVAL_EMBEDDING_TIMEOUT, 4.0),
+                all_embeddings = await asyncio.wait_for(
+                    get_embeddings_async(search_queries),
+                    timeout=RETRIEVAL_EMBEDDING_TIMEOUT,
                 )
-                if one:
-                    all_embeddings = [one]
+            except asyncio.TimeoutError:
+                print(f"[Retrieval] Embedding batch timed out after {RETRIEVAL_EMBEDDING_TIMEOUT}s, falling back to single embedding")
             except Exception as e:
-                print(f"[Retrieval] Single-embedding fallback failed: {e}")
-                return []
+                print(f"[Retrieval] Embedding batch failed: {e}, falling back to single embedding")
+
+        if not all_embeddings:
+            if pinecone_index_mode == "integrated":
+                all_embeddings = [[0.0]]
+                search_queries = [query]
+                search_weights = [1.0]
+                search_kinds = ["original"]
+            else:
+                try:
+                    one = await asyncio.wait_for(
+                        asyncio.to_thread(get_embedding, query),
+                        timeout=min(RETRIEVAL_EMBEDDING_TIMEOUT, 4.0),
+                    )
+                    if one:
+                        all_embeddings = [one]
+                except Exception as e:
+                    print(f"[Retrieval] Single-embedding fallback failed: {e}")
+                    return None
 
     if len(all_embeddings) != len(search_queries):
         aligned = min(len(all_embeddings), len(search_queries))
@@ -2317,7 +2657,29 @@ async def retrieve_context_vectors(
         else:
             all_embeddings = []
     if not all_embeddings:
-        return []
+        return None
+
+    return _RetrievalSession(
+        query=query,
+        twin_id=twin_id,
+        creator_id=creator_id,
+        search_queries=search_queries,
+        search_weights=search_weights,
+        search_kinds=search_kinds,
+        embeddings=all_embeddings,
+        index_mode=pinecone_index_mode,
+    )
+
+
+async def _fetch_session_results(session: _RetrievalSession, general_top_k: int) -> List[Dict[str, Any]]:
+    """
+    Vector search for the session's search plan at the given per-query top_k.
+
+    Results already fetched at an equal or larger top_k are reused as-is;
+    otherwise Pinecone is queried again with the session's embeddings.
+    """
+    if session.raw_results and session.fetched_top_k >= general_top_k:
+        return session.raw_results
 
     async def _execute_queries_with_compat(
         embeddings_batch: List[List[float]],
@@ -2326,16 +2688,17 @@ async def retrieve_context_vectors(
         timeout_override: float,
     ) -> List[Dict[str, Any]]:
         kwargs = {
-            "creator_id": creator_id,
+            "creator_id": session.creator_id,
             "timeout": timeout_override,
             "general_top_k": top_k_override,
         }
         if search_text_batch is not None:
             kwargs["search_texts"] = search_text_batch
+        session.vector_fetches += 1
         try:
             return await _execute_pinecone_queries(
                 embeddings_batch,
-                twin_id,
+                session.twin_id,
                 **kwargs,
             )
         except TypeError as e:
@@ -2346,137 +2709,212 @@ async def retrieve_context_vectors(
             kwargs.pop("search_texts", None)
             return await _execute_pinecone_queries(
                 embeddings_batch,
-                twin_id,
+                session.twin_id,
                 **kwargs,
             )
 
-    # 3. Parallel Vector Search with bounded timeout.
-    all_results = await _execute_queries_with_compat(
-        embeddings_batch=all_embeddings,
-        search_text_batch=search_queries,
-        top_k_override=max(RETRIEVAL_TOP_K_GENERAL, top_k * 2),
-        timeout_override=RETRIEVAL_VECTOR_TIMEOUT,
-    )
-
-    # Fallback pass: if the full pipeline failed, retry a single direct query embedding.
-    if not all_results:
-        print(
-            "[Retrieval] Primary vector pipeline returned no results; attempting minimal "
-            "single-query fallback."
+    with measure_phase("vector_search", session.twin_id):
+        # 3. Parallel Vector Search with bounded timeout.
+        all_results = await _execute_queries_with_compat(
+            embeddings_batch=session.embeddings,
+            search_text_batch=session.search_queries,
+            top_k_override=general_top_k,
+            timeout_override=RETRIEVAL_VECTOR_TIMEOUT,
         )
-        try:
-            if pinecone_index_mode == "integrated":
-                fallback_embedding = [0.0]
-            else:
-                fallback_embedding = await asyncio.wait_for(
-                    asyncio.to_thread(get_embedding, query),
-                    timeout=min(RETRIEVAL_EMBEDDING_TIMEOUT, 8.0),
-                )
-            all_results = await _execute_queries_with_compat(
-                embeddings_batch=[fallback_embedding],
-                search_text_batch=[query],
-                top_k_override=max(RETRIEVAL_RETRY_TOP_K, top_k * 2),
-                timeout_override=max(RETRIEVAL_VECTOR_TIMEOUT, RETRIEVAL_PER_NAMESPACE_TIMEOUT * 2.5),
+
+        # Fallback pass: if the full pipeline failed, retry a single direct query embedding.
+        if not all_results:
+            print(
+                "[Retrieval] Primary vector pipeline returned no results; attempting minimal "
+                "single-query fallback."
             )
-        except Exception as e:
-            print(f"[Retrieval] Minimal fallback retrieval failed: {e}")
+            try:
+                if session.index_mode == "integrated":
+                    fallback_embedding = [0.0]
+                else:
+                    fallback_embedding = await asyncio.wait_for(
+                        asyncio.to_thread(get_embedding, session.query),
+                        timeout=min(RETRIEVAL_EMBEDDING_TIMEOUT, 8.0),
+                    )
+                all_results = await _execute_queries_with_compat(
+                    embeddings_batch=[fallback_embedding],
+                    search_text_batch=[session.query],
+                    top_k_override=max(RETRIEVAL_RETRY_TOP_K, general_top_k),
+                    timeout_override=max(RETRIEVAL_VECTOR_TIMEOUT, RETRIEVAL_PER_NAMESPACE_TIMEOUT * 2.5),
+                )
+            except Exception as e:
+                print(f"[Retrieval] Minimal fallback retrieval failed: {e}")
+
+    if all_results:
+        session.raw_results = all_results
+        session.fetched_top_k = general_top_k
+    return all_results or []
+
+
+async def _rank_session_results(
+    session: _RetrievalSession,
+    all_results: List[Dict[str, Any]],
+    *,
+    group_id: Optional[str],
+    top_k: int,
+    retry_applied: bool,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any], str]:
+    """Merge, filter, diversify and rerank raw vector results into final contexts."""
+    query = session.query
+    twin_id = session.twin_id
+    search_weights = session.search_weights
 
-    if not all_results:
-        return []
-    
     verified_results = all_results[0]
     general_results_list = [res["matches"] for res in all_results[1:]]
-    
-    # 4. Dense merge across query variants.
-    dense_merged_hits = rrf_merge(
-        general_results_list,
-        weights=search_weights[: len(general_results_list)],
-    )
-    dense_scores = [float(hit.get("score", 0.0) or 0.0) for hit in dense_merged_hits if isinstance(hit, dict)]
-
-    # 4b. Sparse lexical ranking over dense candidates + weighted RRF fusion.
-    sparse_hits: List[Dict[str, Any]] = []
-    merged_general_hits = dense_merged_hits
-    if RETRIEVAL_SPARSE_FUSION_ENABLED and dense_merged_hits:
-        sparse_hits = _build_sparse_hits_from_dense(
-            query,
-            dense_merged_hits,
-            limit=max(RETRIEVAL_RETRY_TOP_K, top_k * 4),
+    # Shared by the sparse, MMR, fusion and anchor stages below.
+    text_features = _TextFeatureCache()
+    
+    with measure_phase("merge", twin_id):
+        # 4. Dense merge across query variants.
+        dense_merged_hits = rrf_merge(
+            general_results_list,
+            weights=search_weights[: len(general_results_list)],
         )
-        if sparse_hits:
-            merged_general_hits = rrf_merge(
-                [dense_merged_hits, sparse_hits],
-                weights=[1.0, RETRIEVAL_SPARSE_RRF_WEIGHT],
+        dense_scores = [float(hit.get("score", 0.0) or 0.0) for hit in dense_merged_hits if isinstance(hit, dict)]
+
+        # 4b. Sparse lexical ranking over dense candidates + weighted RRF fusion.
+        sparse_hits: List[Dict[str, Any]] = []
+        merged_general_hits = dense_merged_hits
+        if RETRIEVAL_SPARSE_FUSION_ENABLED and dense_merged_hits:
+            sparse_hits = _build_sparse_hits_from_dense(
+                query,
+                dense_merged_hits,
+                limit=max(RETRIEVAL_RETRY_TOP_K, top_k * 4),
+                features=text_features,
             )
-    sparse_scores = [
-        float(hit.get("sparse_score", hit.get("score", 0.0)) or 0.0)
-        for hit in sparse_hits
-        if isinstance(hit, dict)
-    ]
+            if sparse_hits:
+                merged_general_hits = rrf_merge(
+                    [dense_merged_hits, sparse_hits],
+                    weights=[1.0, RETRIEVAL_SPARSE_RRF_WEIGHT],
+                )
+        sparse_scores = [
+            float(hit.get("sparse_score", hit.get("score", 0.0)) or 0.0)
+            for hit in sparse_hits
+            if isinstance(hit, dict)
+        ]
+    
+        # 5. Process matches into contexts
+        contexts = _process_verified_matches(verified_results)
+        raw_general_chunks = _process_general_matches(merged_general_hits)
+        contexts.extend(raw_general_chunks)
+
+        # 5b. Hard guardrail: never allow cross-twin chunks to pass through.
+        contexts = _enforce_twin_source_scope(contexts, twin_id)
+    
+        # 6. Filter by group permissions if group_id is provided
+        contexts = _filter_by_group_permissions(contexts, group_id)
+        print(f"DEBUG: After permissions: {len(contexts)} (Group: {group_id})")
+    
+        # 7. Deduplicate and apply diversity controls before reranking.
+        unique_contexts = _deduplicate_and_limit(contexts, top_k=max(top_k * 6, RETRIEVAL_RETRY_TOP_K))
+        unique_contexts = _apply_mmr(
+            query,
+            unique_contexts,
+            limit=max(top_k * 4, RETRIEVAL_RETRY_TOP_K),
+            features=text_features,
+            vectors=_dense_vectors_by_text(merged_general_hits),
+        )
+        unique_contexts = _apply_diversity_caps(
+            unique_contexts,
+            limit=max(top_k * 3, RETRIEVAL_RETRY_TOP_K),
+        )
+        print(f"DEBUG: Unique contexts before rerank: {len(unique_contexts)}")
+    
+    with measure_phase("rerank", twin_id):
+        # 8. Rerank with all improvements (timeout, hybrid, selective, cache)
+        # Calculate max vector score for selective reranking
+        max_vector_score = max(
+            (float(c.get("vector_score", c.get("score", 0.0)) or 0.0) for c in unique_contexts),
+            default=0.0
+        )
     
-    # 5. Process matches into contexts
-    contexts = _process_verified_matches(verified_results)
-    raw_general_chunks = _process_general_matches(merged_general_hits)
-    contexts.extend(raw_general_chunks)
+        final_contexts, rerank_provider_used = await rerank_contexts(
+            query=query,
+            contexts=unique_contexts,
+            top_k=top_k,
+            max_vector_score=max_vector_score
+        )
 
-    # 5b. Hard guardrail: never allow cross-twin chunks to pass through.
-    contexts = _enforce_twin_source_scope(contexts, twin_id)
-    
-    # 6. Filter by group permissions if group_id is provided
-    contexts = _filter_by_group_permissions(contexts, group_id)
-    print(f"DEBUG: After permissions: {len(contexts)} (Group: {group_id})")
-    
-    # 7. Deduplicate and apply diversity controls before reranking.
-    unique_contexts = _deduplicate_and_limit(contexts, top_k=max(top_k * 6, RETRIEVAL_RETRY_TOP_K))
-    unique_contexts = _apply_mmr(query, unique_contexts, limit=max(top_k * 4, RETRIEVAL_RETRY_TOP_K))
-    unique_contexts = _apply_diversity_caps(
-        unique_contexts,
-        limit=max(top_k * 3, RETRIEVAL_RETRY_TOP_K),
-    )
-    print(f"DEBUG: Unique contexts before rerank: {len(unique_contexts)}")
-    
-    # 8. Rerank with all improvements (timeout, hybrid, selective, cache)
-    # Calculate max vector score for selective reranking
-    max_vector_score = max(
-        (float(c.get("vector_score", c.get("score", 0.0)) or 0.0) for c in unique_contexts),
-        default=0.0
-    )
+    with measure_phase("post_process", twin_id):
+        # Keep raw vector score available after reranking updates score.
+        for ctx in final_contexts:
+            if "vector_score" not in ctx:
+                ctx["vector_score"] = float(ctx.get("score", 0.0) or 0.0)
+
+        # Hybrid lexical fusion: blend lexical overlap with semantic/rerank score.
+        final_contexts = _apply_lexical_fusion(query, final_contexts, features=text_features)
+        final_contexts = _apply_prompt_question_policy(query, final_contexts)
+
+        # Drop weak off-topic hits before handing context to the planner.
+        final_contexts = _apply_anchor_relevance_filter(final_contexts, query, features=text_features)
+        final_contexts = final_contexts[:top_k]
+
+        rerank_scores: List[float] = []
+        if rerank_provider_used != "vector":
+            rerank_scores = [float(c.get("score", 0.0) or 0.0) for c in final_contexts]
+        retrieval_stats = _build_retrieval_stats_payload(
+            dense_scores=dense_scores,
+            sparse_scores=sparse_scores,
+            rerank_scores=rerank_scores,
+            final_contexts=final_contexts,
+            retry_applied=retry_applied,
+        )
+    return final_contexts, retrieval_stats, rerank_provider_used
+
+
+@observe(name="rag_vector_retrieval")
+async def retrieve_context_vectors(
+    query: str,
+    twin_id: str,
+    creator_id: Optional[str] = None,
+    group_id: Optional[str] = None,
+    top_k: int = 5,
+) -> List[Dict[str, Any]]:
+    """
+    Optimized retrieval pipeline using HyDE, Query Expansion, and RRF (vector-only).
+    Used when no verified QnA match is found.
+    If group_id is provided, filters results by group permissions.
+
+    When the result misses RETRIEVAL_CONFIDENCE_FLOOR, a single retry widens the
+    candidate pool. The retry reuses the session's search plan and embeddings and
+    only re-queries Pinecone when the first pass fetched fewer candidates than
+    the retry needs.
     
-    final_contexts, rerank_provider_used = await rerank_contexts(
-        query=query,
-        contexts=unique_contexts,
-        top_k=top_k,
-        max_vector_score=max_vector_score
-    )
+    Args:
+        query: Search query
+        twin_id: Twin ID
+        creator_id: Creator ID (for Delphi namespace format) - None for legacy
+        group_id: Access group for filtering (optional)
+        top_k: Number of results to return
+    """
+    query = (query or "").strip()
+    if not query:
+        return []
+
+    session = await _prepare_retrieval_session(query, twin_id, creator_id)
+    if session is None:
+        return []
+
+    all_results = await _fetch_session_results(session, max(RETRIEVAL_TOP_K_GENERAL, top_k * 2))
+    if not all_results:
+        return []
 
-    # Keep raw vector score available after reranking updates score.
-    for ctx in final_contexts:
-        if "vector_score" not in ctx:
-            ctx["vector_score"] = float(ctx.get("score", 0.0) or 0.0)
-
-    # Hybrid lexical fusion: blend lexical overlap with semantic/rerank score.
-    final_contexts = _apply_lexical_fusion(query, final_contexts)
-    final_contexts = _apply_prompt_question_policy(query, final_contexts)
-
-    # Drop weak off-topic hits before handing context to the planner.
-    final_contexts = _apply_anchor_relevance_filter(final_contexts, query)
-    final_contexts = final_contexts[:top_k]
-
-    rerank_scores: List[float] = []
-    if rerank_provider_used != "vector":
-        rerank_scores = [float(c.get("score", 0.0) or 0.0) for c in final_contexts]
-    retrieval_stats = _build_retrieval_stats_payload(
-        dense_scores=dense_scores,
-        sparse_scores=sparse_scores,
-        rerank_scores=rerank_scores,
-        final_contexts=final_contexts,
-        retry_applied=_retry_attempted,
+    final_contexts, retrieval_stats, rerank_provider_used = await _rank_session_results(
+        session,
+        all_results,
+        group_id=group_id,
+        top_k=top_k,
+        retry_applied=False,
     )
 
     query_policy = get_grounding_policy(query)
     should_retry = (
         RETRIEVAL_CONFIDENCE_RETRY_ENABLED
-        and not _retry_attempted
         and bool(query_policy.get("requires_evidence"))
         and bool(final_contexts)
         and not bool(retrieval_stats.get("meets_confidence_floor"))
@@ -2489,17 +2927,34 @@ async def retrieve_context_vectors(
             f"({retrieval_stats.get('confidence_floor_value'):.3f} < {RETRIEVAL_CONFIDENCE_FLOOR:.3f}); "
             f"retrying with top_k={retry_k}."
         )
-        retry_contexts = await retrieve_context_vectors(
-            query,
-            twin_id,
-            creator_id=creator_id,
-            group_id=group_id,
-            top_k=retry_k,
-            _retry_attempted=True,
+        retry_started = time.perf_counter()
+        fetches_before = session.vector_fetches
+        retry_results = await _fetch_session_results(session, max(RETRIEVAL_TOP_K_GENERAL, retry_k * 2))
+        retry_contexts: List[Dict[str, Any]] = []
+        if retry_results:
+            retry_contexts, retry_stats, retry_provider = await _rank_session_results(
+                session,
+                retry_results,
+                group_id=group_id,
+                top_k=retry_k,
+                retry_applied=True,
+            )
+        retry_latency_ms = round((time.perf_counter() - retry_started) * 1000.0, 2)
+        retry_refetched = session.vector_fetches > fetches_before
+        print(
+            f"[Retrieval] Confidence retry took {retry_latency_ms}ms "
+            f"(vector_refetch={retry_refetched})"
         )
         if retry_contexts:
-            return retry_contexts[:top_k]
-    
+            final_contexts = retry_contexts[:top_k]
+            retrieval_stats = retry_stats
+            rerank_provider_used = retry_provider
+        retrieval_stats["retry_latency_ms"] = retry_latency_ms
+        retrieval_stats["retry_vector_refetch"] = retry_refetched
+
+    search_queries = session.search_queries
+    search_kinds = session.search_kinds
+    search_weights = session.search_weights
     
     namespace = get_namespace(creator_id, twin_id)
     print(f"[Retrieval] Found {len(final_contexts)} contexts for twin_id={twin_id} (namespace={namespace})")
@@ -2684,6 +3139,7 @@ async def get_retrieval_health_status(twin_id: Optional[str] = None) -> Dict[str
         "vector_timeout_s": RETRIEVAL_VECTOR_TIMEOUT,
         "per_namespace_timeout_s": RETRIEVAL_PER_NAMESPACE_TIMEOUT,
         "index_init_timeout_s": RETRIEVAL_INDEX_INIT_TIMEOUT,
+        "namespace_ledger": get_namespace_ledger_stats(),
     }
     
     if not dual_read:
@@ -2704,6 +3160,7 @@ def get_reranker_status() -> Dict[str, Any]:
         Dict with configuration, availability, and health status
     """
     from modules.clients import get_cohere_client
+    from modules.rerank_service import get_rerank_batching_stats
     
     # Check Cohere availability
     cohere_available = False
@@ -2730,8 +3187,9 @@ def get_reranker_status() -> Dict[str, Any]:
             "flashrank": {
                 "enabled": _flashrank_enabled,
                 "available": flashrank_available,
-                "model": "ms-marco-MiniLM-L-12-v2" if flashrank_available else None,
+                "model": _flashrank_model_name if flashrank_available else None,
                 "preloaded": _ranker_instance is not None,
+                "batching": get_rerank_batching_stats(),
             },
             "hybrid": {
                 "enabled": _cohere_rerank_enabled and _flashrank_enabled,
@@ -2745,7 +3203,9 @@ def get_reranker_status() -> Dict[str, Any]:
             "cache": {
                 "enabled": _rerank_cache_enabled,
                 "maxsize": _rerank_cache_maxsize,
-                "current_size": len(_rerank_cache._cache) if _rerank_cache else 0,
+                "current_size": len(_rerank_cache) if _rerank_cache else 0,
+                "reranker_version": _reranker_version(),
+                **(_rerank_cache.stats() if _rerank_cache else {}),
             },
         },
         "health": {
@@ -2773,6 +3233,5 @@ def clear_rerank_cache():
 # Alias for backward compatibility
 get_rerank_cache_stats = lambda: {
     "enabled": _rerank_cache_enabled,
-    "size": len(_rerank_cache._cache) if _rerank_cache else 0,
-    "maxsize": _rerank_cache_maxsize,
+    **_rerank_cache.stats(),
 } if _rerank_cache_enabled else {"enabled": False}
@@ -6,6 +6,7 @@ Handles generation and validation of public share tokens for twins.
 import uuid
 from typing import Optional, Dict, Any
 from modules.observability import supabase
+from modules.twin_cache import invalidate_twin_cache
 from modules.access_groups import get_default_group
 from modules.governance import AuditLogger
 
@@ -50,6 +51,7 @@ def generate_share_token(twin_id: str) -> str:
     
     # Update twin
     supabase.table("twins").update({"settings": settings}).eq("id", twin_id).execute()
+    invalidate_twin_cache(twin_id)
     
     return share_token
 
@@ -77,6 +79,7 @@ def regenerate_share_token(twin_id: str) -> str:
     
     # Update twin
     supabase.table("twins").update({"settings": settings}).eq("id", twin_id).execute()
+    invalidate_twin_cache(twin_id)
     
     return share_token
 
@@ -250,6 +253,7 @@ def toggle_public_sharing(twin_id: str, enabled: bool) -> bool:
         
         # Update twin
         supabase.table("twins").update({"settings": settings}).eq("id", twin_id).execute()
+        invalidate_twin_cache(twin_id)
         
         # Phase 9: Log the action
         AuditLogger.log(
@@ -0,0 +1,206 @@
+"""
+Twin Cache: short-TTL read-through caches for the chat hot path.
+
+A chat turn used to re-read the same rows several times: get_twin_system for
+persona settings (twice on first turn), twins.settings for public publish
+controls, and the twins/users/conversations lookups behind the auth guards.
+This module keeps those reads in process for a few seconds.
+
+Caches:
+- twin_settings: get_twin_system row per twin
+- publish_controls: parsed public publish controls per twin
+- twin_access: positive ownership results per (twin_id, tenant_id) and active twins
+- tenant: user_id -> tenant_id from the users table
+- conversation: conversation owner/twin rows and each twin's owner user_id
+
+Only successful lookups are cached, so a denial is always re-checked.
+Writers call invalidate_twin_cache(twin_id) after updating or deleting a
+twin; the TTLs bound staleness across web instances.
+
+Environment Variables:
+- TWIN_CACHE_ENABLED: "true" (default) or "false"
+- TWIN_SETTINGS_CACHE_TTL_SECONDS: settings/publish-controls TTL (default 30)
+- AUTH_CACHE_TTL_SECONDS: ownership/tenant/conversation TTL (default 60)
+- TWIN_CACHE_MAXSIZE: entries per cache (default 2048)
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+TWIN_CACHE_ENABLED = os.getenv("TWIN_CACHE_ENABLED", "true").lower() == "true"
+TWIN_SETTINGS_CACHE_TTL_SECONDS = float(os.getenv("TWIN_SETTINGS_CACHE_TTL_SECONDS", "30"))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+TWIN_CACHE_MAXSIZE = int(os.getenv("TWIN_CACHE_MAXSIZE", "2048"))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU with a per-cache TTL.
+
+    Values are deep-copied on the way in and out so callers can mutate what
+    they get back (settings dicts are routinely merged in place).
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, maxsize: int = TWIN_CACHE_MAXSIZE):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = max(1, int(maxsize))
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if not TWIN_CACHE_ENABLED:
+            return default
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not TWIN_CACHE_ENABLED or self.ttl_seconds <= 0:
+            return
+        stored = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        should_cache: Callable[[Any], bool] = lambda value: value is not None,
+    ) -> Any:
+        """Return the cached value or call loader(); only values passing should_cache are stored."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        if should_cache(value):
+            self.set(key, value)
+        return value
+
+    def invalidate(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop entries for which predicate(key, value) is true."""
+        with self._lock:
+            stale = [key for key, (_expires, value) in self._entries.items() if predicate(key, value)]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+twin_settings_cache = TTLCache("twin_settings", TWIN_SETTINGS_CACHE_TTL_SECONDS)
+publish_controls_cache = TTLCache("publish_controls", TWIN_SETTINGS_CACHE_TTL_SECONDS)
+twin_access_cache = TTLCache("twin_access", AUTH_CACHE_TTL_SECONDS)
+tenant_cache = TTLCache("tenant", AUTH_CACHE_TTL_SECONDS)
+conversation_cache = TTLCache("conversation", AUTH_CACHE_TTL_SECONDS)
+
+_ALL_CACHES = (
+    twin_settings_cache,
+    publish_controls_cache,
+    twin_access_cache,
+    tenant_cache,
+    conversation_cache,
+)
+
+
+def get_twin_system_row(twin_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Cached get_twin_system RPC row for a twin (None when not found).
+
+    Errors from the RPC propagate to the caller, as they did before caching.
+    """
+    from modules.observability import supabase
+
+    def _load():
+        twin_res = supabase.rpc("get_twin_system", {"t_id": twin_id}).single().execute()
+        return twin_res.data if twin_res.data else None
+
+    return twin_settings_cache.get_or_load(twin_id, _load)
+
+
+def get_twin_settings(twin_id: str) -> Dict[str, Any]:
+    """Settings dict from the cached get_twin_system row ({} when missing)."""
+    row = get_twin_system_row(twin_id)
+    settings = row.get("settings") if row else None
+    return settings if isinstance(settings, dict) else {}
+
+
+async def get_twin_settings_async(twin_id: str) -> Dict[str, Any]:
+    """get_twin_settings for async paths: cache misses load in the DB thread pool."""
+    if twin_settings_cache.get(twin_id, _MISSING) is not _MISSING:
+        return get_twin_settings(twin_id)
+    from modules.async_db import run_db
+
+    return await run_db(get_twin_settings, twin_id, name="twin_cache.twin_settings")
+
+
+def _key_twin_id(key: Hashable) -> str:
+    # Twin-scoped keys are either twin_id or (kind, twin_id, ...).
+    return str(key[1] if isinstance(key, tuple) else key)
+
+
+def invalidate_twin_cache(twin_id: Optional[str] = None) -> None:
+    """Drop every cached entry for a twin (or everything when twin_id is None)."""
+    if twin_id is None:
+        clear_twin_caches()
+        return
+    twin_id = str(twin_id)
+    for cache in (twin_settings_cache, publish_controls_cache, twin_access_cache):
+        cache.invalidate(lambda key, _value: _key_twin_id(key) == twin_id)
+    conversation_cache.invalidate(
+        lambda key, value: (key[0] == "twin_owner" and str(key[1]) == twin_id)
+        or (key[0] == "conversation" and str((value or {}).get("twin_id")) == twin_id)
+    )
+
+
+def invalidate_tenant_cache(user_id: Optional[str] = None) -> None:
+    """Drop the cached tenant mapping for a user (or all users)."""
+    if user_id is None:
+        tenant_cache.clear()
+    else:
+        tenant_cache.invalidate(lambda key, _value: key == user_id)
+
+
+def clear_twin_caches() -> None:
+    for cache in _ALL_CACHES:
+        cache.clear()
+
+
+def get_twin_cache_stats() -> Dict[str, Any]:
+    return {
+        "enabled": TWIN_CACHE_ENABLED,
+        **{cache.name: cache.stats() for cache in _ALL_CACHES},
+    }
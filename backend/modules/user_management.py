@@ -7,6 +7,7 @@ import uuid
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from modules.observability import supabase
+from modules.twin_cache import invalidate_tenant_cache
 
 
 def _is_missing_users_column_error(error: Exception, column_name: str) -> bool:
@@ -224,6 +225,8 @@ def accept_invitation(
             supabase.table("users").update(update_payload).eq("email", invited_email).execute()
             user_lookup = supabase.table("users").select("*").eq("email", invited_email).limit(1).execute()
             user_row = (user_lookup.data or [None])[0]
+        # The invitation may move the user to another tenant.
+        invalidate_tenant_cache(target_id or (user_row or {}).get("id"))
     else:
         user_create_data: Dict[str, Any] = {
             "tenant_id": invitation["tenant_id"],
@@ -287,6 +290,7 @@ def delete_user(user_id: str, deleted_by: str) -> bool:
         
         # Delete user (cascading will handle group_memberships)
         response = supabase.table("users").delete().eq("id", user_id).execute()
+        invalidate_tenant_cache(user_id)
         return bool(response.data)
     except Exception as e:
         print(f"Error deleting user: {e}")
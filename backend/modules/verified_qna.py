@@ -1,13 +1,23 @@
 """
 Verified QnA Module: Canonical storage and retrieval of owner-verified answers.
 """
+import asyncio
 import uuid
 import json
 from typing import List, Optional, Dict, Any, Tuple
 from difflib import SequenceMatcher
 import re
+import numpy as np
 from modules.observability import supabase
+from modules.async_db import run_db
 from modules.embeddings import get_embedding, cosine_similarity
+from modules.verified_qna_index import (
+    VERIFIED_QNA_INDEX_ENABLED,
+    VERIFIED_QNA_INDEX_TTL_SECONDS,
+    VerifiedQnAIndex,
+    get_verified_qna_index,
+    invalidate_verified_qna_index,
+)
 
 QNA_STOPWORDS = {
     "the", "a", "an", "and", "or", "but", "if", "then", "else", "when", "what", "how", "why",
@@ -33,6 +43,14 @@ def _token_overlap_score(a: str, b: str) -> float:
     return len(a_tokens & b_tokens) / float(len(a_tokens | b_tokens))
 
 
+def _fetch_allowed_qna_ids(group_id: str) -> List[str]:
+    """Get verified QnA content_ids the group is allowed to see."""
+    permissions_response = supabase.table("content_permissions").select("content_id").eq(
+        "group_id", group_id
+    ).eq("content_type", "verified_qna").execute()
+    return [perm["content_id"] for perm in (permissions_response.data or [])]
+
+
 def _fetch_verified_qna_entries(
     twin_id: str,
     group_id: Optional[str] = None
@@ -48,12 +66,7 @@ def _fetch_verified_qna_entries(
         List of verified QnA entries
     """
     if group_id:
-        # Get allowed content_ids from content_permissions
-        permissions_response = supabase.table("content_permissions").select("content_id").eq(
-            "group_id", group_id
-        ).eq("content_type", "verified_qna").execute()
-        
-        allowed_content_ids = [perm["content_id"] for perm in (permissions_response.data or [])]
+        allowed_content_ids = _fetch_allowed_qna_ids(group_id)
         
         if not allowed_content_ids:
             return []
@@ -351,6 +364,7 @@ async def create_verified_qna(
     
     # Create citation entries if provided
     _create_citation_entries(verified_qna_id, citations or [])
+    invalidate_verified_qna_index(twin_id)
     
     return verified_qna_id
 
@@ -380,8 +394,23 @@ async def match_verified_qna(
     Returns:
         Best matching QnA entry with similarity score, or None if no match above threshold
     """
+    if VERIFIED_QNA_INDEX_ENABLED:
+        # Index misses and group masks are blocking DB reads; the query embedding
+        # is computed outside run_db so it does not hold a DB slot.
+        scope = await run_db(_load_verified_qna_match_scope, twin_id, group_id, name="verified_qna.match")
+        if scope is None:
+            return None
+        return await _match_verified_qna_indexed(
+            query,
+            *scope,
+            use_exact=use_exact,
+            use_semantic=use_semantic,
+            exact_threshold=exact_threshold,
+            semantic_threshold=semantic_threshold,
+        )
+
     # Fetch verified QnA entries, filtered by group if provided
-    qna_entries = _fetch_verified_qna_entries(twin_id, group_id)
+    qna_entries = await run_db(_fetch_verified_qna_entries, twin_id, group_id, name="verified_qna.entries")
     
     if not qna_entries:
         return None
@@ -412,6 +441,12 @@ async def match_verified_qna(
     if semantic_match and semantic_score >= semantic_threshold:
         candidates.append(("semantic", semantic_match, semantic_score))
 
+    return _select_best_candidate(candidates)
+
+
+def _select_best_candidate(
+    candidates: List[Tuple[str, Dict[str, Any], float]]
+) -> Optional[Dict[str, Any]]:
     if candidates:
         match_type, best_match, best_score = max(candidates, key=lambda c: c[2])
         result = _format_match_result(best_match, best_score)
@@ -421,6 +456,108 @@ async def match_verified_qna(
     return None
 
 
+def _load_verified_qna_match_scope(
+    twin_id: str, group_id: Optional[str]
+) -> Optional[Tuple[VerifiedQnAIndex, Optional[np.ndarray]]]:
+    """
+    The cached per-twin index and the group's permission mask (blocking on a miss).
+    Returns None when nothing can match.
+    """
+    index = get_verified_qna_index(
+        twin_id,
+        loader=lambda tid: _fetch_verified_qna_entries(tid),
+        tokenize=_normalize_tokens,
+    )
+    if not len(index):
+        return None
+
+    mask = None
+    if group_id:
+        mask = index.get_group_mask(group_id, VERIFIED_QNA_INDEX_TTL_SECONDS)
+        if mask is None:
+            mask = index.mask_for_ids(set(_fetch_allowed_qna_ids(group_id)))
+            index.set_group_mask(group_id, mask)
+        if not mask.any():
+            return None
+    return index, mask
+
+
+async def _match_verified_qna_indexed(
+    query: str,
+    index: VerifiedQnAIndex,
+    mask: Optional[np.ndarray],
+    *,
+    use_exact: bool,
+    use_semantic: bool,
+    exact_threshold: float,
+    semantic_threshold: float,
+) -> Optional[Dict[str, Any]]:
+    """
+    match_verified_qna over the cached per-twin index.
+
+    Same thresholds, lexical grounding and tie-breaking as the row-by-row path;
+    group permissions are applied as a cached boolean mask.
+    """
+    exact_match = None
+    exact_score = 0.0
+    if use_exact:
+        exact_match, exact_score = index.exact_match(query, exact_threshold, mask)
+        if exact_score == 1.0 and exact_match:
+            result = _format_match_result(exact_match, exact_score)
+            result["match_type"] = "exact"
+            return result
+
+    semantic_match = None
+    semantic_score = 0.0
+    if use_semantic and _normalize_tokens(query):
+        try:
+            query_embedding = await asyncio.to_thread(get_embedding, query)
+            semantic_match, semantic_score = index.semantic_match(
+                query, query_embedding, semantic_threshold, mask
+            )
+        except Exception as e:
+            print(f"Error during semantic matching: {e}")
+
+    candidates: List[Tuple[str, Dict[str, Any], float]] = []
+    if exact_match and exact_score >= exact_threshold:
+        candidates.append(("exact", exact_match, exact_score))
+    if semantic_match and semantic_score >= semantic_threshold:
+        candidates.append(("semantic", semantic_match, semantic_score))
+    return _select_best_candidate(candidates)
+
+
+def find_verified_qna_for_embedding(
+    twin_id: str,
+    question: str,
+    question_embedding: List[float],
+    semantic_threshold: float = 0.7,
+) -> Optional[Dict[str, Any]]:
+    """
+    Semantic match for a question whose embedding is already known (no embedding call).
+
+    Uses the cached per-twin index with the same lexical grounding as
+    match_verified_qna; group permissions are not applied and citations are
+    not fetched.
+    """
+    index = get_verified_qna_index(
+        twin_id,
+        loader=lambda tid: _fetch_verified_qna_entries(tid),
+        tokenize=_normalize_tokens,
+    )
+    if not len(index):
+        return None
+    match, score = index.semantic_match(question, question_embedding, semantic_threshold)
+    if not match:
+        return None
+    return {
+        "id": match["id"],
+        "question": match["question"],
+        "answer": match["answer"],
+        "similarity_score": score,
+        "match_type": "semantic",
+    }
+
+
 async def get_verified_qna(qna_id: str) -> Optional[Dict[str, Any]]:
     """
     Fetches a verified QnA entry with its citations and patch history.
@@ -496,6 +633,7 @@ async def edit_verified_qna(
         "answer": new_answer,
         "updated_at": datetime.now().isoformat()
     }).eq("id", qna_id).execute()
+    invalidate_verified_qna_index(qna_res.data.get("twin_id"))
     
     # Note: Embeddings are now stored in Postgres only (no Pinecone vectors)
     # The question_embedding column contains the JSON-encoded embedding for semantic matching
@@ -0,0 +1,252 @@
+"""
+Verified QnA Index: per-twin in-memory index for verified answer matching.
+
+match_verified_qna runs on every chat turn. Instead of re-selecting every active
+row, decoding each JSON embedding and looping in Python, the index keeps per twin:
+- a row-normalized NumPy matrix of question embeddings (one dot product per query)
+- a normalized-question map for the exact path
+- per-entry token sets plus a token -> entry inverted index for lexical grounding
+- cached group permission masks
+
+Indexes are rebuilt on demand after invalidate_verified_qna_index(twin_id)
+(called on create/patch/deactivate) or when VERIFIED_QNA_INDEX_TTL_SECONDS
+elapses, which bounds staleness across web instances.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+VERIFIED_QNA_INDEX_ENABLED = os.getenv("VERIFIED_QNA_INDEX_ENABLED", "true").lower() == "true"
+VERIFIED_QNA_INDEX_TTL_SECONDS = float(os.getenv("VERIFIED_QNA_INDEX_TTL_SECONDS", "300"))
+VERIFIED_QNA_INDEX_MAX_TWINS = int(os.getenv("VERIFIED_QNA_INDEX_MAX_TWINS", "256"))
+
+# Same lexical grounding floor as the row-by-row semantic path.
+MIN_SEMANTIC_TOKEN_OVERLAP = 0.12
+
+
+def parse_embedding(raw: Any) -> Optional[List[float]]:
+    if raw is None or raw == "":
+        return None
+    try:
+        values = json.loads(raw) if isinstance(raw, str) else raw
+        if isinstance(values, (list, tuple)) and values:
+            return [float(v) for v in values]
+    except (json.JSONDecodeError, ValueError, TypeError):
+        return None
+    return None
+
+
+class VerifiedQnAIndex:
+    """Immutable snapshot of one twin's active verified QnA entries."""
+
+    def __init__(self, twin_id: str, entries: List[Dict[str, Any]], tokenize: Callable[[str], List[str]]):
+        self.twin_id = twin_id
+        self.entries = entries
+        self.built_at = time.monotonic()
+        self._tokenize = tokenize
+        self.id_to_row: Dict[str, int] = {}
+        self.question_to_row: Dict[str, int] = {}
+        self.normalized_questions: List[str] = []
+        self.token_sets: List[Set[str]] = []
+        self.inverted: Dict[str, List[int]] = {}
+        self._group_masks: Dict[str, Tuple[float, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+        vectors: List[Optional[List[float]]] = []
+        for row, entry in enumerate(entries):
+            self.id_to_row[str(entry.get("id"))] = row
+            normalized = str(entry.get("question") or "").lower().strip()
+            self.normalized_questions.append(normalized)
+            # First occurrence wins, matching the row-order scan it replaces.
+            self.question_to_row.setdefault(normalized, row)
+            tokens = set(tokenize(entry.get("question") or ""))
+            self.token_sets.append(tokens)
+            for token in tokens:
+                self.inverted.setdefault(token, []).append(row)
+            vectors.append(parse_embedding(entry.get("question_embedding")))
+
+        dims = {len(v) for v in vectors if v}
+        self.dimension = max(dims, key=lambda d: sum(1 for v in vectors if v and len(v) == d)) if dims else 0
+        self.matrix = np.zeros((len(entries), self.dimension), dtype=np.float32)
+        self.has_embedding = np.zeros(len(entries), dtype=bool)
+        for row, vector in enumerate(vectors):
+            if vector and len(vector) == self.dimension:
+                self.matrix[row] = vector
+                self.has_embedding[row] = True
+        norms = np.linalg.norm(self.matrix, axis=1)
+        nonzero = norms > 0
+        self.matrix[nonzero] /= norms[nonzero, None]
+        self.has_embedding &= nonzero
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return ttl_seconds <= 0 or (time.monotonic() - self.built_at) < ttl_seconds
+
+    def mask_for_ids(self, allowed_ids: Optional[Set[str]]) -> Optional[np.ndarray]:
+        if allowed_ids is None:
+            return None
+        mask = np.zeros(len(self.entries), dtype=bool)
+        for content_id in allowed_ids:
+            row = self.id_to_row.get(str(content_id))
+            if row is not None:
+                mask[row] = True
+        return mask
+
+    def get_group_mask(self, group_id: str, ttl_seconds: float) -> Optional[np.ndarray]:
+        with self._lock:
+            cached = self._group_masks.get(group_id)
+        if cached and (ttl_seconds <= 0 or time.monotonic() - cached[0] < ttl_seconds):
+            return cached[1]
+        return None
+
+    def set_group_mask(self, group_id: str, mask: np.ndarray) -> None:
+        with self._lock:
+            self._group_masks[group_id] = (time.monotonic(), mask)
+
+    def clear_group_masks(self) -> None:
+        with self._lock:
+            self._group_masks.clear()
+
+    def exact_match(
+        self,
+        query: str,
+        exact_threshold: float,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Exact lookup, then fuzzy ratio pruned by SequenceMatcher's cheap upper bounds."""
+        query_normalized = query.lower().strip()
+        row = self.question_to_row.get(query_normalized)
+        if row is not None and (mask is None or mask[row]):
+            return self.entries[row], 1.0
+
+        best_row: Optional[int] = None
+        best_score = 0.0
+        matcher = SequenceMatcher(None)
+        matcher.set_seq1(query_normalized)
+        for row, question in enumerate(self.normalized_questions):
+            if mask is not None and not mask[row]:
+                continue
+            if question == query_normalized:
+                return self.entries[row], 1.0
+            matcher.set_seq2(question)
+            floor = max(best_score, exact_threshold)
+            if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+                continue
+            similarity = matcher.ratio()
+            if similarity > best_score and similarity >= exact_threshold:
+                best_score = similarity
+                best_row = row
+        return (self.entries[best_row] if best_row is not None else None), best_score
+
+    def semantic_match(
+        self,
+        query: str,
+        query_embedding: List[float],
+        semantic_threshold: float,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Top-1 cosine match among lexically grounded entries, ties broken by overlap."""
+        query_tokens = set(self._tokenize(query))
+        if not query_tokens or not self.dimension or len(query_embedding or []) != self.dimension:
+            return None, 0.0
+
+        candidate_rows = sorted({row for token in query_tokens for row in self.inverted.get(token, ())})
+        if not candidate_rows:
+            return None, 0.0
+        rows = np.asarray(candidate_rows, dtype=np.int64)
+        keep = self.has_embedding[rows]
+        if mask is not None:
+            keep &= mask[rows]
+        rows = rows[keep]
+        if rows.size == 0:
+            return None, 0.0
+
+        overlaps = np.asarray(
+            [
+                len(query_tokens & self.token_sets[row]) / float(len(query_tokens | self.token_sets[row]))
+                for row in rows
+            ],
+            dtype=np.float64,
+        )
+        grounded = overlaps >= MIN_SEMANTIC_TOKEN_OVERLAP
+        rows, overlaps = rows[grounded], overlaps[grounded]
+        if rows.size == 0:
+            return None, 0.0
+
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query_vector))
+        if norm == 0.0:
+            return None, 0.0
+        scores = (self.matrix[rows] @ (query_vector / norm)).astype(np.float64)
+
+        passing = scores >= semantic_threshold
+        if not passing.any():
+            return None, 0.0
+        rows, scores, overlaps = rows[passing], scores[passing], overlaps[passing]
+        # Highest similarity first, then highest overlap, then original row order.
+        best = np.lexsort((rows, -overlaps, -scores))[0]
+        return self.entries[int(rows[best])], float(scores[best])
+
+
+_indexes: "OrderedDict[str, VerifiedQnAIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_index_stats = {"hits": 0, "builds": 0, "invalidations": 0}
+
+
+def get_verified_qna_index(
+    twin_id: str,
+    loader: Callable[[str], List[Dict[str, Any]]],
+    tokenize: Callable[[str], List[str]],
+) -> VerifiedQnAIndex:
+    """Return a fresh index for the twin, building it with loader(twin_id) if needed."""
+    with _indexes_lock:
+        index = _indexes.get(twin_id)
+        if index is not None and index.is_fresh(VERIFIED_QNA_INDEX_TTL_SECONDS):
+            _indexes.move_to_end(twin_id)
+            _index_stats["hits"] += 1
+            return index
+
+    index = VerifiedQnAIndex(twin_id, loader(twin_id) or [], tokenize)
+    with _indexes_lock:
+        _indexes[twin_id] = index
+        _indexes.move_to_end(twin_id)
+        while len(_indexes) > max(1, VERIFIED_QNA_INDEX_MAX_TWINS):
+            _indexes.popitem(last=False)
+        _index_stats["builds"] += 1
+    return index
+
+
+def invalidate_verified_qna_index(twin_id: Optional[str] = None) -> None:
+    """Drop the cached index for a twin (or all twins when twin_id is None)."""
+    with _indexes_lock:
+        if twin_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(twin_id, None)
+        _index_stats["invalidations"] += 1
+
+
+def invalidate_verified_qna_group_masks(twin_id: Optional[str] = None) -> None:
+    """Drop cached group permission masks after content_permissions change."""
+    with _indexes_lock:
+        targets = list(_indexes.values()) if twin_id is None else [i for i in [_indexes.get(twin_id)] if i]
+    for index in targets:
+        index.clear_group_masks()
+
+
+def get_verified_qna_index_stats() -> Dict[str, Any]:
+    with _indexes_lock:
+        return {
+            "enabled": VERIFIED_QNA_INDEX_ENABLED,
+            "twins": len(_indexes),
+            "entries": sum(len(index) for index in _indexes.values()),
+            **_index_stats,
+        }
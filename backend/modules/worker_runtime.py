@@ -0,0 +1,219 @@
+"""
+Worker Runtime: concurrent job slots for the background worker.
+
+One worker process runs up to WORKER_CONCURRENCY jobs at once. Optional
+per-type caps (WORKER_JOB_TYPE_LIMITS="ingestion=2,graph_extraction=3") keep a
+burst of one job type from occupying every slot's downstream quota.
+
+The dispatcher only dequeues when a slot is free, so jobs stay in the shared
+queue (visible to other workers) until this process can actually start them.
+The queue cannot be filtered by type, so a dequeued job whose type is at its
+cap is set aside without holding a slot and started once that type frees up;
+at most `concurrency` jobs are set aside before dequeuing pauses.
+With Redis the dequeue blocks on BZPOPMIN; the DB fallback cannot block and
+keeps the adaptive idle sleep.
+
+Environment Variables:
+- WORKER_CONCURRENCY: concurrent job slots per process (default 4)
+- WORKER_JOB_TYPE_LIMITS: comma-separated job_type=max pairs (default none)
+- WORKER_DEQUEUE_BLOCK_SECONDS: Redis blocking-dequeue timeout (default 5)
+- WORKER_STATS_INTERVAL_SECONDS: stats log/publish interval (default 60)
+"""
+import asyncio
+import os
+import time
+import traceback
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+WORKER_DEQUEUE_BLOCK_SECONDS = float(os.getenv("WORKER_DEQUEUE_BLOCK_SECONDS", "5"))
+WORKER_STATS_INTERVAL_SECONDS = float(os.getenv("WORKER_STATS_INTERVAL_SECONDS", "60"))
+
+
+def parse_job_type_limits(raw: Optional[str]) -> Dict[str, int]:
+    """Parse "type=n,type2=m" into {type: n}; malformed pairs are ignored."""
+    limits: Dict[str, int] = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        job_type, _, value = part.partition("=")
+        try:
+            limit = int(value.strip())
+        except ValueError:
+            continue
+        if job_type.strip() and limit > 0:
+            limits[job_type.strip()] = limit
+    return limits
+
+
+WORKER_JOB_TYPE_LIMITS = parse_job_type_limits(os.getenv("WORKER_JOB_TYPE_LIMITS", ""))
+
+
+class WorkerRuntime:
+    """
+    Dispatches dequeued jobs onto a bounded set of concurrent slots.
+
+    dequeue(block_timeout) is a blocking callable and runs in a thread;
+    process(job) is the async job handler and returns True on success.
+    A job whose type is at its cap is deferred without holding a slot, so
+    jobs of other types keep flowing past it.
+    """
+
+    def __init__(
+        self,
+        dequeue: Callable[[float], Optional[Dict[str, Any]]],
+        process: Callable[[Dict[str, Any]], Awaitable[bool]],
+        *,
+        concurrency: int = WORKER_CONCURRENCY,
+        job_type_limits: Optional[Dict[str, int]] = None,
+        block_timeout: float = WORKER_DEQUEUE_BLOCK_SECONDS,
+        blocking_dequeue: bool = True,
+        queue_depth: Optional[Callable[[], int]] = None,
+    ):
+        self.concurrency = max(1, int(concurrency))
+        self.job_type_limits = dict(WORKER_JOB_TYPE_LIMITS if job_type_limits is None else job_type_limits)
+        self.block_timeout = block_timeout
+        self.blocking_dequeue = blocking_dequeue
+        self._dequeue = dequeue
+        self._process = process
+        self._queue_depth = queue_depth
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._deferred: Deque[Dict[str, Any]] = deque()
+        self._type_freed = asyncio.Event()
+        self._tasks: set = set()
+        self._in_flight_by_type: Dict[str, int] = {}
+        self._type_stats: Dict[str, Dict[str, float]] = {}
+        self._started_at = time.monotonic()
+        self.jobs_processed = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def _record(self, job_type: str, success: bool, duration: float) -> None:
+        stats = self._type_stats.setdefault(
+            job_type, {"completed": 0, "failed": 0, "total_seconds": 0.0}
+        )
+        stats["completed" if success else "failed"] += 1
+        stats["total_seconds"] += duration
+
+    def _has_type_capacity(self, job_type: str) -> bool:
+        limit = self.job_type_limits.get(job_type)
+        return limit is None or self._in_flight_by_type.get(job_type, 0) < limit
+
+    def _take_deferred(self) -> Optional[Dict[str, Any]]:
+        for job in self._deferred:
+            if self._has_type_capacity(job.get("job_type") or "unknown"):
+                self._deferred.remove(job)
+                return job
+        return None
+
+    async def _run_job(self, job: Dict[str, Any], job_type: str) -> None:
+        job_id = job.get("job_id")
+        try:
+            print(f"[Worker] Processing job {job_id} ({job_type})")
+            start_time = time.monotonic()
+            success = False
+            try:
+                success = bool(await self._process(job))
+            except Exception as e:
+                print(f"[Worker] Job {job_id} crashed: {e}")
+                traceback.print_exc()
+                success = False
+            duration = time.monotonic() - start_time
+            self._record(job_type, success, duration)
+            self.jobs_processed += 1
+            status_symbol = "✅" if success else "❌"
+            print(f"[Worker] {status_symbol} Job {job_id} finished in {duration:.2f}s")
+        finally:
+            self._in_flight_by_type[job_type] -= 1
+            self._slots.release()
+            if job_type in self.job_type_limits:
+                self._type_freed.set()
+
+    def _start(self, job: Dict[str, Any]) -> None:
+        # Count the job against its type before yielding, so the next poll sees it.
+        job_type = job.get("job_type") or "unknown"
+        self._in_flight_by_type[job_type] = self._in_flight_by_type.get(job_type, 0) + 1
+        task = asyncio.create_task(self._run_job(job, job_type))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def poll_once(self) -> bool:
+        """
+        Wait for a free slot and start one job: a deferred job whose type has
+        room, else a newly dequeued one. Returns False if the queue was empty.
+        """
+        await self._slots.acquire()
+        job = self._take_deferred()
+        if job is None:
+            if len(self._deferred) >= self.concurrency:
+                # Every set-aside job waits on a capped type; don't claim more until one frees.
+                self._slots.release()
+                self._type_freed.clear()
+                try:
+                    await asyncio.wait_for(self._type_freed.wait(), timeout=self.block_timeout or None)
+                except asyncio.TimeoutError:
+                    pass
+                return True
+            try:
+                timeout = self.block_timeout if self.blocking_dequeue else 0
+                job = await asyncio.to_thread(self._dequeue, timeout)
+            except BaseException:
+                self._slots.release()
+                raise
+            if not job:
+                self._slots.release()
+                return False
+            if not self._has_type_capacity(job.get("job_type") or "unknown"):
+                self._deferred.append(job)
+                self._slots.release()
+                return True
+        self._start(job)
+        return True
+
+    async def drain(self) -> None:
+        """Wait for every in-flight job, and every deferred job, to finish."""
+        while True:
+            job = self._take_deferred()
+            while job is not None:
+                await self._slots.acquire()
+                self._start(job)
+                job = self._take_deferred()
+            if not self._tasks:
+                return
+            await asyncio.wait(list(self._tasks), return_when=asyncio.FIRST_COMPLETED)
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = max(time.monotonic() - self._started_at, 1e-9)
+        by_type = {}
+        for job_type, stats in self._type_stats.items():
+            finished = stats["completed"] + stats["failed"]
+            by_type[job_type] = {
+                "completed": int(stats["completed"]),
+                "failed": int(stats["failed"]),
+                "in_flight": self._in_flight_by_type.get(job_type, 0),
+                "avg_seconds": round(stats["total_seconds"] / finished, 3) if finished else 0.0,
+                "jobs_per_minute": round(finished * 60.0 / uptime, 3),
+            }
+        for job_type, count in self._in_flight_by_type.items():
+            if job_type not in by_type and count:
+                by_type[job_type] = {"completed": 0, "failed": 0, "in_flight": count, "avg_seconds": 0.0, "jobs_per_minute": 0.0}
+
+        queue_depth = None
+        if self._queue_depth is not None:
+            try:
+                queue_depth = int(self._queue_depth())
+            except Exception:
+                queue_depth = None
+        return {
+            "concurrency": self.concurrency,
+            "job_type_limits": self.job_type_limits,
+            "in_flight": self.in_flight,
+            "deferred": len(self._deferred),
+            "queue_depth": queue_depth,
+            "jobs_processed": self.jobs_processed,
+            "uptime_seconds": round(uptime, 1),
+            "by_type": by_type,
+        }
@@ -22,6 +22,7 @@ from modules.audio_generator import (
     get_twin_voice_settings
 )
 from modules.observability import supabase
+from modules.twin_cache import invalidate_twin_cache
 
 router = APIRouter(tags=["audio"])
 
@@ -158,6 +159,7 @@ async def update_voice_settings(
         
         # Save
         supabase.table("twins").update({"settings": settings}).eq("id", twin_id).execute()
+        invalidate_twin_cache(twin_id)
         
         return {"success": True, "settings": settings["voice"]}
         
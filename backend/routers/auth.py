@@ -17,6 +17,7 @@ from modules.user_management import (
     accept_invitation,
 )
 from modules.observability import supabase
+from modules.twin_cache import invalidate_twin_cache
 from supabase import create_client as create_supabase_client
 from supabase_auth.errors import AuthApiError
 
@@ -364,6 +365,7 @@ async def get_my_twins(user=Depends(get_current_user)):
                     supabase.table("twins").update({
                         "tenant_id": tenant_id
                     }).eq("id", orphan["id"]).execute()
+                    invalidate_twin_cache(orphan["id"])
                     print(f"[MY-TWINS REPAIR] Fixed twin {orphan['id']} ({orphan.get('name', 'unnamed')})")
                 except Exception as e:
                     print(f"[MY-TWINS REPAIR ERROR] Failed to fix twin {orphan['id']}: {e}")
@@ -696,6 +698,7 @@ async def delete_account(request: DeleteAccountRequest, user=Depends(get_current
                 supabase.table("twins").update({
                     "settings": settings
                 }).eq("id", twin_id).execute()
+                invalidate_twin_cache(twin_id)
                 if not already_archived:
                     archived_count += 1
             except Exception as e:
@@ -7,6 +7,8 @@ from modules.schemas import (
 )
 from modules.auth_guard import get_current_user, verify_twin_ownership, verify_conversation_ownership, ensure_twin_active
 from modules.access_groups import get_user_group, get_default_group
+from modules.twin_cache import publish_controls_cache
+from modules.async_db import run_db
 from modules.observability import (
     supabase, get_conversations, get_messages, 
     log_interaction, create_conversation
@@ -27,6 +29,8 @@ from modules.persona_spec_store import get_active_persona_spec
 from modules.owner_memory_store import format_owner_memory_context
 from modules.response_policy import UNCERTAINTY_RESPONSE, owner_guidance_suffix
 from modules.grounding_policy import get_grounding_policy
+from modules import response_streaming
+from modules.response_streaming import SentenceSplitter, bind_token_sink
 from modules.deepagents_policy import classify_deepagents_intent
 from modules.runtime_audit_store import (
     enqueue_owner_review_item,
@@ -40,6 +44,7 @@ import json
 import asyncio
 import uuid
 import os
+import time
 from modules.langfuse_sdk import (
     flush_client,
     get_client as get_langfuse_client,
@@ -504,28 +509,40 @@ def _merge_context_snippets(existing: List[Dict[str, Any]], incoming: Optional[L
     return merged
 
 
-def _load_public_publish_controls(twin_id: str) -> Dict[str, Set[str]]:
-    controls = {
+def _empty_public_publish_controls() -> Dict[str, Set[str]]:
+    return {
         "published_identity_topics": set(),
         "published_policy_topics": set(),
         "published_source_ids": set(),
     }
+
+
+def _load_public_publish_controls(twin_id: str) -> Dict[str, Set[str]]:
     try:
-        twin_res = supabase.table("twins").select("settings").eq("id", twin_id).single().execute()
-        settings = twin_res.data.get("settings") if twin_res.data else {}
-        publish_controls = settings.get("publish_controls") if isinstance(settings, dict) else {}
-        if not isinstance(publish_controls, dict):
-            return controls
-        for key in ("published_identity_topics", "published_policy_topics", "published_source_ids"):
-            raw = publish_controls.get(key)
-            if isinstance(raw, list):
-                controls[key] = {
-                    str(value).strip()
-                    for value in raw
-                    if isinstance(value, (str, int, float)) and str(value).strip()
-                }
+        # Read failures are not cached; they fall back to empty controls.
+        return publish_controls_cache.get_or_load(
+            twin_id,
+            lambda: _read_public_publish_controls(twin_id),
+        )
     except Exception:
+        return _empty_public_publish_controls()
+
+
+def _read_public_publish_controls(twin_id: str) -> Dict[str, Set[str]]:
+    controls = _empty_public_publish_controls()
+    twin_res = supabase.table("twins").select("settings").eq("id", twin_id).single().execute()
+    settings = twin_res.data.get("settings") if twin_res.data else {}
+    publish_controls = settings.get("publish_controls") if isinstance(settings, dict) else {}
+    if not isinstance(publish_controls, dict):
         return controls
+    for key in ("published_identity_topics", "published_policy_topics", "published_source_ids"):
+        raw = publish_controls.get(key)
+        if isinstance(raw, list):
+            controls[key] = {
+                str(value).strip()
+                for value in raw
+                if isinstance(value, (str, int, float)) and str(value).strip()
+            }
     return controls
 
 
@@ -651,6 +668,96 @@ def _evaluate_grounding_support(answer: str, contexts: List[Dict[str, Any]]) ->
     }
 
 
+class _LiveAnswerStream:
+    """
+    Forwards realizer tokens to the client and checks each sentence as it completes.
+
+    Tokens go out as ordinary content events, which clients already append. A
+    completed sentence that fails the grounding verifier (when grounding is
+    enforced) or contains a persona banned phrase is retracted: a correction
+    event replaces the displayed answer with the sentences that passed, and
+    later tokens are held back. Once the buffered pipeline (persona audit,
+    grounding, online eval) has produced the final answer, resolve() emits one
+    more correction if the client is not already showing exactly that text.
+    """
+
+    def __init__(self, *, started_at: float, enforce_grounding: bool, banned_phrases: List[str]):
+        self.started_at = started_at
+        self.enforce_grounding = enforce_grounding
+        self.banned_phrases = [p.lower() for p in banned_phrases if isinstance(p, str) and p.strip()]
+        self.splitter = SentenceSplitter()
+        self.shown = ""
+        self.passed: List[str] = []
+        self.held = False
+        self.ttft_ms: Optional[float] = None
+        self.sentences_checked = 0
+        self.retractions: List[Dict[str, str]] = []
+
+    def feed(self, delta: str, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        events: List[Dict[str, Any]] = []
+        if delta and not self.held:
+            if self.ttft_ms is None:
+                self.ttft_ms = round((time.perf_counter() - self.started_at) * 1000, 2)
+            self.shown += delta
+            events.append({"type": "content", "token": delta, "content": delta})
+        for sentence in self.splitter.feed(delta):
+            events.extend(self._check(sentence, contexts))
+        return events
+
+    def finish(self, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        events: List[Dict[str, Any]] = []
+        for sentence in self.splitter.flush():
+            events.extend(self._check(sentence, contexts))
+        return events
+
+    def _check(self, sentence: str, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.held:
+            return []
+        self.sentences_checked += 1
+        reason = None
+        lowered = sentence.lower()
+        if any(phrase in lowered for phrase in self.banned_phrases):
+            reason = "persona_banned_phrase"
+        elif GROUNDING_VERIFIER_ENABLED and self.enforce_grounding and contexts:
+            if not _evaluate_grounding_support(sentence, contexts).get("supported"):
+                reason = "grounding_unsupported"
+        if reason is None:
+            self.passed.append(sentence)
+            return []
+
+        self.held = True
+        self.shown = " ".join(self.passed)
+        self.retractions.append({"reason": reason, "sentence": sentence})
+        print(f"[Chat] Streaming retraction: reason={reason} sentence='{sentence[:80]}'")
+        return [{
+            "type": "correction",
+            "action": "retract",
+            "reason": reason,
+            "retracted": sentence,
+            "content": self.shown,
+        }]
+
+    def resolve(self, final_response: str) -> List[Dict[str, Any]]:
+        """Events that bring the client in line with the final answer (empty if nothing was streamed)."""
+        if self.ttft_ms is None or final_response.strip() == self.shown.strip():
+            return []
+        self.shown = final_response
+        return [{
+            "type": "correction",
+            "action": "replace",
+            "reason": "retracted" if self.held else "post_stream_policy",
+            "content": final_response,
+        }]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "ttft_ms": self.ttft_ms,
+            "sentences_checked": self.sentences_checked,
+            "retractions": list(self.retractions),
+        }
+
+
 def _resolve_trace_id(fallback: Optional[str] = None) -> str:
     trace_id = None
     try:
@@ -1539,7 +1646,7 @@ async def chat(
 
     conversation_row = None
     if conversation_id:
-        conversation_row = _fetch_conversation_record(conversation_id)
+        conversation_row = await run_db(_fetch_conversation_record, conversation_id, name="chat.conversation")
         reset_reason = _context_reset_reason_for_conversation(
             conversation_row=conversation_row,
             twin_id=twin_id,
@@ -1590,10 +1697,14 @@ async def chat(
 
     async def stream_generator():
         nonlocal conversation_id
+        request_started = time.perf_counter()
+        live_stream: Optional[_LiveAnswerStream] = None
+        token_task = None
         try:
             if not conversation_id:
                 user_id = user.get("user_id") if user else None
-                conv = create_conversation(
+                conv = await run_db(
+                    create_conversation,
                     twin_id,
                     user_id,
                     group_id=group_id,
@@ -1611,7 +1722,7 @@ async def chat(
             raw_history = []
             langchain_history = []
             if conversation_id:
-                raw_history = get_messages(conversation_id)
+                raw_history = await run_db(get_messages, conversation_id, name="chat.history")
                 for msg in raw_history:
                     if msg.get("role") == "user":
                         langchain_history.append(HumanMessage(content=msg.get("content", "")))
@@ -1639,7 +1750,7 @@ async def chat(
             
             # Fetch graph stats for this twin
             from modules.graph_context import get_graph_stats
-            graph_stats = get_graph_stats(twin_id)
+            graph_stats = await run_db(get_graph_stats, twin_id, name="chat.graph_stats")
             
             # Identity Confidence Gate (deterministic)
             history_for_gate = []
@@ -1704,6 +1815,23 @@ async def chat(
             # Log full query for debugging
             print(f"[Chat DEBUG] Full Query: {query}")
             
+            token_queue: Optional[asyncio.Queue] = None
+            if not is_reasoning_query and response_streaming.CHAT_TOKEN_STREAMING_ENABLED:
+                deterministic_rules = ((active_spec or {}).get("spec") or {}).get("deterministic_rules") or {}
+                live_stream = _LiveAnswerStream(
+                    started_at=request_started,
+                    enforce_grounding=_should_hard_enforce_grounding(
+                        query=query,
+                        strict_grounding=_query_requires_strict_grounding(query),
+                        target_owner_scope=None,
+                        dialogue_mode=None,
+                    ),
+                    banned_phrases=deterministic_rules.get("banned_phrases") or [],
+                )
+                token_queue = asyncio.Queue()
+                # Tasks created below copy this context, so realizer_node sees the sink.
+                bind_token_sink(token_queue.put_nowait)
+
             if not is_reasoning_query:
                 agent_iter = run_agent_stream(
                     twin_id=twin_id,
@@ -1722,14 +1850,25 @@ async def chat(
                 while True:
                     if pending_task is None:
                         pending_task = asyncio.create_task(agent_iter.__anext__())
+                    if token_queue is not None and token_task is None:
+                        token_task = asyncio.create_task(token_queue.get())
 
-                    done, _ = await asyncio.wait({pending_task}, timeout=10)
+                    waiting = {pending_task} if token_task is None else {pending_task, token_task}
+                    done, _ = await asyncio.wait(waiting, timeout=10, return_when=asyncio.FIRST_COMPLETED)
                     if not done:
                         # Keep the SSE stream alive while the agent is still thinking.
                         # Keep SSE stream alive using canonical event type
                         yield json.dumps({"type": "metadata", "ping": True}) + "\n"
                         continue
 
+                    if token_task is not None and token_task in done:
+                        delta = token_task.result()
+                        token_task = None
+                        for event in live_stream.feed(delta, retrieved_context_snippets):
+                            yield json.dumps(event) + "\n"
+                        if pending_task not in done:
+                            continue
+
                     try:
                         chunk = pending_task.result()
                     except StopAsyncIteration:
@@ -1813,6 +1952,22 @@ async def chat(
                             if msg.content and not getattr(msg, 'tool_calls', None):
                                 full_response = msg.content
 
+                if token_queue is not None:
+                    bind_token_sink(None)
+                    remaining_tokens = []
+                    if token_task is not None:
+                        if token_task.done():
+                            remaining_tokens.append(token_task.result())
+                        else:
+                            token_task.cancel()
+                    while not token_queue.empty():
+                        remaining_tokens.append(token_queue.get_nowait())
+                    for delta in remaining_tokens:
+                        for event in live_stream.feed(delta, retrieved_context_snippets):
+                            yield json.dumps(event) + "\n"
+                    for event in live_stream.finish(retrieved_context_snippets):
+                        yield json.dumps(event) + "\n"
+
             # If model fell back despite having citations, try a deterministic extract
             if not workflow_intent and isinstance(routing_decision, dict):
                 raw_intent = routing_decision.get("intent")
@@ -2015,23 +2170,35 @@ async def chat(
                 "decision_trace": decision_trace,
                 "identity_gate_mode": gate.get("gate_mode"),
                 "effective_conversation_id": conversation_id,
+                "token_streaming": live_stream.summary() if live_stream else {"enabled": False},
                 **context_trace,
             })
             yield json.dumps(metadata) + "\n"
             
-            # 4. Send final content
-            if full_response:
-                print(f"[Chat] Yielding content: {len(full_response)} chars")
-                yield json.dumps({"type": "content", "token": full_response, "content": full_response}) + "\n"
+            # 4. Send final content (or reconcile what was already streamed)
+            fallback = _uncertainty_message(resolved_context.context.value)
+            final_content = full_response or fallback
+            corrections = live_stream.resolve(final_content) if live_stream else []
+            if live_stream and live_stream.ttft_ms is not None:
+                ttft_ms = live_stream.ttft_ms
+                for event in corrections:
+                    yield json.dumps(event) + "\n"
             else:
-                fallback = _uncertainty_message(resolved_context.context.value)
-                print(f"[Chat] Fallback emitted: {fallback}")
-                yield json.dumps({"type": "content", "token": fallback, "content": fallback}) + "\n"
+                ttft_ms = round((time.perf_counter() - request_started) * 1000, 2)
+                if full_response:
+                    print(f"[Chat] Yielding content: {len(full_response)} chars")
+                else:
+                    print(f"[Chat] Fallback emitted: {fallback}")
+                yield json.dumps({"type": "content", "token": final_content, "content": final_content}) + "\n"
 
             # 5. Done event
-            yield json.dumps({"type": "done"}) + "\n"
+            total_latency_ms = round((time.perf_counter() - request_started) * 1000, 2)
+            yield json.dumps({"type": "done", "ttft_ms": ttft_ms, "total_latency_ms": total_latency_ms}) + "\n"
             
-            print(f"[Chat] Stream ended for twin_id={twin_id}")
+            print(
+                f"[Chat] Stream ended for twin_id={twin_id} "
+                f"ttft_ms={ttft_ms} total_latency_ms={total_latency_ms} corrections={len(corrections)}"
+            )
             
             # 6. Run evaluation (fire-and-forget, non-blocking)
             try:
@@ -2064,7 +2231,8 @@ async def chat(
                 # Create conversation if needed
                 if not conversation_id:
                     user_id = user.get("user_id") if user else None
-                    conv = create_conversation(
+                    conv = await run_db(
+                        create_conversation,
                         twin_id,
                         user_id,
                         group_id=group_id,
@@ -2075,13 +2243,15 @@ async def chat(
                     )
                     conversation_id = conv["id"]
                 
-                user_msg_row = log_interaction(
+                user_msg_row = await run_db(
+                    log_interaction,
                     conversation_id,
                     "user",
                     query,
                     interaction_context=resolved_context.context.value,
                 )
-                assistant_msg_row = log_interaction(
+                assistant_msg_row = await run_db(
+                    log_interaction,
                     conversation_id,
                     "assistant",
                     full_response or fallback,
@@ -2166,6 +2336,10 @@ async def chat(
             # =================================================================
             # CRITICAL FIX H4: Proper cleanup on stream end or disconnect
             # =================================================================
+            if live_stream is not None:
+                bind_token_sink(None)
+                if token_task is not None and not token_task.done():
+                    token_task.cancel()
             try:
                 # Flush Langfuse traces if client is available.
                 if _langfuse_client:
@@ -2214,7 +2388,7 @@ async def chat_widget(twin_id: str, request: ChatWidgetRequest, req_raw: Request
     """
     from modules.api_keys import validate_api_key, validate_domain
     from modules.sessions import create_session, get_session, update_session_activity
-    from modules.rate_limiting import check_rate_limit, record_request
+    from modules.rate_limiting import check_rate_limit
     
     # 1. Validate API Key
     key_info = validate_api_key(request.api_key)
@@ -2249,7 +2423,7 @@ async def chat_widget(twin_id: str, request: ChatWidgetRequest, req_raw: Request
         )
     
     # 4. Rate Limiting Check
-    # Check sessions per hour
+    # Check and count sessions per hour (one atomic step)
     allowed, status = check_rate_limit(session_id, "session", "requests_per_hour", 30)
     if not allowed:
         raise HTTPException(status_code=429, detail="Session rate limit exceeded")
@@ -2604,9 +2778,6 @@ async def chat_widget(twin_id: str, request: ChatWidgetRequest, req_raw: Request
         except Exception as eval_err:
             logger.debug(f"Widget evaluation trigger failed (non-blocking): {eval_err}")
 
-        # Record usage
-        record_request(session_id, "session", "requests_per_hour")
-        
         # Log interaction
         user_msg_row = log_interaction(
             conversation_id,
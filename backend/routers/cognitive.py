@@ -20,6 +20,7 @@ from modules.auth_guard import get_current_user, require_twin_access, require_te
 from modules.governance import AuditLogger
 
 from modules.observability import supabase, get_messages, log_interaction, create_conversation
+from modules.graph_index import bump_graph_version
 from modules.agent import run_agent_stream
 from modules._core.host_engine import get_next_slot, get_next_question, process_turn, generate_contextual_question
 from modules._core.interview_controller import InterviewController, InterviewStage, INTENT_QUESTIONS
@@ -210,6 +211,7 @@ async def cognitive_interview(
         try:
             supabase.table("nodes").delete().eq("twin_id", twin_id).execute()
             supabase.table("edges").delete().eq("twin_id", twin_id).execute()
+            bump_graph_version(twin_id)
             InterviewController.update_session(session_id, new_stage=InterviewStage.OPENING.value, new_intent_confirmed=False)
         except: pass
         return InterviewResponse(
@@ -368,6 +370,7 @@ async def cognitive_interview(
                 "t_id": twin_id, "n_name": "Intent Confirmed", 
                 "n_type": "intent.confirmed", "n_desc": "true", "n_props": {}
             }).execute()
+            bump_graph_version(twin_id)
             
             next_slot = get_next_slot(host_policy, filled_slots)
             if next_slot:
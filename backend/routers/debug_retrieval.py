@@ -138,6 +138,7 @@ async def debug_namespaces(
         clear_creator_namespace_cache
     )
     from modules.clients import get_pinecone_index
+    from modules.namespace_ledger import get_namespace_ledger
     
     try:
         verify_twin_ownership(twin_id, current_user)
@@ -172,6 +173,7 @@ async def debug_namespaces(
             "primary_namespace": primary,
             "dual_read_enabled": os.getenv("DELPHI_DUAL_READ", "true").lower() == "true",
             "namespaces": namespace_details,
+            "namespace_ledger": get_namespace_ledger(twin_id, candidates),
             "pinecone_total_vectors": stats.total_vector_count,
             "pinecone_dimension": stats.dimension
         }
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from modules.observability import supabase
+from modules.graph_index import bump_graph_version
 from modules._core.tenant_guard import verify_tenant_access, verify_twin_access
 
 router = APIRouter(tags=["graph"])
@@ -85,6 +86,7 @@ async def create_node(
             "properties": node.properties
         }
         res = supabase.table("nodes").insert(data).execute()
+        bump_graph_version(twin_id)
         return res.data[0]
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
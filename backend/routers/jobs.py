@@ -145,6 +145,22 @@ async def list_user_jobs(
     return [job_to_response(job) for job in jobs]
 
 
+@router.get("/workers/stats")
+async def get_worker_runtime_stats(user=Depends(get_current_user)):
+    """
+    Get queue depth plus in-flight count and per-type throughput for each live worker.
+
+    Workers publish their stats to Redis periodically; without Redis only the
+    queue depth is available.
+    """
+    from modules.job_queue import get_queue_length, get_worker_stats
+
+    return {
+        "queue_depth": get_queue_length(),
+        "workers": get_worker_stats(),
+    }
+
+
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job_details(
     job_id: str,
@@ -8,6 +8,7 @@ from modules.observability import get_knowledge_profile, supabase
 from modules.verified_qna import (
     list_verified_qna, get_verified_qna, edit_verified_qna
 )
+from modules.verified_qna_index import invalidate_verified_qna_index
 
 router = APIRouter(tags=["knowledge"])
 
@@ -101,6 +102,7 @@ async def delete_verified_qna(qna_id: str, user=Depends(verify_owner)):
         
         # Soft delete
         supabase.table("verified_qna").update({"is_active": False}).eq("id", qna_id).execute()
+        invalidate_verified_qna_index(qna_res.data.get("twin_id"))
         
         return {"status": "success", "message": "Verified QnA deleted"}
     except HTTPException:
@@ -1,7 +1,11 @@
 """
 Metrics and Analytics Router
 Provides endpoints for dashboard analytics, user events, and session tracking.
-Uses real data from conversations and messages tables.
+Dashboard, daily and top-question figures come from the per-twin rollups
+(modules/analytics_rollups.py), falling back to scanning the conversations and
+messages tables when rollups are disabled or unavailable. Top questions prefer
+semantic question clusters (modules/question_clusters.py) once a twin's
+history has been clustered.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -10,6 +14,8 @@ from typing import Optional, List
 from datetime import datetime, date, timedelta
 from modules.observability import supabase
 from modules.auth_guard import get_current_user, verify_twin_ownership, verify_owner
+from modules.analytics_rollups import get_daily_rollups, get_question_rollups
+from modules.question_clusters import get_top_question_clusters, suggest_verified_qna_candidates
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
@@ -47,6 +53,13 @@ class TopQuestion(BaseModel):
     avg_confidence: float
 
 
+class QuestionClusterSuggestion(BaseModel):
+    cluster_id: str
+    question: str
+    count: int
+    avg_confidence: Optional[float] = None
+
+
 class ConversationSummary(BaseModel):
     id: str
     created_at: str
@@ -64,6 +77,71 @@ class ActivityItem(BaseModel):
     metadata: Optional[dict] = {}
 
 
+# ============================================================================
+# Rollup helpers
+# ============================================================================
+
+def _dashboard_stats_from_rollups(rows) -> DashboardStats:
+    """Sum per-day rollup rows into the same figures the base-table scan produces."""
+    totals = {
+        "conversations": 0,
+        "messages": 0,
+        "user_messages": 0,
+        "assistant_messages": 0,
+        "confidence_sum": 0.0,
+        "confidence_count": 0,
+        "escalations": 0,
+    }
+    for row in rows:
+        for key in totals:
+            totals[key] += row.get(key) or 0
+
+    user_messages = totals["user_messages"]
+    assistant_messages = totals["assistant_messages"]
+    response_rate = min(100, (assistant_messages / user_messages * 100) if user_messages else 100)
+    avg_confidence = totals["confidence_sum"] / totals["confidence_count"] if totals["confidence_count"] else 0
+    escalation_rate = (totals["escalations"] / user_messages * 100) if user_messages else 0
+    return DashboardStats(
+        conversations=totals["conversations"],
+        messages=totals["messages"],
+        user_messages=user_messages,
+        assistant_messages=assistant_messages,
+        avg_confidence=round(avg_confidence, 1),
+        escalation_rate=round(escalation_rate, 1),
+        response_rate=round(response_rate, 1)
+    )
+
+
+def _daily_counts_from_base_tables(twin_id: str, start_date: date) -> dict:
+    """Per-day conversation/message counts scanned from conversations and messages (pre-rollup path)."""
+    conversations_result = supabase.table("conversations")\
+        .select("id, created_at")\
+        .eq("twin_id", twin_id)\
+        .gte("created_at", start_date.isoformat())\
+        .execute()
+    
+    conversations = conversations_result.data or []
+    
+    # Group by date
+    daily = {}
+    for conv in conversations:
+        d = conv["created_at"][:10]  # YYYY-MM-DD
+        if d not in daily:
+            daily[d] = {"conversations": 0, "messages": 0, "conversation_ids": []}
+        daily[d]["conversations"] += 1
+        daily[d]["conversation_ids"].append(conv["id"])
+    
+    # Get message counts for each day
+    for d, data in daily.items():
+        if data["conversation_ids"]:
+            messages_result = supabase.table("messages")\
+                .select("id")\
+                .in_("conversation_id", data["conversation_ids"])\
+                .execute()
+            data["messages"] = len(messages_result.data or [])
+    return daily
+
+
 # ============================================================================
 # Dashboard Stats Endpoint - REAL DATA
 # ============================================================================
@@ -74,6 +152,10 @@ async def get_dashboard_stats(twin_id: str, days: int = Query(30, ge=1, le=90),
     verify_twin_ownership(twin_id, user)
     try:
         start_date = datetime.now() - timedelta(days=days)
+
+        rollups = get_daily_rollups(twin_id, start_date.date())
+        if rollups is not None:
+            return _dashboard_stats_from_rollups(rollups.values())
         
         # Get all conversations for this twin
         conversations_result = supabase.table("conversations")\
@@ -312,33 +394,10 @@ async def get_daily_metrics(twin_id: str, days: int = Query(7, ge=1, le=30), use
     verify_twin_ownership(twin_id, user)
     try:
         start_date = date.today() - timedelta(days=days)
-        
-        # Get conversations directly
-        conversations_result = supabase.table("conversations")\
-            .select("id, created_at")\
-            .eq("twin_id", twin_id)\
-            .gte("created_at", start_date.isoformat())\
-            .execute()
-        
-        conversations = conversations_result.data or []
-        
-        # Group by date
-        daily = {}
-        for conv in conversations:
-            d = conv["created_at"][:10]  # YYYY-MM-DD
-            if d not in daily:
-                daily[d] = {"conversations": 0, "messages": 0, "conversation_ids": []}
-            daily[d]["conversations"] += 1
-            daily[d]["conversation_ids"].append(conv["id"])
-        
-        # Get message counts for each day
-        for d, data in daily.items():
-            if data["conversation_ids"]:
-                messages_result = supabase.table("messages")\
-                    .select("id")\
-                    .in_("conversation_id", data["conversation_ids"])\
-                    .execute()
-                data["messages"] = len(messages_result.data or [])
+
+        daily = get_daily_rollups(twin_id, start_date)
+        if daily is None:
+            daily = _daily_counts_from_base_tables(twin_id, start_date)
         
         # Fill in missing days with zeros
         result = []
@@ -370,6 +429,28 @@ async def get_top_questions(twin_id: str, limit: int = Query(5, ge=1, le=20), us
     """Get most frequently asked questions from REAL conversations."""
     verify_twin_ownership(twin_id, user)
     try:
+        question_clusters = get_top_question_clusters(twin_id, limit)
+        if question_clusters is not None:
+            return [
+                TopQuestion(
+                    question=row["representative"],
+                    count=row["count"],
+                    avg_confidence=round(row["confidence_sum"] / row["confidence_count"], 1) if row.get("confidence_count") else 85.0
+                )
+                for row in question_clusters
+            ]
+
+        question_rollups = get_question_rollups(twin_id, limit)
+        if question_rollups is not None:
+            return [
+                TopQuestion(
+                    question=row["display"],
+                    count=row["count"],
+                    avg_confidence=round(row["confidence_sum"] / row["confidence_count"], 1) if row.get("confidence_count") else 85.0
+                )
+                for row in question_rollups
+            ]
+
         # Get conversation IDs for this twin
         conversations_result = supabase.table("conversations")\
             .select("id")\
@@ -432,6 +513,21 @@ async def get_top_questions(twin_id: str, limit: int = Query(5, ge=1, le=20), us
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/question-clusters/{twin_id}/suggestions", response_model=List[QuestionClusterSuggestion])
+async def get_verified_qna_suggestions(
+    twin_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    min_count: int = Query(2, ge=1),
+    user=Depends(get_current_user)
+):
+    """Frequently asked question clusters that no verified answer covers yet."""
+    verify_twin_ownership(twin_id, user)
+    try:
+        return suggest_verified_qna_candidates(twin_id, limit=limit, min_count=min_count)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ============================================================================
 # Event Logging
 # ============================================================================
@@ -560,9 +656,15 @@ async def get_detailed_health(user=Depends(verify_owner)):
         start = time.time()
         result = supabase.table("twins").select("id").limit(1).execute()
         response_ms = (time.time() - start) * 1000
+        from modules.async_db import get_async_db_stats
+        from modules.analytics_rollups import get_analytics_rollup_stats
+        from modules.question_clusters import get_question_cluster_stats
         health["services"]["supabase"] = {
             "status": "healthy",
-            "response_ms": round(response_ms, 2)
+            "response_ms": round(response_ms, 2),
+            "async_queries": get_async_db_stats(),
+            "analytics_rollups": get_analytics_rollup_stats(),
+            "question_clusters": get_question_cluster_stats()
         }
         log_service_health("supabase", "healthy", response_ms)
     except Exception as e:
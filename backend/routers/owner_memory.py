@@ -16,6 +16,7 @@ from modules.owner_memory_store import (
     retract_owner_memory,
     get_owner_memory,
     approve_owner_memory,
+    sync_owner_memory_index,
 )
 from modules.memory_events import create_memory_event
 from modules.verified_qna import create_verified_qna
@@ -189,7 +190,7 @@ async def delete_owner_memory_endpoint(
     """Retract (soft-delete) an owner memory. Idempotent."""
     verify_twin_ownership(twin_id, user)
     
-    success = retract_owner_memory(memory_id, reason="owner_request")
+    success = retract_owner_memory(memory_id, twin_id, reason="owner_request")
     if not success:
         raise HTTPException(status_code=500, detail="Failed to retract memory")
     
@@ -479,6 +480,7 @@ async def lock_owner_memory_endpoint(
     )
     if not updated.data:
         raise HTTPException(status_code=500, detail="Failed to update lock state")
+    sync_owner_memory_index({**existing, **updated.data[0]})
 
     return {
         "status": "updated",
@@ -12,6 +12,7 @@ from datetime import datetime
 
 from modules.auth_guard import get_current_user
 from modules.observability import supabase
+from modules.twin_cache import invalidate_twin_cache
 from modules.governance import AuditLogger
 
 # Link-First modules
@@ -507,6 +508,7 @@ async def transition_to_clarification_pending(
         .eq("id", twin_id)
         .execute()
     )
+    invalidate_twin_cache(twin_id)
     
     if not result.data:
         raise HTTPException(404, "Twin not found")
@@ -540,6 +542,7 @@ async def transition_to_persona_built(
         .eq("id", twin_id)
         .execute()
     )
+    invalidate_twin_cache(twin_id)
     
     if not result.data:
         raise HTTPException(404, "Twin not found")
@@ -600,6 +603,7 @@ async def activate_twin(
         update_data["name"] = final_name
     
     result = supabase.table("twins").update(update_data).eq("id", twin_id).execute()
+    invalidate_twin_cache(twin_id)
     
     # Create active persona spec
     try:
@@ -15,6 +15,7 @@ from modules.memory_events import (
     create_memory_event, update_memory_event
 )
 from modules.observability import supabase
+from modules.graph_index import bump_graph_version
 
 router = APIRouter(tags=["til"])
 
@@ -186,6 +187,7 @@ async def edit_memory_endpoint(
         
         # Update the node
         supabase.table("nodes").update(update_data).eq("id", node_id).eq("twin_id", twin_id).execute()
+        bump_graph_version(twin_id)
         
         return {
             "success": True,
@@ -244,6 +246,7 @@ async def delete_memory_endpoint(
         
         # Archive node (soft delete)
         supabase.table("nodes").update({"status": "archived"}).eq("id", node_id).eq("twin_id", twin_id).execute()
+        bump_graph_version(twin_id)
         
         return {
             "success": True,
@@ -15,6 +15,7 @@ from modules.access_groups import (
     get_group_members, set_group_limit, get_group_limits, set_group_override, get_group_overrides
 )
 from modules.observability import supabase
+from modules.twin_cache import invalidate_twin_cache
 from modules.specializations import get_specialization, get_all_specializations
 from modules.clients import get_pinecone_index
 from modules.graph_context import get_graph_stats
@@ -409,6 +410,7 @@ async def update_twin_settings(
         response = supabase.table("twins").update({
             "settings": updated_settings
         }).eq("id", twin_id).execute()
+        invalidate_twin_cache(twin_id)
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Twin not found or update failed")
@@ -497,6 +499,7 @@ async def archive_twin(twin_id: str, user=Depends(get_current_user)):
         update_res = supabase.table("twins").update({
             "settings": settings
         }).eq("id", twin_id).execute()
+        invalidate_twin_cache(twin_id)
         
         if not update_res.data:
             raise HTTPException(status_code=500, detail="Failed to archive twin")
@@ -536,6 +539,7 @@ async def delete_twin(twin_id: str, user=Depends(get_current_user)):
         
         # Hard delete - remove from database
         delete_res = supabase.table("twins").delete().eq("id", twin_id).execute()
+        invalidate_twin_cache(twin_id)
         
         if not delete_res.data:
             raise HTTPException(status_code=500, detail="Failed to delete twin")
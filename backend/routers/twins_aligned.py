@@ -25,6 +25,7 @@ from modules.access_groups import (
     get_group_members, set_group_limit, get_group_limits, set_group_override, get_group_overrides
 )
 from modules.observability import supabase
+from modules.twin_cache import invalidate_twin_cache
 from modules.specializations import get_specialization, get_all_specializations
 from modules.clients import get_pinecone_index
 from modules.graph_context import get_graph_stats
@@ -295,6 +296,7 @@ async def transition_twin_status(
         "status": new_status,
         "updated_at": datetime.utcnow().isoformat(),
     }).eq("id", twin_id).execute()
+    invalidate_twin_cache(twin_id)
     
     return {
         "twin_id": twin_id,
@@ -354,6 +356,7 @@ async def activate_twin(
     
     # Update twin
     result = supabase.table("twins").update(updates).eq("id", twin_id).execute()
+    invalidate_twin_cache(twin_id)
     
     return {
         "twin_id": twin_id,
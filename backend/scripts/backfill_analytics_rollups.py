@@ -0,0 +1,65 @@
+"""
+Analytics Rollup Backfill
+
+Rebuilds per-twin dashboard rollups (twin_daily_rollups, twin_question_rollups)
+from the conversations, messages and escalations tables. Run once after
+applying database/migrations/migration_analytics_rollups.sql, and again for a
+twin whenever its counters are suspected to have drifted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# Ensure `modules.*` imports resolve when executed from repo root.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv()
+
+from modules.analytics_rollups import backfill_twin_rollups
+from modules.observability import supabase
+
+
+def _twin_ids(only: list[str], missing_only: bool, page_size: int = 500) -> list[str]:
+    if only:
+        return only
+    twin_ids: list[str] = []
+    start = 0
+    while True:
+        res = supabase.table("twins").select("id").order("id").range(start, start + page_size - 1).execute()
+        rows = res.data or []
+        twin_ids.extend(row["id"] for row in rows)
+        if len(rows) < page_size:
+            break
+        start += page_size
+    if missing_only:
+        done = {row["twin_id"] for row in (supabase.table("twin_rollup_state").select("twin_id").execute().data or [])}
+        twin_ids = [twin_id for twin_id in twin_ids if twin_id not in done]
+    return twin_ids
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild analytics rollups from base tables.")
+    parser.add_argument("--twin-id", action="append", default=[], help="Twin to rebuild (repeatable). Default: all twins.")
+    parser.add_argument("--missing-only", action="store_true", help="Skip twins that already have rollup state.")
+    args = parser.parse_args()
+
+    summary = {"twins": 0, "failed": []}
+    for twin_id in _twin_ids(args.twin_id, args.missing_only):
+        result = backfill_twin_rollups(twin_id)
+        if result is None:
+            summary["failed"].append(twin_id)
+            continue
+        summary["twins"] += 1
+        print(json.dumps({"twin_id": twin_id, **result}))
+
+    print(json.dumps({"summary": summary}, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
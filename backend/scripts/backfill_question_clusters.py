@@ -0,0 +1,75 @@
+"""
+Question Cluster Backfill
+
+Re-clusters every user question of a twin (oldest first, embedded in batches)
+and swaps the result into twin_question_clusters. Run once after applying
+database/migrations/migration_question_clusters.sql; /metrics/top-questions
+serves clusters only for twins rebuilt here. Rerun for a twin after changing
+QUESTION_CLUSTER_SIMILARITY or the embedding provider.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# Ensure `modules.*` imports resolve when executed from repo root.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv()
+
+from modules.observability import supabase
+from modules.question_clusters import rebuild_question_clusters
+
+
+def _twin_ids(only: list[str], missing_only: bool, page_size: int = 500) -> list[str]:
+    if only:
+        return only
+    twin_ids: list[str] = []
+    start = 0
+    while True:
+        res = supabase.table("twins").select("id").order("id").range(start, start + page_size - 1).execute()
+        rows = res.data or []
+        twin_ids.extend(row["id"] for row in rows)
+        if len(rows) < page_size:
+            break
+        start += page_size
+    if missing_only:
+        done = {
+            row["twin_id"]
+            for row in (supabase.table("twin_question_cluster_state").select("twin_id").execute().data or [])
+        }
+        twin_ids = [twin_id for twin_id in twin_ids if twin_id not in done]
+    return twin_ids
+
+
+async def _run(twin_ids: list[str], batch_size: int) -> dict:
+    summary = {"twins": 0, "failed": []}
+    for twin_id in twin_ids:
+        result = await rebuild_question_clusters(twin_id, batch_size=batch_size)
+        if result is None:
+            summary["failed"].append(twin_id)
+            continue
+        summary["twins"] += 1
+        print(json.dumps({"twin_id": twin_id, **result}))
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild semantic question clusters from logged messages.")
+    parser.add_argument("--twin-id", action="append", default=[], help="Twin to rebuild (repeatable). Default: all twins.")
+    parser.add_argument("--missing-only", action="store_true", help="Skip twins that already have cluster state.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Questions embedded per request.")
+    args = parser.parse_args()
+
+    summary = asyncio.run(_run(_twin_ids(args.twin_id, args.missing_only), args.batch_size))
+    print(json.dumps({"summary": summary}, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,675 @@
+"""
+Offline end-to-end benchmark for retrieve_context_vectors and
+retrieve_context_with_verified_first.
+
+Pinecone, OpenAI, Cohere and Supabase are replaced with local stand-ins so the
+real retrieval code (query plan, namespace ledger, RRF and sparse fusion, twin
+scope and group filters, MMR, rerank parsing, lexical fusion, anchor filter,
+verified QnA and owner memory indexes) runs without network access:
+
+- InMemoryPineconeIndex implements the index calls PineconeIndexAdapter and
+  the namespace ledger make (query with metadata filters and include_values,
+  upsert, describe_index_stats) over one NumPy matrix per namespace.
+- Embeddings are deterministic hashed bag-of-words vectors, so a query built
+  from a chunk's words retrieves that chunk.
+- The LLM (query expansion, HyDE) and the Cohere reranker return deterministic
+  output.
+- Supabase tables (twins, sources, access groups, permissions, verified QnA,
+  owner memories) are served from memory.
+
+The index runs in vector mode (PINECONE_INDEX_MODE is forced to "vector").
+Each stand-in can add a fixed latency to model its network round trip; by
+default they add none and the report measures the pipeline's own overhead.
+
+Per-phase latencies come from the retrieval.measure_phase events of each
+request. For every pipeline x corpus size x concurrency level the report gives
+p50/p95/p99 per phase and end to end, throughput, and recall of the target
+chunk. It is written as JSON (sorted keys) so runs can be diffed.
+
+Usage:
+    python scripts/benchmark_retrieval_e2e.py [--corpus-sizes 1000,10000] [--concurrency 1,8,32]
+        [--queries 200] [--pipeline vectors|verified_first|both] [--output report.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
+import json
+import os
+import platform
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["PINECONE_INDEX_MODE"] = "vector"
+
+from modules import (  # noqa: E402
+    access_groups,
+    clients,
+    delphi_namespace,
+    namespace_ledger,
+    owner_memory_index,
+    owner_memory_store,
+    retrieval,
+    verified_qna,
+    verified_qna_index,
+)
+
+__test__ = False
+
+TWIN_ID = "7d1c3f0e-5b7a-4c8e-9a51-3f6b2d8e4a10"
+CREATOR_ID = "bench.creator"
+GROUP_ID = "0b6f9e3a-2c4d-4e8f-a1b2-c3d4e5f60718"
+CHUNKS_PER_SOURCE = 20
+WORDS_PER_CHUNK = 60
+TOPIC_WORDS = 12
+VERIFIED_QNA_COUNT = 50
+SYLLABLES = "ba be bi bo da de di do fa fe fi ka ke ki ko la le li lo ma me mi mo na ne ni no ra re ri ro sa se si so ta te ti to va ve vi vo".split()
+QUERY_TEMPLATES = (
+    "How should we approach {0} {1} for {2} {3}?",
+    "What is the tradeoff between {0} {1} and {2} {3}?",
+    "Explain the {0} {1} {2} {3} strategy",
+    "Which {0} {1} works best with {2} {3} in practice?",
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_request_phases: "contextvars.ContextVar[dict]" = contextvars.ContextVar("bench_request_phases")
+
+
+# ---------------------------------------------------------------------------
+# Deterministic embeddings, LLM and reranker
+# ---------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=65536)
+def _token_bucket(token, dimension):
+    digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    return digest % dimension, 1.0 if (digest >> 40) & 1 else -1.0
+
+
+def fake_embedding(text, dimension):
+    """Unit-length signed feature-hashing vector of the text's tokens."""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for token in _TOKEN.findall((text or "").lower()):
+        bucket, sign = _token_bucket(token, dimension)
+        vector[bucket] += sign
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0:
+        vector[0] = 1.0
+        return vector
+    return vector / norm
+
+
+class FakeChatCompletions:
+    """Sync chat.completions stand-in for expand_query and generate_hyde_answer."""
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+
+    def create(self, *, messages, **_kwargs):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        system = messages[0]["content"]
+        query = messages[-1]["content"].replace("Original query:", "").strip()
+        words = _TOKEN.findall(query.lower())
+        if "variations" in system:
+            content = "\n".join([
+                f"- {' '.join(words[1:] or words)}",
+                f"- {' '.join(reversed(words))}",
+                f"- {query} overview",
+            ])
+        else:
+            content = f"In short, {' '.join(words)} depends on {' '.join(words[-3:])} and how {' '.join(words[:3])} is applied."
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeCohereClient:
+    """Cohere rerank stand-in scoring documents by query token overlap."""
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+
+    def rerank(self, *, query, documents, top_n, **_kwargs):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        query_tokens = set(_TOKEN.findall(query.lower()))
+        scored = []
+        for idx, document in enumerate(documents):
+            tokens = set(_TOKEN.findall((document or "").lower()))
+            overlap = len(query_tokens & tokens) / float(max(len(query_tokens), 1))
+            scored.append({"index": idx, "relevance_score": round(0.05 + 0.9 * overlap, 6)})
+        scored.sort(key=lambda item: (-item["relevance_score"], item["index"]))
+        return {"results": scored[:top_n]}
+
+
+# ---------------------------------------------------------------------------
+# In-memory Pinecone index
+# ---------------------------------------------------------------------------
+
+def _matches_filter(metadata, metadata_filter):
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(_matches_filter(metadata, part) for part in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches_filter(metadata, part) for part in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, expected in condition.items():
+                if op == "$eq" and value != expected:
+                    return False
+                if op == "$ne" and value == expected:
+                    return False
+                if op == "$in" and value not in expected:
+                    return False
+                if op == "$nin" and value in expected:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class _Namespace:
+    def __init__(self):
+        self.ids = []
+        self.rows = {}
+        self.vectors = []
+        self.metadata = []
+        self.matrix = None
+        self.masks = {}
+
+
+class InMemoryPineconeIndex:
+    """
+    Exact cosine search over per-namespace NumPy matrices behind the raw
+    Pinecone Index API that PineconeIndexAdapter wraps in vector mode.
+    Metadata filter masks are computed once per distinct filter.
+    """
+
+    def __init__(self, dimension, latency_s=0.0):
+        self.dimension = dimension
+        self.latency_s = latency_s
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, namespace=""):
+        with self._lock:
+            ns = self._namespaces.setdefault(namespace, _Namespace())
+            for item in vectors:
+                values = np.asarray(item["values"], dtype=np.float32)
+                metadata = dict(item.get("metadata") or {})
+                row = ns.rows.get(item["id"])
+                if row is None:
+                    ns.rows[item["id"]] = len(ns.ids)
+                    ns.ids.append(item["id"])
+                    ns.vectors.append(values)
+                    ns.metadata.append(metadata)
+                else:
+                    ns.vectors[row] = values
+                    ns.metadata[row] = metadata
+            ns.matrix = None
+            ns.masks = {}
+        return {"upserted_count": len(vectors)}
+
+    def describe_index_stats(self, **_kwargs):
+        with self._lock:
+            namespaces = {name: {"vector_count": len(ns.ids)} for name, ns in self._namespaces.items()}
+        return {
+            "dimension": self.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+        }
+
+    def _snapshot(self, namespace, metadata_filter):
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None or not ns.ids:
+                return None, None, None
+            if ns.matrix is None:
+                matrix = np.vstack(ns.vectors)
+                norms = np.linalg.norm(matrix, axis=1)
+                norms[norms == 0] = 1.0
+                ns.matrix = matrix / norms[:, None]
+            mask = None
+            if metadata_filter:
+                key = json.dumps(metadata_filter, sort_keys=True, default=str)
+                mask = ns.masks.get(key)
+                if mask is None:
+                    mask = np.fromiter(
+                        (_matches_filter(md, metadata_filter) for md in ns.metadata), dtype=bool, count=len(ns.ids)
+                    )
+                    ns.masks[key] = mask
+            return ns, ns.matrix, mask
+
+    def query(self, *, vector, top_k, namespace="", include_metadata=True, include_values=False, filter=None, **_kwargs):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        ns, matrix, mask = self._snapshot(namespace, filter)
+        if ns is None:
+            return {"matches": [], "namespace": namespace}
+        query_vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query_vector))
+        scores = matrix @ (query_vector / norm if norm else query_vector)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        available = int(mask.sum()) if mask is not None else len(scores)
+        k = min(max(1, int(top_k)), available)
+        if k <= 0:
+            return {"matches": [], "namespace": namespace}
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        matches = []
+        for row in top:
+            match = {"id": ns.ids[row], "score": float(scores[row])}
+            if include_metadata:
+                match["metadata"] = dict(ns.metadata[row])
+            if include_values:
+                match["values"] = matrix[row].tolist()
+            matches.append(match)
+        return {"matches": matches, "namespace": namespace}
+
+
+# ---------------------------------------------------------------------------
+# In-memory Supabase
+# ---------------------------------------------------------------------------
+
+class _TableQuery:
+    def __init__(self, client, name):
+        self._client = client
+        self._name = name
+        self._filters = []
+        self._limit = None
+        self._single = False
+
+    def select(self, *_args, **_kwargs):
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        allowed = set(values)
+        self._filters.append(lambda row: row.get(column) in allowed)
+        return self
+
+    def order(self, *_args, **_kwargs):
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def execute(self):
+        if self._client.latency_s:
+            time.sleep(self._client.latency_s)
+        rows = [dict(row) for row in self._client.tables.get(self._name, []) if all(f(row) for f in self._filters)]
+        if self._limit is not None:
+            rows = rows[: self._limit]
+        if self._single:
+            return SimpleNamespace(data=rows[0] if rows else None)
+        return SimpleNamespace(data=rows)
+
+
+class InMemorySupabase:
+    """Read-only table(...).select().eq()/in_()...execute() over dict rows."""
+
+    def __init__(self, tables, latency_s=0.0):
+        self.tables = tables
+        self.latency_s = latency_s
+
+    def table(self, name):
+        return _TableQuery(self, name)
+
+    def rpc(self, *_args, **_kwargs):
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=None))
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus and queries
+# ---------------------------------------------------------------------------
+
+def _vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def build_corpus(corpus_size, dimension, seed):
+    """Chunks grouped into sources; each source draws its words from one topic."""
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(max(400, corpus_size // 10), rng)
+    sources, chunks = [], []
+    for source_idx in range((corpus_size + CHUNKS_PER_SOURCE - 1) // CHUNKS_PER_SOURCE):
+        source_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        topic = rng.sample(vocabulary, TOPIC_WORDS)
+        sources.append({"id": source_id, "twin_id": TWIN_ID, "filename": f"doc-{source_idx}.pdf"})
+        for chunk_idx in range(CHUNKS_PER_SOURCE):
+            if len(chunks) >= corpus_size:
+                break
+            words = [rng.choice(topic) if rng.random() < 0.6 else rng.choice(vocabulary) for _ in range(WORDS_PER_CHUNK)]
+            text = " ".join(words)
+            chunk_id = f"{source_id}-{chunk_idx}"
+            chunks.append({
+                "id": chunk_id,
+                "values": fake_embedding(text, dimension).tolist(),
+                "metadata": {
+                    "text": text,
+                    "source_id": source_id,
+                    "twin_id": TWIN_ID,
+                    "chunk_id": chunk_id,
+                    "filename": f"doc-{source_idx}.pdf",
+                    "section_title": f"section-{chunk_idx // 5}",
+                    "block_type": "answer_text",
+                    "is_answer_text": True,
+                    "is_verified": False,
+                    "category": "FACT",
+                },
+            })
+    return sources, chunks
+
+
+def build_verified_qna(chunks, dimension, rng):
+    entries = []
+    for idx, chunk in enumerate(rng.sample(chunks, min(VERIFIED_QNA_COUNT, len(chunks)))):
+        words = chunk["metadata"]["text"].split()
+        question = f"What does {' '.join(words[:4])} mean?"
+        entries.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "twin_id": TWIN_ID,
+            "question": question,
+            "answer": f"Verified answer {idx}: {' '.join(words[4:16])}.",
+            "question_embedding": json.dumps(fake_embedding(question, dimension).round(6).tolist()),
+            "is_active": True,
+        })
+    return entries
+
+
+def build_queries(chunks, verified_entries, count, verified_ratio, rng):
+    """(query, target chunk id or None, expects verified answer) triples."""
+    queries = []
+    for idx in range(count):
+        if verified_entries and rng.random() < verified_ratio:
+            queries.append((rng.choice(verified_entries)["question"], None, True))
+            continue
+        chunk = rng.choice(chunks)
+        words = chunk["metadata"]["text"].split()
+        picked = rng.sample(words, 4)
+        queries.append((QUERY_TEMPLATES[idx % len(QUERY_TEMPLATES)].format(*picked), chunk["id"], False))
+    return queries
+
+
+def build_tables(sources, verified_entries):
+    permissions = [
+        {"group_id": GROUP_ID, "content_id": source["id"], "content_type": "source"} for source in sources
+    ] + [
+        {"group_id": GROUP_ID, "content_id": entry["id"], "content_type": "verified_qna"} for entry in verified_entries
+    ]
+    return {
+        "twins": [{"id": TWIN_ID, "creator_id": CREATOR_ID, "tenant_id": "bench-tenant"}],
+        "sources": sources,
+        "access_groups": [{"id": GROUP_ID, "twin_id": TWIN_ID, "is_default": True, "is_public": False}],
+        "content_permissions": permissions,
+        "verified_qna": verified_entries,
+        "citations": [],
+        "owner_beliefs": [],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Wiring
+# ---------------------------------------------------------------------------
+
+def _capture_phase_events(original):
+    def _log(event_type, data):
+        phases = _request_phases.get(None)
+        if phases is not None and event_type == "phase_timing":
+            phases[data["phase"]] = phases.get(data["phase"], 0.0) + float(data["duration_ms"])
+        original(event_type, data)
+    return _log
+
+
+def install_stand_ins(stack, index, db, args):
+    """Patch module globals for the duration of the ExitStack."""
+    dimension = args.dimension
+    embed_latency_s = args.embed_latency_ms / 1000.0
+
+    async def _embeddings_async(texts):
+        if embed_latency_s:
+            await asyncio.sleep(embed_latency_s)
+        return [fake_embedding(text, dimension).tolist() for text in texts]
+
+    def _embedding(text):
+        if embed_latency_s:
+            time.sleep(embed_latency_s)
+        return fake_embedding(text, dimension).tolist()
+
+    chat = SimpleNamespace(chat=SimpleNamespace(completions=FakeChatCompletions(args.llm_latency_ms / 1000.0)))
+    cohere = FakeCohereClient(args.rerank_latency_ms / 1000.0)
+    patches = [
+        (retrieval, "get_embeddings_async", _embeddings_async),
+        (retrieval, "get_embedding", _embedding),
+        (verified_qna, "get_embedding", _embedding),
+        (owner_memory_store, "get_embedding", _embedding),
+        (retrieval, "get_openai_client", lambda: chat),
+        (retrieval, "get_pinecone_index", lambda: index),
+        (clients, "get_cohere_client", lambda required=False: cohere),
+        (retrieval, "_cohere_rerank_enabled", args.rerank == "cohere"),
+        (retrieval, "_cohere_strict_mode", False),
+        (retrieval, "_flashrank_enabled", False),
+        (retrieval, "log_retrieval_event", _capture_phase_events(retrieval.log_retrieval_event)),
+    ]
+    for module in (retrieval, verified_qna, owner_memory_store, delphi_namespace, access_groups):
+        patches.append((module, "supabase", db))
+    for module, name, value in patches:
+        previous = getattr(module, name)
+        setattr(module, name, value)
+        stack.callback(setattr, module, name, previous)
+
+
+def reset_caches():
+    retrieval.clear_rerank_cache()
+    delphi_namespace.clear_creator_namespace_cache()
+    namespace_ledger.invalidate_namespace_ledger()
+    verified_qna_index.invalidate_verified_qna_index()
+    owner_memory_index.invalidate_owner_memory_index()
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def percentiles(values):
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        "count": int(array.size),
+        "mean": round(float(array.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(array.max()), 3),
+    }
+
+
+async def _run_one(pipeline, query, top_k):
+    phases = {}
+    token = _request_phases.set(phases)
+    started = time.perf_counter()
+    try:
+        if pipeline == "verified_first":
+            contexts = await retrieval.retrieve_context_with_verified_first(query, TWIN_ID, top_k=top_k)
+        else:
+            contexts = await retrieval.retrieve_context_vectors(query, TWIN_ID, group_id=GROUP_ID, top_k=top_k)
+        error = None
+    except Exception as e:
+        contexts, error = [], f"{type(e).__name__}: {e}"
+    finally:
+        _request_phases.reset(token)
+    return (time.perf_counter() - started) * 1000.0, phases, contexts, error
+
+
+async def run_level(pipeline, queries, concurrency, top_k, warmup):
+    """Run every query once with at most `concurrency` in flight."""
+    for query, _, _ in queries[:warmup]:
+        await _run_one(pipeline, query, top_k)
+    retrieval.clear_rerank_cache()
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _bounded(query):
+        async with semaphore:
+            return await _run_one(pipeline, query, top_k)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[_bounded(query) for query, _, _ in queries])
+    wall_s = time.perf_counter() - started
+
+    totals = []
+    by_phase = defaultdict(list)
+    outcomes = defaultdict(int)
+    errors = []
+    recall_hits = recall_total = 0
+    for (total_ms, phases, contexts, error), (_, target_id, _) in zip(results, queries):
+        totals.append(total_ms)
+        for phase, duration_ms in phases.items():
+            by_phase[phase].append(duration_ms)
+        if error:
+            errors.append(error)
+            outcomes["error"] += 1
+        elif not contexts:
+            outcomes["empty"] += 1
+        elif contexts[0].get("verified_qna_match"):
+            outcomes["verified_qna"] += 1
+        elif contexts[0].get("owner_memory_match"):
+            outcomes["owner_memory"] += 1
+        else:
+            outcomes["vector"] += 1
+        if target_id:
+            recall_total += 1
+            recall_hits += any(ctx.get("chunk_id") == target_id for ctx in contexts)
+
+    return {
+        "pipeline": pipeline,
+        "concurrency": concurrency,
+        "requests": len(queries),
+        "wall_seconds": round(wall_s, 3),
+        "throughput_rps": round(len(queries) / wall_s, 2) if wall_s > 0 else None,
+        "outcomes": dict(sorted(outcomes.items())),
+        "recall_at_k": round(recall_hits / recall_total, 4) if recall_total else None,
+        "errors": sorted(set(errors))[:5],
+        "latency_ms": {
+            "end_to_end": percentiles(totals),
+            **{phase: percentiles(durations) for phase, durations in by_phase.items()},
+        },
+    }
+
+
+async def run_benchmark(args):
+    runs = []
+    pipelines = ["vectors", "verified_first"] if args.pipeline == "both" else [args.pipeline]
+    for corpus_size in args.corpus_sizes:
+        build_started = time.perf_counter()
+        rng = random.Random(args.seed + corpus_size)
+        sources, chunks = build_corpus(corpus_size, args.dimension, args.seed + corpus_size)
+        verified_entries = build_verified_qna(chunks, args.dimension, rng)
+        index = InMemoryPineconeIndex(args.dimension, latency_s=args.vector_latency_ms / 1000.0)
+        namespace = retrieval.get_namespace(CREATOR_ID, TWIN_ID)
+        for start in range(0, len(chunks), 1000):
+            index.upsert(chunks[start : start + 1000], namespace=namespace)
+        db = InMemorySupabase(build_tables(sources, verified_entries), latency_s=args.db_latency_ms / 1000.0)
+        build_s = time.perf_counter() - build_started
+
+        for pipeline in pipelines:
+            ratio = args.verified_ratio if pipeline == "verified_first" else 0.0
+            queries = build_queries(chunks, verified_entries, args.queries, ratio, random.Random(args.seed))
+            for concurrency in args.concurrency:
+                with contextlib.ExitStack() as stack:
+                    # Retrieval logs with print(); keep stdout for the report.
+                    log_sink = sys.stderr if args.verbose else stack.enter_context(open(os.devnull, "w"))
+                    stack.enter_context(contextlib.redirect_stdout(log_sink))
+                    install_stand_ins(stack, index, db, args)
+                    reset_caches()
+                    # Prime the namespace ledger so the empty legacy namespace is skipped, as in steady state.
+                    namespace_ledger.refresh_namespace_counts(index, wait=True)
+                    result = await run_level(pipeline, queries, concurrency, args.top_k, args.warmup)
+                result["corpus_size"] = corpus_size
+                result["corpus_build_seconds"] = round(build_s, 3)
+                runs.append(result)
+                e2e = result["latency_ms"]["end_to_end"]
+                print(
+                    f"[Benchmark] {pipeline:<14} corpus={corpus_size:<7} concurrency={concurrency:<4} "
+                    f"p50={e2e['p50']:.2f}ms p95={e2e['p95']:.2f}ms p99={e2e['p99']:.2f}ms "
+                    f"rps={result['throughput_rps']} recall={result['recall_at_k']}",
+                    file=sys.stderr,
+                )
+    return runs
+
+
+def _int_list(raw):
+    return [int(value) for value in str(raw).split(",") if value.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus-sizes", type=_int_list, default=[1000, 10000])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32])
+    parser.add_argument("--queries", type=int, default=200, help="requests per corpus size and concurrency level")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests before each level")
+    parser.add_argument("--pipeline", choices=["vectors", "verified_first", "both"], default="both")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--verified-ratio", type=float, default=0.2, help="share of verified_first queries asking a verified question")
+    parser.add_argument("--rerank", choices=["cohere", "vector"], default="cohere", help="'cohere' uses the local Cohere stand-in")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--vector-latency-ms", type=float, default=0.0)
+    parser.add_argument("--rerank-latency-ms", type=float, default=0.0)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="send retrieval's own log output to stderr")
+    args = parser.parse_args()
+
+    runs = asyncio.run(run_benchmark(args))
+    settings = {key: value for key, value in vars(args).items() if key not in ("output", "verbose")}
+    report = {
+        "benchmark": "retrieval_e2e",
+        "settings": settings,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "runs": runs,
+    }
+    payload = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+        print(f"[Benchmark] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
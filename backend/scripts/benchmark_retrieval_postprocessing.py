@@ -0,0 +1,146 @@
+"""
+Micro-benchmark for retrieval post-processing (sparse fusion, MMR, lexical
+fusion, anchor filter) with and without the shared per-request text features,
+plus dense (cosine) MMR over stored vectors.
+
+The "legacy" path re-tokenizes every candidate in every stage, which is what
+retrieval did before the stages shared a _TextFeatureCache. Both paths are run
+over the same synthetic candidates and must return identical rankings.
+
+Usage:
+    python scripts/benchmark_retrieval_postprocessing.py [--iterations 20]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import retrieval  # noqa: E402
+
+__test__ = False
+
+QUERY = "What pricing strategies do founders recommend for early enterprise customers?"
+VOCABULARY = (
+    "pricing price strategy strategies founder founders enterprise customer customers early seed "
+    "revenue contract contracts discount discounts annual monthly negotiation value based cost plus "
+    "market segment sales cycle churn retention onboarding product roadmap hiring team board"
+).split()
+
+
+def _legacy_overlap(query, text):
+    anchors = retrieval._extract_anchor_terms(query)
+    if not anchors:
+        return 0.0
+    normalized = set()
+    for token in set(re.findall(r"[a-z0-9][a-z0-9_-]*", (text or "").lower())):
+        normalized.update(retrieval._token_variants(token))
+    if not normalized:
+        return 0.0
+    return len(anchors.intersection(normalized)) / float(max(len(anchors), 1))
+
+
+def _legacy_tokens(text):
+    return set(re.findall(r"[a-z0-9][a-z0-9_-]*", (text or "").lower()))
+
+
+def _legacy_mmr(contexts, limit):
+    candidates = [dict(row) for row in contexts]
+    tokens = [_legacy_tokens(row.get("text")) for row in candidates]
+    selected, selected_tokens = [], []
+    lam = retrieval.RETRIEVAL_MMR_LAMBDA
+    while candidates and len(selected) < limit:
+        best_idx, best_score = 0, float("-inf")
+        for idx, row in enumerate(candidates):
+            relevance = float(row.get("score", 0.0))
+            penalty = max((retrieval._jaccard_similarity(tokens[idx], s) for s in selected_tokens), default=0.0)
+            score = lam * relevance - (1.0 - lam) * penalty
+            if score > best_score:
+                best_idx, best_score = idx, score
+        selected.append(candidates.pop(best_idx))
+        selected_tokens.append(tokens.pop(best_idx))
+    return selected
+
+
+def _legacy_pipeline(query, contexts, limit):
+    sparse = sorted(contexts, key=lambda c: _legacy_overlap(query, c["text"]), reverse=True)
+    diversified = _legacy_mmr(sparse, limit)
+    for ctx in diversified:
+        ctx["lexical_score"] = _legacy_overlap(query, ctx["text"])
+    anchors = retrieval._extract_anchor_terms(query)
+    return [c for c in diversified if anchors.intersection(
+        {v for t in _legacy_tokens(c["text"]) for v in retrieval._token_variants(t)}
+    )]
+
+
+def _shared_pipeline(query, contexts, limit):
+    features = retrieval._TextFeatureCache()
+    sparse = sorted(contexts, key=lambda c: retrieval._lexical_overlap_score(query, c["text"], features), reverse=True)
+    diversified = retrieval._apply_mmr(query, sparse, limit=limit, features=features)
+    for ctx in diversified:
+        ctx["lexical_score"] = retrieval._lexical_overlap_score(query, ctx["text"], features)
+    anchors = features.anchors(query)
+    return [c for c in diversified if retrieval._text_has_anchor_overlap(c["text"], anchors, features)]
+
+
+def _candidates(count, rng):
+    rows = []
+    for idx in range(count):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(120, 220))]
+        rows.append({"id": f"c{idx}", "text": " ".join(words), "score": rng.random()})
+    return rows
+
+
+def _time_per_query(fn, contexts, limit, iterations):
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(QUERY, [dict(c) for c in contexts], limit)
+    return (time.process_time() - start) / iterations * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'top_k':>5} {'candidates':>10} {'legacy ms':>10} {'shared ms':>10} {'speedup':>8}")
+    for top_k in (8, 16, 32, 48):
+        contexts = _candidates(top_k * 4, rng)
+        limit = top_k * 2
+        legacy = _legacy_pipeline(QUERY, [dict(c) for c in contexts], limit)
+        shared = _shared_pipeline(QUERY, [dict(c) for c in contexts], limit)
+        assert [c["id"] for c in legacy] == [c["id"] for c in shared], "rankings diverged"
+
+        legacy_ms = _time_per_query(_legacy_pipeline, contexts, limit, args.iterations)
+        shared_ms = _time_per_query(_shared_pipeline, contexts, limit, args.iterations)
+        print(f"{top_k:>5} {len(contexts):>10} {legacy_ms:>10.3f} {shared_ms:>10.3f} {legacy_ms / shared_ms:>7.2f}x")
+
+    main_dense(args.iterations)
+
+
+def _time_dense_mmr(count, limit, dimension, iterations, rng):
+    contexts = _candidates(count, rng)
+    matrix = np.random.default_rng(rng.randint(0, 1 << 30)).normal(size=(count, dimension)).astype(np.float32)
+    vectors = {c["text"]: matrix[i] for i, c in enumerate(contexts)}
+    start = time.process_time()
+    for _ in range(iterations):
+        retrieval._apply_mmr(QUERY, contexts, limit=limit, vectors=vectors)
+    return (time.process_time() - start) / iterations * 1000.0
+
+
+def main_dense(iterations):
+    rng = random.Random(11)
+    print(f"\n{'candidates':>10} {'limit':>6} {'dim':>6} {'dense MMR ms':>13}")
+    for count, limit in ((64, 32), (128, 48), (192, 64)):
+        dense_ms = _time_dense_mmr(count, limit, 1536, iterations, rng)
+        print(f"{count:>10} {limit:>6} {1536:>6} {dense_ms:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
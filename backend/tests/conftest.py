@@ -19,6 +19,9 @@ if backend_dir not in sys.path:
 # Ensure feature flags and dev mode are consistent for tests
 os.environ.setdefault("ENABLE_ENHANCED_INGESTION", "true")
 os.environ.setdefault("DEV_MODE", "false")
+# Question clustering embeds logged questions on a background thread; tests that
+# exercise it enable it explicitly.
+os.environ.setdefault("QUESTION_CLUSTERS_ENABLED", "false")
 
 # Ensure langfuse decorator doesn't break FastAPI signatures in tests
 def _noop_observe(*args, **kwargs):
@@ -51,6 +54,31 @@ def pytest_configure(config):
     )
 
 
+@pytest.fixture(autouse=True)
+def _clear_twin_caches():
+    """Keep cached twin settings/ownership/graphs/owner memories/namespace stats/rollup and cluster state from leaking between tests' mocked DBs."""
+    from modules.analytics_rollups import invalidate_analytics_rollups
+    from modules.graph_index import invalidate_graph_index
+    from modules.namespace_ledger import invalidate_namespace_ledger
+    from modules.owner_memory_index import invalidate_owner_memory_index
+    from modules.question_clusters import invalidate_question_clusters
+    from modules.twin_cache import clear_twin_caches
+
+    clear_twin_caches()
+    invalidate_graph_index()
+    invalidate_owner_memory_index()
+    invalidate_namespace_ledger()
+    invalidate_analytics_rollups()
+    invalidate_question_clusters()
+    yield
+    clear_twin_caches()
+    invalidate_graph_index()
+    invalidate_owner_memory_index()
+    invalidate_namespace_ledger()
+    invalidate_analytics_rollups()
+    invalidate_question_clusters()
+
+
 def pytest_collection_modifyitems(session, config, items):
     if not _STRICT_GATE_ENABLED:
         return
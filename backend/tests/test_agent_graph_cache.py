@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from modules import agent
+
+
+@pytest.fixture(autouse=True)
+def _fresh_graph_cache(monkeypatch):
+    monkeypatch.setattr(agent, "get_checkpointer", lambda: None)
+    monkeypatch.setattr(agent, "AGENT_GRAPH_CACHE_ENABLED", True)
+    agent.reset_compiled_twin_agent()
+    yield
+    agent.reset_compiled_twin_agent()
+
+
+def test_compiled_graph_is_built_once_per_process():
+    builds_before = agent.get_agent_graph_cache_stats()["builds"]
+
+    first = agent.create_twin_agent("twin-1", group_id="group-a")
+    second = agent.create_twin_agent("twin-2", group_id="group-b")
+
+    stats = agent.get_agent_graph_cache_stats()
+    assert first is second
+    assert stats["builds"] == builds_before + 1
+    assert stats["compiled"] is True
+    assert stats["last_compile_ms"] >= 0.0
+
+
+def test_graph_is_recompiled_when_checkpointer_changes(monkeypatch):
+    first = agent.get_compiled_twin_agent()
+    monkeypatch.setattr(agent, "get_checkpointer", lambda: object())
+    monkeypatch.setattr(agent, "build_twin_agent_graph", lambda checkpointer=None: ("graph", checkpointer))
+
+    second = agent.get_compiled_twin_agent()
+
+    assert second is not first
+    assert second[0] == "graph"
+
+
+@pytest.mark.asyncio
+async def test_retrieve_node_scopes_retrieval_from_state(monkeypatch):
+    import modules.tools as tools
+
+    captured = {}
+
+    class _FakeTool:
+        async def ainvoke(self, payload):
+            return json.dumps([{"text": payload["query"], "source_id": "src-1"}])
+
+    def _fake_get_retrieval_tool(twin_id, group_id=None, conversation_history=None, resolve_default_group=True):
+        captured.update(
+            twin_id=twin_id,
+            group_id=group_id,
+            history=conversation_history,
+            resolve_default_group=resolve_default_group,
+        )
+        return _FakeTool()
+
+    monkeypatch.setattr(tools, "get_retrieval_tool", _fake_get_retrieval_tool)
+    messages = [HumanMessage(content="what is the rubric?")]
+
+    result = await agent.retrieve_hybrid_node(
+        {
+            "twin_id": "twin-9",
+            "retrieval_group_id": "group-9",
+            "resolve_default_group_filtering": False,
+            "messages": messages,
+            "sub_queries": ["rubric"],
+        }
+    )
+
+    assert captured == {
+        "twin_id": "twin-9",
+        "group_id": "group-9",
+        "history": messages,
+        "resolve_default_group": False,
+    }
+    assert result["citations"] == ["src-1"]
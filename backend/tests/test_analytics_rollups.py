@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from modules import analytics_rollups
+from routers import metrics
+
+
+def _supabase(conversation_rows=None, state_rows=None):
+    sb = MagicMock()
+    tables = {
+        "conversations": conversation_rows or [],
+        "twin_rollup_state": state_rows or [],
+    }
+
+    def _table(name):
+        chain = MagicMock()
+        query = chain.select.return_value
+        query.eq.return_value = query
+        query.gte.return_value = query
+        query.order.return_value = query
+        query.limit.return_value = query
+        query.execute.return_value = SimpleNamespace(data=tables.get(name, []))
+        return chain
+
+    sb.table.side_effect = _table
+    sb.rpc.return_value.execute.return_value = SimpleNamespace(data={"days": 3, "questions": 2})
+    return sb
+
+
+def _rpc_params(sb, name="increment_twin_rollups_system"):
+    return [call.args[1] for call in sb.rpc.call_args_list if call.args[0] == name]
+
+
+def test_messages_increment_the_conversation_day_and_question_sketch():
+    sb = _supabase()
+    with patch.object(analytics_rollups, "supabase", sb):
+        analytics_rollups.record_conversation("twin-1", {"id": "conv-1", "created_at": "2026-03-02T23:59:00+00:00"})
+        analytics_rollups.record_message("conv-1", "user", "  What is your PRICING model? ")
+        analytics_rollups.record_message("conv-1", "assistant", "Usage based.", confidence_score=0.8)
+
+    conversation, user, assistant = _rpc_params(sb)
+    assert conversation == {"t_id": "twin-1", "p_day": "2026-03-02", "p_conversations": 1}
+    assert user["p_day"] == "2026-03-02" and user["p_user_messages"] == 1
+    assert user["p_question_key"] == "what is your pricing model?"
+    assert user["p_question_display"] == "What is your PRICING model?"
+    assert user["p_question_capacity"] == analytics_rollups.ANALYTICS_QUESTION_SKETCH_CAPACITY
+    assert assistant == {
+        "t_id": "twin-1",
+        "p_day": "2026-03-02",
+        "p_messages": 1,
+        "p_assistant_messages": 1,
+        "p_confidence_sum": 0.8,
+        "p_confidence_count": 1,
+    }
+    # The conversation scope came from the cache, not a lookup.
+    assert analytics_rollups.get_analytics_rollup_stats()["conversation_lookups"] == 0
+
+
+def test_unknown_conversation_is_looked_up_once():
+    sb = _supabase(conversation_rows=[{"twin_id": "twin-2", "created_at": "2026-01-05T10:00:00Z"}])
+    with patch.object(analytics_rollups, "supabase", sb):
+        analytics_rollups.record_message("conv-9", "assistant", "hi")
+        analytics_rollups.record_message("conv-9", "assistant", "again")
+
+    assert [p["p_day"] for p in _rpc_params(sb)] == ["2026-01-05", "2026-01-05"]
+    assert [c.args[0] for c in sb.table.call_args_list] == ["conversations"]
+
+
+def test_rollup_write_failure_does_not_raise():
+    sb = _supabase()
+    sb.rpc.return_value.execute.side_effect = RuntimeError("function does not exist")
+    failures = analytics_rollups.get_analytics_rollup_stats()["increment_failures"]
+    with patch.object(analytics_rollups, "supabase", sb):
+        analytics_rollups.record_conversation("twin-1", {"id": "conv-1", "created_at": "2026-03-02"})
+
+    assert analytics_rollups.get_analytics_rollup_stats()["increment_failures"] == failures + 1
+
+
+def test_first_read_backfills_twin_once():
+    sb = _supabase()
+    with patch.object(analytics_rollups, "supabase", sb):
+        assert analytics_rollups.get_daily_rollups("twin-1", date(2026, 1, 1)) == {}
+        assert analytics_rollups.get_question_rollups("twin-1", 5) == []
+
+    assert len(_rpc_params(sb, "backfill_twin_rollups_system")) == 1
+
+
+def test_failed_backfill_falls_back_to_base_tables():
+    sb = _supabase()
+    sb.rpc.return_value.execute.side_effect = RuntimeError("not migrated")
+    with patch.object(analytics_rollups, "supabase", sb):
+        assert analytics_rollups.get_daily_rollups("twin-1", date(2026, 1, 1)) is None
+
+
+@pytest.mark.asyncio
+async def test_dashboard_endpoints_read_rollup_rows_only():
+    today = date.today()
+    rows = {
+        today.isoformat(): {"conversations": 2, "messages": 6, "user_messages": 3, "assistant_messages": 3,
+                            "confidence_sum": 1.6, "confidence_count": 2, "escalations": 1},
+        (today - timedelta(days=1)).isoformat(): {"conversations": 1, "messages": 2, "user_messages": 1,
+                                                  "assistant_messages": 1, "confidence_sum": 0.0,
+                                                  "confidence_count": 0, "escalations": 0},
+    }
+    base_tables = MagicMock(side_effect=AssertionError("base tables scanned"))
+    with patch("routers.metrics.verify_twin_ownership"), patch(
+        "routers.metrics.get_daily_rollups", return_value=rows
+    ), patch("routers.metrics.get_question_rollups", return_value=[
+        {"display": "How do you price?", "count": 4, "confidence_sum": 0, "confidence_count": 0}
+    ]), patch.object(metrics.supabase, "table", base_tables):
+        stats = await metrics.get_dashboard_stats("twin-1", days=30, user={})
+        daily = await metrics.get_daily_metrics("twin-1", days=2, user={})
+        top = await metrics.get_top_questions("twin-1", limit=5, user={})
+
+    assert (stats.conversations, stats.messages, stats.user_messages) == (3, 8, 4)
+    assert stats.avg_confidence == 0.8
+    assert stats.escalation_rate == 25.0
+    assert stats.response_rate == 100.0
+    assert [(d.conversations, d.messages) for d in daily] == [(0, 0), (1, 2), (2, 6)]
+    assert [(q.question, q.count, q.avg_confidence) for q in top] == [("How do you price?", 4, 85.0)]
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from modules import async_db
+from modules.async_db import db_execute, get_async_db_stats, run_db
+
+
+class _SyncQuery:
+    def __init__(self, calls, table):
+        self.calls = calls
+        self.table_name = table
+        self.filters = []
+
+    def select(self, *_args):
+        return self
+
+    def eq(self, key, value):
+        self.filters.append((key, value))
+        return self
+
+    def execute(self):
+        self.calls.append((self.table_name, self.filters, threading.current_thread().name))
+        return SimpleNamespace(data=[{"table": self.table_name}])
+
+
+class _SyncClient:
+    def __init__(self):
+        self.calls = []
+
+    def table(self, name):
+        return _SyncQuery(self.calls, name)
+
+
+class _AsyncQuery(_SyncQuery):
+    async def execute(self):
+        self.calls.append((self.table_name, self.filters, "native"))
+        return SimpleNamespace(data=[{"table": self.table_name}])
+
+
+class _AsyncClient(_SyncClient):
+    def table(self, name):
+        return _AsyncQuery(self.calls, name)
+
+
+@pytest.mark.asyncio
+async def test_non_client_objects_run_the_same_chain_in_the_db_pool():
+    client = _SyncClient()
+
+    res = await db_execute(lambda db: db.table("messages").select("*").eq("id", "m1"), name="test.messages", client=client)
+
+    assert res.data == [{"table": "messages"}]
+    assert client.calls[0][1] == [("id", "m1")]
+    assert client.calls[0][2].startswith("async-db")
+    assert get_async_db_stats()["queries"]["test.messages"]["count"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_real_clients_use_the_native_async_pool(monkeypatch):
+    native = _AsyncClient()
+    monkeypatch.setattr(async_db, "_is_shared_sync_client", lambda _client: True)
+    monkeypatch.setattr(async_db, "_create_postgrest", lambda: native)
+    monkeypatch.setattr(async_db, "ASYNC_DB_BACKEND", "native")
+    sync_client = _SyncClient()
+
+    res = await db_execute(lambda db: db.table("twins").select("id"), name="test.twins", client=sync_client)
+
+    assert res.data == [{"table": "twins"}]
+    assert native.calls[0][2] == "native"
+    assert sync_client.calls == []
+
+
+@pytest.mark.asyncio
+async def test_run_db_caps_concurrency_per_loop(monkeypatch):
+    monkeypatch.setattr(async_db, "ASYNC_DB_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(async_db, "_loop_states", async_db.weakref.WeakKeyDictionary())
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def _slow_query():
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+        return "ok"
+
+    started = time.perf_counter()
+    ticks = 0
+
+    async def _ticker():
+        nonlocal ticks
+        while time.perf_counter() - started < 0.05:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    results, _ = await asyncio.gather(
+        asyncio.gather(*(run_db(_slow_query, name="test.slow") for _ in range(6))),
+        _ticker(),
+    )
+
+    assert results == ["ok"] * 6
+    assert state["peak"] == 2
+    assert ticks > 5  # event loop kept running while queries were in flight
+
+
+@pytest.mark.asyncio
+async def test_run_db_records_failures_and_reraises():
+    def _boom():
+        raise RuntimeError("db down")
+
+    before = get_async_db_stats()["errors"]
+    with pytest.raises(RuntimeError):
+        await run_db(_boom, name="test.boom")
+    assert get_async_db_stats()["errors"] == before + 1
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("PINECONE_API_KEY", "test-key")
+os.environ.setdefault("PINECONE_INDEX_NAME", "test-index")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+
+from main import app
+from modules import inference_router, response_streaming
+from modules.agent import realizer_node
+from modules.auth_guard import get_current_user
+from modules.response_streaming import SentenceSplitter, bind_token_sink, get_token_sink
+from routers import chat as chat_router
+
+client = TestClient(app)
+
+
+def _owner_user():
+    return {"user_id": "owner-1", "tenant_id": "tenant-1", "role": "owner"}
+
+
+def _events(raw_text):
+    return [json.loads(line) for line in raw_text.strip().splitlines() if line.strip()]
+
+
+def _streaming_agent(deltas):
+    async def _fake_stream(*_args, **_kwargs):
+        sink = get_token_sink()
+        for delta in deltas:
+            sink(delta)
+            await asyncio.sleep(0)
+        yield {"agent": {"messages": [AIMessage(content="".join(deltas).strip())]}}
+
+    return _fake_stream
+
+
+def _post_chat(fake_stream, active_spec=None):
+    gate = AsyncMock(return_value={"decision": "ANSWER", "owner_memory": [], "owner_memory_refs": [], "owner_memory_context": ""})
+    app.dependency_overrides[get_current_user] = _owner_user
+    try:
+        with patch("routers.chat.verify_twin_ownership"), patch("routers.chat.ensure_twin_active"), patch(
+            "routers.chat.get_user_group", new=AsyncMock(return_value=None)
+        ), patch("routers.chat.get_default_group", new=AsyncMock(return_value={"id": "group-1"})), patch(
+            "routers.chat._fetch_conversation_record",
+            return_value={"id": "conv-1", "twin_id": "twin-1", "group_id": "group-1", "interaction_context": "owner_chat"},
+        ), patch("routers.chat.get_messages", return_value=[]), patch("routers.chat.log_interaction"), patch(
+            "routers.chat.run_identity_gate", gate
+        ), patch("routers.chat.run_agent_stream", fake_stream), patch(
+            "routers.chat.get_active_persona_spec", return_value=active_spec
+        ), patch("modules.graph_context.get_graph_stats", return_value={"has_graph": False, "node_count": 0}):
+            resp = client.post("/chat/twin-1", json={"query": "how do you pick markets", "conversation_id": "conv-1"})
+    finally:
+        app.dependency_overrides = {}
+    assert resp.status_code == 200
+    return _events(resp.text)
+
+
+def test_sentence_splitter_waits_for_boundary_whitespace():
+    splitter = SentenceSplitter()
+
+    assert splitter.feed("Revenue grew 3.") == []
+    assert splitter.feed("5x last year. Next") == ["Revenue grew 3.5x last year."]
+    assert splitter.feed(" we hire!\nThen") == ["Next we hire!"]
+    assert splitter.flush() == ["Then"]
+
+
+def test_tokens_are_streamed_before_metadata_and_not_resent(monkeypatch):
+    monkeypatch.setattr(response_streaming, "CHAT_TOKEN_STREAMING_ENABLED", True)
+
+    events = _post_chat(_streaming_agent(["I start ", "with one niche. ", "Then expand."]))
+
+    types = [e["type"] for e in events if not e.get("ping")]
+    assert types[:3] == ["content", "content", "content"]
+    assert "".join(e["content"] for e in events if e["type"] == "content") == "I start with one niche. Then expand."
+    metadata = next(e for e in events if e["type"] == "metadata" and not e.get("ping"))
+    assert metadata["token_streaming"]["sentences_checked"] == 2
+    done = events[-1]
+    assert done["type"] == "done"
+    assert done["ttft_ms"] <= done["total_latency_ms"]
+
+
+def test_banned_phrase_sentence_is_retracted_and_final_answer_replaces_it(monkeypatch):
+    monkeypatch.setattr(response_streaming, "CHAT_TOKEN_STREAMING_ENABLED", True)
+    spec = {"version": "v1", "spec": {"deterministic_rules": {"banned_phrases": ["As an AI language model"]}}}
+
+    events = _post_chat(
+        _streaming_agent(["I pick markets I know. ", "As an AI language model I ", "cannot say. ", "More later."]),
+        active_spec=spec,
+    )
+
+    corrections = [e for e in events if e["type"] == "correction"]
+    assert corrections[0]["action"] == "retract"
+    assert corrections[0]["reason"] == "persona_banned_phrase"
+    assert corrections[0]["content"] == "I pick markets I know."
+    # Tokens after the retracted sentence are held back.
+    streamed = [e["content"] for e in events if e["type"] == "content"]
+    assert "More later." not in streamed
+    assert corrections[-1]["action"] == "replace"
+    assert corrections[-1]["reason"] == "retracted"
+
+
+def test_buffered_mode_is_unchanged_when_streaming_disabled(monkeypatch):
+    monkeypatch.setattr(response_streaming, "CHAT_TOKEN_STREAMING_ENABLED", False)
+
+    async def _fake_stream(*_args, **_kwargs):
+        assert get_token_sink() is None
+        yield {"agent": {"messages": [AIMessage(content="Buffered answer.")]}}
+
+    events = _post_chat(_fake_stream)
+
+    contents = [e for e in events if e["type"] == "content"]
+    assert [e["content"] for e in contents] == ["Buffered answer."]
+    assert not any(e["type"] == "correction" for e in events)
+    assert events[-1]["ttft_ms"] is not None
+
+
+def test_unsupported_sentence_is_retracted_when_grounding_is_enforced():
+    live = chat_router._LiveAnswerStream(started_at=0.0, enforce_grounding=True, banned_phrases=[])
+    contexts = [{"text": "We focus on enterprise pricing with annual contracts for mid-market customers."}]
+
+    events = live.feed("We focus on enterprise pricing with annual contracts. ", contexts)
+    events += live.feed("Our rocket company launches satellites into orbit weekly. ", contexts)
+
+    assert [e["type"] for e in events] == ["content", "content", "correction"]
+    assert events[-1]["reason"] == "grounding_unsupported"
+    assert events[-1]["content"] == "We focus on enterprise pricing with annual contracts."
+    assert live.resolve(events[-1]["content"]) == []
+
+
+@pytest.mark.asyncio
+async def test_realizer_streams_through_bound_sink():
+    received = []
+    bind_token_sink(received.append)
+
+    async def _fake_stream_text(messages, *, on_token, **_kwargs):
+        for delta in ("Hello ", "there."):
+            on_token(delta)
+        return "Hello there.", {"provider": "openai", "model": "m", "latency_ms": 9.0, "ttft_ms": 2.0, "streamed": True}
+
+    try:
+        with patch("modules.agent.stream_text", new=_fake_stream_text), patch(
+            "modules.agent.invoke_text", new=AsyncMock(side_effect=AssertionError("buffered path used"))
+        ):
+            result = await realizer_node({"planning_output": {"answer_points": ["hi"]}, "dialogue_mode": "QA_FACT"})
+    finally:
+        bind_token_sink(None)
+
+    assert received == ["Hello ", "there."]
+    assert result["messages"][0].content == "Hello there."
+    assert result["messages"][0].additional_kwargs["inference_ttft_ms"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_stream_text_falls_back_only_before_first_token(monkeypatch):
+    monkeypatch.setattr(inference_router, "_candidate_providers", lambda task, preferred_provider=None: ["openai", "anthropic"])
+    calls = []
+
+    async def _flaky(provider, messages, *, temperature, max_tokens, on_token):
+        calls.append(provider)
+        if provider == "openai":
+            raise RuntimeError("connect failed")
+        on_token("ok")
+        return "ok", "claude"
+
+    monkeypatch.setattr(inference_router, "_stream_provider", _flaky)
+    tokens = []
+    content, meta = await inference_router.stream_text([{"role": "user", "content": "hi"}], on_token=tokens.append)
+
+    assert (content, tokens, calls) == ("ok", ["ok"], ["openai", "anthropic"])
+    assert meta["fallback_used"] is True and meta["ttft_ms"] is not None
+
+    async def _midstream(provider, messages, *, temperature, max_tokens, on_token):
+        on_token("partial")
+        raise RuntimeError("reset")
+
+    monkeypatch.setattr(inference_router, "_stream_provider", _midstream)
+    with pytest.raises(RuntimeError, match="after first token"):
+        await inference_router.stream_text([{"role": "user", "content": "hi"}], on_token=tokens.append)
@@ -0,0 +1,139 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from modules import chunk_enrichment, ingestion
+from modules.chunk_enrichment import is_clearly_factual, plan_enrichment_packs
+
+
+class _FakeCompletions:
+    def __init__(self, respond):
+        self.calls = []
+        self._respond = respond
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        chunks = json.loads(kwargs["messages"][1]["content"])
+        content = self._respond(chunks)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _install_client(monkeypatch, respond):
+    completions = _FakeCompletions(respond)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(chunk_enrichment, "get_async_openai_client", lambda: client)
+    return completions
+
+
+def test_prefilter_only_skips_figures_and_structured_text():
+    table = "Plan | Seats | Price\nStarter | 5 | $49\nGrowth | 25 | $199\nScale | 100 | $799"
+    figures = "Revenue reached $4.2M in FY2023, up 38% from $3.0M in FY2022 across 1,200 accounts."
+
+    assert is_clearly_factual(table)
+    assert is_clearly_factual(figures)
+    # Any stance or first-person language goes to the LLM, even with numbers.
+    assert not is_clearly_factual("I think 2024 was our best year: revenue grew 38% to $4.2M.")
+    assert not is_clearly_factual("The company sells software to mid-market retailers in Europe.")
+    assert not is_clearly_factual("Is 38% growth in 2023 sustainable?")
+
+
+def test_packs_respect_chunk_count_and_character_budget():
+    texts = ["a" * 100, "b" * 100, "c" * 100, "d" * 900, "e" * 50]
+
+    assert plan_enrichment_packs(texts, pack_size=2, max_chars=10_000) == [[0, 1], [2, 3], [4]]
+    assert plan_enrichment_packs(texts, pack_size=8, max_chars=1000) == [[0, 1, 2], [3, 4]]
+
+
+@pytest.mark.asyncio
+async def test_packed_call_matches_results_by_id(monkeypatch):
+    def _respond(chunks):
+        # Out of order, one chunk dropped, one unknown id.
+        items = [
+            {"id": chunks[2]["id"], "questions": ["q3"], "category": "OPINION", "tone": "Assertive",
+             "opinion_map": {"topic": "hiring", "stance": "slow", "intensity": 8}},
+            {"id": chunks[0]["id"], "questions": ["q1", "q2", "q3", "q4"], "category": "FACT", "tone": "Technical",
+             "opinion_map": {"topic": "ignored", "stance": "x", "intensity": 1}},
+            {"id": "c99", "questions": [], "category": "FACT", "tone": "Neutral", "opinion_map": None},
+        ]
+        return json.dumps({"chunks": items})
+
+    completions = _install_client(monkeypatch, _respond)
+    results = await chunk_enrichment.analyze_chunk_batch(["first chunk", "second chunk", "third chunk"])
+
+    assert len(completions.calls) == 1
+    assert completions.calls[0]["response_format"]["type"] == "json_schema"
+    assert results[0] == {"questions": ["q1", "q2", "q3"], "category": "FACT", "tone": "Technical", "opinion_map": None}
+    assert results[1] is None
+    assert results[2]["opinion_map"] == {"topic": "hiring", "stance": "slow", "intensity": 8}
+
+
+@pytest.mark.asyncio
+async def test_failed_packed_call_raises(monkeypatch):
+    def _respond(_chunks):
+        raise RuntimeError("rate limited")
+
+    _install_client(monkeypatch, _respond)
+
+    with pytest.raises(RuntimeError):
+        await chunk_enrichment.analyze_chunk_batch(["one", "two"])
+
+
+@pytest.mark.asyncio
+async def test_enrichment_skips_factual_chunks_and_retries_dropped_ones(monkeypatch):
+    texts = [
+        "Plan | Seats | Price\nStarter | 5 | $49\nGrowth | 25 | $199",
+        "I believe founders should hire slowly.",
+        "The team ships weekly.",
+        "We price on usage.",
+    ]
+    packed, single = [], []
+
+    async def _fake_batch(batch):
+        packed.append(list(batch))
+        return [None if text == "The team ships weekly." else {"questions": [text], "category": "OPINION"} for text in batch]
+
+    async def _fake_single(text):
+        single.append(text)
+        return {"questions": [text], "category": "FACT"}
+
+    monkeypatch.setattr(ingestion, "analyze_chunk_batch", _fake_batch)
+    monkeypatch.setattr(ingestion, "analyze_chunk_content", _fake_single)
+
+    analyses, counts = await ingestion._enrich_chunk_texts(texts, concurrency=2, pack_size=8)
+
+    assert packed == [texts[1:]]
+    assert single == ["The team ships weekly."]
+    assert analyses[0] == chunk_enrichment.default_chunk_analysis()
+    assert [a["questions"][0] for a in analyses[1:]] == texts[1:]
+    assert counts == {
+        "enrich_skipped": 1,
+        "enrich_llm_chunks": 3,
+        "enrich_llm_calls": 2,
+        "enrich_fallback_chunks": 1,
+        "enrich_failed_chunks": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_failed_pack_is_retried_once_then_left_unenriched(monkeypatch):
+    texts = ["I think remote work wins.", "We hire slowly.", "My view on pricing."]
+    packed = []
+
+    async def _failing_batch(batch):
+        packed.append(list(batch))
+        raise RuntimeError("429 rate limited")
+
+    async def _single(_text):
+        raise AssertionError("a failed pack must not fan out to single calls")
+
+    monkeypatch.setattr(ingestion, "INGESTION_ENRICH_RETRY_SECONDS", 0)
+    monkeypatch.setattr(ingestion, "analyze_chunk_batch", _failing_batch)
+    monkeypatch.setattr(ingestion, "analyze_chunk_content", _single)
+
+    analyses, counts = await ingestion._enrich_chunk_texts(texts, concurrency=2, pack_size=8)
+
+    assert packed == [texts, texts]
+    assert analyses == [chunk_enrichment.default_chunk_analysis()] * 3
+    assert counts["enrich_llm_calls"] == 2
+    assert counts["enrich_failed_chunks"] == 3
@@ -22,15 +22,17 @@ async def test_extract_from_content_returns_nodes_and_edges():
     # Mock the OpenAI response
     mock_response = MagicMock()
     mock_response.choices = [MagicMock()]
-    mock_response.choices[0].message.parsed = MagicMock()
-    mock_response.choices[0].message.parsed.nodes = [
-        MagicMock(name="Test Company", type="Company", description="A test company", properties=[]),
-        MagicMock(name="John Doe", type="Person", description="CEO of Test Company", properties=[])
-    ]
-    mock_response.choices[0].message.parsed.edges = [
-        MagicMock(from_node="John Doe", to_node="Test Company", type="CEO_OF", description="Is CEO")
-    ]
-    mock_response.choices[0].message.parsed.confidence = 0.85
+    from modules._core.scribe_engine import GraphUpdates, NodeUpdate, EdgeUpdate
+    mock_response.choices[0].message.parsed = GraphUpdates(
+        nodes=[
+            NodeUpdate(name="Test Company", type="Company", description="A test company", properties=[]),
+            NodeUpdate(name="John Doe", type="Person", description="CEO of Test Company", properties=[])
+        ],
+        edges=[
+            EdgeUpdate(from_node="John Doe", to_node="Test Company", type="CEO_OF", description="Is CEO")
+        ],
+        confidence=0.85
+    )
     
     # Mock the persist functions
     mock_nodes = [
@@ -42,8 +44,7 @@ async def test_extract_from_content_returns_nodes_and_edges():
     ]
     
     with patch('modules._core.scribe_engine.get_async_openai_client') as mock_client, \
-         patch('modules._core.scribe_engine._persist_nodes', new_callable=AsyncMock, return_value=mock_nodes), \
-         patch('modules._core.scribe_engine._persist_edges', new_callable=AsyncMock, return_value=mock_edges), \
+         patch('modules._core.scribe_engine._persist_graph_updates', new_callable=AsyncMock, return_value=(mock_nodes, mock_edges)), \
          patch('modules.memory_events.create_memory_event', new_callable=AsyncMock, return_value={"id": "mem-1"}):
         
         # Setup mock client
@@ -0,0 +1,106 @@
+import pytest
+
+from modules import embeddings
+from modules.embedding_cache import EmbeddingCache, _SQLiteTier, make_cache_key
+
+
+def test_cache_key_normalizes_whitespace_and_separates_models():
+    a = make_cache_key("hello   world ", provider="openai", model="m1", dimension=3)
+    b = make_cache_key(" hello world", provider="openai", model="m1", dimension=3)
+    c = make_cache_key("hello world", provider="openai", model="m2", dimension=3)
+    d = make_cache_key("hello world", provider="huggingface", model="m1", dimension=3)
+
+    assert a == b
+    assert len({a, c, d}) == 3
+
+
+def test_lru_evicts_least_recently_used_and_tracks_stats():
+    cache = EmbeddingCache(maxsize=2)
+    cache.set("a", [1.0])
+    cache.set("b", [2.0])
+    assert cache.get("a") == [1.0]  # touch "a" so "b" is the eviction candidate
+    cache.set("c", [3.0])
+
+    assert cache.get("b") is None
+    assert cache.get("c") == [3.0]
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["l1_hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+
+
+def test_sqlite_tier_backfills_l1(tmp_path):
+    path = str(tmp_path / "emb.sqlite3")
+    writer = EmbeddingCache(maxsize=4, l2=_SQLiteTier(path))
+    writer.set_many({"k1": [0.5, 0.25], "k2": [1.0, 2.0]})
+
+    reader = EmbeddingCache(maxsize=4, l2=_SQLiteTier(path))
+    found = reader.get_many(["k1", "k2", "missing"])
+
+    assert found == {"k1": [0.5, 0.25], "k2": [1.0, 2.0]}
+    assert reader.stats()["l2_hits"] == 2
+    assert reader.stats()["misses"] == 1
+    assert reader.get("k1") == [0.5, 0.25]
+    assert reader.stats()["l1_hits"] == 1
+
+
+def test_l2_errors_degrade_to_misses():
+    class _BrokenTier:
+        name = "broken"
+
+        def get_many(self, keys):
+            raise RuntimeError("down")
+
+        def set_many(self, items):
+            raise RuntimeError("down")
+
+    cache = EmbeddingCache(maxsize=4, l2=_BrokenTier())
+    cache.set("k", [1.0])
+    assert cache.get("k") == [1.0]
+    assert cache.get("other") is None
+    assert cache.stats()["l2_errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_embeddings_only_send_misses_to_provider(monkeypatch):
+    cache = EmbeddingCache(maxsize=16)
+    calls = []
+
+    async def _fake_uncached(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts], "openai"
+
+    monkeypatch.setattr(embeddings, "EMBEDDING_PROVIDER", "openai")
+    monkeypatch.setattr(embeddings, "get_embedding_cache", lambda: cache)
+    monkeypatch.setattr(embeddings, "_get_embeddings_async_uncached", _fake_uncached)
+
+    first = await embeddings.get_embeddings_async(["aa", "bbb", "aa"])
+    second = await embeddings.get_embeddings_async(["bbb", "c"])
+
+    assert first == [[2.0], [3.0], [2.0]]
+    assert second == [[3.0], [1.0]]
+    assert calls == [["aa", "bbb"], ["c"]]
+
+
+def test_cached_vectors_are_returned_as_copies():
+    cache = EmbeddingCache(maxsize=4)
+    cache.set("k", [1.0, 2.0])
+
+    cache.get("k").append(3.0)
+    cache.get_many(["k"])["k"][0] = 9.0
+
+    assert cache.get("k") == [1.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_short_provider_response_raises_a_clear_error(monkeypatch):
+    async def _short_provider(texts):
+        return [[1.0]], "openai"
+
+    monkeypatch.setattr(embeddings, "EMBEDDING_PROVIDER", "openai")
+    monkeypatch.setattr(embeddings, "get_embedding_cache", lambda: EmbeddingCache(maxsize=16))
+    monkeypatch.setattr(embeddings, "_get_embeddings_async_provider", _short_provider)
+
+    with pytest.raises(ValueError, match="returned 1 vectors for 2 texts"):
+        await embeddings.get_embeddings_async(["aa", "bbb"])
@@ -0,0 +1,203 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from modules import embeddings, graph_context, graph_index
+from modules.graph_index import GraphIndex, bump_graph_version, get_graph_index
+
+
+def _node(node_id, name, description=""):
+    return {"id": node_id, "name": name, "type": "Concept", "description": description, "properties": {}}
+
+
+def _edge(edge_id, from_id, to_id, edge_type="RELATES_TO"):
+    return {"id": edge_id, "from_node_id": from_id, "to_node_id": to_id, "type": edge_type}
+
+
+NODES = [
+    _node("n1", "Investment Strategy", "Long-term portfolio allocation"),
+    _node("n2", "Index Funds", "Low cost investing vehicle"),
+    _node("n3", "Vanguard", "Asset manager"),
+    _node("n4", "Bogleheads", "Community around Vanguard"),
+    _node("n5", "Unrelated", "Cooking recipes"),
+]
+EDGES = [
+    _edge("e1", "n1", "n2"),
+    _edge("e2", "n2", "n3"),
+    _edge("e3", "n3", "n4"),
+    _edge("e4", "n1", "missing-node"),
+]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_indexes(monkeypatch):
+    monkeypatch.setattr(graph_index, "_get_redis", lambda: None)
+    graph_index.invalidate_graph_index()
+    yield
+    graph_index.invalidate_graph_index()
+
+
+def test_keyword_seeds_score_names_above_descriptions_with_prefix_match():
+    index = GraphIndex("twin-1", NODES, EDGES)
+
+    seeds = index.keyword_seeds("invest in vanguard", max_seeds=8)
+
+    assert [n["id"] for n in seeds] == ["n1", "n3", "n2", "n4"]
+    assert index.keyword_seeds("zzz", max_seeds=8) == []
+
+
+def test_expand_is_bounded_two_hop_bfs_with_internal_edges():
+    index = GraphIndex("twin-1", NODES, EDGES)
+
+    nodes, edges = index.expand(["n1"], max_hops=2, max_nodes=12)
+    assert [n["id"] for n in nodes] == ["n1", "n2", "n3"]
+    assert sorted(e["id"] for e in edges) == ["e1", "e2"]
+
+    capped, _ = index.expand(["n1"], max_hops=2, max_nodes=2)
+    assert [n["id"] for n in capped] == ["n1", "n2"]
+    assert index.stats()["edges"] == 3  # dangling edge dropped
+    assert index.stats()["cached_expansions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_index_rebuilds_only_after_version_bump(monkeypatch):
+    loads = []
+
+    def _load(twin_id, version=""):
+        loads.append(version)
+        return GraphIndex(twin_id, NODES, EDGES, version=version)
+
+    monkeypatch.setattr(graph_index, "load_graph_index", _load)
+
+    first = await get_graph_index("twin-1")
+    assert await get_graph_index("twin-1") is first
+    assert len(loads) == 1
+
+    bump_graph_version("twin-1")
+    rebuilt = await get_graph_index("twin-1")
+    assert rebuilt is not first
+    assert len(loads) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_stale_readers_share_one_rebuild(monkeypatch):
+    loads = []
+
+    def _load(twin_id, version=""):
+        loads.append(version)
+        time.sleep(0.05)
+        return GraphIndex(twin_id, NODES, EDGES, version=version)
+
+    monkeypatch.setattr(graph_index, "load_graph_index", _load)
+
+    results = await asyncio.gather(*(get_graph_index("twin-1") for _ in range(5)))
+
+    assert len(loads) == 1
+    assert all(index is results[0] for index in results)
+    assert graph_index.get_graph_index_stats()["shared_rebuilds"] >= 4
+
+
+def test_fetch_paged_orders_rows_by_id(monkeypatch):
+    calls = []
+
+    class _Query:
+        def __getattr__(self, name):
+            def _call(*args):
+                calls.append(name)
+                return self
+
+            return _call
+
+        def execute(self):
+            return SimpleNamespace(data=[{"id": "n1"}])
+
+    monkeypatch.setattr(graph_index, "supabase", SimpleNamespace(table=lambda name: _Query()))
+
+    assert graph_index._fetch_paged("nodes", "twin-1", 10) == [{"id": "n1"}]
+    assert calls.index("order") < calls.index("range")
+
+
+@pytest.mark.asyncio
+async def test_semantic_seeds_use_cached_node_embeddings(monkeypatch):
+    calls = []
+    vectors = {"Vanguard": [1.0, 0.0], "Unrelated": [0.0, 1.0]}
+
+    async def _embed(texts):
+        calls.append(list(texts))
+        return [next((v for k, v in vectors.items() if text.startswith(k)), [0.6, 0.8]) for text in texts]
+
+    monkeypatch.setattr(embeddings, "get_embeddings_async", _embed)
+    index = GraphIndex("twin-1", NODES, EDGES)
+
+    assert await index.semantic_seeds("Vanguard", top_k=1) == []  # build runs in the background
+    await index._embedding_task
+    seeds = await index.semantic_seeds("Vanguard", top_k=1)
+    assert [n["id"] for n in seeds] == ["n3"]
+    assert len(calls) == 2  # node batch once, then only the query
+
+    successor = GraphIndex("twin-1", NODES + [_node("n6", "Vanguard ETF", "")], EDGES)
+    successor.inherit_embeddings(index)
+    await successor.build_embeddings()
+    assert calls[-1] == ["Vanguard ETF:"]
+
+
+@pytest.mark.asyncio
+async def test_node_embeddings_are_batched_and_failures_back_off(monkeypatch):
+    calls = []
+
+    async def _embed(texts):
+        calls.append(len(texts))
+        if len(calls) == 2:
+            raise RuntimeError("provider down")
+        return [[1.0, 0.0] for _ in texts]
+
+    monkeypatch.setattr(embeddings, "get_embeddings_async", _embed)
+    monkeypatch.setattr(graph_index, "GRAPH_INDEX_EMBED_BATCH_SIZE", 2)
+    index = GraphIndex("twin-1", NODES, EDGES)
+
+    assert await index.build_embeddings() is None
+    assert calls == [2, 2]
+    index.schedule_embeddings()
+    assert index._embedding_task is None  # backing off after the failure
+
+    index._embed_retry_at = 0.0
+    matrix = await index.build_embeddings()
+    assert matrix.shape == (5, 2)
+    assert calls == [2, 2, 2, 1]  # first batch was kept, not re-embedded
+
+
+@pytest.mark.asyncio
+async def test_redis_version_stamp_is_cached_between_turns(monkeypatch):
+    reads = []
+
+    class _Redis:
+        def get(self, key):
+            reads.append(key)
+            return "7"
+
+        def incr(self, key):
+            return 8
+
+    monkeypatch.setattr(graph_index, "_get_redis", lambda: _Redis())
+    monkeypatch.setattr(graph_index, "load_graph_index", lambda twin_id, version="": GraphIndex(twin_id, NODES, EDGES, version))
+
+    first = await get_graph_index("twin-1")
+    assert await get_graph_index("twin-1") is first
+    assert len(reads) == 1
+
+    bump_graph_version("twin-1")
+    await get_graph_index("twin-1")
+    assert len(reads) == 2
+
+
+@pytest.mark.asyncio
+async def test_graph_snapshot_served_from_index(monkeypatch):
+    monkeypatch.setattr(graph_index, "load_graph_index", lambda twin_id, version="": GraphIndex(twin_id, NODES, EDGES, version))
+
+    snapshot = await graph_context.get_graph_snapshot("twin-1", query="Index Funds investing")
+
+    assert {n["id"] for n in snapshot["nodes"]} == {"n1", "n2", "n3", "n4"}
+    assert "Index Funds (Concept)" in snapshot["context_text"]
+    assert "KNOWN RELATIONSHIPS" in snapshot["context_text"]
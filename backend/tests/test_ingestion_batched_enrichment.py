@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from modules import ingestion
+
+
+def _entries(count: int):
+    return [{"text": f"chunk {i}", "block_type": "answer_text"} for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_embeddings_are_requested_in_configured_batches(monkeypatch):
+    batches = []
+
+    async def _fake_embed(texts):
+        batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    async def _fake_analyze(text):
+        return {"questions": [text], "category": "FACT"}
+
+    async def _fake_analyze_batch(texts):
+        return [{"questions": [text], "category": "FACT"} for text in texts]
+
+    monkeypatch.setattr(ingestion, "get_embeddings_async", _fake_embed)
+    monkeypatch.setattr(ingestion, "analyze_chunk_content", _fake_analyze)
+    monkeypatch.setattr(ingestion, "analyze_chunk_batch", _fake_analyze_batch)
+
+    analyses, embeddings, stats = await ingestion._enrich_and_embed_chunks(
+        _entries(5), batch_size=2
+    )
+
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert len(embeddings) == 5
+    assert [a["questions"][0] for a in analyses] == [f"chunk {i}" for i in range(5)]
+    assert stats["embed_batches"] == 3
+    assert stats["embed_batch_size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_enrichment_respects_concurrency_bound(monkeypatch):
+    in_flight = 0
+    peak = 0
+
+    async def _fake_analyze(text):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"questions": [], "category": "FACT"}
+
+    async def _fake_embed(texts):
+        return [[0.0] for _ in texts]
+
+    monkeypatch.setattr(ingestion, "get_embeddings_async", _fake_embed)
+    monkeypatch.setattr(ingestion, "analyze_chunk_content", _fake_analyze)
+
+    await ingestion._enrich_and_embed_chunks(_entries(10), enrich_concurrency=3, enrich_pack_size=1)
+
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_integrated_mode_skips_embedding_calls(monkeypatch):
+    async def _fail_embed(_texts):
+        raise AssertionError("embeddings should not be requested")
+
+    async def _fake_analyze(_text):
+        return {"questions": []}
+
+    monkeypatch.setattr(ingestion, "get_embeddings_async", _fail_embed)
+    monkeypatch.setattr(ingestion, "analyze_chunk_content", _fake_analyze)
+
+    _analyses, embeddings, stats = await ingestion._enrich_and_embed_chunks(_entries(3), embed=False)
+
+    assert embeddings == [None, None, None]
+    assert stats["embed_batches"] == 0
+
+
+@pytest.mark.asyncio
+async def test_embedding_batch_mismatch_raises(monkeypatch):
+    async def _short_embed(texts):
+        return [[0.0]]
+
+    async def _fake_analyze(_text):
+        return {}
+
+    monkeypatch.setattr(ingestion, "get_embeddings_async", _short_embed)
+    monkeypatch.setattr(ingestion, "analyze_chunk_content", _fake_analyze)
+
+    with pytest.raises(ValueError):
+        await ingestion._enrich_and_embed_chunks(_entries(3), batch_size=3)
@@ -0,0 +1,226 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+import modules.observability as observability
+from modules import ingestion
+
+
+class _FakeChunksTable:
+    def __init__(self, rows):
+        self.rows = rows
+        self.inserted = []
+        self.deleted_ids = []
+        self.deleted_sources = []
+        self._mode = None
+        self._ids = None
+        self._range = None
+
+    def select(self, *_args, **_kwargs):
+        self._mode = "select"
+        return self
+
+    def insert(self, rows):
+        self._mode = "insert"
+        self.inserted.extend(rows)
+        return self
+
+    def delete(self):
+        self._mode = "delete"
+        return self
+
+    def eq(self, column, value):
+        if self._mode == "delete" and column == "source_id":
+            self.deleted_sources.append(value)
+        return self
+
+    def in_(self, _column, ids):
+        self._ids = list(ids)
+        return self
+
+    def order(self, *_args, **_kwargs):
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def execute(self):
+        if self._mode == "select":
+            start, end = self._range or (0, len(self.rows))
+            self._range = None
+            return SimpleNamespace(data=list(self.rows[start : end + 1]))
+        if self._mode == "delete":
+            self.deleted_ids.extend(self._ids or [])
+        return SimpleNamespace(data=[])
+
+
+class _FakeIndex:
+    def __init__(self):
+        self.filter_deletes = []
+
+    def delete(self, filter, namespace):
+        self.filter_deletes.append((filter, namespace))
+
+
+class _FakeAdapter:
+    mode = "vector"
+
+    def __init__(self, _index=None):
+        self.upserted = []
+        self.deleted = []
+
+    def upsert(self, vectors, namespace):
+        self.upserted.extend(vectors)
+
+    def delete(self, ids, namespace):
+        self.deleted.extend(ids)
+
+    async def upsert_bulk_async(self, vectors, namespace):
+        self.upsert(vectors, namespace)
+        return {"items": len(vectors), "batches": 1, "seconds": 0.0, "vectors_per_sec": 0.0}
+
+    async def delete_bulk_async(self, ids, namespace):
+        self.delete(ids, namespace)
+        return {"items": len(ids), "batches": 1, "seconds": 0.0, "vectors_per_sec": 0.0}
+
+
+@pytest.fixture
+def ingestion_env(monkeypatch):
+    state = {"embedded": [], "enriched": []}
+    adapter = _FakeAdapter()
+
+    async def _fake_embed(texts):
+        state["embedded"].extend(texts)
+        return [[0.1, 0.2] for _ in texts]
+
+    async def _fake_analyze(text):
+        state["enriched"].append(text)
+        return {"questions": [], "category": "FACT", "tone": "Neutral"}
+
+    async def _fake_analyze_batch(texts):
+        return [await _fake_analyze(text) for text in texts]
+
+    async def _no_group(_twin_id):
+        return None
+
+    monkeypatch.setattr(ingestion, "get_embeddings_async", _fake_embed)
+    monkeypatch.setattr(ingestion, "analyze_chunk_content", _fake_analyze)
+    monkeypatch.setattr(ingestion, "analyze_chunk_batch", _fake_analyze_batch)
+    monkeypatch.setattr(ingestion, "start_step", lambda **_kwargs: "event-1")
+    monkeypatch.setattr(ingestion, "finish_step", lambda **_kwargs: None)
+    monkeypatch.setattr(ingestion, "get_pinecone_index", lambda: object())
+    monkeypatch.setattr(ingestion, "PineconeIndexAdapter", lambda _index: adapter)
+    monkeypatch.setattr(ingestion, "resolve_creator_id_for_twin", lambda _twin_id: None)
+    monkeypatch.setattr(ingestion, "get_primary_namespace_for_twin", lambda **_kwargs: "ns-1")
+    monkeypatch.setattr(ingestion, "get_default_group", _no_group)
+    monkeypatch.setattr(ingestion, "run_persona_extraction_for_source", lambda **_kwargs: {})
+    state["adapter"] = adapter
+    return state
+
+
+def _install_table(monkeypatch, rows):
+    table = _FakeChunksTable(rows)
+    monkeypatch.setattr(observability, "supabase", SimpleNamespace(table=lambda _name: table))
+    return table
+
+
+def test_chunk_hash_changes_with_text_and_override():
+    entry = {"text": "Hello world", "block_type": "answer_text"}
+
+    base = ingestion._chunk_content_hash(entry)
+
+    assert base == ingestion._chunk_content_hash(dict(entry))
+    assert base != ingestion._chunk_content_hash({**entry, "text": "Hello there"})
+    assert base != ingestion._chunk_content_hash(entry, {"filename": "a.pdf"})
+
+
+@pytest.mark.asyncio
+async def test_reingest_only_embeds_changed_chunks(monkeypatch, ingestion_env):
+    kept = {"text": "unchanged paragraph", "block_type": "answer_text", "is_answer_text": True}
+    removed = {"text": "old paragraph", "block_type": "answer_text", "is_answer_text": True}
+    added = {"text": "new paragraph", "block_type": "answer_text", "is_answer_text": True}
+
+    existing_rows = [
+        {"id": "row-kept", "vector_id": "vec-kept", "metadata": {"content_hash": ingestion._chunk_content_hash(kept)}},
+        {"id": "row-old", "vector_id": "vec-old", "metadata": {"content_hash": ingestion._chunk_content_hash(removed)}},
+    ]
+    table = _install_table(monkeypatch, existing_rows)
+
+    total = await ingestion.process_and_index_text(
+        "source-1",
+        "twin-1",
+        "",
+        chunk_entries_override=[kept, added],
+    )
+
+    assert total == 2
+    assert ingestion_env["embedded"] == ["new paragraph"]
+    assert ingestion_env["enriched"] == ["new paragraph"]
+    assert [row["content"] for row in table.inserted] == ["new paragraph"]
+    assert table.inserted[0]["metadata"]["content_hash"] == ingestion._chunk_content_hash(added)
+    assert table.deleted_ids == ["row-old"]
+    assert ingestion_env["adapter"].deleted == ["vec-old"]
+    assert len(ingestion_env["adapter"].upserted) == 1
+
+
+@pytest.mark.asyncio
+async def test_full_rebuild_replaces_every_chunk(monkeypatch, ingestion_env):
+    kept = {"text": "unchanged paragraph", "block_type": "answer_text"}
+    existing_rows = [
+        {"id": "row-kept", "vector_id": "vec-kept", "metadata": {"content_hash": ingestion._chunk_content_hash(kept)}},
+    ]
+    table = _install_table(monkeypatch, existing_rows)
+
+    total = await ingestion.process_and_index_text(
+        "source-1",
+        "twin-1",
+        "",
+        chunk_entries_override=[kept],
+        incremental=False,
+    )
+
+    assert total == 1
+    assert ingestion_env["embedded"] == ["unchanged paragraph"]
+    assert table.deleted_ids == ["row-kept"]
+    assert ingestion_env["adapter"].deleted == ["vec-kept"]
+
+
+@pytest.mark.asyncio
+async def test_delete_source_pages_vector_ids_and_sweeps_by_filter(monkeypatch, ingestion_env):
+    rows = [{"id": f"row-{i}", "vector_id": f"vec-{i}"} for i in range(2500)]
+    table = _install_table(monkeypatch, rows)
+    index = _FakeIndex()
+
+    monkeypatch.setattr(ingestion, "get_pinecone_index", lambda: index)
+    monkeypatch.setattr(ingestion, "get_primary_namespace_for_twin", lambda _twin_id: "ns-1")
+    monkeypatch.setattr(ingestion, "supabase", MagicMock())
+    monkeypatch.setattr(ingestion.AuditLogger, "log", lambda **_kwargs: None)
+
+    assert await ingestion.delete_source("source-1", "twin-1") is True
+
+    assert len(ingestion_env["adapter"].deleted) == 2500
+    assert index.filter_deletes == [({"source_id": {"$eq": "source-1"}}, "ns-1")]
+    assert table.deleted_sources == ["source-1"]
+
+
+@pytest.mark.asyncio
+async def test_failed_existing_chunk_load_falls_back_to_full_rebuild(monkeypatch, ingestion_env):
+    kept = {"text": "unchanged paragraph", "block_type": "answer_text"}
+    table = _install_table(monkeypatch, [{"id": "row-kept", "vector_id": "vec-kept", "metadata": {}}])
+    index = _FakeIndex()
+    monkeypatch.setattr(ingestion, "get_pinecone_index", lambda: index)
+
+    def _unavailable(_source_id):
+        raise ConnectionError("chunks unavailable")
+
+    monkeypatch.setattr(ingestion, "_load_existing_chunks_by_hash", _unavailable)
+
+    total = await ingestion.process_and_index_text("source-1", "twin-1", "", chunk_entries_override=[kept])
+
+    assert total == 1
+    assert ingestion_env["embedded"] == ["unchanged paragraph"]
+    assert ingestion_env["adapter"].deleted == ["vec-kept"]
+    assert index.filter_deletes == [({"source_id": {"$eq": "source-1"}}, "ns-1")]
+    assert table.deleted_sources == ["source-1"]
@@ -0,0 +1,218 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import openpyxl
+import pytest
+
+import modules.observability as observability
+from modules import ingestion
+
+
+class _Page:
+    def __init__(self, text):
+        self._text = text
+
+    def extract_text(self):
+        return self._text
+
+
+class _Reader:
+    def __init__(self, *_args, **_kwargs):
+        self.pages = [_Page(f"Page {n} body text") for n in range(1, 6)] + [_Page(None)]
+
+
+class _ChunksTable:
+    def __init__(self, events):
+        self.events = events
+        self._mode = None
+
+    def select(self, *_args, **_kwargs):
+        self._mode = "select"
+        return self
+
+    def insert(self, rows):
+        self._mode = "insert"
+        self.events.append(("insert", len(rows)))
+        return self
+
+    def eq(self, *_args, **_kwargs):
+        return self
+
+    def order(self, *_args, **_kwargs):
+        return self
+
+    def range(self, *_args):
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=[])
+
+
+class _Adapter:
+    mode = "vector"
+
+    def __init__(self, events):
+        self.events = events
+
+    async def upsert_bulk_async(self, vectors, namespace):
+        self.events.append(("upsert", len(vectors)))
+        return {"items": len(vectors), "batches": 1, "seconds": 0.0, "vectors_per_sec": 0.0}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    events = []
+
+    async def _fake_embed(texts):
+        return [[0.1, 0.2] for _ in texts]
+
+    async def _fake_analyze(_text):
+        return {"questions": [], "category": "FACT", "tone": "Neutral"}
+
+    async def _fake_analyze_batch(texts):
+        return [{"questions": [], "category": "FACT", "tone": "Neutral"} for _ in texts]
+
+    async def _no_group(_twin_id):
+        return None
+
+    table = _ChunksTable(events)
+    monkeypatch.setattr(observability, "supabase", SimpleNamespace(table=lambda _name: table))
+    monkeypatch.setattr(ingestion, "get_embeddings_async", _fake_embed)
+    monkeypatch.setattr(ingestion, "analyze_chunk_content", _fake_analyze)
+    monkeypatch.setattr(ingestion, "analyze_chunk_batch", _fake_analyze_batch)
+    monkeypatch.setattr(ingestion, "start_step", lambda **_kwargs: "event-1")
+    monkeypatch.setattr(ingestion, "finish_step", lambda **kwargs: events.append(("finish", kwargs["step"], kwargs["status"])))
+    monkeypatch.setattr(ingestion, "get_pinecone_index", lambda: object())
+    monkeypatch.setattr(ingestion, "PineconeIndexAdapter", lambda _index: _Adapter(events))
+    monkeypatch.setattr(ingestion, "resolve_creator_id_for_twin", lambda _twin_id: None)
+    monkeypatch.setattr(ingestion, "get_primary_namespace_for_twin", lambda **_kwargs: "ns-1")
+    monkeypatch.setattr(ingestion, "get_default_group", _no_group)
+    monkeypatch.setattr(ingestion, "PdfReader", _Reader)
+    monkeypatch.setattr(ingestion, "INGESTION_STREAM_BATCH_CHUNKS", 2)
+    return events
+
+
+def test_streamed_pdf_matches_eager_extraction(monkeypatch):
+    monkeypatch.setattr(ingestion, "PdfReader", _Reader)
+
+    document = ingestion.stream_document("manual.pdf", doc_name="Manual.pdf")
+    streamed = list(document)
+    text, eager = ingestion.extract_pdf_text_and_chunk_entries("manual.pdf", doc_name="Manual.pdf")
+
+    assert streamed == eager
+    assert document.text == text == ingestion.extract_text_from_pdf("manual.pdf")
+    assert document.units_read == 5
+    with pytest.raises(RuntimeError):
+        list(document)
+
+
+@pytest.mark.asyncio
+async def test_streamed_document_is_indexed_batch_by_batch(monkeypatch, pipeline):
+    persona_texts = []
+    monkeypatch.setattr(
+        ingestion,
+        "run_persona_extraction_for_source",
+        lambda **kwargs: persona_texts.append(kwargs["text"]) or {},
+    )
+    document = ingestion.stream_document("manual.pdf", doc_name="Manual.pdf")
+    pages_read_at_first_upsert = []
+    progress = []
+
+    build_entries = document._build_entries
+
+    def _tracking(page):
+        if not any(event[0] == "upsert" for event in pipeline):
+            pages_read_at_first_upsert.append(page["page_number"])
+        return build_entries(page)
+
+    document._build_entries = _tracking
+
+    total = await ingestion.process_and_index_text(
+        "source-1",
+        "twin-1",
+        "",
+        chunk_entries_override=document,
+        on_progress=progress.append,
+    )
+
+    assert total == 5
+    assert [e for e in pipeline if e[0] == "upsert"] == [("upsert", 2), ("upsert", 2), ("upsert", 1)]
+    # Only the first batch's pages were read before the first upsert.
+    assert pages_read_at_first_upsert == [1, 2]
+    assert [p["page_number"] for p in progress] == [2, 4, 5]
+    assert progress[-1]["chunks"] == 5
+    assert [e[1] for e in pipeline if e[0] == "finish"] == ["chunked", "embedded", "indexed"]
+    assert persona_texts == [document.text]
+
+
+@pytest.mark.asyncio
+async def test_extraction_failure_closes_open_steps(pipeline):
+    def _entries():
+        yield {"text": "first chunk", "page_number": 1}
+        yield {"text": "second chunk", "page_number": 2}
+        raise ValueError("corrupt page 3")
+
+    with pytest.raises(ValueError):
+        await ingestion.process_and_index_text("source-1", "twin-1", "", chunk_entries_override=_entries())
+
+    finishes = [e[1:] for e in pipeline if e[0] == "finish"]
+    assert finishes[0] == ("chunked", "error")
+    assert {step for step, _status in finishes} == {"chunked", "embedded", "indexed"}
+    assert all(status == "error" for _step, status in finishes)
+
+
+@pytest.mark.asyncio
+async def test_failed_streaming_ingest_removes_partial_chunks(monkeypatch):
+    purged = []
+    sources = MagicMock()
+
+    async def _index(*_args, **_kwargs):
+        raise ValueError("corrupt page 3")
+
+    async def _purge(source_id, namespace, index=None):
+        purged.append((source_id, namespace))
+        return 2
+
+    monkeypatch.setattr(ingestion, "stream_document", lambda *_args, **_kwargs: object())
+    monkeypatch.setattr(ingestion, "process_and_index_text", _index)
+    monkeypatch.setattr(ingestion, "_purge_source_chunks", _purge)
+    monkeypatch.setattr(ingestion, "resolve_creator_id_for_twin", lambda _twin_id: None)
+    monkeypatch.setattr(ingestion, "get_primary_namespace_for_twin", lambda **_kwargs: "ns-1")
+    monkeypatch.setattr(ingestion, "log_ingestion_event", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(ingestion, "supabase", sources)
+
+    with pytest.raises(ValueError):
+        await ingestion.ingest_source("source-1", "twin-1", "manual.pdf")
+
+    assert purged == [("source-1", "ns-1")]
+    sources.table.return_value.update.assert_called_with({"status": "error", "health_status": "failed"})
+
+
+def test_text_sections_split_on_line_boundaries_and_rejoin_exactly():
+    lines = [f"Paragraph {n} " + "x" * 40 for n in range(50)] + [""]
+
+    sections = list(ingestion.iter_text_sections(lines, max_chars=500))
+
+    assert len(sections) > 1
+    assert all(len(s["text"]) <= 500 for s in sections)
+    assert "\n".join(s["text"] for s in sections) == "\n".join(lines)
+    assert [s["text"] for s in ingestion.iter_text_sections(lines, max_chars=10_000)] == ["\n".join(lines)]
+
+
+def test_excel_lines_stream_in_read_only_mode(tmp_path):
+    path = tmp_path / "sheet.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.title = "Revenue"
+    wb.active.append(["Quarter", "Amount"])
+    wb.active.append(["Q1", 100])
+    wb.active.append([None, None])
+    wb.create_sheet("Notes").append(["Flat growth", None, "expected"])
+    wb.save(path)
+
+    document = ingestion.stream_document(str(path), doc_name="sheet.xlsx")
+    entries = list(document)
+
+    expected = "--- Sheet: Revenue ---\nQuarter | Amount\nQ1 | 100\n--- Sheet: Notes ---\nFlat growth | expected"
+    assert ingestion.extract_text_from_excel(str(path)) == expected
+    assert document.text == expected
+    assert entries == ingestion.chunk_text_with_metadata(expected)
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+from modules import namespace_ledger
+from modules.namespace_ledger import (
+    get_namespace_ledger,
+    get_namespace_ledger_stats,
+    record_namespace_write,
+    refresh_namespace_counts,
+    select_read_namespaces,
+)
+
+PRIMARY = "creator_c1_twin_t1"
+LEGACY = "t1"
+
+
+class _Index:
+    def __init__(self, namespaces):
+        self.namespaces = namespaces
+        self.calls = 0
+
+    def describe_index_stats(self):
+        self.calls += 1
+        return SimpleNamespace(
+            namespaces={ns: SimpleNamespace(vector_count=count) for ns, count in self.namespaces.items()}
+        )
+
+
+def test_reads_every_candidate_until_stats_are_known():
+    index = _Index({PRIMARY: 10, LEGACY: 0})
+
+    assert select_read_namespaces("t1", [PRIMARY, LEGACY]) == [PRIMARY, LEGACY]
+
+    refresh_namespace_counts(index, wait=True)
+    before = get_namespace_ledger_stats()
+    assert select_read_namespaces("t1", [PRIMARY, LEGACY], index, queries_per_namespace=3) == [PRIMARY]
+    after = get_namespace_ledger_stats()
+    assert after["namespaces_skipped"] - before["namespaces_skipped"] == 1
+    assert after["queries_avoided"] - before["queries_avoided"] == 3
+    assert index.calls == 1
+
+
+def test_unmigrated_twin_keeps_dual_read_and_primary_is_never_dropped():
+    refresh_namespace_counts(_Index({LEGACY: 42}), wait=True)
+
+    assert select_read_namespaces("t1", [PRIMARY, LEGACY]) == [PRIMARY, LEGACY]
+
+
+def test_local_write_after_snapshot_is_read_before_next_refresh():
+    refresh_namespace_counts(_Index({PRIMARY: 10}), wait=True)
+    record_namespace_write("t1", LEGACY)
+
+    assert select_read_namespaces("t1", [PRIMARY, LEGACY]) == [PRIMARY, LEGACY]
+    assert [row["read"] for row in get_namespace_ledger("t1", [PRIMARY, LEGACY])] == [True, True]
+
+
+def test_stale_snapshot_is_served_while_refresh_runs_in_background(monkeypatch):
+    refresh_namespace_counts(_Index({PRIMARY: 10}), wait=True)
+    monkeypatch.setattr(namespace_ledger, "NAMESPACE_STATS_TTL_SECONDS", 0.0)
+    started = []
+    monkeypatch.setattr(namespace_ledger, "refresh_namespace_counts", lambda index, wait=False: started.append(index))
+    index = _Index({PRIMARY: 10, LEGACY: 5})
+
+    assert select_read_namespaces("t1", [PRIMARY, LEGACY], index) == [PRIMARY]
+    assert started == [index]
+
+
+def test_failed_refresh_keeps_full_fan_out():
+    failing = Mock()
+    failing.describe_index_stats.side_effect = RuntimeError("pinecone down")
+
+    failures_before = get_namespace_ledger_stats()["stats_failures"]
+    refresh_namespace_counts(failing, wait=True)
+
+    assert select_read_namespaces("t1", [PRIMARY, LEGACY], failing) == [PRIMARY, LEGACY]
+    assert get_namespace_ledger_stats()["stats_failures"] - failures_before == 1
+    assert failing.describe_index_stats.call_count == 1  # retry is backed off
+
+
+@pytest.mark.asyncio
+async def test_retrieval_skips_empty_legacy_namespace(monkeypatch):
+    monkeypatch.setenv("PINECONE_INDEX_MODE", "vector")
+    from modules.retrieval import _execute_pinecone_queries
+
+    index = _Index({PRIMARY: 10})
+    index.query = Mock(return_value={"matches": []})
+    refresh_namespace_counts(index, wait=True)
+    avoided_before = get_namespace_ledger_stats()["queries_avoided"]
+
+    with patch("modules.retrieval.get_pinecone_index", return_value=index), patch(
+        "modules.retrieval.get_namespace_candidates_for_twin", return_value=[PRIMARY, LEGACY]
+    ):
+        await _execute_pinecone_queries([[0.1, 0.2]], "t1", creator_id="c1")
+
+    assert {call.kwargs["namespace"] for call in index.query.call_args_list} == {PRIMARY}
+    # One verified and one general query were not sent to the legacy namespace.
+    assert get_namespace_ledger_stats()["queries_avoided"] - avoided_before == 2
@@ -0,0 +1,197 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from modules import owner_memory_index, owner_memory_store as oms
+from modules.owner_memory_index import OwnerMemoryIndex, get_owner_memory_index_stats
+
+
+def _mem(mem_id, topic, value, memory_type="belief", embedding=None, confidence=0.7, created_at="2026-01-01"):
+    return {
+        "id": mem_id,
+        "twin_id": "twin-1",
+        "topic_normalized": topic,
+        "memory_type": memory_type,
+        "value": value,
+        "confidence": confidence,
+        "status": "verified",
+        "embedding": embedding,
+        "created_at": created_at,
+    }
+
+
+MEMORIES = [
+    _mem("m1", "remote work", "I prefer remote work for deep focus", embedding=json.dumps([1.0, 0.0, 0.0]), created_at="2026-01-05"),
+    _mem("m2", "pricing", "Value based pricing beats cost plus", "stance", embedding=[0.0, 1.0, 0.0], confidence=0.9, created_at="2026-01-04"),
+    _mem("m3", "hiring", "Hire slowly and fire quickly", "tone_rule", embedding=[0.6, 0.8, 0.0], created_at="2026-01-03"),
+    _mem("m4", "remote work", "Offices still matter for onboarding", "lens", created_at="2026-01-02"),
+    _mem("m5", "general", "Untyped memory about remote teams", "", embedding=[0.0, 0.0, 1.0], created_at="2026-01-01"),
+]
+
+
+@pytest.fixture
+def loader(monkeypatch):
+    calls = []
+
+    def _list(twin_id, status="active", limit=200):
+        calls.append(twin_id)
+        return [dict(m) for m in MEMORIES]
+
+    monkeypatch.setattr(oms, "_query_owner_memories", _list)
+    monkeypatch.setattr(oms, "get_embedding", lambda text: [0.8, 0.6, 0.0])
+    return calls
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"query": "should we keep remote work", "topic_normalized": "remote work"},
+        {"query": "what about pricing", "memory_type": "stance"},
+        {"query": "hiring plans", "memory_type": "tone_rule", "limit": 2},
+        {"query": "", "topic_normalized": None},
+    ],
+)
+def test_indexed_search_matches_row_scan(loader, monkeypatch, kwargs):
+    monkeypatch.setattr(oms, "OWNER_MEMORY_INDEX_ENABLED", False)
+    expected = oms.find_owner_memory_candidates(twin_id="twin-1", **kwargs)
+    monkeypatch.setattr(oms, "OWNER_MEMORY_INDEX_ENABLED", True)
+    actual = oms.find_owner_memory_candidates(twin_id="twin-1", **kwargs)
+
+    assert [m["id"] for m in actual] == [m["id"] for m in expected]
+    assert [m["_score"] for m in actual] == pytest.approx([m["_score"] for m in expected], abs=1e-6)
+
+
+def test_index_is_reused_and_rows_are_not_mutated(loader):
+    first = oms.find_owner_memory_candidates("remote work", "twin-1")
+    second = oms.find_owner_memory_candidates("pricing", "twin-1")
+
+    assert len(loader) == 1
+    assert first and second
+    index = owner_memory_index._indexes["twin-1"]
+    assert all("_score" not in m for m in index.memories)
+
+
+def test_query_embedding_skipped_when_no_memory_has_one(monkeypatch):
+    monkeypatch.setattr(oms, "_query_owner_memories", lambda *a, **k: [_mem("m1", "pricing", "Value pricing")])
+    monkeypatch.setattr(oms, "get_embedding", lambda text: pytest.fail("query should not be embedded"))
+
+    results = oms.find_owner_memory_candidates("pricing", "twin-1")
+
+    assert not OwnerMemoryIndex("twin-1", [], oms._tokenize).needs_query_embedding
+    assert results[0]["_score"] == pytest.approx(0.5)
+
+
+def test_writes_update_the_cached_index_without_reload(loader, monkeypatch):
+    oms.find_owner_memory_candidates("remote work", "twin-1")
+
+    class _Query:
+        def __init__(self, data=None):
+            self.data = data
+
+        def eq(self, *_args):
+            return self
+
+        def execute(self):
+            return SimpleNamespace(data=[self.data] if self.data else [])
+
+    class _Table:
+        def insert(self, data):
+            return _Query({"id": "m6", "created_at": "2026-02-01", **data})
+
+        def update(self, data):
+            return _Query()
+
+    monkeypatch.setattr(oms, "supabase", SimpleNamespace(table=lambda name: _Table()))
+
+    created = oms.create_owner_memory(
+        twin_id="twin-1",
+        tenant_id="tenant-1",
+        topic_normalized="crypto",
+        memory_type="belief",
+        value="Crypto is mostly speculation",
+        supersede_id="m1",
+    )
+    assert created["id"] == "m6"
+
+    ids = [m["id"] for m in oms.find_owner_memory_candidates("crypto speculation", "twin-1", limit=10)]
+    assert ids[0] == "m6"
+    assert "m1" not in ids  # superseded
+
+    oms.retract_owner_memory("m6", "twin-1")
+    ids = [m["id"] for m in oms.find_owner_memory_candidates("crypto speculation", "twin-1", limit=10)]
+    assert "m6" not in ids
+    assert len(loader) == 1
+    assert get_owner_memory_index_stats()["write_through"] >= 3
+
+
+def test_proposed_rows_are_dropped_when_not_auto_approved(loader, monkeypatch):
+    monkeypatch.setattr(oms, "AUTO_APPROVE_OWNER_MEMORY", False)
+    oms.find_owner_memory_candidates("remote work", "twin-1")
+
+    oms.sync_owner_memory_index({**MEMORIES[0], "status": "proposed"})
+
+    assert "m1" not in owner_memory_index._indexes["twin-1"].id_to_row
+
+
+def test_failed_load_is_not_cached_as_an_empty_index(monkeypatch):
+    rows = []
+
+    def _query(twin_id, status="active", limit=200):
+        if not rows:
+            rows.append(1)
+            raise ConnectionError("db down")
+        return [dict(m) for m in MEMORIES]
+
+    monkeypatch.setattr(oms, "_query_owner_memories", _query)
+    monkeypatch.setattr(oms, "get_embedding", lambda text: [0.8, 0.6, 0.0])
+
+    assert oms.find_owner_memory_candidates("remote work", "twin-1") == []
+    assert "twin-1" not in owner_memory_index._indexes
+    assert oms.find_owner_memory_candidates("remote work", "twin-1")
+
+
+def test_write_on_another_instance_rebuilds_via_redis_version(loader, monkeypatch):
+    class _Redis:
+        def __init__(self):
+            self.values = {}
+
+        def get(self, key):
+            return self.values.get(key)
+
+        def incr(self, key):
+            self.values[key] = int(self.values.get(key) or 0) + 1
+            return self.values[key]
+
+    client = _Redis()
+    monkeypatch.setattr(owner_memory_index, "_get_redis", lambda: client)
+    monkeypatch.setattr(owner_memory_index, "OWNER_MEMORY_VERSION_CACHE_SECONDS", 0)
+
+    oms.find_owner_memory_candidates("remote work", "twin-1")
+    oms.sync_owner_memory_index(_mem("m6", "crypto", "Crypto is speculation"))
+    oms.find_owner_memory_candidates("remote work", "twin-1")
+    assert len(loader) == 1  # a local write-through keeps the index current
+
+    client.incr("owner_memory_version:twin-1")  # a write on another instance
+    oms.find_owner_memory_candidates("remote work", "twin-1")
+    assert len(loader) == 2
+
+
+def test_retract_bumps_the_version_when_the_twin_is_not_cached_here(monkeypatch):
+    bumped = []
+    monkeypatch.setattr(owner_memory_index, "_bump_version", lambda twin_id: bumped.append(twin_id))
+
+    class _Query:
+        def eq(self, *_args):
+            return self
+
+        def execute(self):
+            return SimpleNamespace(data=[])
+
+    monkeypatch.setattr(
+        oms, "supabase", SimpleNamespace(table=lambda name: SimpleNamespace(update=lambda data: _Query()))
+    )
+
+    assert oms.retract_owner_memory("m9", "twin-2")
+    assert oms.supersede_owner_memory("m8", "m9", "twin-2")
+    assert bumped == ["twin-2", "twin-2"]
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from modules import pinecone_adapter
+from modules.pinecone_adapter import PineconeBulkWriteError, PineconeIndexAdapter, iter_write_batches
+
+
+class _Index:
+    def __init__(self, delay=0.0, failures=0, error=None):
+        self.delay = delay
+        self.failures = failures
+        self.error = error or ConnectionError("transient")
+        self.upserted = []
+        self.deleted = []
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            fail = self.failures > 0
+            if fail:
+                self.failures -= 1
+        try:
+            time.sleep(self.delay)
+            if fail:
+                raise self.error
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def upsert(self, vectors, namespace):
+        self._call()
+        self.upserted.append(len(vectors))
+
+    def delete(self, ids, namespace):
+        self._call()
+        self.deleted.append(list(ids))
+
+
+def _vectors(n, text="x"):
+    return [{"id": f"v{i}", "values": [0.1, 0.2], "metadata": {"text": text}} for i in range(n)]
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    monkeypatch.setenv("PINECONE_INDEX_MODE", "vector")
+    monkeypatch.setattr(pinecone_adapter, "_retry_delay", lambda _attempt: 0.0)
+
+
+def test_batches_respect_count_and_byte_budget():
+    vectors = _vectors(5, text="a" * 300)
+    size = pinecone_adapter._payload_bytes(vectors[0])
+
+    by_count = [len(b) for b in iter_write_batches(vectors, max_items=2)]
+    by_bytes = [len(b) for b in iter_write_batches(vectors, max_items=10, max_bytes=size * 2 + 1)]
+    oversized = [len(b) for b in iter_write_batches(vectors, max_items=10, max_bytes=10)]
+
+    assert by_count == [2, 2, 1]
+    assert by_bytes == [2, 2, 1]
+    assert oversized == [1] * 5
+
+
+def test_upsert_bulk_caps_in_flight_requests_and_reports_throughput():
+    index = _Index(delay=0.01)
+    adapter = PineconeIndexAdapter(index)
+
+    stats = adapter.upsert_bulk((v for v in _vectors(25)), "ns", max_batch_vectors=3, max_in_flight=2)
+
+    assert sum(index.upserted) == 25
+    assert index.peak == 2
+    assert stats["items"] == 25 and stats["batches"] == 9
+    assert stats["vectors_per_sec"] > 0
+
+
+def test_transient_failures_are_retried_per_batch():
+    index = _Index(failures=2)
+    adapter = PineconeIndexAdapter(index)
+
+    stats = adapter.upsert_bulk(_vectors(4), "ns", max_batch_vectors=2, max_in_flight=1)
+
+    assert index.upserted == [2, 2]
+    assert stats["retries"] == 2
+
+
+def test_client_errors_fail_fast_with_partial_stats():
+    error = RuntimeError("bad request")
+    error.status = 400
+    index = _Index(error=error)
+    adapter = PineconeIndexAdapter(index)
+    adapter.upsert_bulk(_vectors(2), "ns", max_batch_vectors=2, max_in_flight=1)
+    index.failures = 1
+
+    with pytest.raises(PineconeBulkWriteError) as exc_info:
+        adapter.upsert_bulk(_vectors(6), "ns", max_batch_vectors=2, max_in_flight=1)
+
+    assert index.calls == 2  # no retry of the 400
+    assert exc_info.value.stats["items"] == 0
+    assert exc_info.value.__cause__ is error
+
+
+@pytest.mark.asyncio
+async def test_async_variants_keep_the_event_loop_free():
+    index = _Index(delay=0.02)
+    adapter = PineconeIndexAdapter(index)
+    ticks = 0
+
+    async def _ticker():
+        nonlocal ticks
+        for _ in range(10):
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    stats, _ = await asyncio.gather(
+        adapter.upsert_bulk_async(_vectors(10), "ns", max_batch_vectors=2, max_in_flight=3),
+        _ticker(),
+    )
+    delete_stats = await adapter.delete_bulk_async([f"v{i}" for i in range(5)] + [None], "ns", batch_size=2)
+
+    assert stats["items"] == 10 and index.peak <= 3
+    assert ticks == 10
+    assert sorted(len(ids) for ids in index.deleted) == [1, 2, 2]
+    assert delete_stats["items"] == 5
+
+
+def test_integrated_mode_caps_records_per_request(monkeypatch):
+    monkeypatch.setenv("PINECONE_INDEX_MODE", "integrated")
+
+    class _IntegratedIndex(_Index):
+        def upsert_records(self, namespace, records):
+            self._call()
+            self.upserted.append(len(records))
+
+        def search_records(self, **_kwargs):
+            return {}
+
+    index = _IntegratedIndex()
+    PineconeIndexAdapter(index).upsert_bulk(_vectors(200), "ns", max_batch_vectors=500, max_in_flight=1)
+
+    assert index.upserted == [96, 96, 8]
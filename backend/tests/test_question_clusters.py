@@ -0,0 +1,210 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from modules import question_clusters
+from modules.question_clusters import TwinQuestionClusters
+from routers import metrics
+
+PRICING = [1.0, 0.0, 0.0]
+PRICING_PARAPHRASE = [0.95, 0.3, 0.0]
+HIRING = [0.0, 0.0, 1.0]
+
+
+def _unit(values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _supabase(tables=None, rpc_data=None):
+    sb = MagicMock()
+    tables = tables or {}
+
+    def _table(name):
+        chain = MagicMock()
+        query = chain.select.return_value
+        for method in ("eq", "gte", "in_", "order", "limit"):
+            getattr(query, method).return_value = query
+        query.execute.return_value = SimpleNamespace(data=tables.get(name, []))
+        chain.insert.return_value.execute.side_effect = lambda: SimpleNamespace(
+            data=[{"id": f"cluster-{sb.insert_count()}"}]
+        )
+        return chain
+
+    inserts = []
+    sb.insert_count = lambda: inserts.append(1) or len(inserts)
+    sb.table.side_effect = _table
+    sb.rpc.return_value.execute.return_value = SimpleNamespace(data=rpc_data)
+    return sb
+
+
+def _rpc_params(sb, name="bump_question_cluster_system"):
+    return [call.args[1] for call in sb.rpc.call_args_list if call.args[0] == name]
+
+
+def test_paraphrases_share_a_cluster_and_move_its_centroid():
+    clusters = TwinQuestionClusters("twin-1")
+
+    assert clusters.assign(_unit(PRICING), "How do you price?", 0.85, 10) == (0, True)
+    assert clusters.assign(_unit(PRICING_PARAPHRASE), "What's your pricing?", 0.85, 10) == (0, False)
+    assert clusters.assign(_unit(HIRING), "Who do you hire?", 0.85, 10) == (1, True)
+
+    assert clusters.counts == [2, 1]
+    assert clusters.representatives == ["How do you price?", "Who do you hire?"]
+    expected = (_unit(PRICING) + _unit(PRICING_PARAPHRASE)) / 2
+    np.testing.assert_allclose(clusters.mean(0), expected, rtol=1e-6)
+    np.testing.assert_allclose(clusters.matrix[0], expected / np.linalg.norm(expected), rtol=1e-6)
+    # At the per-twin cap a dissimilar question joins the nearest cluster instead.
+    assert clusters.assign(_unit([0.1, 1.0, 0.0]), "Where are you based?", 0.85, 2) == (0, False)
+
+
+def test_assign_question_inserts_new_clusters_and_bumps_existing_ones(monkeypatch):
+    embeddings = {"How do you price?": PRICING, "What's your pricing?": PRICING_PARAPHRASE}
+    monkeypatch.setattr(question_clusters, "get_embedding", lambda text: embeddings[text])
+    sb = _supabase(rpc_data=2)
+    before = question_clusters.get_question_cluster_stats()
+
+    with patch.object(question_clusters, "supabase", sb):
+        first = question_clusters._assign_question("twin-1", "How do you price?")
+        second = question_clusters._assign_question("twin-1", "What's your pricing?")
+
+    assert first == second == "cluster-1"
+    (bump,) = _rpc_params(sb)
+    assert bump["p_cluster_id"] == "cluster-1"
+    assert json.loads(bump["p_vector"]) == pytest.approx(list(_unit(PRICING_PARAPHRASE)), abs=1e-5)
+    stats = question_clusters.get_question_cluster_stats()
+    assert stats["loads"] - before["loads"] == 1
+    assert stats["clusters_created"] - before["clusters_created"] == 1
+    assert stats["clusters_cached"] == 1
+
+
+def test_bump_of_a_replaced_cluster_reloads_and_reassigns(monkeypatch):
+    monkeypatch.setattr(question_clusters, "get_embedding", lambda text: PRICING)
+    row = {"representative": "How do you price?", "centroid": json.dumps(PRICING), "count": 1}
+    tables = {"twin_question_clusters": [{**row, "id": "cluster-old"}]}
+    sb = _supabase(tables=tables)
+    results = iter([None, 2])
+
+    def _bump(_name, _params):
+        # A rebuild replaced the twin's clusters after they were cached.
+        tables["twin_question_clusters"] = [{**row, "id": "cluster-new"}]
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=next(results)))
+
+    sb.rpc.side_effect = _bump
+    before = question_clusters.get_question_cluster_stats()
+
+    with patch.object(question_clusters, "supabase", sb):
+        assert question_clusters._assign_question("twin-1", "What's your pricing?") == "cluster-new"
+
+    assert [call.args[1]["p_cluster_id"] for call in sb.rpc.call_args_list] == ["cluster-old", "cluster-new"]
+    stats = question_clusters.get_question_cluster_stats()
+    assert stats["stale_clusters"] - before["stale_clusters"] == 1
+    assert stats["loads"] - before["loads"] == 2
+
+
+def test_answer_confidence_lands_on_the_question_cluster(monkeypatch):
+    monkeypatch.setattr(question_clusters, "QUESTION_CLUSTERS_ENABLED", True)
+    monkeypatch.setattr(question_clusters, "_submit", lambda fn, *args: fn(*args))
+    monkeypatch.setattr(question_clusters, "get_conversation_scope", lambda conversation_id: ("twin-1", "2026-03-02"))
+    monkeypatch.setattr(question_clusters, "get_embedding", lambda text: PRICING)
+    sb = _supabase(rpc_data=1)
+
+    with patch.object(question_clusters, "supabase", sb):
+        question_clusters.observe_message("conv-1", "user", "How do you price?")
+        question_clusters.observe_message("conv-1", "assistant", "Usage based.", confidence_score=0.8)
+        # A second answer without a new question is not attributed again.
+        question_clusters.observe_message("conv-1", "assistant", "Anything else?", confidence_score=0.9)
+
+    assert _rpc_params(sb) == [{"p_cluster_id": "cluster-1", "p_count_delta": 0, "p_confidence": 0.8}]
+
+
+def test_failed_write_is_counted_and_drops_the_cached_centroids(monkeypatch):
+    monkeypatch.setattr(question_clusters, "get_embedding", lambda text: PRICING)
+    sb = _supabase()
+    sb.table.side_effect = None
+    sb.table.return_value.select.return_value.eq.return_value.order.return_value.limit.return_value.execute.return_value = (
+        SimpleNamespace(data=[])
+    )
+    sb.table.return_value.insert.return_value.execute.side_effect = RuntimeError("db down")
+    failures = question_clusters.get_question_cluster_stats()["failures"]
+
+    with patch.object(question_clusters, "supabase", sb):
+        question_clusters._pending += 1
+        question_clusters._run(question_clusters._assign_question, "twin-1", "How do you price?")
+
+    stats = question_clusters.get_question_cluster_stats()
+    assert stats["failures"] == failures + 1 and stats["twins_cached"] == 0 and stats["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rebuild_pairs_questions_with_answer_confidence(monkeypatch):
+    messages = [
+        {"conversation_id": "c1", "role": "user", "content": "How do you price?", "created_at": "2026-03-01T10:00:00"},
+        {"conversation_id": "c1", "role": "assistant", "content": "Usage.", "confidence_score": 0.8, "created_at": "2026-03-01T10:00:01"},
+        {"conversation_id": "c2", "role": "user", "content": "What's your pricing?", "created_at": "2026-03-01T11:00:00"},
+        {"conversation_id": "c2", "role": "assistant", "content": "Usage.", "confidence_score": 0.6, "created_at": "2026-03-01T11:00:01"},
+        {"conversation_id": "c2", "role": "user", "content": "Who do you hire?", "created_at": "2026-03-01T11:01:00"},
+    ]
+    sb = _supabase(tables={"conversations": [{"id": "c1"}, {"id": "c2"}], "messages": messages}, rpc_data=2)
+    embeddings = {"How do you price?": PRICING, "What's your pricing?": PRICING_PARAPHRASE, "Who do you hire?": HIRING}
+    monkeypatch.setattr(
+        question_clusters, "get_embeddings_async", AsyncMock(side_effect=lambda texts: [embeddings[t] for t in texts])
+    )
+
+    with patch.object(question_clusters, "supabase", sb):
+        result = await question_clusters.rebuild_question_clusters("twin-1")
+
+    assert result == {"questions": 3, "clusters": 2}
+    (params,) = _rpc_params(sb, "replace_twin_question_clusters_system")
+    pricing, hiring = params["p_clusters"]
+    assert (pricing["count"], pricing["confidence_sum"], pricing["confidence_count"]) == (2, pytest.approx(1.4), 2)
+    assert (hiring["representative"], hiring["count"], hiring["confidence_count"]) == ("Who do you hire?", 1, 0)
+    assert question_clusters.get_question_cluster_stats()["twins_backfilled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_top_questions_prefer_clusters_once_backfilled(monkeypatch):
+    monkeypatch.setattr(question_clusters, "QUESTION_CLUSTERS_ENABLED", True)
+    clusters = [{"id": "k1", "representative": "How do you price?", "count": 7, "confidence_sum": 4.2, "confidence_count": 6}]
+    sb = _supabase(tables={"twin_question_cluster_state": [{"twin_id": "twin-1"}], "twin_question_clusters": clusters})
+
+    with patch.object(question_clusters, "supabase", sb), patch("routers.metrics.verify_twin_ownership"), patch(
+        "routers.metrics.get_question_rollups", side_effect=AssertionError("rollups read")
+    ):
+        result = await metrics.get_top_questions("twin-1", limit=5, user={"user_id": "owner-1"})
+
+    assert [(q.question, q.count, q.avg_confidence) for q in result] == [("How do you price?", 7, 0.7)]
+
+    # Without cluster state the rollup sketch is used.
+    sb = _supabase()
+    rollups = [{"display": "hi", "count": 2, "confidence_sum": 0, "confidence_count": 0}]
+    question_clusters.invalidate_question_clusters()
+    with patch.object(question_clusters, "supabase", sb), patch("routers.metrics.verify_twin_ownership"), patch(
+        "routers.metrics.get_question_rollups", return_value=rollups
+    ):
+        result = await metrics.get_top_questions("twin-1", limit=5, user={"user_id": "owner-1"})
+
+    assert [(q.question, q.count) for q in result] == [("hi", 2)]
+
+
+def test_suggestions_skip_clusters_covered_by_verified_answers(monkeypatch):
+    rows = [
+        {"id": "k1", "representative": "How do you price?", "centroid": json.dumps(PRICING), "count": 9, "confidence_sum": 0, "confidence_count": 0},
+        {"id": "k2", "representative": "Who do you hire?", "centroid": json.dumps(HIRING), "count": 4, "confidence_sum": 1.2, "confidence_count": 2},
+    ]
+    covered = []
+
+    def _find(twin_id, question, embedding, threshold):
+        covered.append((question, embedding))
+        return {"id": "qna-1"} if question == "How do you price?" else None
+
+    monkeypatch.setattr(question_clusters, "find_verified_qna_for_embedding", _find)
+    with patch.object(question_clusters, "supabase", _supabase(tables={"twin_question_clusters": rows})):
+        suggestions = question_clusters.suggest_verified_qna_candidates("twin-1", limit=5)
+
+    assert suggestions == [{"cluster_id": "k2", "question": "Who do you hire?", "count": 4, "avg_confidence": 0.6}]
+    # Coverage was checked with the stored centroids, not fresh embeddings.
+    assert covered == [("How do you price?", PRICING), ("Who do you hire?", HIRING)]
@@ -0,0 +1,191 @@
+import threading
+
+import pytest
+
+from modules import rate_limiting
+from modules.rate_limiting import InMemoryRateLimitBackend, RateLimitBackend, RedisRateLimitBackend
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def incr(self, key):
+        self._ops.append(lambda: self._client.incr(key))
+
+    def expire(self, key, seconds):
+        self._ops.append(lambda: self._client.expirations.__setitem__(key, seconds) or True)
+
+    def execute(self):
+        return [op() for op in self._ops]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.expirations = {}
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    def mget(self, *keys):
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def register_script(self, _script):
+        # Mirrors RedisRateLimitBackend.ACQUIRE_SCRIPT; the real one runs atomically in Redis.
+        def _run(keys, args):
+            current, previous = (int(self.values.get(key) or 0) for key in keys)
+            count = int(current + previous * float(args[0]))
+            if count >= int(args[1]):
+                return [0, count]
+            self.incr(keys[0])
+            self.expirations[keys[0]] = int(args[2])
+            return [1, count + 1]
+
+        return _run
+
+
+def test_in_memory_token_bucket_blocks_then_refills():
+    backend = InMemoryRateLimitBackend()
+    key = ("sess-1", "session", "requests_per_minute")
+
+    assert backend.current_count(*key, 3, now=0.0) == 0
+    for _ in range(3):
+        backend.increment(*key, now=0.0)
+
+    assert backend.current_count(*key, 3, now=0.0) == 3
+    # 3 per minute drains one token every 20 seconds.
+    assert backend.current_count(*key, 3, now=20.0) == 2
+    assert backend.current_count(*key, 3, now=60.0) == 0
+
+
+def test_redis_sliding_window_weights_previous_window():
+    client = _FakeRedis()
+    backend = RedisRateLimitBackend(client)
+    key = ("sess-1", "session", "requests_per_minute")
+
+    for _ in range(10):
+        backend.increment(*key, now=30.0)
+    assert backend.current_count(*key, 10, now=59.0) == 10
+    assert set(client.expirations.values()) == {120}
+
+    # A quarter into the next window, 75% of the previous window still counts.
+    backend.increment(*key, now=75.0)
+    assert backend.current_count(*key, 10, now=75.0) == 8
+    assert backend.current_count(*key, 10, now=125.0) == 0
+
+
+def test_check_consumes_atomically_and_defers_supabase(monkeypatch):
+    backend = InMemoryRateLimitBackend()
+    rate_limiting.set_rate_limit_backend(backend)
+    monkeypatch.setattr(rate_limiting, "RATE_LIMIT_FLUSH_INTERVAL_SECONDS", 3600)
+    monkeypatch.setattr(rate_limiting, "_pending_usage", {})
+
+    class _NoSupabase:
+        def table(self, name):
+            raise AssertionError("request path must not hit Supabase")
+
+    monkeypatch.setattr(rate_limiting, "supabase", _NoSupabase())
+    try:
+        for _ in range(2):
+            allowed, status = rate_limiting.check_rate_limit("sess-1", "session", "requests_per_hour", 2)
+            assert allowed is True
+
+        allowed, status = rate_limiting.check_rate_limit("sess-1", "session", "requests_per_hour", 2)
+        assert allowed is False
+        assert status["remaining"] == 0
+        assert status["current_count"] == 2
+        assert status["reset_at"].endswith("+00:00")
+        assert list(rate_limiting._pending_usage.values()) == [2]
+    finally:
+        rate_limiting.set_rate_limit_backend(None)
+
+
+def test_concurrent_acquires_never_exceed_limit():
+    backend = InMemoryRateLimitBackend()
+    results = []
+    barrier = threading.Barrier(20)
+
+    def _acquire():
+        barrier.wait()
+        results.append(backend.try_acquire("sess-1", "session", "requests_per_minute", 5, now=0.0)[0])
+
+    threads = [threading.Thread(target=_acquire) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 5
+
+
+def test_redis_acquire_counts_only_allowed_requests():
+    client = _FakeRedis()
+    backend = RedisRateLimitBackend(client)
+    key = ("sess-1", "session", "requests_per_minute")
+
+    assert [backend.try_acquire(*key, 2, now=10.0) for _ in range(3)] == [(True, 1), (True, 2), (False, 2)]
+    assert client.values == {"ratelimit:session:requests_per_minute:sess-1:0": 2}
+    # Half of the previous window still counts at 90s: 2 * 0.5 = 1 < 2.
+    assert backend.try_acquire(*key, 2, now=90.0) == (True, 2)
+
+
+def test_flush_aggregates_pending_usage_into_one_write(monkeypatch):
+    writes = []
+
+    class _Query:
+        def __init__(self, op=None, payload=None):
+            self.op = op
+            self.payload = payload
+
+        def select(self, *_args):
+            return self
+
+        def eq(self, *_args):
+            return self
+
+        def insert(self, payload):
+            return _Query("insert", payload)
+
+        def execute(self):
+            if self.op:
+                writes.append((self.op, self.payload))
+            return type("Resp", (), {"data": []})()
+
+    class _Supabase:
+        def table(self, _name):
+            return _Query()
+
+    monkeypatch.setattr(rate_limiting, "supabase", _Supabase())
+    monkeypatch.setattr(
+        rate_limiting,
+        "_pending_usage",
+        {("sess-1", "session", "requests_per_hour", "2026-01-01T10:00:00"): 5},
+    )
+
+    assert rate_limiting.flush_rate_limit_usage() == 1
+    assert writes == [(
+        "insert",
+        {
+            "tracking_key": "sess-1",
+            "tracking_type": "session",
+            "limit_type": "requests_per_hour",
+            "window_start": "2026-01-01T10:00:00",
+            "request_count": 5,
+        },
+    )]
+    assert rate_limiting._pending_usage == {}
+
+
+def test_incomplete_backend_fails_at_construction():
+    class _CountOnly(RateLimitBackend):
+        def current_count(self, tracking_key, tracking_type, limit_type, limit_value, now):
+            return 0
+
+    with pytest.raises(TypeError):
+        _CountOnly()
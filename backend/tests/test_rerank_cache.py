@@ -0,0 +1,76 @@
+import json
+
+from modules import retrieval
+from modules.retrieval import RerankCache, _get_cache_key
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+def test_cache_key_covers_full_candidate_identity():
+    shared_prefix = "x" * 150
+    a = [{"chunk_id": "c1", "text": shared_prefix + " first ending"}]
+    b = [{"chunk_id": "c1", "text": shared_prefix + " second ending"}]
+    c = [{"chunk_id": "c2", "text": shared_prefix + " first ending"}]
+
+    keys = {_get_cache_key("q", a, 10), _get_cache_key("q", b, 10), _get_cache_key("q", c, 10)}
+    assert len(keys) == 3
+    assert _get_cache_key("q", a, 10) != _get_cache_key("q", a, 20)
+    assert _get_cache_key("q", a, 10) == _get_cache_key("q", [dict(a[0])], 10)
+
+
+def test_cache_key_changes_with_reranker_model(monkeypatch):
+    contexts = [{"chunk_id": "c1", "text": "hello"}]
+    before = _get_cache_key("q", contexts, 10)
+    monkeypatch.setattr(retrieval, "_cohere_rerank_model", "rerank-v9")
+    assert _get_cache_key("q", contexts, 10) != before
+
+
+def test_lru_evicts_least_recently_used_and_counts_hits():
+    cache = RerankCache(maxsize=2, ttl_seconds=60)
+    cache.set("a", [{"text": "A"}])
+    cache.set("b", [{"text": "B"}])
+    assert cache.get("a") == [{"text": "A"}]
+    cache.set("c", [{"text": "C"}])
+
+    assert cache.get("b") is None
+    assert cache.get("c") == [{"text": "C"}]
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(retrieval.time, "monotonic", lambda: clock["now"])
+    cache = RerankCache(maxsize=10, ttl_seconds=5)
+    cache.set("k", [{"text": "A", "score": 0.9}])
+
+    cached = cache.get("k")
+    cached[0]["score"] = 0.1
+    assert cache.get("k") == [{"text": "A", "score": 0.9}]
+
+    clock["now"] = 1006.0
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_redis_tier_shares_results_between_instances():
+    redis_client = _FakeRedis()
+    writer = RerankCache(maxsize=10, ttl_seconds=60, redis_client=redis_client)
+    reader = RerankCache(maxsize=10, ttl_seconds=60, redis_client=redis_client)
+
+    writer.set("k", [{"text": "A", "score": 0.8}])
+    assert json.loads(redis_client.store["k"]) == [{"text": "A", "score": 0.8}]
+    assert reader.get("k") == [{"text": "A", "score": 0.8}]
+    assert reader.stats()["redis_hits"] == 1
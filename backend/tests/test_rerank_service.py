@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from modules.latency_histogram import LatencyHistogram
+from modules.rerank_service import RerankBatcher, score_pairs_with_flashrank
+
+
+def _length_scorer(calls):
+    def _score(_ranker, pairs):
+        calls.append(list(pairs))
+        return [float(len(text)) for _query, text in pairs]
+
+    return _score
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_forward_pass():
+    calls = []
+    batcher = RerankBatcher(lambda: object(), window_ms=50, max_pairs=100, scorer=_length_scorer(calls))
+
+    first, second = await asyncio.gather(
+        batcher.score("q1", ["a", "bbb"]),
+        batcher.score("q2", ["cc"]),
+    )
+
+    assert first == [1.0, 3.0]
+    assert second == [2.0]
+    assert len(calls) == 1
+    assert sorted(calls[0]) == [("q1", "a"), ("q1", "bbb"), ("q2", "cc")]
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["requests"] == 2
+    assert stats["queue_wait_ms"]["count"] == 2
+    assert stats["compute_ms"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_max_pairs_splits_batches():
+    calls = []
+    batcher = RerankBatcher(lambda: object(), window_ms=50, max_pairs=2, scorer=_length_scorer(calls))
+
+    results = await asyncio.gather(*(batcher.score(f"q{i}", ["xx", "y"]) for i in range(3)))
+
+    assert results == [[2.0, 1.0]] * 3
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_scoring_errors_reach_every_caller_and_worker_survives():
+    state = {"fail": True}
+
+    def _scorer(_ranker, pairs):
+        if state["fail"]:
+            raise RuntimeError("onnx failed")
+        return [0.5] * len(pairs)
+
+    batcher = RerankBatcher(lambda: object(), window_ms=1, scorer=_scorer)
+    with pytest.raises(RuntimeError):
+        await batcher.score("q", ["a"])
+
+    state["fail"] = False
+    assert await batcher.score("q", ["a"]) == [0.5]
+    assert batcher.stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_callers_and_bad_batches_do_not_stop_the_worker():
+    release = threading.Event()
+    calls = []
+
+    def _scorer(_ranker, pairs):
+        calls.append(list(pairs))
+        if len(calls) == 1:
+            release.wait(2)
+        if pairs[0][0] == "broken":
+            return None  # not sliceable: fails outside the scorer's own error handling
+        return [1.0] * len(pairs)
+
+    batcher = RerankBatcher(lambda: object(), window_ms=1, scorer=_scorer)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(batcher.score("slow", ["a"]), timeout=0.05)
+    abandoned = batcher.submit("abandoned", ["b"])
+    assert abandoned.cancel()
+    release.set()
+
+    with pytest.raises(TypeError):
+        await asyncio.wait_for(batcher.score("broken", ["c"]), timeout=2)
+    assert await asyncio.wait_for(batcher.score("q", ["d"]), timeout=2) == [1.0]
+    assert all(pairs[0][0] != "abandoned" for pairs in calls)
+
+
+def test_score_pairs_matches_flashrank_pairwise_math():
+    captured = {}
+
+    class _Tokenizer:
+        def encode_batch(self, pairs):
+            captured["pairs"] = pairs
+            return [SimpleNamespace(ids=[1, 2], type_ids=[0, 0], attention_mask=[1, 1]) for _ in pairs]
+
+    class _Session:
+        def run(self, _outputs, onnx_input):
+            captured["inputs"] = sorted(onnx_input)
+            return [np.array([[0.0], [2.0]])]
+
+    ranker = SimpleNamespace(session=_Session(), tokenizer=_Tokenizer(), llm_model=None)
+    scores = score_pairs_with_flashrank(ranker, [("q1", "a"), ("q2", "b")])
+
+    assert captured["pairs"] == [["q1", "a"], ["q2", "b"]]
+    assert captured["inputs"] == ["attention_mask", "input_ids"]
+    assert scores[0] == pytest.approx(0.5)
+    assert scores[1] == pytest.approx(1 / (1 + np.exp(-2.0)))
+
+
+def test_latency_histogram_buckets_are_cumulative():
+    histogram = LatencyHistogram(buckets_ms=(1, 10))
+    for value in (0.5, 5, 50):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"le_1": 1, "le_10": 2, "le_inf": 3}
+    assert snapshot["count"] == 3
+    assert snapshot["max_ms"] == 50
@@ -0,0 +1,97 @@
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from modules import retrieval
+
+
+def _ctx(text, score):
+    return {"text": text, "score": score, "vector_score": score}
+
+
+def test_dense_mmr_diversifies_on_cosine_similarity():
+    contexts = [_ctx("pricing tiers", 0.90), _ctx("cost model", 0.89), _ctx("hiring plan", 0.80)]
+    vectors = {
+        "pricing tiers": np.asarray([1.0, 0.0], dtype=np.float32),
+        "cost model": np.asarray([0.99, 0.05], dtype=np.float32),
+        "hiring plan": np.asarray([0.0, 1.0], dtype=np.float32),
+    }
+
+    lexical = retrieval._apply_mmr("q", contexts, limit=2)
+    dense = retrieval._apply_mmr("q", contexts, limit=2, vectors=vectors)
+
+    # No shared tokens, so Jaccard sees no redundancy; the vectors do.
+    assert [c["text"] for c in lexical] == ["pricing tiers", "cost model"]
+    assert [c["text"] for c in dense] == ["pricing tiers", "hiring plan"]
+
+
+def test_candidates_without_vectors_fall_back_to_jaccard():
+    contexts = [_ctx("pricing plans for teams", 0.9), _ctx("pricing plans for teams today", 0.88), _ctx("hiring", 0.7)]
+    vectors = {"hiring": np.asarray([0.0, 1.0], dtype=np.float32)}
+
+    similarity = retrieval._MMRSimilarity([c["text"] for c in contexts], vectors, retrieval._TextFeatureCache())
+    row = similarity.row(0, np.asarray([False, True, True]))
+    picked = retrieval._apply_mmr("q", contexts, limit=2, vectors=vectors)
+
+    assert row[1] == pytest.approx(0.8)
+    assert row[2] == 0.0
+    assert [c["text"] for c in picked] == ["pricing plans for teams", "hiring"]
+
+
+def test_dense_mmr_matches_reference_loop_on_many_candidates():
+    rng = np.random.default_rng(5)
+    count, limit = 120, 40
+    matrix = rng.normal(size=(count, 64)).astype(np.float32)
+    contexts = [_ctx(f"chunk {i}", float(s)) for i, s in enumerate(rng.random(count))]
+    vectors = {c["text"]: matrix[i] for i, c in enumerate(contexts)}
+
+    picked = retrieval._apply_mmr("q", contexts, limit=limit, vectors=vectors)
+
+    unit = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    lam = retrieval.RETRIEVAL_MMR_LAMBDA
+    remaining, chosen = list(range(count)), []
+    while len(chosen) < limit:
+        best = max(
+            remaining,
+            key=lambda i: lam * contexts[i]["score"] - (1 - lam) * max((float(unit[i] @ unit[j]) for j in chosen), default=0.0),
+        )
+        remaining.remove(best)
+        chosen.append(best)
+    assert [c["text"] for c in picked] == [contexts[i]["text"] for i in chosen]
+
+
+@pytest.mark.asyncio
+async def test_general_queries_request_stored_values(monkeypatch):
+    monkeypatch.setenv("PINECONE_INDEX_MODE", "vector")
+    monkeypatch.setattr(retrieval, "RETRIEVAL_MMR_DENSE_ENABLED", True)
+    response = Mock()
+    response.matches = [Mock(id="doc-1", score=0.9, metadata={"text": "Match 1"}, values=[0.1, 0.2])]
+    index = Mock()
+    index.query = Mock(return_value=response)
+
+    with patch("modules.retrieval.get_pinecone_index", return_value=index), patch(
+        "modules.retrieval.get_namespace_candidates_for_twin", return_value=["ns-1"]
+    ):
+        verified, general = await retrieval._execute_pinecone_queries([[0.1, 0.2]], "twin-1")
+
+    flags = sorted(call.kwargs.get("include_values", False) for call in index.query.call_args_list)
+    assert flags == [False, True]
+    assert "values" not in verified["matches"][0]
+    assert isinstance(general["matches"][0]["values"], np.ndarray)
+    assert retrieval._dense_vectors_by_text(general["matches"]).keys() == {"Match 1"}
+
+
+@pytest.mark.asyncio
+async def test_dense_mmr_is_off_by_default(monkeypatch):
+    monkeypatch.setenv("PINECONE_INDEX_MODE", "vector")
+    assert retrieval.RETRIEVAL_MMR_DENSE_ENABLED is False
+    index = Mock()
+    index.query = Mock(return_value=Mock(matches=[]))
+
+    with patch("modules.retrieval.get_pinecone_index", return_value=index), patch(
+        "modules.retrieval.get_namespace_candidates_for_twin", return_value=["ns-1"]
+    ):
+        await retrieval._execute_pinecone_queries([[0.1, 0.2]], "twin-1")
+
+    assert not any(call.kwargs.get("include_values", False) for call in index.query.call_args_list)
@@ -634,6 +634,174 @@ class TestHybridRetrievalControls:
         assert isinstance(rows[0].get("retrieval_stats"), dict)
 
 
+    async def test_retry_reuses_query_prep_and_embeddings(self, monkeypatch):
+        from modules import retrieval
+
+        prep_calls = {"embed": 0, "expand": 0, "hyde": 0}
+        fetched_top_k = []
+
+        async def _fake_embeddings(queries):
+            prep_calls["embed"] += 1
+            return [[0.1, 0.2, 0.3] for _ in queries]
+
+        async def _fake_expand(_query):
+            prep_calls["expand"] += 1
+            return ["startup rubric criteria"]
+
+        async def _fake_hyde(_query):
+            prep_calls["hyde"] += 1
+            return "A rubric scores founders."
+
+        async def _fake_execute(embs, _twin_id, creator_id=None, timeout=5.0, general_top_k=None, search_texts=None):
+            fetched_top_k.append(general_top_k)
+            score = 0.01 if len(fetched_top_k) == 1 else 0.93
+            return [{"matches": []}] + [
+                {
+                    "matches": [
+                        {
+                            "id": f"chunk-{len(fetched_top_k)}",
+                            "score": score,
+                            "metadata": {
+                                "text": "startup rubric founder evaluation",
+                                "source_id": "source-1",
+                                "twin_id": "twin-1",
+                                "block_type": "answer_text",
+                                "is_answer_text": True,
+                            },
+                        }
+                    ]
+                }
+                for _ in embs
+            ]
+
+        monkeypatch.setattr(retrieval, "get_embeddings_async", _fake_embeddings)
+        monkeypatch.setattr(retrieval, "expand_query", _fake_expand)
+        monkeypatch.setattr(retrieval, "generate_hyde_answer", _fake_hyde)
+        monkeypatch.setattr(retrieval, "_should_attempt_query_expansion", lambda _query: True)
+        monkeypatch.setattr(retrieval, "_should_attempt_hyde", lambda _query: True)
+        monkeypatch.setattr(retrieval, "_execute_pinecone_queries", _fake_execute)
+        monkeypatch.setattr(retrieval, "get_pinecone_index_mode", lambda: "vector")
+        monkeypatch.setattr(retrieval, "_rerank_with_cohere", lambda *_args, **_kwargs: None)
+        monkeypatch.setattr(retrieval, "_rerank_with_flashrank", lambda *_args, **_kwargs: None)
+        monkeypatch.setattr(retrieval, "_filter_by_group_permissions", lambda rows, _group_id: rows)
+        monkeypatch.setattr(retrieval, "_enforce_twin_source_scope", lambda rows, _twin_id: rows)
+        monkeypatch.setattr(retrieval, "RETRIEVAL_CONFIDENCE_RETRY_ENABLED", True)
+        monkeypatch.setattr(retrieval, "RETRIEVAL_CONFIDENCE_FLOOR", 0.2)
+        monkeypatch.setattr(retrieval, "RETRIEVAL_RETRY_TOP_K", 8)
+        monkeypatch.setattr(retrieval, "RETRIEVAL_TOP_K_GENERAL", 8)
+        monkeypatch.setattr(retrieval, "_cohere_strict_mode", False)
+
+        rows = await retrieval.retrieve_context_vectors("startup rubric", "twin-1", top_k=2)
+
+        assert prep_calls == {"embed": 1, "expand": 1, "hyde": 1}
+        assert fetched_top_k == [8, 16]
+        stats = rows[0]["retrieval_stats"]
+        assert stats["retry_applied"] is True
+        assert stats["retry_vector_refetch"] is True
+        assert stats["retry_latency_ms"] >= 0.0
+
+    async def test_retry_reuses_vector_results_when_pool_is_large_enough(self, monkeypatch):
+        from modules import retrieval
+
+        fetch_count = {"n": 0}
+
+        async def _fake_embeddings(queries):
+            return [[0.1, 0.2, 0.3] for _ in queries]
+
+        async def _fake_execute(embs, _twin_id, creator_id=None, timeout=5.0, general_top_k=None, search_texts=None):
+            fetch_count["n"] += 1
+            return [{"matches": []}] + [
+                {
+                    "matches": [
+                        {
+                            "id": "chunk-1",
+                            "score": 0.01,
+                            "metadata": {
+                                "text": "startup rubric founder evaluation",
+                                "source_id": "source-1",
+                                "twin_id": "twin-1",
+                                "block_type": "answer_text",
+                                "is_answer_text": True,
+                            },
+                        }
+                    ]
+                }
+                for _ in embs
+            ]
+
+        monkeypatch.setattr(retrieval, "get_embeddings_async", _fake_embeddings)
+        monkeypatch.setattr(retrieval, "_should_attempt_query_expansion", lambda _query: False)
+        monkeypatch.setattr(retrieval, "_should_attempt_hyde", lambda _query: False)
+        monkeypatch.setattr(retrieval, "_execute_pinecone_queries", _fake_execute)
+        monkeypatch.setattr(retrieval, "get_pinecone_index_mode", lambda: "vector")
+        monkeypatch.setattr(retrieval, "_rerank_with_cohere", lambda *_args, **_kwargs: None)
+        monkeypatch.setattr(retrieval, "_rerank_with_flashrank", lambda *_args, **_kwargs: None)
+        monkeypatch.setattr(retrieval, "_filter_by_group_permissions", lambda rows, _group_id: rows)
+        monkeypatch.setattr(retrieval, "_enforce_twin_source_scope", lambda rows, _twin_id: rows)
+        monkeypatch.setattr(retrieval, "_apply_anchor_relevance_filter", lambda rows, _query, **_kwargs: rows)
+        monkeypatch.setattr(retrieval, "RETRIEVAL_CONFIDENCE_RETRY_ENABLED", True)
+        monkeypatch.setattr(retrieval, "RETRIEVAL_CONFIDENCE_FLOOR", 0.2)
+        monkeypatch.setattr(retrieval, "RETRIEVAL_RETRY_TOP_K", 8)
+        monkeypatch.setattr(retrieval, "RETRIEVAL_TOP_K_GENERAL", 32)
+        monkeypatch.setattr(retrieval, "RETRIEVAL_MIN_ACCEPTED_SCORE", 0.0)
+        monkeypatch.setattr(retrieval, "_cohere_strict_mode", False)
+
+        rows = await retrieval.retrieve_context_vectors("startup rubric", "twin-1", top_k=2)
+
+        assert fetch_count["n"] == 1
+        assert rows
+        assert rows[0]["retrieval_stats"]["retry_vector_refetch"] is False
+
+    async def test_each_stage_records_phase_timing(self, monkeypatch):
+        from modules import retrieval
+
+        async def _fake_embeddings(queries):
+            return [[0.1, 0.2, 0.3] for _ in queries]
+
+        async def _fake_execute(embs, _twin_id, creator_id=None, timeout=5.0, general_top_k=None, search_texts=None):
+            return [{"matches": []}] + [
+                {
+                    "matches": [
+                        {
+                            "id": "chunk-1",
+                            "score": 0.9,
+                            "metadata": {
+                                "text": "startup rubric founder evaluation",
+                                "source_id": "source-1",
+                                "twin_id": "twin-1",
+                                "block_type": "answer_text",
+                                "is_answer_text": True,
+                            },
+                        }
+                    ]
+                }
+                for _ in embs
+            ]
+
+        events = []
+        recorded = []
+        monkeypatch.setattr(retrieval, "log_retrieval_event", lambda event, data: events.append((event, data)))
+        monkeypatch.setattr(retrieval, "record_phase_timing", lambda phase, ms: recorded.append(phase))
+        monkeypatch.setattr(retrieval, "get_embeddings_async", _fake_embeddings)
+        monkeypatch.setattr(retrieval, "_should_attempt_query_expansion", lambda _query: False)
+        monkeypatch.setattr(retrieval, "_should_attempt_hyde", lambda _query: False)
+        monkeypatch.setattr(retrieval, "_execute_pinecone_queries", _fake_execute)
+        monkeypatch.setattr(retrieval, "get_pinecone_index_mode", lambda: "vector")
+        monkeypatch.setattr(retrieval, "_rerank_with_cohere", lambda *_args, **_kwargs: None)
+        monkeypatch.setattr(retrieval, "_rerank_with_flashrank", lambda *_args, **_kwargs: None)
+        monkeypatch.setattr(retrieval, "_filter_by_group_permissions", lambda rows, _group_id: rows)
+        monkeypatch.setattr(retrieval, "_enforce_twin_source_scope", lambda rows, _twin_id: rows)
+        monkeypatch.setattr(retrieval, "RETRIEVAL_CONFIDENCE_RETRY_ENABLED", False)
+        monkeypatch.setattr(retrieval, "_cohere_strict_mode", False)
+
+        rows = await retrieval.retrieve_context_vectors("startup rubric", "twin-1", top_k=2)
+
+        assert rows
+        phases = [data["phase"] for event, data in events if event == "phase_timing"]
+        assert phases == ["query_prep", "query_embedding", "vector_search", "merge", "rerank", "post_process"]
+        assert recorded == phases
+        assert all(data["duration_ms"] >= 0.0 and data["twin_id"] == "twin-1" for _, data in events if data.get("phase"))
+
 class TestAnchorRelevanceFiltering:
     """Test off-topic filtering for weak retrieval matches."""
 
@@ -801,6 +969,19 @@ class TestRRFMerge:
         assert result[0]["id"] in {"doc-original", "doc-shared"}
         assert result[0]["id"] != "doc-hyde"
 
+    async def test_rrf_merge_only_stringifies_hits_without_ids(self):
+        """Hits with ids (which may carry dense values) must not be repr'd as keys."""
+        from modules.retrieval import rrf_merge
+
+        class _NoRepr(dict):
+            def __repr__(self):
+                raise AssertionError("hit was stringified")
+
+        with_id = _NoRepr(id="doc-1", score=0.9, metadata={"text": "A"})
+        result = rrf_merge([[with_id, {"score": 0.5, "metadata": {"text": "B"}}]])
+
+        assert [r.get("id") for r in result] == ["doc-1", None]
+
 
 class TestQueryPlanning:
     """Test query-plan generation and augmentation gates."""
@@ -0,0 +1,83 @@
+import random
+
+from modules import retrieval
+
+
+QUERY = "Which pricing strategies work for enterprise customers?"
+WORDS = "pricing price strategies enterprise customer customers discount annual churn hiring board".split()
+
+
+def _contexts(count=24, seed=3):
+    rng = random.Random(seed)
+    return [
+        {"id": f"c{i}", "text": " ".join(rng.choice(WORDS) for _ in range(30)), "score": rng.random(), "vector_score": 0.1}
+        for i in range(count)
+    ]
+
+
+def _reference_overlap(query, text):
+    anchors = retrieval._extract_anchor_terms(query)
+    variants = set()
+    for token in retrieval._TOKEN_PATTERN.findall(text.lower()):
+        variants.update(retrieval._token_variants(token))
+    return len(anchors & variants) / float(len(anchors)) if variants else 0.0
+
+
+def _reference_mmr(contexts, limit):
+    candidates = [dict(c) for c in contexts]
+    tokens = [set(retrieval._TOKEN_PATTERN.findall(c["text"].lower())) for c in candidates]
+    selected, selected_tokens = [], []
+    lam = retrieval.RETRIEVAL_MMR_LAMBDA
+    while candidates and len(selected) < limit:
+        scores = [
+            lam * c["score"] - (1.0 - lam) * max((retrieval._jaccard_similarity(tokens[i], s) for s in selected_tokens), default=0.0)
+            for i, c in enumerate(candidates)
+        ]
+        best = scores.index(max(scores))
+        selected.append(candidates.pop(best))
+        selected_tokens.append(tokens.pop(best))
+    return selected
+
+
+def test_shared_features_match_per_stage_tokenization():
+    contexts = _contexts()
+    features = retrieval._TextFeatureCache()
+
+    for ctx in contexts:
+        assert retrieval._lexical_overlap_score(QUERY, ctx["text"], features) == _reference_overlap(QUERY, ctx["text"])
+    mmr = retrieval._apply_mmr(QUERY, contexts, limit=10, features=features)
+
+    assert [c["id"] for c in mmr] == [c["id"] for c in _reference_mmr(contexts, 10)]
+    assert len(features) == len({c["text"] for c in contexts})
+
+
+def test_each_text_is_tokenized_once_across_stages(monkeypatch):
+    contexts = _contexts(count=12)
+    calls = []
+    original = retrieval._TextFeatures.__init__
+
+    def _counting_init(self, text):
+        calls.append(text)
+        original(self, text)
+
+    monkeypatch.setattr(retrieval._TextFeatures, "__init__", _counting_init)
+    features = retrieval._TextFeatureCache()
+
+    dense_hits = [{"id": c["id"], "score": c["score"], "metadata": {"text": c["text"]}} for c in contexts]
+    sparse = retrieval._build_sparse_hits_from_dense(QUERY, dense_hits, limit=12, features=features)
+    diversified = retrieval._apply_mmr(QUERY, contexts, limit=6, features=features)
+    fused = retrieval._apply_lexical_fusion(QUERY, diversified, features)
+    retrieval._apply_anchor_relevance_filter(fused, QUERY, features)
+
+    assert sparse
+    assert sorted(calls) == sorted({c["text"] for c in contexts})
+
+
+def test_stages_still_work_without_a_shared_cache():
+    contexts = _contexts(count=6)
+
+    fused = retrieval._apply_lexical_fusion(QUERY, contexts)
+    filtered = retrieval._apply_anchor_relevance_filter(fused, QUERY)
+
+    assert all("lexical_score" in c for c in fused)
+    assert [c["id"] for c in filtered] == [c["id"] for c in fused if _reference_overlap(QUERY, c["text"]) > 0 or c["vector_score"] >= retrieval.RETRIEVAL_STRONG_VECTOR_FLOOR]
@@ -0,0 +1,149 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from modules._core import scribe_engine
+from modules._core.scribe_engine import EdgeUpdate, GraphUpdates, NodeUpdate, Property, merge_graph_updates
+
+
+def _node(name, description="", props=None, node_type="Company"):
+    return NodeUpdate(
+        name=name,
+        type=node_type,
+        description=description,
+        properties=[Property(key=k, value=v) for k, v in (props or {}).items()],
+    )
+
+
+def _edge(from_node, to_node, edge_type="RELATES_TO"):
+    return EdgeUpdate(from_node=from_node, to_node=to_node, type=edge_type, description=None)
+
+
+class _Rpc:
+    def __init__(self, db, name, params):
+        self.db = db
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.db.calls.append((self.name, self.params))
+        if self.name == "persist_graph_batch_system":
+            if self.db.missing_bulk:
+                raise Exception("PGRST202: Could not find the function public.persist_graph_batch_system")
+            nodes = [{"id": f"id-{n['name']}", "name": n["name"]} for n in self.params["p_nodes"]]
+            edges = [{"id": f"e-{e['from_node']}-{e['to_node']}"} for e in self.params["p_edges"]]
+            return SimpleNamespace(data={"nodes": nodes, "edges": edges})
+        if self.name == "create_node_system":
+            return SimpleNamespace(data=[{"id": f"id-{self.params['n_name']}", "name": self.params["n_name"]}])
+        if self.name == "create_edge_system":
+            return SimpleNamespace(data=[{"id": f"e-{self.params['from_id']}-{self.params['to_id']}"}])
+        raise AssertionError(self.name)
+
+
+class _Supabase:
+    def __init__(self, missing_bulk=False):
+        self.missing_bulk = missing_bulk
+        self.calls = []
+
+    def rpc(self, name, params):
+        return _Rpc(self, name, params)
+
+
+@pytest.fixture(autouse=True)
+def _reset_bulk_flag(monkeypatch):
+    monkeypatch.setattr(scribe_engine, "_graph_batch_rpc_available", None)
+
+
+def test_merge_dedups_nodes_by_name_and_rewrites_edges():
+    first = GraphUpdates(
+        nodes=[_node("Acme Corp", "Short", {"sector": "AI"}), _node("Jane Doe", node_type="Person")],
+        edges=[_edge("Jane Doe", "Acme Corp", "FOUNDED")],
+        confidence=0.9,
+    )
+    second = GraphUpdates(
+        nodes=[_node("acme corp ", "A longer description", {"sector": "Retail", "hq": "Austin"})],
+        edges=[_edge("jane doe", "ACME CORP", "founded"), _edge("Jane Doe", "Unknown Co")],
+        confidence=0.7,
+    )
+
+    nodes, edges = merge_graph_updates([first, second])
+
+    assert [n.name for n in nodes] == ["Acme Corp", "Jane Doe"]
+    acme = nodes[0]
+    assert acme.description == "A longer description"
+    assert {p.key: p.value for p in acme.properties} == {"sector": "AI", "hq": "Austin"}
+    assert len(edges) == 1
+    assert (edges[0].from_node, edges[0].to_node) == ("Jane Doe", "Acme Corp")
+    # Inputs are not mutated by the merge
+    assert first.nodes[0].description == "Short"
+
+
+@pytest.mark.asyncio
+async def test_persist_graph_updates_uses_one_bulk_rpc(monkeypatch):
+    db = _Supabase()
+    monkeypatch.setattr(scribe_engine, "supabase", db)
+
+    nodes, edges = await scribe_engine._persist_graph_updates(
+        "twin-1",
+        [_node("A"), _node("B"), _node("a")],
+        [_edge("A", "B"), _edge("a", "b")],
+    )
+
+    assert [name for name, _params in db.calls] == ["persist_graph_batch_system"]
+    assert [n["name"] for n in db.calls[0][1]["p_nodes"]] == ["A", "B"]
+    assert len(db.calls[0][1]["p_edges"]) == 1
+    assert len(nodes) == 2 and len(edges) == 1
+
+
+@pytest.mark.asyncio
+async def test_persist_graph_updates_falls_back_when_rpc_missing(monkeypatch):
+    db = _Supabase(missing_bulk=True)
+    monkeypatch.setattr(scribe_engine, "supabase", db)
+
+    nodes, edges = await scribe_engine._persist_graph_updates("twin-1", [_node("A"), _node("B")], [_edge("A", "B")])
+    assert len(nodes) == 2 and len(edges) == 1
+
+    db.calls.clear()
+    await scribe_engine._persist_graph_updates("twin-1", [_node("C")], [])
+    assert [name for name, _params in db.calls] == ["create_node_system"]
+
+
+@pytest.mark.asyncio
+async def test_extract_from_content_runs_chunks_concurrently_and_persists_once(monkeypatch):
+    monkeypatch.setattr(scribe_engine, "CONTENT_EXTRACTION_CONCURRENCY", 2)
+    state = {"active": 0, "peak": 0, "calls": 0}
+
+    async def _parse(**_kwargs):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        state["calls"] += 1
+        updates = GraphUpdates(nodes=[_node("Shared"), _node(f"Node {state['calls']}")], edges=[], confidence=0.5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(parsed=updates))])
+
+    client = SimpleNamespace(beta=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=_parse))))
+    monkeypatch.setattr(scribe_engine, "get_async_openai_client", lambda: client)
+    persisted = []
+
+    async def _persist(twin_id, nodes, edges):
+        persisted.append([n.name for n in nodes])
+        return [{"id": n.name, "name": n.name} for n in nodes], []
+
+    monkeypatch.setattr(scribe_engine, "_persist_graph_updates", _persist)
+    monkeypatch.setattr("modules.actions_engine.EventEmitter.emit", lambda **_kwargs: None)
+
+    result = await scribe_engine.extract_from_content(
+        twin_id="twin-1",
+        content_text="Some meaningful sentence about the company. " * 40,
+        chunk_size=400,
+        max_chunks=4,
+    )
+
+    assert state["calls"] == 4
+    assert state["peak"] == 2
+    assert len(persisted) == 1
+    assert persisted[0].count("Shared") == 1
+    assert len(result["all_nodes"]) == 5
+    assert result["total_confidence"] == pytest.approx(0.5)
@@ -0,0 +1,110 @@
+import pytest
+from fastapi import HTTPException
+
+from modules import auth_guard, observability, twin_cache
+from modules.twin_cache import TTLCache, get_twin_settings, invalidate_twin_cache
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, parent, table):
+        self.parent = parent
+        self.table = table
+        self.filters = {}
+
+    def select(self, *_args):
+        return self
+
+    def eq(self, key, value):
+        self.filters[key] = value
+        return self
+
+    def single(self):
+        return self
+
+    def execute(self):
+        self.parent.calls.append(self.table)
+        if self.table == "rpc:get_twin_system":
+            return _Response({"id": "twin-1", "settings": dict(self.parent.settings)})
+        if self.table == "twins":
+            owned = self.filters.get("tenant_id") == self.parent.owner_tenant
+            return _Response({"id": self.filters.get("id"), "tenant_id": self.parent.owner_tenant} if owned else None)
+        if self.table == "conversations":
+            return _Response({"user_id": "someone-else", "twin_id": "twin-1"})
+        raise AssertionError(f"unexpected table {self.table}")
+
+
+class _Supabase:
+    def __init__(self, settings=None, owner_tenant="tenant-1"):
+        self.settings = settings or {}
+        self.owner_tenant = owner_tenant
+        self.calls = []
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def rpc(self, name, _params):
+        return _Query(self, f"rpc:{name}")
+
+
+def test_ttl_cache_expires_and_returns_copies(monkeypatch):
+    clock = {"now": 100.0}
+    monkeypatch.setattr(twin_cache.time, "monotonic", lambda: clock["now"])
+    cache = TTLCache("test", ttl_seconds=5)
+
+    cache.set("k", {"settings": {"a": 1}})
+    value = cache.get("k")
+    value["settings"]["a"] = 2
+    assert cache.get("k") == {"settings": {"a": 1}}
+
+    clock["now"] = 106.0
+    assert cache.get("k") is None
+
+
+def test_twin_settings_are_cached_until_invalidated(monkeypatch):
+    db = _Supabase(settings={"persona_profile": "Calm."})
+    monkeypatch.setattr(observability, "supabase", db, raising=False)
+
+    assert get_twin_settings("twin-1") == {"persona_profile": "Calm."}
+    assert get_twin_settings("twin-1") == {"persona_profile": "Calm."}
+    assert db.calls == ["rpc:get_twin_system"]
+
+    db.settings = {"persona_profile": "Bold."}
+    invalidate_twin_cache("twin-1")
+    assert get_twin_settings("twin-1") == {"persona_profile": "Bold."}
+    assert db.calls == ["rpc:get_twin_system", "rpc:get_twin_system"]
+
+
+def test_twin_ownership_caches_grants_but_rechecks_denials(monkeypatch):
+    db = _Supabase(owner_tenant="tenant-1")
+    monkeypatch.setattr(observability, "supabase", db, raising=False)
+    owner = {"user_id": "user-1", "tenant_id": "tenant-1"}
+    stranger = {"user_id": "user-2", "tenant_id": "tenant-2"}
+
+    assert auth_guard.verify_twin_ownership("twin-1", owner) is True
+    assert auth_guard.verify_twin_ownership("twin-1", owner) is True
+    assert db.calls == ["twins"]
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            auth_guard.verify_twin_ownership("twin-1", stranger)
+        assert exc_info.value.status_code == 404
+    assert db.calls == ["twins", "twins", "twins"]
+
+
+def test_twin_invalidation_drops_conversation_twin_owner(monkeypatch):
+    db = _Supabase()
+    monkeypatch.setattr(observability, "supabase", db, raising=False)
+    twin_cache.conversation_cache.set(("twin_owner", "twin-1"), "user-1")
+    twin_cache.conversation_cache.set(("conversation", "conv-1"), {"user_id": "x", "twin_id": "twin-1"})
+    twin_cache.conversation_cache.set(("conversation", "conv-2"), {"user_id": "x", "twin_id": "twin-2"})
+
+    invalidate_twin_cache("twin-1")
+
+    assert twin_cache.conversation_cache.get(("twin_owner", "twin-1")) is None
+    assert twin_cache.conversation_cache.get(("conversation", "conv-1")) is None
+    assert twin_cache.conversation_cache.get(("conversation", "conv-2")) == {"user_id": "x", "twin_id": "twin-2"}
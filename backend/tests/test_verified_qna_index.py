@@ -0,0 +1,176 @@
+import json
+import time
+
+import pytest
+
+from modules import async_db, verified_qna
+from modules import verified_qna_index
+from modules.verified_qna_index import VerifiedQnAIndex, invalidate_verified_qna_index
+
+
+def _entry(qna_id, question, embedding):
+    return {
+        "id": qna_id,
+        "question": question,
+        "answer": f"answer {qna_id}",
+        "question_embedding": json.dumps(embedding),
+        "is_active": True,
+    }
+
+
+@pytest.fixture(autouse=True)
+def _indexed_matching(monkeypatch):
+    monkeypatch.setattr(verified_qna, "VERIFIED_QNA_INDEX_ENABLED", True)
+    monkeypatch.setattr(
+        verified_qna,
+        "_format_match_result",
+        lambda best_match, best_score: {"id": best_match["id"], "similarity_score": best_score},
+    )
+    invalidate_verified_qna_index()
+    yield
+    invalidate_verified_qna_index()
+
+
+def _install_entries(monkeypatch, entries, calls=None):
+    def _fetch(twin_id, group_id=None):
+        if calls is not None:
+            calls.append(twin_id)
+        return entries
+
+    monkeypatch.setattr(verified_qna, "_fetch_verified_qna_entries", _fetch)
+
+
+@pytest.mark.asyncio
+async def test_semantic_match_uses_cosine_over_grounded_entries(monkeypatch):
+    entries = [
+        _entry("q1", "Do you know antler?", [1.0, 0.0, 0.0]),
+        _entry("q2", "What is your favorite food?", [0.0, 1.0, 0.0]),
+    ]
+    _install_entries(monkeypatch, entries)
+    in_flight = []
+
+    def _embed(_text):
+        # The query embedding must not hold a DB slot.
+        in_flight.append(async_db.get_async_db_stats()["in_flight"])
+        return [0.9, 0.1, 0.0]
+
+    monkeypatch.setattr(verified_qna, "get_embedding", _embed)
+
+    result = await verified_qna.match_verified_qna(
+        query="do you know antler",
+        twin_id="twin-1",
+        use_exact=False,
+        semantic_threshold=0.75,
+    )
+
+    assert result["id"] == "q1"
+    assert result["match_type"] == "semantic"
+    assert result["similarity_score"] == pytest.approx(0.9 / (0.82 ** 0.5), abs=1e-5)
+    assert in_flight == [0]
+
+
+@pytest.mark.asyncio
+async def test_semantic_match_requires_lexical_grounding(monkeypatch):
+    _install_entries(monkeypatch, [_entry("q1", "How's your day going so far?", [1.0, 0.0])])
+    monkeypatch.setattr(verified_qna, "get_embedding", lambda _text: [1.0, 0.0])
+
+    result = await verified_qna.match_verified_qna(
+        query="who are you?",
+        twin_id="twin-1",
+        use_exact=False,
+        semantic_threshold=0.5,
+    )
+
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_semantic_threshold_is_enforced(monkeypatch):
+    _install_entries(monkeypatch, [_entry("q3", "what is antler", [1.0, 1.0])])
+    monkeypatch.setattr(verified_qna, "get_embedding", lambda _text: [1.0, 0.0])
+
+    result = await verified_qna.match_verified_qna(
+        query="what is antler",
+        twin_id="twin-1",
+        use_exact=False,
+        semantic_threshold=0.9,
+    )
+    assert result is None
+
+    exact_result = await verified_qna.match_verified_qna(
+        query="What is Antler ",
+        twin_id="twin-1",
+        use_semantic=False,
+    )
+    assert exact_result["id"] == "q3"
+    assert exact_result["similarity_score"] == 1.0
+    assert exact_result["match_type"] == "exact"
+
+
+@pytest.mark.asyncio
+async def test_index_is_reused_until_invalidated(monkeypatch):
+    calls = []
+    entries = [_entry("q1", "what is antler", [1.0, 0.0])]
+    _install_entries(monkeypatch, entries, calls)
+
+    for _ in range(3):
+        await verified_qna.match_verified_qna("what is antler", "twin-1", use_semantic=False)
+    assert calls == ["twin-1"]
+
+    invalidate_verified_qna_index("twin-1")
+    await verified_qna.match_verified_qna("what is antler", "twin-1", use_semantic=False)
+    assert calls == ["twin-1", "twin-1"]
+
+
+@pytest.mark.asyncio
+async def test_index_expires_after_ttl(monkeypatch):
+    calls = []
+    _install_entries(monkeypatch, [_entry("q1", "what is antler", [1.0, 0.0])], calls)
+    monkeypatch.setattr(verified_qna_index, "VERIFIED_QNA_INDEX_TTL_SECONDS", 0.01)
+
+    await verified_qna.match_verified_qna("what is antler", "twin-1", use_semantic=False)
+    time.sleep(0.02)
+    await verified_qna.match_verified_qna("what is antler", "twin-1", use_semantic=False)
+
+    assert calls == ["twin-1", "twin-1"]
+
+
+@pytest.mark.asyncio
+async def test_group_mask_restricts_matches(monkeypatch):
+    entries = [
+        _entry("q1", "what is antler", [1.0, 0.0]),
+        _entry("q2", "what is antler fund", [1.0, 0.0]),
+    ]
+    _install_entries(monkeypatch, entries)
+    permission_calls = []
+
+    def _allowed(group_id):
+        permission_calls.append(group_id)
+        return ["q2"]
+
+    monkeypatch.setattr(verified_qna, "_fetch_allowed_qna_ids", _allowed)
+
+    first = await verified_qna.match_verified_qna("what is antler", "twin-1", group_id="g1", use_semantic=False)
+    second = await verified_qna.match_verified_qna("what is antler", "twin-1", group_id="g1", use_semantic=False)
+
+    assert first["id"] == "q2"
+    assert first["match_type"] == "exact"
+    assert second["id"] == "q2"
+    assert permission_calls == ["g1"]
+
+
+def test_index_skips_invalid_embeddings_and_matches_fuzzy():
+    entries = [
+        {"id": "bad", "question": "what is antler", "question_embedding": "not-json"},
+        _entry("ok", "what is antler capital", [0.0, 2.0]),
+    ]
+    index = VerifiedQnAIndex("twin-1", entries, verified_qna._normalize_tokens)
+
+    assert index.has_embedding.tolist() == [False, True]
+    match, score = index.semantic_match("antler capital", [0.0, 1.0], 0.5)
+    assert match["id"] == "ok"
+    assert score == pytest.approx(1.0)
+
+    fuzzy_match, fuzzy_score = index.exact_match("what is antler capitol", 0.7)
+    assert fuzzy_match["id"] == "ok"
+    assert 0.9 < fuzzy_score < 1.0
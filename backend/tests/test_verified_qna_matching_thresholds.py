@@ -3,6 +3,13 @@ import pytest
 from modules import verified_qna
 
 
+@pytest.fixture(autouse=True)
+def _row_by_row_matching(monkeypatch):
+    # These cases pin the row-by-row fallback; the cached index path is covered
+    # in test_verified_qna_index.py.
+    monkeypatch.setattr(verified_qna, "VERIFIED_QNA_INDEX_ENABLED", False)
+
+
 def _mock_qna_entry(qna_id: str, question: str, answer: str = "answer"):
     return {
         "id": qna_id,
@@ -0,0 +1,215 @@
+import asyncio
+import json
+
+import pytest
+
+from modules import job_queue
+from modules.worker_runtime import WorkerRuntime, parse_job_type_limits
+
+
+def _queue_of(jobs):
+    pending = list(jobs)
+
+    def _dequeue(_block_timeout):
+        return pending.pop(0) if pending else None
+
+    return _dequeue
+
+
+async def _poll_all(runtime, count):
+    for _ in range(count):
+        assert await runtime.poll_once() is True
+    await runtime.drain()
+
+
+def test_parse_job_type_limits_ignores_malformed_pairs():
+    assert parse_job_type_limits("ingestion=2, graph_extraction=3,bad,x=0,y=z") == {
+        "ingestion": 2,
+        "graph_extraction": 3,
+    }
+
+
+@pytest.mark.asyncio
+async def test_runtime_runs_jobs_concurrently_up_to_slot_count():
+    state = {"active": 0, "peak": 0}
+
+    async def _process(_job):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return True
+
+    jobs = [{"job_id": f"j{i}", "job_type": "ingestion"} for i in range(6)]
+    runtime = WorkerRuntime(_queue_of(jobs), _process, concurrency=3, job_type_limits={})
+
+    await _poll_all(runtime, 6)
+
+    assert state["peak"] == 3
+    stats = runtime.stats()
+    assert stats["in_flight"] == 0
+    assert stats["jobs_processed"] == 6
+    assert stats["by_type"]["ingestion"]["completed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_runtime_caps_concurrency_per_job_type():
+    active = {"ingestion": 0, "graph_extraction": 0}
+    peak = {"ingestion": 0, "graph_extraction": 0}
+
+    async def _process(job):
+        job_type = job["job_type"]
+        active[job_type] += 1
+        peak[job_type] = max(peak[job_type], active[job_type])
+        await asyncio.sleep(0.01)
+        active[job_type] -= 1
+        return job_type != "graph_extraction"
+
+    jobs = [{"job_id": f"i{i}", "job_type": "ingestion"} for i in range(4)]
+    jobs += [{"job_id": f"g{i}", "job_type": "graph_extraction"} for i in range(2)]
+    runtime = WorkerRuntime(_queue_of(jobs), _process, concurrency=6, job_type_limits={"ingestion": 1})
+
+    await _poll_all(runtime, 6)
+
+    assert peak["ingestion"] == 1
+    assert peak["graph_extraction"] == 2
+    by_type = runtime.stats()["by_type"]
+    assert by_type["ingestion"]["completed"] == 4
+    assert by_type["graph_extraction"]["failed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_capped_job_type_does_not_block_other_types():
+    started = []
+    release = asyncio.Event()
+
+    async def _process(job):
+        started.append(job["job_id"])
+        if job["job_type"] == "ingestion":
+            await release.wait()
+        return True
+
+    jobs = [
+        {"job_id": "i0", "job_type": "ingestion"},
+        {"job_id": "i1", "job_type": "ingestion"},
+        {"job_id": "g0", "job_type": "graph_extraction"},
+    ]
+    runtime = WorkerRuntime(_queue_of(jobs), _process, concurrency=2, job_type_limits={"ingestion": 1})
+
+    for _ in range(3):
+        assert await runtime.poll_once() is True
+    await asyncio.sleep(0)
+
+    assert started == ["i0", "g0"]
+    assert runtime.stats()["deferred"] == 1
+
+    release.set()
+    await runtime.drain()
+    assert started == ["i0", "g0", "i1"]
+    assert runtime.stats()["deferred"] == 0
+
+
+@pytest.mark.asyncio
+async def test_empty_queue_releases_slot_and_crashes_count_as_failures():
+    async def _process(_job):
+        raise RuntimeError("boom")
+
+    runtime = WorkerRuntime(
+        _queue_of([{"job_id": "j1", "job_type": "reindex"}]),
+        _process,
+        concurrency=1,
+        job_type_limits={},
+        queue_depth=lambda: 7,
+    )
+
+    assert await runtime.poll_once() is True
+    await runtime.drain()
+    assert await runtime.poll_once() is False
+
+    stats = runtime.stats()
+    assert stats["queue_depth"] == 7
+    assert stats["by_type"]["reindex"]["failed"] == 1
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def hgetall(self, key):
+        self._ops.append(lambda: dict(self._client.hashes.get(key, {})))
+
+    def delete(self, key):
+        self._ops.append(lambda: int(self._client.hashes.pop(key, None) is not None))
+
+    def execute(self):
+        return [op() for op in self._ops]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.zset = {}
+        self.hashes = {}
+        self.block_calls = []
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def zadd(self, key, mapping):
+        self.zset.update(mapping)
+
+    def zcard(self, key):
+        return len(self.zset)
+
+    def zpopmin(self, key, count=1):
+        if not self.zset:
+            return []
+        member = min(self.zset, key=lambda m: (self.zset[m], m))
+        return [(member, float(self.zset.pop(member)))]
+
+    def bzpopmin(self, key, timeout=0):
+        self.block_calls.append(timeout)
+        popped = self.zpopmin(key)
+        return (key, *popped[0]) if popped else None
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+def test_redis_dequeue_pops_highest_priority_with_metadata(monkeypatch):
+    client = _FakeRedis()
+    monkeypatch.setattr(job_queue, "get_redis_client", lambda: client)
+
+    job_queue.enqueue_job("low", "graph_extraction", priority=0)
+    job_queue.enqueue_job("high", "ingestion", priority=5, metadata={"source_id": "s1"})
+
+    first = job_queue.dequeue_job(block_timeout=2)
+    second = job_queue.dequeue_job()
+
+    assert first == {"job_id": "high", "job_type": "ingestion", "priority": 5, "metadata": {"source_id": "s1"}}
+    assert second["job_id"] == "low"
+    assert second["job_type"] == "graph_extraction"
+    assert client.block_calls == [2]
+    assert client.hashes == {}
+    assert job_queue.dequeue_job() is None
+
+
+def test_publish_and_read_worker_stats(monkeypatch):
+    store = {}
+
+    class _StatsRedis:
+        def set(self, key, value, ex=None):
+            store[key] = value
+
+        def scan_iter(self, match=None):
+            prefix = match.rstrip("*")
+            return [key for key in store if key.startswith(prefix)]
+
+        def mget(self, keys):
+            return [store.get(key) for key in keys]
+
+    monkeypatch.setattr(job_queue, "get_redis_client", lambda: _StatsRedis())
+
+    assert job_queue.publish_worker_stats("w1", {"in_flight": 2}, ttl_seconds=30) is True
+    assert job_queue.get_worker_stats() == {"w1": {"in_flight": 2}}
+    assert json.loads(store["worker_stats:w1"]) == {"in_flight": 2}
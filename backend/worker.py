@@ -92,7 +92,8 @@ def validate_worker_environment():
 # Run validation before importing modules that depend on env vars
 validate_worker_environment()
 
-from modules.job_queue import dequeue_job, get_redis_client, get_queue_length
+from modules.job_queue import dequeue_job, get_redis_client, get_queue_length, publish_worker_stats
+from modules.worker_runtime import WorkerRuntime, WORKER_STATS_INTERVAL_SECONDS
 from modules._core.scribe_engine import process_graph_extraction_job, process_content_extraction_job
 from modules.persona_feedback_learning_jobs import process_feedback_learning_job
 from modules.training_jobs import process_training_job
@@ -110,15 +111,55 @@ if sys.platform != 'win32':
         pass
 
 def handle_shutdown(sig, frame):
-    print("\n[Worker] Shutdown signal received. Finishing current job and stopping...")
+    print("\n[Worker] Shutdown signal received. Finishing in-flight jobs and stopping...")
     shutdown_event.set()
 
 signal.signal(signal.SIGINT, handle_shutdown)
 signal.signal(signal.SIGTERM, handle_shutdown)
 
+async def process_job(job) -> bool:
+    """Dispatch a dequeued job to its handler based on job type."""
+    job_id = job.get("job_id")
+    job_type = job.get("job_type")
+
+    if job_type == "content_extraction":
+        return await process_content_extraction_job(job_id)
+    elif job_type == "graph_extraction":
+        return await process_graph_extraction_job(job_id)
+    elif job_type == "feedback_learning":
+        return await process_feedback_learning_job(job_id)
+    elif job_type in ["ingestion", "reindex", "health_check"]:
+        # Training jobs with automatic retry logic
+        from modules.training_jobs import process_training_job_with_retry
+        return await process_training_job_with_retry(job_id)
+    print(f"[Worker] Unknown job type: {job_type}")
+    return False
+
+
+async def report_worker_stats(runtime: WorkerRuntime, worker_id: str):
+    """Periodically log queue depth, in-flight count and per-type throughput, and publish them to Redis."""
+    while not shutdown_event.is_set():
+        try:
+            await asyncio.wait_for(shutdown_event.wait(), timeout=WORKER_STATS_INTERVAL_SECONDS)
+            return
+        except asyncio.TimeoutError:
+            pass
+        try:
+            stats = await asyncio.to_thread(runtime.stats)
+            print(
+                f"[Worker] Stats: in_flight={stats['in_flight']} queue_depth={stats['queue_depth']} "
+                f"processed={stats['jobs_processed']} by_type={stats['by_type']}"
+            )
+            await asyncio.to_thread(
+                publish_worker_stats, worker_id, stats, int(WORKER_STATS_INTERVAL_SECONDS * 2)
+            )
+        except Exception as e:
+            print(f"[Worker] Stats reporting failed: {e}")
+
+
 async def worker_loop():
     """
-    Main worker loop that polls for jobs and executes them.
+    Main worker loop: dequeues jobs into WORKER_CONCURRENCY concurrent slots.
     """
     worker_id = os.getenv("RENDER_INSTANCE_ID", "local-worker")
     print(f"[Worker] Starting background worker ({worker_id})...")
@@ -132,62 +173,30 @@ async def worker_loop():
         print("[Worker] INFO: REDIS_URL not configured/available - using DB-backed queue polling")
         print("[Worker] TIP: Configure REDIS_URL for lower latency and horizontal scaling")
 
+    runtime = WorkerRuntime(
+        dequeue=dequeue_job,
+        process=process_job,
+        blocking_dequeue=bool(redis_client),
+        queue_depth=get_queue_length,
+    )
+    print(
+        f"[Worker] Concurrency: {runtime.concurrency} slots"
+        + (f", per-type limits: {runtime.job_type_limits}" if runtime.job_type_limits else "")
+    )
+
     consecutive_empty_polls = 0
-    jobs_processed = 0
+    stats_task = asyncio.create_task(report_worker_stats(runtime, worker_id))
 
     while not shutdown_event.is_set():
         try:
-            # Poll for job
-            job = dequeue_job()
-            
-            if job:
+            if await runtime.poll_once():
                 consecutive_empty_polls = 0
-                jobs_processed += 1
-                
-                job_id = job.get("job_id")
-                job_type = job.get("job_type")
-                metadata = job.get("metadata", {})
-                
-                print(f"[Worker] Processing job {job_id} ({job_type})")
-                
-                start_time = asyncio.get_event_loop().time()
-                success = False
-                
-                try:
-                    # Dispatch based on job type
-                    if job_type == "content_extraction":
-                        success = await process_content_extraction_job(job_id)
-                    elif job_type == "graph_extraction":
-                        success = await process_graph_extraction_job(job_id)
-                    elif job_type == "feedback_learning":
-                        success = await process_feedback_learning_job(job_id)
-                    elif job_type in ["ingestion", "reindex", "health_check"]:
-                        # Training jobs with automatic retry logic
-                        from modules.training_jobs import process_training_job_with_retry
-                        success = await process_training_job_with_retry(job_id)
-                    else:
-                        print(f"[Worker] Unknown job type: {job_type}")
-                        success = False
-                        
-                except Exception as e:
-                    print(f"[Worker] Job {job_id} crashed: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    success = False
-                
-                duration = asyncio.get_event_loop().time() - start_time
-                status_symbol = "✅" if success else "❌"
-                print(f"[Worker] {status_symbol} Job {job_id} finished in {duration:.2f}s")
-                
             else:
                 consecutive_empty_polls += 1
-                # Adaptive sleep: sleep longer if queue is empty for a while, up to 5s
-                sleep_time = min(5, 0.5 + (consecutive_empty_polls * 0.1))
-                await asyncio.sleep(sleep_time)
-                
-                # Log heartbeat every ~60s of inactivity
-                if consecutive_empty_polls % 60 == 0 and consecutive_empty_polls > 0:
-                     print(f"[Worker] Heartbeat: Waiting for jobs... (Queue empty)")
+                if not runtime.blocking_dequeue:
+                    # DB polling cannot block: sleep longer if queue is empty for a while, up to 5s
+                    sleep_time = min(5, 0.5 + (consecutive_empty_polls * 0.1))
+                    await asyncio.sleep(sleep_time)
 
         except Exception as e:
             print(f"[Worker] Critical error in loop: {e}")
@@ -195,7 +204,11 @@ async def worker_loop():
             traceback.print_exc()
             await asyncio.sleep(5)  # Backoff on critical error
 
-    print(f"[Worker] Shutdown complete. Processed {jobs_processed} jobs.")
+    stats_task.cancel()
+    if runtime.in_flight:
+        print(f"[Worker] Waiting for {runtime.in_flight} in-flight job(s) to finish...")
+    await runtime.drain()
+    print(f"[Worker] Shutdown complete. Processed {runtime.jobs_processed} jobs.")
 
 if __name__ == "__main__":
     if sys.platform == 'win32':
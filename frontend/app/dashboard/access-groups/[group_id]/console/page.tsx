@@ -75,6 +75,7 @@ export default function GroupConsolePage() {
       const reader = response.body?.getReader();
       const decoder = new TextDecoder();
       let assistantMessage = '';
+      let corrected = false;
       let buffer = '';
 
       if (reader) {
@@ -91,8 +92,10 @@ export default function GroupConsolePage() {
             if (!line.trim()) continue;
             try {
               const data = JSON.parse(line);
-              if (data.type === 'content') {
-                assistantMessage += data.content;
+              if (data.type === 'content' || data.type === 'correction') {
+                // A correction carries the full replacement for text already streamed.
+                corrected = corrected || data.type === 'correction';
+                assistantMessage = data.type === 'correction' ? data.content || '' : assistantMessage + data.content;
                 setMessages((prev) => {
                   const next = [...prev];
                   next[next.length - 1] = { ...next[next.length - 1], content: assistantMessage };
@@ -112,6 +115,9 @@ export default function GroupConsolePage() {
           const data = JSON.parse(tail);
           if (data.type === 'content') {
             assistantMessage += data.content;
+          } else if (data.type === 'correction') {
+            corrected = true;
+            assistantMessage = data.content || '';
           }
         } catch (err) {
           // Skip invalid JSON
@@ -120,7 +126,7 @@ export default function GroupConsolePage() {
 
       setMessages((prev) => {
         const next = [...prev];
-        next[next.length - 1] = { ...next[next.length - 1], content: assistantMessage || next[next.length - 1].content };
+        next[next.length - 1] = { ...next[next.length - 1], content: corrected ? assistantMessage : assistantMessage || next[next.length - 1].content };
         return next;
       });
     } catch (err) {
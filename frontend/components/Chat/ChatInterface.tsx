@@ -10,7 +10,7 @@ import { API_ENDPOINTS } from '@/lib/constants';
 
 const STREAM_IDLE_TIMEOUT_MS = 60000;
 
-export type ChatStreamEventType = 'metadata' | 'clarify' | 'content' | 'done' | 'error';
+export type ChatStreamEventType = 'metadata' | 'clarify' | 'content' | 'correction' | 'done' | 'error';
 
 export interface ChatStreamEvent {
   type: ChatStreamEventType;
@@ -580,6 +580,16 @@ export default function ChatInterface({
                   last[last.length - 1] = lastMsg;
                   return last;
                 });
+              } else if (data.type === 'correction') {
+                // Streamed text was retracted or replaced; content is the full replacement.
+                emitStreamEvent('correction', data);
+                setMessages((prev) => {
+                  const last = [...prev];
+                  const lastMsg = { ...last[last.length - 1] };
+                  lastMsg.content = data.content || '';
+                  last[last.length - 1] = lastMsg;
+                  return last;
+                });
               } else if (data.type === 'done') {
                 emitStreamEvent('done', data);
               }
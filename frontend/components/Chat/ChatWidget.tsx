@@ -196,6 +196,14 @@ export default function ChatWidget({
                   last[last.length - 1] = lastMsg;
                   return last;
                 });
+              } else if (data.type === 'correction') {
+                setMessages((prev) => {
+                  const last = [...prev];
+                  const lastMsg = { ...last[last.length - 1] };
+                  lastMsg.content = data.content || '';
+                  last[last.length - 1] = lastMsg;
+                  return last;
+                });
               }
             } catch (e) {
               console.error('Error parsing stream line:', e);
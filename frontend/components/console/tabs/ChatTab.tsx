@@ -163,6 +163,15 @@ export function ChatTab({ twinId, twinName, onSendMessage }: ChatTabProps) {
                                         };
                                         return next;
                                     });
+                                } else if (data.type === 'correction') {
+                                    setMessages(prev => {
+                                        const next = [...prev];
+                                        next[next.length - 1] = {
+                                            ...next[next.length - 1],
+                                            content: data.content || ''
+                                        };
+                                        return next;
+                                    });
                                 }
                             } catch (e) {
                                 console.error('Error parsing stream line:', e);
@@ -159,7 +159,8 @@ export async function registerTrainingModuleRoutes(
         : 'Owner chat answer.';
     const payload =
       `${json({ type: 'answer_metadata', conversation_id: `conv-${state.ownerChatBodies.length}`, dialogue_mode: 'ANSWER', owner_memory_refs: [], owner_memory_topics: [], planning_output: { reasoning_trace: 'trace' } })}\n` +
-      `${json({ type: 'answer_token', content })}\n` +
+      `${json({ type: 'answer_token', content: 'Retracted draft sentence. ' })}\n` +
+      `${json({ type: 'correction', content })}\n` +
       `${json({ type: 'done' })}\n`;
     await route.fulfill({
       status: 200,
@@ -38,6 +38,7 @@ test.describe('Persona Training Loop (UI)', () => {
     await input.fill('Now send as owner chat');
     await input.press('Enter');
     await expect(page.getByText('Owner chat answer.')).toBeVisible();
+    await expect(page.getByText('Retracted draft sentence.')).toHaveCount(0);
 
     await expect.poll(() => state.ownerChatBodies.length).toBe(2);
     expect(state.ownerChatBodies[1].mode).toBe('owner');